@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+OpenEurope Audit Trail
+----------------------
+
+Tamper-evident, append-only storage for the audit trail produced by the
+``openeurope.py`` pipeline. Every record is a single JSON line whose SHA-256
+hash covers the hash of the previous record and the digest of the input file
+the run processed, so altering, removing or reordering any line breaks the
+chain from that point onwards.
+
+Each line has the layout::
+
+    {"prev":"<64 hex>","seq":N,...,"hash":"<64 hex>"}
+
+The ``hash`` field is the SHA-256 of the line with the trailing ``hash``
+member removed. Because ``prev`` and ``hash`` sit at fixed byte offsets, the
+verifier only slices bytes and hashes them: it streams the log line by line,
+never parses JSON and uses constant memory regardless of the log size.
+
+Usage:
+    python3 audit_trail.py verify audit_chain.jsonl
+    python3 audit_trail.py verify audit_chain.jsonl --checkpoint audit_chain.ckpt
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+from typing import Dict, Iterable, NamedTuple, Optional
+
+# Hash used as ``prev`` by the first record of a chain
+GENESIS_HASH = "0" * 64
+
+_PREFIX = b'{"prev":"'
+_PREV_END = len(_PREFIX) + 64
+_SUFFIX_LEN = len(b',"hash":"') + 64 + len(b'"}')
+_CHUNK_SIZE = 1024 * 1024
+
+
+class AuditChainError(ValueError):
+    """Raised when an audit chain is malformed or has been tampered with."""
+
+
+class ChainStatus(NamedTuple):
+    """Position reached by a verification run.
+
+    ``offset`` is the byte offset just past the last verified record, so a
+    later run can resume from it instead of re-reading the whole log.
+    """
+
+    entries: int
+    offset: int
+    last_hash: str
+
+
+def file_digest(file_path: str) -> str:
+    """Return the SHA-256 hex digest of ``file_path``, read in 1 MiB chunks."""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _encode_record(prev_hash: str, seq: int, fields: Dict[str, str]) -> bytes:
+    body = json.dumps(fields, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    head = f'{{"prev":"{prev_hash}","seq":{seq}'
+    unsigned = (head + ("," + body[1:] if body != "{}" else "}")).encode("utf-8")
+    record_hash = hashlib.sha256(unsigned).hexdigest()
+    return unsigned[:-1] + f',"hash":"{record_hash}"}}\n'.encode("ascii")
+
+
+def _read_tail(log_path: str) -> ChainStatus:
+    """Return the sequence number and hash of the last record in ``log_path``.
+
+    Only the final line is read, so appending to a long log stays O(1).
+    """
+    if not os.path.exists(log_path) or os.path.getsize(log_path) == 0:
+        return ChainStatus(0, 0, GENESIS_HASH)
+    with open(log_path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        size = f.tell()
+        block = 4096
+        data = b""
+        pos = size
+        while pos > 0 and data.count(b"\n") < 2:
+            step = min(block, pos)
+            pos -= step
+            f.seek(pos)
+            data = f.read(step) + data
+    last_line = data.rstrip(b"\n").rsplit(b"\n", 1)[-1]
+    try:
+        record = json.loads(last_line)
+        return ChainStatus(int(record["seq"]) + 1, size, record["hash"])
+    except (ValueError, KeyError) as exc:
+        raise AuditChainError(f"Last record of {log_path} is corrupt") from exc
+
+
+def append_entries(
+    log_path: str,
+    audit_log: Iterable[Dict[str, str]],
+    input_file: str,
+    input_digest: Optional[str] = None
+) -> str:
+    """Append pipeline audit entries to the hash-chained log at ``log_path``.
+
+    Parameters
+    ----------
+    log_path : str
+        Path to the append-only chain file; created if missing.
+    audit_log : iterable of dict
+        Entries with ``step``, ``timestamp`` and ``message`` keys, as produced
+        by the pipeline functions in ``openeurope.py``.
+    input_file : str
+        The input data file the entries refer to.
+    input_digest : str, optional
+        Precomputed SHA-256 of ``input_file``; computed when omitted.
+
+    Returns
+    -------
+    str
+        Hash of the last record written, i.e. the new head of the chain.
+    """
+    if input_digest is None:
+        input_digest = file_digest(input_file)
+    seq, _, prev_hash = _read_tail(log_path)
+    lines = []
+    for entry in audit_log:
+        fields = {
+            "step": entry["step"],
+            "timestamp": entry["timestamp"],
+            "message": entry["message"],
+            "input_file": os.path.basename(input_file),
+            "input_sha256": input_digest,
+        }
+        line = _encode_record(prev_hash, seq, fields)
+        prev_hash = line[-67:-3].decode("ascii")
+        lines.append(line)
+        seq += 1
+    # Single append write; O_APPEND keeps concurrent writers from interleaving
+    with open(log_path, "ab") as f:
+        f.write(b"".join(lines))
+        f.flush()
+        os.fsync(f.fileno())
+    return prev_hash
+
+
+def verify_chain(
+    log_path: str,
+    start: Optional[ChainStatus] = None
+) -> ChainStatus:
+    """Verify the integrity of a hash-chained audit log.
+
+    The log is streamed line by line; each line is checked for the expected
+    ``prev`` link and for a ``hash`` matching its content.
+
+    Parameters
+    ----------
+    log_path : str
+        Path to the chain file.
+    start : ChainStatus, optional
+        Result of an earlier verification. When given, verification resumes
+        at ``start.offset`` and expects ``start.last_hash`` as the next link.
+
+    Returns
+    -------
+    ChainStatus
+        Number of verified records, end offset and head hash.
+
+    Raises
+    ------
+    AuditChainError
+        If a record is malformed, its hash does not match or the chain is broken.
+    """
+    entries, offset, prev = start if start is not None else ChainStatus(0, 0, GENESIS_HASH)
+    expected_prev = prev.encode("ascii")
+    sha256 = hashlib.sha256
+    with open(log_path, "rb", buffering=_CHUNK_SIZE) as f:
+        if offset > os.fstat(f.fileno()).st_size:
+            raise AuditChainError(f"{log_path} is shorter than the checkpoint (truncated?)")
+        f.seek(offset)
+        for line in f:
+            entries += 1
+            if not line.endswith(b"\n") or len(line) <= _PREV_END + _SUFFIX_LEN:
+                raise AuditChainError(f"Record {entries} is truncated or malformed")
+            if not line.startswith(_PREFIX) or line[_PREV_END:_PREV_END + 1] != b'"':
+                raise AuditChainError(f"Record {entries} is malformed")
+            if line[len(_PREFIX):_PREV_END] != expected_prev:
+                raise AuditChainError(f"Chain broken at record {entries}: previous hash mismatch")
+            record_hash = line[-67:-3]
+            unsigned = line[:-_SUFFIX_LEN - 1] + b"}"
+            if sha256(unsigned).hexdigest().encode("ascii") != record_hash:
+                raise AuditChainError(f"Record {entries} has been altered: hash mismatch")
+            expected_prev = record_hash
+            offset += len(line)
+    return ChainStatus(entries, offset, expected_prev.decode("ascii"))
+
+
+def load_checkpoint(checkpoint_path: str) -> Optional[ChainStatus]:
+    """Read a verification checkpoint written by :func:`save_checkpoint`."""
+    if not os.path.exists(checkpoint_path):
+        return None
+    with open(checkpoint_path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    return ChainStatus(int(data["entries"]), int(data["offset"]), data["last_hash"])
+
+
+def save_checkpoint(checkpoint_path: str, status: ChainStatus) -> None:
+    """Persist a verification result so the next run only checks new records."""
+    tmp_path = checkpoint_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(status._asdict(), f)
+    os.replace(tmp_path, checkpoint_path)
+
+
+def main() -> None:
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(
+        description="Verify OpenEurope hash-chained audit logs"
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    verify_parser = subparsers.add_parser(
+        "verify",
+        help="Check that an audit chain has not been altered"
+    )
+    verify_parser.add_argument("log_file", help="Path to the audit chain file")
+    verify_parser.add_argument(
+        "--checkpoint",
+        help=(
+            "Checkpoint file: resume from the last verified record and update "
+            "it on success, so nightly checks only hash new entries"
+        )
+    )
+    args = parser.parse_args()
+
+    start = load_checkpoint(args.checkpoint) if args.checkpoint else None
+    try:
+        status = verify_chain(args.log_file, start)
+    except (AuditChainError, OSError) as exc:
+        print(f"Audit chain INVALID: {exc}", file=sys.stderr)
+        raise SystemExit(1) from exc
+    if args.checkpoint:
+        save_checkpoint(args.checkpoint, status)
+    print(f"Audit chain OK: {status.entries} records, head {status.last_hash}")
+
+
+if __name__ == "__main__":
+    main()
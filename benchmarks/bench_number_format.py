@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+OpenEurope Number Parsing Benchmark
+-----------------------------------
+
+Times ``number_format.parse_numbers`` against the same rules applied one
+value at a time in Python (:func:`parse_value`, regular expressions and
+``float``), on text cells written by ``generate_meter_data.py`` in Italian
+(or English) notation with unit suffixes and stray spaces. The cells of one generated
+block are repeated up to the requested count; both parsers must agree with
+each other and with the values the generator started from.
+
+Usage:
+    python3 benchmarks/bench_number_format.py
+    python3 benchmarks/bench_number_format.py --cells 10M --number-format en -o parse.json
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+from typing import Any, Dict, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+from bench_pipeline import environment, measure  # noqa: E402
+from generate_meter_data import NUMERIC_COLUMNS, GeneratorConfig, generate_frame, parse_size  # noqa: E402
+from number_format import MAX_CELL_LENGTH, MAX_DIGITS, parse_numbers  # noqa: E402
+
+DEFAULT_CELLS = "10M"
+# Rows generated; their numeric cells are repeated up to --cells
+BLOCK_ROWS = 200_000
+
+_CELL = re.compile(r"([-+$]*)([0-9.,']+)(.*)")
+_SPACES = re.compile(r"\s+")
+# Spaces between two characters of a number are thousand separators, written "'"
+_INNER_SPACES = re.compile(r"(?<=[0-9.,])\s+(?=[0-9.,])")
+
+
+def _split(text: str) -> Optional[tuple]:
+    """Sign and number of a cell, or ``None`` when it is not a number."""
+    if len(text) > MAX_CELL_LENGTH or "'" in text:
+        return None
+    text = text.replace("€", "$").replace("£", "$")
+    text = _SPACES.sub("", _INNER_SPACES.sub(lambda m: "'" * len(m.group()), text))
+    match = _CELL.fullmatch(text)
+    if not match:
+        return None
+    prefix, number, unit = match.groups()
+    if prefix.count("-") + prefix.count("+") > 1 or not any(c.isdigit() for c in number):
+        return None
+    letter = unit[:1].isascii() and unit[:1].isalpha() or not unit[:1].isascii()
+    if unit and not (unit[0] == "$" or letter) or re.match(r"[eE][-+0-9]", unit):
+        return None
+    return "-" in prefix, number
+
+
+def _ambiguous(number: str) -> bool:
+    return bool(re.fullmatch(r"[1-9][0-9]{0,2}[.,][0-9]{3}", number))
+
+
+def _decimal_of(number: str) -> Optional[str]:
+    """Decimal separator of an unambiguous number (``""`` when it has none)."""
+    if "." in number and "," in number:
+        return "." if number.rfind(".") > number.rfind(",") else ","
+    for mark in ".,":
+        if number.count(mark) == 1:
+            return mark
+    return ""
+
+
+def parse_value(text: str, decimal: Optional[str]) -> float:
+    """One cell, with ``decimal`` for ambiguous numbers (their own separator when ``None``)."""
+    split = _split(text)
+    if split is None:
+        return float("nan")
+    negative, number = split
+    mark = (decimal or number[-4]) if _ambiguous(number) else _decimal_of(number)
+    integer, _, fraction = number.partition(mark) if mark else (number, "", "")
+    thousands = "," if mark == "." else "."
+    if mark and (mark in fraction or thousands in fraction or "'" in fraction):
+        return float("nan")
+    groups = re.split(r"[.,']", integer) if not mark else re.split(f"[{thousands}']", integer)
+    if mark and any(mark in group for group in groups):
+        return float("nan")
+    if len(groups) > 1 and not (1 <= len(groups[0]) <= 3 and all(len(g) == 3 for g in groups[1:])):
+        return float("nan")
+    digits = "".join(groups) + fraction
+    if not digits.isdigit() or len(digits) > MAX_DIGITS or not all(g.isdigit() for g in groups[1:]):
+        return float("nan")
+    value = int(digits) / 10 ** len(fraction)
+    return -value if negative else value
+
+
+def parse_values(cells: Sequence[str]) -> np.ndarray:
+    """Per-value counterpart of ``parse_numbers``: a voting pass, then a parsing pass."""
+    votes = {",": 0, ".": 0}
+    for text in cells:
+        split = _split(text)
+        if split is None or _ambiguous(split[1]):
+            continue
+        number = split[1]
+        mark = _decimal_of(number)
+        if not mark:
+            mark = "," if number.count(".") > 1 else "." if number.count(",") > 1 else ""
+        if mark and not np.isnan(parse_value(text, "")):
+            votes[mark] += 1
+    decimal = None if votes["."] == votes[","] else max(votes, key=votes.get)
+    return np.array([parse_value(text, decimal) for text in cells])
+
+
+def make_cells(cells: int, number_format: str, seed: int = 0) -> Dict[str, np.ndarray]:
+    """Text cells and the values they were written from, ``cells`` of each."""
+    rows = min(BLOCK_ROWS, -(-cells // len(NUMERIC_COLUMNS)))
+    config = GeneratorConfig(
+        seed=seed, number_format=number_format, unit_rate=0.1, space_rate=0.05, garbage_rate=0.001
+    )
+    text = generate_frame(rows, config)
+    clean = generate_frame(rows, config._replace(number_format="en", unit_rate=0.0, space_rate=0.0))
+    block = np.concatenate([text[column].to_numpy(dtype=object) for column in NUMERIC_COLUMNS])
+    expected = np.concatenate([
+        pd.to_numeric(clean[column], errors="coerce").to_numpy(dtype=np.float64) for column in NUMERIC_COLUMNS
+    ])
+    filled = pd.notna(block)
+    block, expected = block[filled], expected[filled]
+    index = np.resize(np.arange(len(block)), cells)
+    return {"cells": block[index], "expected": expected[index]}
+
+
+def _mismatches(values: np.ndarray, expected: np.ndarray) -> int:
+    return int((~np.isclose(values, expected, rtol=0, atol=1e-9, equal_nan=True)).sum())
+
+
+def main() -> None:
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description="Benchmark the vectorised number parser")
+    parser.add_argument(
+        "--cells", type=parse_size, default=parse_size(DEFAULT_CELLS),
+        help=f"Text cells to parse, e.g. 1M 10M (default: {DEFAULT_CELLS})"
+    )
+    parser.add_argument(
+        "--number-format", choices=["it", "en"], default="it",
+        help="Notation of the generated cells (default: it)"
+    )
+    parser.add_argument("--repeat", type=int, default=1, help="Timed runs per parser (default: 1)")
+    parser.add_argument("-o", "--output", help="Write the results to this JSON file")
+    args = parser.parse_args()
+
+    data = make_cells(args.cells, args.number_format)
+    cells, expected = data["cells"], data["expected"]
+    invalid = int(np.isnan(expected).sum())
+    print(f"Parsing {len(cells):,} cells ({args.number_format}, {invalid:,} not numbers)")
+    results: Dict[str, Any] = {}
+    for name, run in (
+        ("parse_numbers", lambda: parse_numbers(cells)),
+        ("per-value python", lambda: parse_values(cells)),
+    ):
+        timing = measure(run, args.repeat, memory=False)
+        mismatches = _mismatches(timing["result"], expected)
+        results[name] = {
+            "seconds": round(timing["seconds"], 3),
+            "cells_per_s": round(len(cells) / timing["seconds"]),
+            "mismatches": mismatches,
+        }
+        print(
+            f"{name:<18}{timing['seconds']:>10.2f} s{len(cells) / timing['seconds']:>16,.0f} cells/s"
+            f"{mismatches:>12,} mismatches",
+            flush=True
+        )
+        results[name]["values"] = timing["result"]
+    agree = _mismatches(results["parse_numbers"].pop("values"), results["per-value python"].pop("values"))
+    speedup = results["per-value python"]["seconds"] / results["parse_numbers"]["seconds"]
+    print(f"Speed-up {speedup:.1f}x; the two parsers disagree on {agree:,} cells")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fh:
+            json.dump({
+                "environment": environment(), "cells": len(cells), "number_format": args.number_format,
+                "results": results, "speedup": round(speedup, 2), "disagreements": agree,
+            }, fh, indent=2)
+        print(f"\nResults written to {args.output}")
+    if agree:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
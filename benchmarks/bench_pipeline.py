@@ -0,0 +1,346 @@
+#!/usr/bin/env python3
+"""
+OpenEurope Pipeline Benchmarks
+------------------------------
+
+Times and memory-profiles every stage of the ``openeurope.py`` pipeline
+(``ingest_data``, ``normalize_data``, ``fill_interval_gaps``,
+``calculate_savings``, ``calculate_group_savings``,
+``calculate_monthly_bands`` and ``generate_report``) on synthetic data of
+growing size; the stages after ``fill_interval_gaps`` work on the filled
+data:
+
+* ``ingest_data`` is measured once per input format (CSV, Excel and, with
+  ``pyarrow`` installed, the columnar Parquet and Feather formats) on a file
+  written block by block by ``generate_meter_data.write_dataset``, so the
+  benchmark itself never holds a second copy of the data; the following
+  stages work on the frame read from the first format and are measured once
+  per size;
+* each measurement is the median of ``--repeat`` timed runs, followed by one
+  extra run under ``tracemalloc`` for the peak of Python/NumPy allocations
+  (skipped with ``--no-memory``);
+* between consecutive sizes the scaling exponent ``log(t2/t1) / log(n2/n1)``
+  is reported (1.0 is linear);
+* results are written as JSON (``-o``) and can be compared with a stored
+  baseline run (``--baseline``): stages slower than the baseline by more than
+  ``--threshold`` are flagged and the exit status is 1.
+
+Further engines are benchmarked by appending a :class:`Stage` to ``STAGES``.
+
+Usage:
+    python3 benchmarks/bench_pipeline.py
+    python3 benchmarks/bench_pipeline.py --sizes 1K 100K 10M --formats csv -o results.json
+    python3 benchmarks/bench_pipeline.py -o new.json --baseline results.json --threshold 0.2
+"""
+
+import argparse
+import gc
+import json
+import math
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from importlib.util import find_spec
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+import openeurope  # noqa: E402
+from data_quality import ScreeningRules  # noqa: E402
+from generate_meter_data import GeneratorConfig, parse_size, write_dataset  # noqa: E402
+
+DEFAULT_SIZES = ["1K", "10K", "100K"]
+
+# Largest sheet Excel can hold (one row is the header)
+EXCEL_MAX_ROWS = 1_048_575
+
+# Differences below this many seconds are noise, never regressions
+MIN_SECONDS = 0.005
+
+
+class InputFormat(NamedTuple):
+    """A file format ``ingest_data`` reads and ``write_dataset`` writes."""
+
+    extension: str
+    requires: Optional[str] = None
+    max_rows: Optional[int] = None
+
+
+FORMATS: Dict[str, InputFormat] = {
+    "csv": InputFormat(".csv"),
+    "xlsx": InputFormat(".xlsx", "openpyxl", EXCEL_MAX_ROWS),
+    "parquet": InputFormat(".parquet", "pyarrow"),
+    "feather": InputFormat(".feather", "pyarrow"),
+}
+
+
+class Stage(NamedTuple):
+    """A benchmarked pipeline step.
+
+    ``run`` receives the context of the current size (``rows``, ``path``,
+    ``workdir`` and the results kept by earlier stages) and its
+    result is stored under ``keep`` for the next stages. Stages with
+    ``per_format`` set are measured once per input file format.
+    """
+
+    name: str
+    run: Callable[[Dict[str, Any]], Any]
+    keep: Optional[str] = None
+    per_format: bool = False
+
+
+def _generate_report(ctx: Dict[str, Any]) -> List[str]:
+    baseline_avg, new_avg, savings, savings_percent = ctx["savings"]
+    return openeurope.generate_report(
+        ctx["workdir"], baseline_avg, new_avg, savings, savings_percent, [],
+        "bench.csv", formats=("md", "html", "json", "csv", "pdf"),
+        groups=ctx["groups"], group_by="building_zone", monthly=ctx["monthly"]
+    )
+
+
+STAGES: List[Stage] = [
+    Stage("ingest_data", lambda ctx: openeurope.ingest_data(ctx["path"], []), "raw", per_format=True),
+    Stage("normalize_data", lambda ctx: openeurope.normalize_data(ctx["raw"], [], ScreeningRules()), "clean"),
+    Stage("fill_interval_gaps", lambda ctx: openeurope.fill_interval_gaps(ctx["clean"], [], "linear"), "filled"),
+    Stage("calculate_savings", lambda ctx: openeurope.calculate_savings(ctx["filled"], []), "savings"),
+    Stage(
+        "calculate_group_savings",
+        lambda ctx: openeurope.calculate_group_savings(ctx["filled"], "building_zone", []),
+        "groups"
+    ),
+    Stage("calculate_monthly_bands", lambda ctx: openeurope.calculate_monthly_bands(ctx["filled"], []), "monthly"),
+    Stage("generate_report", _generate_report),
+]
+
+
+def make_input(path: str, rows: int, fmt: str, seed: int = 0) -> None:
+    """Write ``rows`` rows of 15-minute meter data to ``path`` (see ``generate_meter_data.py``).
+
+    CSV files are generated and written one block at a time, so sizes such
+    as 100M rows never exist in memory as a whole.
+    """
+    write_dataset(path, rows, GeneratorConfig(seed=seed), fmt, jobs=os.cpu_count() or 1)
+
+
+def measure(fn: Callable[[], Any], repeat: int, memory: bool) -> Dict[str, Any]:
+    """Run ``fn`` ``repeat`` times (plus once traced when ``memory``)."""
+    times = []
+    result = None
+    for _ in range(max(1, repeat)):
+        result = None
+        gc.collect()
+        started = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - started)
+    peak = None
+    if memory:
+        gc.collect()
+        tracemalloc.start()
+        try:
+            fn()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return {
+        "result": result,
+        "seconds": statistics.median(times),
+        "min_seconds": min(times),
+        "peak_mib": round(peak / 2 ** 20, 3) if peak is not None else None,
+    }
+
+
+def available_formats(names: Sequence[str]) -> List[str]:
+    """Return the formats whose writer/reader dependency is installed."""
+    usable = []
+    for name in names:
+        requires = FORMATS[name].requires
+        if requires and find_spec(requires) is None:
+            print(f"skip {name}: {requires} is not installed", file=sys.stderr)
+            continue
+        usable.append(name)
+    return usable
+
+
+def run_size(
+    rows: int,
+    formats: Sequence[str],
+    repeat: int,
+    memory: bool,
+    stages: Sequence[Stage] = STAGES
+) -> List[Dict[str, Any]]:
+    """Benchmark every stage on ``rows`` rows and return one record per measurement."""
+    records = []
+    with tempfile.TemporaryDirectory(prefix="oe_bench_") as workdir:
+        ctx: Dict[str, Any] = {"rows": rows, "workdir": workdir}
+        for stage in stages:
+            variants = formats if stage.per_format else [None]
+            for fmt in variants:
+                if fmt is not None:
+                    spec = FORMATS[fmt]
+                    if spec.max_rows is not None and rows > spec.max_rows:
+                        continue
+                    ctx["path"] = os.path.join(workdir, "input" + spec.extension)
+                    make_input(ctx["path"], rows, fmt)
+                    ctx["file_mib"] = os.path.getsize(ctx["path"]) / 2 ** 20
+                timing = measure(lambda: stage.run(ctx), repeat, memory)
+                # Later stages use the frame read by the first format
+                if stage.keep and stage.keep not in ctx:
+                    ctx[stage.keep] = timing["result"]
+                record = {
+                    "stage": stage.name,
+                    "format": fmt or "-",
+                    "rows": rows,
+                    "seconds": round(timing["seconds"], 6),
+                    "min_seconds": round(timing["min_seconds"], 6),
+                    "rows_per_s": round(rows / timing["seconds"]) if timing["seconds"] else None,
+                    "peak_mib": timing["peak_mib"],
+                }
+                if fmt is not None:
+                    record["file_mib"] = round(ctx["file_mib"], 3)
+                    os.remove(ctx["path"])
+                records.append(record)
+                print(_format_record(record), flush=True)
+    return records
+
+
+def add_scaling(records: List[Dict[str, Any]]) -> None:
+    """Set ``scaling`` on each record: exponent of time vs rows from the previous size."""
+    previous: Dict[tuple, Dict[str, Any]] = {}
+    for record in sorted(records, key=lambda r: r["rows"]):
+        key = (record["stage"], record["format"])
+        prev = previous.get(key)
+        if prev and prev["seconds"] > 0 and record["seconds"] > 0 and record["rows"] > prev["rows"]:
+            record["scaling"] = round(
+                math.log(record["seconds"] / prev["seconds"]) / math.log(record["rows"] / prev["rows"]), 3
+            )
+        previous[key] = record
+
+
+def compare(
+    records: List[Dict[str, Any]],
+    baseline: List[Dict[str, Any]],
+    threshold: float,
+    min_seconds: float = MIN_SECONDS
+) -> List[Dict[str, Any]]:
+    """Return the records slower than their baseline by more than ``threshold``."""
+    base = {(r["stage"], r["format"], r["rows"]): r for r in baseline}
+    regressions = []
+    for record in records:
+        old = base.get((record["stage"], record["format"], record["rows"]))
+        if old is None or not old["seconds"]:
+            continue
+        record["baseline_seconds"] = old["seconds"]
+        record["ratio"] = round(record["seconds"] / old["seconds"], 3)
+        if record["ratio"] > 1 + threshold and record["seconds"] - old["seconds"] > min_seconds:
+            record["regression"] = True
+            regressions.append(record)
+    return regressions
+
+
+def environment() -> Dict[str, Any]:
+    """Describe the machine and library versions of a run."""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR,
+            capture_output=True, text=True, timeout=10
+        ).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        commit = ""
+    return {
+        "date": datetime.now().isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def _format_record(record: Dict[str, Any]) -> str:
+    peak = f"{record['peak_mib']:>10.1f}" if record.get("peak_mib") is not None else f"{'-':>10}"
+    speed = f"{record['rows_per_s']:>14,}" if record.get("rows_per_s") else f"{'-':>14}"
+    return f"{record['stage']:<26}{record['format']:<9}{record['rows']:>12,}{record['seconds'] * 1000:>12.2f}{speed}{peak}"
+
+
+def main() -> None:
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description="Benchmark the OpenEurope pipeline stages")
+    parser.add_argument(
+        "--sizes", nargs="+", type=parse_size, default=[parse_size(s) for s in DEFAULT_SIZES],
+        help="Row counts, e.g. 1K 100K 10M 100M (default: %s)" % " ".join(DEFAULT_SIZES)
+    )
+    parser.add_argument(
+        "--formats", nargs="+", choices=sorted(FORMATS), default=list(FORMATS),
+        help="Input formats for ingest_data (default: all installed)"
+    )
+    parser.add_argument("--stages", nargs="+", help="Only run these stages (and the ones they depend on)")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per measurement (default: 3)")
+    parser.add_argument("--no-memory", action="store_true", help="Skip the tracemalloc run")
+    parser.add_argument("-o", "--output", help="Write the results to this JSON file")
+    parser.add_argument("--baseline", help="Compare with the results JSON of an earlier run")
+    parser.add_argument(
+        "--threshold", type=float, default=0.2,
+        help="Flag stages slower than the baseline by more than this fraction (default: 0.2)"
+    )
+    args = parser.parse_args()
+
+    stages = STAGES
+    if args.stages:
+        unknown = set(args.stages) - {stage.name for stage in STAGES}
+        if unknown:
+            parser.error(f"unknown stages: {', '.join(sorted(unknown))}")
+        # Earlier stages feed the later ones: run everything up to the last one requested
+        last = max(i for i, stage in enumerate(STAGES) if stage.name in args.stages)
+        stages = STAGES[:last + 1]
+
+    formats = available_formats(args.formats)
+    if not formats:
+        parser.error("none of the requested formats can be written here")
+
+    print(f"{'stage':<26}{'format':<9}{'rows':>12}{'ms':>12}{'rows/s':>14}{'peak MiB':>10}")
+    records = []
+    for rows in sorted(args.sizes):
+        records.extend(run_size(rows, formats, args.repeat, not args.no_memory, stages))
+    if args.stages:
+        records = [r for r in records if r["stage"] in args.stages]
+    add_scaling(records)
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as fh:
+            baseline = json.load(fh)["results"]
+        regressions = compare(records, baseline, args.threshold)
+        compared = [r for r in records if "ratio" in r]
+        print(f"\nCompared {len(compared)} measurements with {args.baseline}")
+        for record in compared:
+            flag = "  REGRESSION" if record.get("regression") else ""
+            print(f"{record['stage']:<26}{record['format']:<9}{record['rows']:>12,}{record['ratio']:>9.2f}x{flag}")
+
+    scaling = [r for r in records if "scaling" in r]
+    if scaling:
+        print("\nScaling exponent (1.0 = linear)")
+        for record in scaling:
+            print(f"{record['stage']:<26}{record['format']:<9}{record['rows']:>12,}{record['scaling']:>9.2f}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fh:
+            json.dump({"environment": environment(), "results": records}, fh, indent=2)
+        print(f"\nResults written to {args.output}")
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) above {args.threshold:.0%}", file=sys.stderr)
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
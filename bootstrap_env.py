@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+OpenEurope Environment Bootstrap
+--------------------------------
+
+Prepares the Python environment the installers (``install_and_run.py`` and
+``web_installer.py``) run the project in, also on plant PCs without internet
+access:
+
+* ``wheelhouse`` (on a machine with internet) builds wheels of the
+  requirements and all their dependencies into ``wheelhouse/``; copy the
+  folder next to the project on the offline machine;
+* ``install`` creates a dedicated virtual environment once and installs every
+  requirement in a single pip resolver pass, with ``--no-index`` from the
+  wheelhouse when one is available (pip is never upgraded);
+* a lock hash of the requirements, the interpreter and the wheelhouse contents
+  is stored in the environment: when it still matches, ``install`` returns
+  immediately without starting pip.
+
+Usage:
+    python3 bootstrap_env.py wheelhouse
+    python3 bootstrap_env.py install [--offline]
+    python3 bootstrap_env.py status
+"""
+
+import argparse
+import hashlib
+import importlib.machinery
+import importlib.util
+import json
+import os
+import subprocess
+import sys
+import sysconfig
+import threading
+import venv
+from typing import Callable, List, Optional, Sequence
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+REQUIREMENTS = ("pandas", "openpyxl")
+VENV_DIR = os.path.join(BASE_DIR, ".openeurope_venv")
+WHEELHOUSE = os.path.join(BASE_DIR, "wheelhouse")
+LOCK_NAME = "openeurope.lock"
+
+# Seconds pip may run before it is stopped
+PIP_TIMEOUT = 600
+
+Log = Callable[[str], None]
+
+
+class BootstrapError(Exception):
+    """Raised when the environment cannot be prepared."""
+
+
+def venv_python(venv_dir: str = VENV_DIR) -> str:
+    """Return the interpreter path of the virtual environment."""
+    if os.name == "nt":
+        return os.path.join(venv_dir, "Scripts", "python.exe")
+    return os.path.join(venv_dir, "bin", "python")
+
+
+def site_packages(venv_dir: str = VENV_DIR) -> Optional[str]:
+    """Return the ``site-packages`` folder of the environment, if it exists."""
+    if os.name == "nt":
+        candidates = [os.path.join(venv_dir, "Lib", "site-packages")]
+    else:
+        lib = os.path.join(venv_dir, "lib")
+        try:
+            candidates = [
+                os.path.join(lib, name, "site-packages")
+                for name in sorted(os.listdir(lib)) if name.startswith("python")
+            ]
+        except OSError:
+            candidates = []
+    return next((path for path in candidates if os.path.isdir(path)), None)
+
+
+def project_python(venv_dir: str = VENV_DIR) -> str:
+    """Interpreter to run the project with: the environment one once created."""
+    python = venv_python(venv_dir)
+    return python if os.path.exists(python) else sys.executable
+
+
+def find_module(name: str, venv_dir: str = VENV_DIR) -> bool:
+    """Whether ``name`` is importable by :func:`project_python`, without importing it."""
+    site = site_packages(venv_dir)
+    if site is None:
+        return importlib.util.find_spec(name) is not None
+    return importlib.machinery.PathFinder.find_spec(name, [site]) is not None
+
+
+def module_version(name: str, venv_dir: str = VENV_DIR) -> Optional[str]:
+    """Installed version of distribution ``name`` for :func:`project_python`."""
+    try:
+        from importlib import metadata
+    except ImportError:  # Python < 3.8
+        return None
+    site = site_packages(venv_dir)
+    try:
+        if site is None:
+            return metadata.version(name)
+        dist = next(iter(metadata.distributions(name=name, path=[site])), None)
+        return dist.version if dist else None
+    except metadata.PackageNotFoundError:
+        return None
+
+
+def wheel_files(wheelhouse: str = WHEELHOUSE) -> List[str]:
+    """Names of the wheels in ``wheelhouse`` (empty when it does not exist)."""
+    try:
+        return sorted(name for name in os.listdir(wheelhouse) if name.endswith(".whl"))
+    except OSError:
+        return []
+
+
+def lock_hash(requirements: Sequence[str] = REQUIREMENTS, wheelhouse: str = WHEELHOUSE) -> str:
+    """Hash of everything that decides the content of the environment."""
+    digest = hashlib.sha256()
+    for part in (
+        "\n".join(requirements),
+        sys.version,
+        sysconfig.get_platform(),
+        os.path.realpath(sys.executable),
+    ):
+        digest.update(part.encode("utf-8") + b"\0")
+    for name in wheel_files(wheelhouse):
+        size = os.path.getsize(os.path.join(wheelhouse, name))
+        digest.update(f"{name}:{size}\0".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def read_lock(venv_dir: str = VENV_DIR) -> dict:
+    """Return the lock stored in the environment (empty when missing)."""
+    try:
+        with open(os.path.join(venv_dir, LOCK_NAME), encoding="utf-8") as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return {}
+
+
+def is_current(
+    venv_dir: str = VENV_DIR,
+    requirements: Sequence[str] = REQUIREMENTS,
+    wheelhouse: str = WHEELHOUSE
+) -> bool:
+    """Whether the environment exists and matches the current lock hash."""
+    return (
+        os.path.exists(venv_python(venv_dir))
+        and read_lock(venv_dir).get("hash") == lock_hash(requirements, wheelhouse)
+    )
+
+
+def run_pip(args: Sequence[str], python: str, log: Log, timeout: float = PIP_TIMEOUT) -> None:
+    """Run ``python -m pip`` passing every output line to ``log``."""
+    command = [python, "-m", "pip", *args, "--disable-pip-version-check", "--progress-bar", "off"]
+    try:
+        process = subprocess.Popen(
+            command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, bufsize=1
+        )
+    except OSError as exc:
+        raise BootstrapError(f"Impossibile avviare pip: {exc}") from exc
+    watchdog = threading.Timer(timeout, process.kill)
+    watchdog.start()
+    errors = []
+    try:
+        for line in process.stdout:
+            line = line.rstrip()
+            if line:
+                log(line)
+                if line.startswith("ERROR"):
+                    errors.append(line)
+        returncode = process.wait()
+    finally:
+        watchdog.cancel()
+    if returncode != 0:
+        raise BootstrapError(errors[-1] if errors else f"pip terminato con codice {returncode}")
+
+
+def build_wheelhouse(
+    wheelhouse: str = WHEELHOUSE,
+    requirements: Sequence[str] = REQUIREMENTS,
+    log: Log = print
+) -> List[str]:
+    """Build wheels of ``requirements`` and their dependencies into ``wheelhouse``."""
+    os.makedirs(wheelhouse, exist_ok=True)
+    log(f"Creazione wheelhouse in {wheelhouse}...")
+    run_pip(["wheel", "--wheel-dir", wheelhouse, *requirements], sys.executable, log)
+    return wheel_files(wheelhouse)
+
+
+def ensure_environment(
+    venv_dir: str = VENV_DIR,
+    wheelhouse: str = WHEELHOUSE,
+    requirements: Sequence[str] = REQUIREMENTS,
+    offline: bool = False,
+    log: Log = print
+) -> bool:
+    """Create or update the environment; return ``False`` when it was already current.
+
+    Raises
+    ------
+    BootstrapError
+        If the environment cannot be created or pip fails.
+    """
+    digest = lock_hash(requirements, wheelhouse)
+    python = venv_python(venv_dir)
+    lock = read_lock(venv_dir)
+    if os.path.exists(python) and lock.get("hash") == digest:
+        return False
+
+    wheels = wheel_files(wheelhouse)
+    if offline and not wheels:
+        raise BootstrapError(f"Nessuna wheel in {wheelhouse}: impossibile installare offline")
+
+    # A different interpreter cannot reuse the environment created by the old one
+    recreate = bool(lock) and lock.get("python") != os.path.realpath(sys.executable)
+    if recreate or not os.path.exists(python):
+        log(f"Creazione ambiente virtuale in {venv_dir}...")
+        try:
+            venv.EnvBuilder(with_pip=True, clear=recreate).create(venv_dir)
+        except (OSError, subprocess.CalledProcessError) as exc:
+            raise BootstrapError(f"Impossibile creare l'ambiente virtuale: {exc}") from exc
+
+    args = ["install"]
+    if wheels:
+        args += ["--no-index", "--find-links", wheelhouse]
+        log(f"Installazione da wheelhouse ({len(wheels)} pacchetti disponibili)...")
+    run_pip(args + list(requirements), python, log)
+
+    with open(os.path.join(venv_dir, LOCK_NAME), "w", encoding="utf-8") as fh:
+        json.dump({"hash": digest, "python": os.path.realpath(sys.executable),
+                   "requirements": list(requirements), "wheels": wheels}, fh, indent=2)
+    return True
+
+
+def main() -> None:
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description="Prepare the OpenEurope Python environment")
+    parser.add_argument("command", choices=["install", "wheelhouse", "status"])
+    parser.add_argument("--venv", default=VENV_DIR, help=f"Virtual environment (default: {VENV_DIR})")
+    parser.add_argument(
+        "--wheelhouse", default=WHEELHOUSE,
+        help=f"Folder of prebuilt wheels (default: {WHEELHOUSE})"
+    )
+    parser.add_argument("--offline", action="store_true", help="Fail instead of using PyPI")
+    args = parser.parse_args()
+
+    try:
+        if args.command == "wheelhouse":
+            wheels = build_wheelhouse(args.wheelhouse)
+            print(f"{len(wheels)} wheel in {args.wheelhouse}")
+        elif args.command == "install":
+            changed = ensure_environment(args.venv, args.wheelhouse, offline=args.offline)
+            print("Ambiente aggiornato" if changed else "Ambiente già aggiornato")
+            print(venv_python(args.venv))
+        else:
+            current = is_current(args.venv, wheelhouse=args.wheelhouse)
+            print("Ambiente aggiornato" if current else "Ambiente da installare")
+            raise SystemExit(0 if current else 1)
+    except BootstrapError as exc:
+        print(f"Errore: {exc}", file=sys.stderr)
+        raise SystemExit(1) from exc
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,510 @@
+#!/usr/bin/env python3
+"""
+OpenEurope Demo Build
+---------------------
+
+Builds the distributable web demo (``OpenEurope_Demo_Semplice_v3.zip``,
+served by ``run_demo.py``) from the working copy in
+``demo/OpenEurope_Demo_Semplice_v3``:
+
+* the local scripts and stylesheets referenced by ``index.html`` are bundled
+  into one JavaScript and one CSS file and minified;
+* bundles and vendored libraries get content-hashed names
+  (``app.<hash>.js``) so the server can mark them immutable;
+* the CDN libraries (in ``index.html`` and in the ``LIBS`` table of app.js,
+  which lazy-loads pdf.js, tesseract.js and html2pdf) are vendored under
+  ``vendor/`` so the demo runs on plants without internet access;
+* gzip (and, with the optional ``brotli`` package, brotli) variants of text
+  assets are stored next to them in the archive, uncompressed, so the server
+  sends them as is;
+* a report compares the bytes downloaded on first load before and after.
+
+Downloaded libraries are cached in ``--vendor-dir``; on an offline machine,
+copy a filled cache there first. ``--allow-cdn`` keeps the CDN URL for any
+library that is not available instead of failing.
+
+Usage:
+    python3 build_demo.py
+    python3 build_demo.py --out-dir dist --allow-cdn
+"""
+
+import argparse
+import gzip
+import hashlib
+import os
+import re
+import sys
+import time
+import urllib.error
+import urllib.request
+import zipfile
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+try:
+    import brotli
+except ImportError:  # optional: only gzip variants are produced
+    brotli = None
+
+SOURCE_DIR = os.path.join("demo", "OpenEurope_Demo_Semplice_v3")
+ZIP_NAME = "OpenEurope_Demo_Semplice_v3.zip"
+VENDOR_CACHE = ".vendor_cache"
+
+# Files of CDN "directory" URLs that the libraries fetch by name at runtime
+CDN_DIRECTORIES = {
+    "https://cdn.jsdelivr.net/npm/tesseract.js-core@5.1.0": [
+        "tesseract-core-simd-lstm.wasm.js",
+        "tesseract-core-lstm.wasm.js",
+        "tesseract-core-simd.wasm.js",
+        "tesseract-core.wasm.js",
+    ],
+    "https://tessdata.projectnaptha.com/4.0.0": ["ita.traineddata.gz"],
+}
+
+# Members that are already compressed are stored as is
+_STORED_EXTENSIONS = (".pdf", ".png", ".jpg", ".gz", ".br", ".zip", ".wasm")
+_TEXT_EXTENSIONS = (".js", ".css", ".html", ".svg", ".json", ".csv", ".txt")
+_MIN_VARIANT_SIZE = 512
+
+_SCRIPT_TAG = re.compile(r'[ \t]*<script\b[^>]*\bsrc="([^"]+)"[^>]*></script>[ \t]*\n?')
+_STYLE_TAG = re.compile(r'[ \t]*<link\b[^>]*\brel="stylesheet"[^>]*\bhref="([^"]+)"[^>]*/?>[ \t]*\n?')
+_LIBS_TABLE = re.compile(r"const LIBS = \{(.*?)\};", re.S)
+_URL_LITERAL = re.compile(r'"(https?://[^"]+)"')
+
+
+class BuildError(RuntimeError):
+    """Raised when the demo cannot be built (missing library, bad source)."""
+
+
+class OutputFile(NamedTuple):
+    name: str
+    data: bytes
+    mtime: float
+    mode: int = 0o644
+
+
+def fingerprint(name: str, data: bytes) -> str:
+    """Return ``name`` with a content hash before its extension."""
+    stem, ext = os.path.splitext(name)
+    return f"{stem}.{hashlib.sha256(data).hexdigest()[:10]}{ext}"
+
+
+# ---------------------------------------------------------------------------
+# Minification
+# ---------------------------------------------------------------------------
+
+_WORD = re.compile(r"[\w$\u0080-\uffff]")
+_REGEX_AFTER = set("(,=:[!&|?{};+-*%<>~^")
+_REGEX_KEYWORDS = {
+    "return", "typeof", "instanceof", "in", "of", "new", "delete", "void",
+    "throw", "case", "do", "else", "yield", "await",
+}
+
+
+def _is_word(c: str) -> bool:
+    return bool(c) and _WORD.match(c) is not None
+
+
+def minify_js(source: str) -> str:
+    """Strip comments and redundant whitespace from JavaScript.
+
+    Line breaks are kept (one per non-empty line), so automatic semicolon
+    insertion behaves exactly as in the source; strings, template literals
+    and regular expression literals are copied verbatim.
+    """
+    out: List[str] = []
+    i, n = 0, len(source)
+    templates: List[int] = []  # open ``${`` depth per nested template literal
+    prev = ""                  # last significant token, for regex detection
+    space = newline = False
+
+    def emit(token: str) -> None:
+        nonlocal space, newline, prev
+        if out:
+            last = out[-1][-1]
+            if newline:
+                out.append("\n")
+            elif space and (
+                (_is_word(last) and _is_word(token[0]))
+                or (last in "+-" and token[0] in "+-")
+            ):
+                out.append(" ")
+        out.append(token)
+        space = newline = False
+        prev = token
+
+    def scan_template(j: int) -> Tuple[int, bool]:
+        # Returns the index after the closing backtick or after ``${``
+        while j < n:
+            c = source[j]
+            if c == "\\":
+                j += 2
+            elif c == "`":
+                return j + 1, False
+            elif c == "$" and source[j + 1:j + 2] == "{":
+                return j + 2, True
+            else:
+                j += 1
+        raise BuildError("unterminated template literal")
+
+    while i < n:
+        c = source[i]
+        if c in " \t\r\f\v":
+            space = True
+            i += 1
+        elif c == "\n":
+            newline = True
+            i += 1
+        elif c == "/" and source[i + 1:i + 2] == "/":
+            end = source.find("\n", i)
+            i = n if end < 0 else end
+        elif c == "/" and source[i + 1:i + 2] == "*":
+            end = source.find("*/", i + 2)
+            if end < 0:
+                raise BuildError("unterminated comment")
+            if "\n" in source[i:end]:
+                newline = True
+            else:
+                space = True
+            i = end + 2
+        elif c in "'\"":
+            j = i + 1
+            while j < n and source[j] != c:
+                if source[j] == "\\":
+                    j += 1
+                elif source[j] == "\n":
+                    raise BuildError("unterminated string literal")
+                j += 1
+            emit(source[i:j + 1])
+            i = j + 1
+        elif c == "`":
+            j, opened = scan_template(i + 1)
+            emit(source[i:j])
+            if opened:
+                templates.append(0)
+            i = j
+        elif c == "}" and templates and templates[-1] == 0:
+            templates.pop()
+            j, opened = scan_template(i + 1)
+            emit(source[i:j])
+            if opened:
+                templates.append(0)
+            i = j
+        elif c == "/" and (not prev or prev[-1] in _REGEX_AFTER or prev in _REGEX_KEYWORDS):
+            j = i + 1
+            in_class = False
+            while j < n and (in_class or source[j] != "/"):
+                if source[j] == "\\":
+                    j += 1
+                elif source[j] == "[":
+                    in_class = True
+                elif source[j] == "]":
+                    in_class = False
+                elif source[j] == "\n":
+                    raise BuildError("unterminated regular expression literal")
+                j += 1
+            j += 1
+            while j < n and source[j].isalpha():
+                j += 1
+            emit(source[i:j])
+            i = j
+        elif _is_word(c):
+            j = i + 1
+            while j < n and _is_word(source[j]):
+                j += 1
+            emit(source[i:j])
+            i = j
+        else:
+            if templates:
+                if c == "{":
+                    templates[-1] += 1
+                elif c == "}":
+                    templates[-1] -= 1
+            emit(c)
+            i += 1
+    return "".join(out) + "\n"
+
+
+_CSS_COMMENT = re.compile(r"/\*.*?\*/", re.S)
+_CSS_STRING = re.compile(r"(\"(?:\\.|[^\"\\])*\"|'(?:\\.|[^'\\])*')")
+
+
+def minify_css(source: str) -> str:
+    """Strip comments and redundant whitespace from a stylesheet."""
+    parts = _CSS_STRING.split(source)
+    for k in range(0, len(parts), 2):
+        chunk = _CSS_COMMENT.sub("", parts[k])
+        chunk = re.sub(r"\s+", " ", chunk)
+        chunk = re.sub(r"\s*([{};,>])\s*", r"\1", chunk)
+        chunk = re.sub(r":\s+", ":", chunk)
+        parts[k] = chunk.replace(";}", "}")
+    return "".join(parts).strip() + "\n"
+
+
+# ---------------------------------------------------------------------------
+# Vendoring
+# ---------------------------------------------------------------------------
+
+def _cache_path(vendor_dir: str, url: str) -> str:
+    return os.path.join(vendor_dir, hashlib.sha1(url.encode("utf-8")).hexdigest()[:16] + "_" + url.rsplit("/", 1)[-1])
+
+
+def fetch(url: str, vendor_dir: str, offline: bool) -> Optional[bytes]:
+    """Return the content of ``url`` from the cache, downloading it if needed."""
+    path = _cache_path(vendor_dir, url)
+    if os.path.exists(path):
+        with open(path, "rb") as f:
+            return f.read()
+    if offline:
+        return None
+    try:
+        with urllib.request.urlopen(url, timeout=60) as response:
+            data = response.read()
+    except (urllib.error.URLError, OSError):
+        return None
+    os.makedirs(vendor_dir, exist_ok=True)
+    with open(path + ".tmp", "wb") as f:
+        f.write(data)
+    os.replace(path + ".tmp", path)
+    return data
+
+
+class Vendored(NamedTuple):
+    local: Dict[str, str]        # CDN URL -> path inside the demo
+    files: List[OutputFile]
+    missing: List[str]
+
+
+def vendor_libraries(urls: List[str], vendor_dir: str, offline: bool, mtime: float) -> Vendored:
+    local: Dict[str, str] = {}
+    files: List[OutputFile] = []
+    missing: List[str] = []
+    for url in urls:
+        if url in CDN_DIRECTORIES:
+            # Fetched by file name at runtime: keep the names, version the folder
+            folder = "vendor/" + re.sub(r"[^\w.@-]+", "_", url.split("://", 1)[1])
+            contents = [(name, fetch(f"{url}/{name}", vendor_dir, offline)) for name in CDN_DIRECTORIES[url]]
+            if any(data is None for _, data in contents):
+                missing.append(url)
+                continue
+            files.extend(OutputFile(f"{folder}/{name}", data, mtime) for name, data in contents)
+            local[url] = folder
+            continue
+        data = fetch(url, vendor_dir, offline)
+        if data is None:
+            missing.append(url)
+            continue
+        name = "vendor/" + fingerprint(url.rsplit("/", 1)[-1], data)
+        files.append(OutputFile(name, data, mtime))
+        local[url] = name
+    return Vendored(local, files, missing)
+
+
+# ---------------------------------------------------------------------------
+# Build
+# ---------------------------------------------------------------------------
+
+class BuildResult(NamedTuple):
+    files: List[OutputFile]
+    report: List[Tuple[str, int, int, int, int]]
+
+
+def _read(path: str) -> str:
+    with open(path, "r", encoding="utf-8") as f:
+        return f.read()
+
+
+def _gzip_size(data: bytes) -> int:
+    return len(gzip.compress(data, compresslevel=9, mtime=0))
+
+
+def build(source_dir: str, vendor_dir: str, allow_cdn: bool = False, offline: bool = False) -> BuildResult:
+    """Build the demo from ``source_dir`` and return the files to ship."""
+    index_html = _read(os.path.join(source_dir, "index.html"))
+    mtime = max(
+        os.path.getmtime(os.path.join(root, name))
+        for root, _, names in os.walk(source_dir) for name in names
+    )
+
+    scripts = _SCRIPT_TAG.findall(index_html)
+    styles = _STYLE_TAG.findall(index_html)
+    local_scripts = [src for src in scripts if "://" not in src]
+    local_styles = [href for href in styles if "://" not in href]
+    if not local_scripts:
+        raise BuildError("index.html references no local script to bundle")
+
+    bundle_js = "".join(_read(os.path.join(source_dir, src)) for src in local_scripts)
+    lib_urls = []
+    libs_table = _LIBS_TABLE.search(bundle_js)
+    if libs_table:
+        lib_urls = _URL_LITERAL.findall(libs_table.group(1))
+    eager_urls = [src for src in scripts if "://" in src] + [href for href in styles if "://" in href]
+
+    vendored = vendor_libraries(eager_urls + lib_urls, vendor_dir, offline, mtime)
+    if vendored.missing and not allow_cdn:
+        raise BuildError(
+            "Could not download: " + ", ".join(vendored.missing)
+            + f". Copy a filled cache into {vendor_dir} or pass --allow-cdn."
+        )
+    for url, path in vendored.local.items():
+        bundle_js = bundle_js.replace(f'"{url}"', f'"{path}"')
+
+    js_bytes = minify_js(bundle_js).encode("utf-8")
+    css_bytes = minify_css("".join(_read(os.path.join(source_dir, href)) for href in local_styles)).encode("utf-8")
+    js_name = fingerprint(local_scripts[-1], js_bytes)
+    css_name = fingerprint(local_styles[-1], css_bytes) if local_styles else None
+
+    # index.html: one tag per bundle, in the position of the first original
+    def replace_tags(html: str, pattern: re.Pattern, bundled: List[str], tag: str) -> str:
+        done = False
+
+        def sub(match: re.Match) -> str:
+            nonlocal done
+            url = match.group(1)
+            if url in bundled:
+                if done:
+                    return ""
+                done = True
+                return tag
+            if url in vendored.local:
+                return match.group(0).replace(url, vendored.local[url])
+            return match.group(0)
+
+        return pattern.sub(sub, html)
+
+    html = replace_tags(index_html, _SCRIPT_TAG, local_scripts, f'  <script defer src="{js_name}"></script>\n')
+    if css_name:
+        html = replace_tags(html, _STYLE_TAG, local_styles, f'  <link rel="stylesheet" href="{css_name}"/>\n')
+    html_bytes = html.encode("utf-8")
+
+    files = [OutputFile("index.html", html_bytes, mtime), OutputFile(js_name, js_bytes, mtime)]
+    if css_name:
+        files.append(OutputFile(css_name, css_bytes, mtime))
+    files.extend(vendored.files)
+    bundled = {"index.html", *local_scripts, *local_styles}
+    for root, dirs, names in os.walk(source_dir):
+        dirs.sort()
+        for name in sorted(names):
+            path = os.path.join(root, name)
+            rel = os.path.relpath(path, source_dir).replace(os.sep, "/")
+            if rel in bundled or name.endswith((".br", ".gz")):
+                continue
+            st = os.stat(path)
+            with open(path, "rb") as f:
+                files.append(OutputFile(rel, f.read(), st.st_mtime, st.st_mode & 0o777))
+
+    # First load: the page, its stylesheets and the scripts it loads eagerly
+    def first_load(entries: List[Tuple[str, Optional[bytes]]]) -> Tuple[int, int]:
+        raw = sum(len(data) for _, data in entries if data is not None)
+        return raw, sum(_gzip_size(data) for _, data in entries if data is not None)
+
+    def cached(url: str) -> Optional[bytes]:
+        return fetch(url, vendor_dir, offline=True)
+
+    before_source = [("index.html", index_html.encode("utf-8"))] + [
+        (src, open(os.path.join(source_dir, src), "rb").read()) for src in local_scripts + local_styles
+    ]
+    # The original page loaded every library up front
+    before_libs = [(url, cached(url)) for url in eager_urls + [
+        url for key, url in re.findall(r'(\w+): "(https?://[^"]+)"', libs_table.group(1) if libs_table else "")
+        if key in ("pdfjs", "tesseract", "html2pdf")
+    ]]
+    after_files = {f.name: f.data for f in files}
+    after_source = [("index.html", html_bytes), (js_name, js_bytes)] + ([(css_name, css_bytes)] if css_name else [])
+    after_libs = [(url, after_files.get(vendored.local.get(url, ""))) for url in eager_urls]
+
+    report = []
+    for label, before, after in (
+        ("App (HTML/JS/CSS)", before_source, after_source),
+        ("Libraries", before_libs, after_libs),
+    ):
+        report.append((label, *first_load(before), *first_load(after)))
+    unknown = [url for url, data in before_libs if data is None]
+    if unknown:
+        report.append((f"(not measured: {len(unknown)} libraries not in the cache)", 0, 0, 0, 0))
+
+    # Precompressed variants, served by the demo server without recompressing
+    variants = []
+    for f in files:
+        if f.name.endswith(_TEXT_EXTENSIONS) and len(f.data) >= _MIN_VARIANT_SIZE:
+            variants.append(OutputFile(f.name + ".gz", gzip.compress(f.data, compresslevel=9, mtime=0), f.mtime))
+            if brotli is not None:
+                variants.append(OutputFile(f.name + ".br", brotli.compress(f.data, quality=11), f.mtime))
+    return BuildResult(files + variants, report)
+
+
+def write_zip(zip_path: str, files: List[OutputFile], top: str) -> None:
+    """Write the build to ``zip_path`` under the ``top`` folder, atomically."""
+    tmp_path = zip_path + ".tmp"
+    dirs = sorted({"/".join(f.name.split("/")[:d]) for f in files for d in range(1, f.name.count("/") + 1)})
+    # Timestamps come from the sources, so rebuilding unchanged sources is reproducible
+    stamp = time.localtime(max(f.mtime for f in files))[:6]
+    with zipfile.ZipFile(tmp_path, "w") as zf:
+        for d in [""] + dirs:
+            info = zipfile.ZipInfo(f"{top}/{d}/" if d else f"{top}/", stamp)
+            info.external_attr = (0o40755 << 16) | 0x10
+            zf.writestr(info, b"")
+        for f in files:
+            info = zipfile.ZipInfo(f"{top}/{f.name}", time.localtime(f.mtime)[:6])
+            info.external_attr = (0o100000 | f.mode) << 16
+            stored = f.name.endswith(_STORED_EXTENSIONS)
+            info.compress_type = zipfile.ZIP_STORED if stored else zipfile.ZIP_DEFLATED
+            zf.writestr(info, f.data, compresslevel=None if stored else 9)
+    os.replace(tmp_path, zip_path)
+
+
+def write_dir(out_dir: str, files: List[OutputFile]) -> None:
+    for f in files:
+        path = os.path.join(out_dir, *f.name.split("/"))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as out:
+            out.write(f.data)
+        os.chmod(path, f.mode)
+        os.utime(path, (f.mtime, f.mtime))
+
+
+def print_report(report: List[Tuple[str, int, int, int, int]]) -> None:
+    print(f"{'First load':<28}{'before':>12}{'gzip':>10}{'after':>12}{'gzip':>10}")
+    totals = [0, 0, 0, 0]
+    for label, *sizes in report:
+        if not any(sizes):
+            print(label)
+            continue
+        totals = [t + s for t, s in zip(totals, sizes)]
+        print(f"{label:<28}" + "".join(f"{s / 1024:>{w}.1f}K" for s, w in zip(sizes, (11, 9, 11, 9))))
+    print(f"{'Total':<28}" + "".join(f"{s / 1024:>{w}.1f}K" for s, w in zip(totals, (11, 9, 11, 9))))
+
+
+def main() -> None:
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description="Build the OpenEurope web demo archive")
+    parser.add_argument("--source", default=SOURCE_DIR, help=f"Demo sources (default: {SOURCE_DIR})")
+    parser.add_argument("-o", "--output", default=ZIP_NAME, help=f"Output archive (default: {ZIP_NAME})")
+    parser.add_argument("--out-dir", help="Write the build to this directory instead of an archive")
+    parser.add_argument(
+        "--vendor-dir", default=VENDOR_CACHE,
+        help=f"Cache of downloaded libraries (default: {VENDOR_CACHE})"
+    )
+    parser.add_argument("--offline", action="store_true", help="Only use libraries already in the cache")
+    parser.add_argument(
+        "--allow-cdn", action="store_true",
+        help="Keep the CDN URL of libraries that cannot be vendored instead of failing"
+    )
+    args = parser.parse_args()
+
+    try:
+        result = build(args.source, args.vendor_dir, args.allow_cdn, args.offline)
+    except (BuildError, OSError) as exc:
+        print(f"Build failed: {exc}", file=sys.stderr)
+        raise SystemExit(1) from exc
+    if args.out_dir:
+        write_dir(args.out_dir, result.files)
+        print(f"Written {len(result.files)} files to {args.out_dir}")
+    else:
+        top = os.path.basename(os.path.normpath(args.source))
+        write_zip(args.output, result.files, top)
+        print(f"Written {args.output} ({len(result.files)} files)")
+    print_report(result.report)
+
+
+if __name__ == "__main__":
+    main()
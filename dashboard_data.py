@@ -0,0 +1,464 @@
+#!/usr/bin/env python3
+"""
+OpenEurope Dashboard Data
+-------------------------
+
+Precomputes the chart series shown by the web demo dashboard from a project
+state (the JSON exported by the demo, or the ``openeurope_demo_v3`` state the
+browser posts to the local server), so the browser only has to draw ready
+data instead of re-running ``aggregateEnergy`` on every edit.
+
+The series mirror ``app.js``:
+
+* ``bands``: monthly F1/F2/F3/Gas totals over all utilities (``renderCharts``,
+  stacked bar chart);
+* ``share``: yearly F1/F2/F3/Gas totals (``renderCharts``, doughnut);
+* ``utilities``: monthly total per utility (``renderUtilityDetailChart``).
+
+Charts can also be rendered server side as SVG. Results are cached by the
+digest of the input state, so each dataset is aggregated once. For live
+editing, :class:`EnergyAggregate` keeps per-utility, per-month partial sums
+and updates them in O(1) when a single monthly record changes.
+
+Usage:
+    python3 dashboard_data.py OpenEurope_progetto.json -o charts
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import os
+import re
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+BANDS = ["f1", "f2", "f3", "gas"]
+BAND_LABELS = ["F1", "F2", "F3", "Gas"]
+
+# Chart.js default palette, in the dataset order used by renderCharts
+BAND_COLORS = ["#36a2eb", "#ff6384", "#ff9f40", "#ffcd56"]
+UTILITY_COLORS = {"electricity": "rgba(96,165,250,0.7)", "gas": "rgba(52,211,153,0.7)"}
+
+_THOUSANDS = re.compile(r"\.(?=\d{3}(\D|$))")
+_MONTH = re.compile(r"\d{4}-\d{2}")
+
+
+def safe_float(value: Any) -> Optional[float]:
+    """Parse a number the way ``safeFloat`` in app.js does (``1.234,56`` aware)."""
+    if value is None:
+        return None
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value) if math.isfinite(value) else None
+    s = re.sub(r"\s", "", str(value))
+    if not s:
+        return None
+    s = _THOUSANDS.sub("", s).replace(",", ".", 1)
+    try:
+        n = float(s)
+    except ValueError:
+        return None
+    return n if math.isfinite(n) else None
+
+
+def months_of_year(year: int) -> List[str]:
+    """Return ``YYYY-MM`` labels for the twelve months of ``year``."""
+    return [f"{year}-{m:02d}" for m in range(1, 13)]
+
+
+def selected_year(state: Dict[str, Any]) -> int:
+    """Year shown by the dashboard, resolved like ``aggregateEnergy`` does."""
+    ui = state.get("ui") or {}
+    project = state.get("project") or {}
+    return int(ui.get("selectedYear") or project.get("year") or datetime.now().year)
+
+
+# Per-record contribution slots: the four bands, then the power KPI sums/counts
+_POTENZA, _POTENZA_N, _COSFI, _COSFI_N = 4, 5, 6, 7
+_SLOTS = 8
+
+
+def _contribution(util_type: str, data: Dict[str, Any]) -> List[float]:
+    """Values a single monthly record adds to the aggregates."""
+    c = [0.0] * _SLOTS
+    data = data or {}
+    if util_type == "electricity":
+        for i, band in enumerate(("f1", "f2", "f3")):
+            c[i] = safe_float(data.get(band)) or 0.0
+        # refreshDashboard averages only the non-zero power readings
+        potenza = safe_float(data.get("potenza")) or 0.0
+        cosfi = safe_float(data.get("cosfi")) or 0.0
+        if potenza:
+            c[_POTENZA], c[_POTENZA_N] = potenza, 1.0
+        if cosfi:
+            c[_COSFI], c[_COSFI_N] = cosfi, 1.0
+    else:
+        c[3] = safe_float(data.get("gas")) or 0.0
+    return c
+
+
+class EnergyAggregate:
+    """Dashboard aggregates kept up to date one record at a time.
+
+    The model stores the contribution of every (year, utility, month) record
+    together with running per-month, per-utility and per-year sums, so
+    inserting, replacing or deleting one record costs O(1) instead of a full
+    re-aggregation of the project. :meth:`chart_data` then reads the sums,
+    touching only the 12 months and the list of utilities.
+    """
+
+    def __init__(self) -> None:
+        self.utilities: Dict[str, Dict[str, str]] = {}
+        self._records: Dict[Tuple[int, str, str], List[float]] = {}
+        self._by_utility: Dict[str, set] = {}
+        self._months: Dict[int, List[List[float]]] = {}
+        self._utility_months: Dict[Tuple[int, str], List[float]] = {}
+        self._years: Dict[int, List[float]] = {}
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any], years: Optional[List[int]] = None) -> "EnergyAggregate":
+        """Build the model from a demo project state, optionally for some years only."""
+        model = cls()
+        for util in state.get("utilities") or []:
+            model.set_utility(util)
+        wanted = None if years is None else {str(y) for y in years}
+        for year_key, year_data in (state.get("energyByYear") or {}).items():
+            if not isinstance(year_data, dict) or (wanted is not None and year_key not in wanted):
+                continue
+            for util_id, records in year_data.items():
+                for record in records or []:
+                    model.upsert(int(year_key), util_id, record.get("month"), record.get("data"))
+        return model
+
+    def set_utility(self, util: Dict[str, Any]) -> None:
+        """Register (or relabel) a utility; its type must not change."""
+        util_type = util.get("type")
+        self.utilities[util.get("id")] = {
+            "type": util_type,
+            "label": util.get("description") or util.get("pod") or util.get("pdr") or "",
+            "unit": "kWh" if util_type == "electricity" else "SmC",
+        }
+
+    def remove_utility(self, util_id: str) -> None:
+        """Forget a utility and subtract all of its records."""
+        for key in list(self._by_utility.get(util_id, ())):
+            self._apply(key, None)
+        self._by_utility.pop(util_id, None)
+        self.utilities.pop(util_id, None)
+
+    def upsert(self, year: int, util_id: str, month: Optional[str], data: Optional[Dict[str, Any]]) -> bool:
+        """Insert or replace the record of ``util_id`` for ``month`` (``YYYY-MM``).
+
+        Records of unknown utilities or outside ``year`` are ignored, as in
+        ``aggregateEnergy``. Returns whether the aggregates changed.
+        """
+        util = self.utilities.get(util_id)
+        if util is None or not _MONTH.fullmatch(str(month or "")) or not month.startswith(f"{year}-"):
+            return False
+        if not 1 <= int(month[5:7]) <= 12:
+            return False
+        self._apply((year, util_id, month), _contribution(util["type"], data or {}))
+        return True
+
+    def delete(self, year: int, util_id: str, month: str) -> bool:
+        """Remove the record of ``util_id`` for ``month``; returns whether it existed."""
+        key = (year, util_id, month)
+        if key not in self._records:
+            return False
+        self._apply(key, None)
+        return True
+
+    def _apply(self, key: Tuple[int, str, str], new: Optional[List[float]]) -> None:
+        year, util_id, month = key
+        old = self._records.pop(key, None)
+        if new is not None:
+            self._records[key] = new
+            self._by_utility.setdefault(util_id, set()).add(key)
+        elif old is not None:
+            self._by_utility.get(util_id, set()).discard(key)
+        i = int(month[5:7]) - 1
+        months = self._months.setdefault(year, [[0.0] * 4 for _ in range(12)])
+        util_months = self._utility_months.setdefault((year, util_id), [0.0] * 12)
+        totals = self._years.setdefault(year, [0.0] * _SLOTS)
+        for sign, values in ((-1.0, old), (1.0, new)):
+            if values is None:
+                continue
+            for slot in range(4):
+                months[i][slot] += sign * values[slot]
+            util_months[i] += sign * (values[0] + values[1] + values[2] + values[3])
+            for slot in range(_SLOTS):
+                totals[slot] += sign * values[slot]
+
+    def _kpi(self, year: int) -> Dict[str, float]:
+        totals = self._years.get(year, [0.0] * _SLOTS)
+        return {
+            "potenza_avg": round(totals[_POTENZA] / totals[_POTENZA_N], 2) if totals[_POTENZA_N] else 0.0,
+            "cosfi_avg": round(totals[_COSFI] / totals[_COSFI_N], 2) if totals[_COSFI_N] else 0.0,
+        }
+
+    def _totals(self, year: int) -> Tuple[List[float], Dict[str, float]]:
+        totals = self._years.get(year, [0.0] * _SLOTS)
+        share = [round(totals[slot], 2) + 0.0 for slot in range(4)]
+        total = dict(zip(BANDS, share))
+        total["tot"] = round(sum(share), 2)
+        return share, total
+
+    def chart_data(self, year: int) -> Dict[str, Any]:
+        """Return the full dashboard chart payload for ``year``."""
+        months = self._months.get(year, [[0.0] * 4 for _ in range(12)])
+        share, total = self._totals(year)
+        return {
+            "year": year,
+            "labels": [m[5:] for m in months_of_year(year)],
+            "bands": {
+                band: [round(months[i][slot], 2) + 0.0 for i in range(12)]
+                for slot, band in enumerate(BANDS)
+            },
+            "share": share,
+            "total": total,
+            "kpi": self._kpi(year),
+            "utilities": {
+                util_id: dict(meta, data=[
+                    round(v, 2) + 0.0 for v in self._utility_months.get((year, util_id), [0.0] * 12)
+                ])
+                for util_id, meta in self.utilities.items()
+            },
+        }
+
+    def month_delta(self, year: int, util_id: str, month: str) -> Dict[str, Any]:
+        """Return only the chart values affected by an edit of one record.
+
+        The dashboard patches its current chart payload with this instead of
+        downloading the whole series again.
+        """
+        i = int(month[5:7]) - 1
+        months = self._months.get(year, [[0.0] * 4 for _ in range(12)])
+        share, total = self._totals(year)
+        return {
+            "year": year,
+            "index": i,
+            "bands": {band: round(months[i][slot], 2) + 0.0 for slot, band in enumerate(BANDS)},
+            "share": share,
+            "total": total,
+            "kpi": self._kpi(year),
+            "utility": {
+                "id": util_id,
+                "value": round(self._utility_months.get((year, util_id), [0.0] * 12)[i], 2) + 0.0,
+            },
+        }
+
+
+def build_chart_data(state: Dict[str, Any], year: Optional[int] = None) -> Dict[str, Any]:
+    """Compute all dashboard chart series for one year of a project state.
+
+    Returns
+    -------
+    dict
+        Compact JSON-serialisable payload with ``year``, ``labels``, ``bands``
+        (monthly values per band), ``share`` (yearly totals per band), ``total``,
+        ``kpi`` (average power and cos φ) and ``utilities`` (monthly totals per
+        utility id).
+    """
+    if year is None:
+        year = selected_year(state)
+    return EnergyAggregate.from_state(state, years=[year]).chart_data(year)
+
+
+def _svg_open(width: int, height: int) -> List[str]:
+    return [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+        f'viewBox="0 0 {width} {height}" font-family="sans-serif" font-size="11">'
+    ]
+
+
+def _svg_legend(parts: List[str], x: float, y: float) -> None:
+    for i, (label, color) in enumerate(zip(BAND_LABELS, BAND_COLORS)):
+        lx = x + i * 60
+        parts.append(f'<rect x="{lx}" y="{y - 9}" width="10" height="10" fill="{color}"/>')
+        parts.append(f'<text x="{lx + 14}" y="{y}" fill="#94a3b8">{label}</text>')
+
+
+def _nice_top(values: List[float]) -> float:
+    top = max(values) if values and max(values) > 0 else 1.0
+    magnitude = 10 ** math.floor(math.log10(top))
+    return math.ceil(top / magnitude) * magnitude
+
+
+def render_monthly_svg(chart: Dict[str, Any], width: int = 640, height: int = 320) -> str:
+    """Render the monthly stacked bar chart as SVG."""
+    parts = _svg_open(width, height)
+    left, bottom, top_pad = 60, 45, 10
+    plot_w, plot_h = width - left - 10, height - bottom - top_pad
+    totals = [sum(chart["bands"][b][i] for b in BANDS) for i in range(12)]
+    top = _nice_top(totals)
+    for i in range(5):
+        gy = top_pad + plot_h - plot_h * i / 4
+        parts.append(f'<line x1="{left}" y1="{gy:.1f}" x2="{left + plot_w}" y2="{gy:.1f}" stroke="#334155" stroke-width="0.5"/>')
+        parts.append(f'<text x="{left - 6}" y="{gy + 4:.1f}" text-anchor="end" fill="#94a3b8">{top * i / 4:,.0f}</text>')
+    slot = plot_w / 12
+    bar_w = slot * 0.6
+    for i, label in enumerate(chart["labels"]):
+        bx = left + slot * i + (slot - bar_w) / 2
+        by = top_pad + plot_h
+        for band, color in zip(BANDS, BAND_COLORS):
+            bh = plot_h * chart["bands"][band][i] / top
+            if bh > 0:
+                by -= bh
+                parts.append(f'<rect x="{bx:.1f}" y="{by:.1f}" width="{bar_w:.1f}" height="{bh:.1f}" fill="{color}"/>')
+        parts.append(f'<text x="{bx + bar_w / 2:.1f}" y="{top_pad + plot_h + 14}" text-anchor="middle" fill="#94a3b8">{label}</text>')
+    _svg_legend(parts, left, height - 8)
+    parts.append("</svg>")
+    return "".join(parts)
+
+
+def render_share_svg(chart: Dict[str, Any], size: int = 320) -> str:
+    """Render the yearly share doughnut chart as SVG."""
+    parts = _svg_open(size, size)
+    cx, cy = size / 2, (size - 30) / 2
+    radius = min(cx, cy) - 10
+    inner = radius * 0.5
+    grand = sum(chart["share"])
+    if grand <= 0:
+        parts.append(f'<text x="{cx}" y="{cy}" text-anchor="middle" fill="#94a3b8">—</text>')
+    angle = -math.pi / 2
+    for value, color in zip(chart["share"], BAND_COLORS):
+        if grand <= 0 or value <= 0:
+            continue
+        sweep = 2 * math.pi * value / grand
+        if sweep >= 2 * math.pi - 1e-9:
+            parts.append(f'<circle cx="{cx}" cy="{cy}" r="{(radius + inner) / 2:.1f}" fill="none" '
+                         f'stroke="{color}" stroke-width="{radius - inner:.1f}"/>')
+            break
+        end = angle + sweep
+        large = 1 if sweep > math.pi else 0
+        p = [
+            (cx + radius * math.cos(angle), cy + radius * math.sin(angle)),
+            (cx + radius * math.cos(end), cy + radius * math.sin(end)),
+            (cx + inner * math.cos(end), cy + inner * math.sin(end)),
+            (cx + inner * math.cos(angle), cy + inner * math.sin(angle)),
+        ]
+        parts.append(
+            f'<path d="M{p[0][0]:.1f},{p[0][1]:.1f} A{radius:.1f},{radius:.1f} 0 {large} 1 {p[1][0]:.1f},{p[1][1]:.1f} '
+            f'L{p[2][0]:.1f},{p[2][1]:.1f} A{inner:.1f},{inner:.1f} 0 {large} 0 {p[3][0]:.1f},{p[3][1]:.1f} Z" fill="{color}"/>'
+        )
+        angle = end
+    _svg_legend(parts, 40, size - 8)
+    parts.append("</svg>")
+    return "".join(parts)
+
+
+def render_utility_svg(chart: Dict[str, Any], util_id: str, width: int = 640, height: int = 240) -> str:
+    """Render the monthly detail bar chart of one utility as SVG."""
+    detail = chart["utilities"].get(util_id)
+    if detail is None:
+        raise KeyError(util_id)
+    parts = _svg_open(width, height)
+    left, bottom, top_pad = 60, 25, 10
+    plot_w, plot_h = width - left - 10, height - bottom - top_pad
+    top = _nice_top(detail["data"])
+    color = UTILITY_COLORS.get(detail["type"], UTILITY_COLORS["electricity"])
+    slot = plot_w / 12
+    bar_w = slot * 0.6
+    parts.append(f'<text x="{left}" y="{top_pad + 2}" fill="#94a3b8">{detail["unit"]}</text>')
+    for i, (label, value) in enumerate(zip(chart["labels"], detail["data"])):
+        bx = left + slot * i + (slot - bar_w) / 2
+        bh = plot_h * value / top
+        parts.append(f'<rect x="{bx:.1f}" y="{top_pad + plot_h - bh:.1f}" width="{bar_w:.1f}" height="{bh:.1f}" fill="{color}"/>')
+        parts.append(f'<text x="{bx + bar_w / 2:.1f}" y="{height - 8}" text-anchor="middle" fill="#94a3b8">{label}</text>')
+    parts.append("</svg>")
+    return "".join(parts)
+
+
+class ChartCache:
+    """Thread-safe LRU cache of chart payloads keyed by the state digest."""
+
+    def __init__(self, max_entries: int = 32) -> None:
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._max_entries = max_entries
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key_for(raw_state: bytes, year: Optional[int] = None) -> str:
+        digest = hashlib.sha1(raw_state)
+        digest.update(str(year).encode("ascii"))
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            chart = self._entries.get(key)
+            if chart is not None:
+                self._entries.move_to_end(key)
+            return chart
+
+    def get_or_build(self, raw_state: bytes, year: Optional[int] = None) -> Tuple[str, Dict[str, Any]]:
+        """Return ``(key, payload)``, aggregating ``raw_state`` only on a cache miss."""
+        key = self.key_for(raw_state, year)
+        chart = self.get(key)
+        if chart is None:
+            chart = build_chart_data(json.loads(raw_state), year)
+            chart["key"] = key
+            with self._lock:
+                self._entries[key] = chart
+                while len(self._entries) > self._max_entries:
+                    self._entries.popitem(last=False)
+        return key, chart
+
+
+class AggregateSessions:
+    """Live :class:`EnergyAggregate` models, one per dashboard session (LRU)."""
+
+    def __init__(self, max_sessions: int = 16) -> None:
+        self._models: "OrderedDict[str, EnergyAggregate]" = OrderedDict()
+        self._max_sessions = max_sessions
+        self.lock = threading.Lock()
+
+    def load(self, session: str, state: Dict[str, Any]) -> EnergyAggregate:
+        """(Re)build the model of ``session`` from a full project state."""
+        model = EnergyAggregate.from_state(state)
+        with self.lock:
+            self._models[session] = model
+            self._models.move_to_end(session)
+            while len(self._models) > self._max_sessions:
+                self._models.popitem(last=False)
+        return model
+
+    def get(self, session: str) -> Optional[EnergyAggregate]:
+        with self.lock:
+            model = self._models.get(session)
+            if model is not None:
+                self._models.move_to_end(session)
+            return model
+
+
+def main() -> None:
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(
+        description="Precompute dashboard chart data and SVG charts from a project JSON export"
+    )
+    parser.add_argument("project_file", help="Project JSON exported from the web demo")
+    parser.add_argument("-o", "--output-dir", default=".", help="Output directory (default: .)")
+    parser.add_argument("--year", type=int, help="Year to chart (default: the project's selected year)")
+    args = parser.parse_args()
+
+    with open(args.project_file, "r", encoding="utf-8") as f:
+        state = json.load(f)
+    chart = build_chart_data(state, args.year)
+    os.makedirs(args.output_dir, exist_ok=True)
+    outputs = {
+        "charts.json": json.dumps(chart, separators=(",", ":")),
+        "monthly.svg": render_monthly_svg(chart),
+        "share.svg": render_share_svg(chart),
+    }
+    for util_id in chart["utilities"]:
+        outputs[f"utility_{util_id}.svg"] = render_utility_svg(chart, util_id)
+    for name, content in outputs.items():
+        path = os.path.join(args.output_dir, name)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(content)
+        print(f"Written {path}")
+
+
+if __name__ == "__main__":
+    main()
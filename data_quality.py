@@ -0,0 +1,257 @@
+"""
+OpenEurope Data Quality Screening
+---------------------------------
+
+Anomaly rules applied by ``openeurope.normalize_data`` after the numeric
+clean-up, so that implausible readings do not reach ``calculate_savings``:
+
+``negative``
+    a consumption reading below zero;
+``spike``
+    a reading far above the other readings of the same meter in the
+    surrounding window (``spike_window_hours``): more than
+    ``spike_threshold`` standard deviations above their mean, with the
+    deviation floored at ``spike_floor`` times that mean so flat profiles
+    do not turn noise into spikes;
+``stuck``
+    the same non-zero reading repeated for at least ``stuck_hours`` (data
+    with a ``timestamp`` column at least a minute apart only); the first
+    reading of the run is kept;
+``after_gt_before``
+    ``consumption_after`` above ``consumption_before`` by more than
+    ``after_tolerance`` (flagged, not dropped, by default).
+
+Rows are screened per meter (``meter_id`` when present) in file order,
+which is chronological for meter exports. Every verdict depends only on
+the rows within ``spike_window_hours / 2`` and on the run of the row, so
+appended rows can be screened with a tail of the earlier ones
+(:func:`screening_context`). Every rule is a handful of NumPy
+passes over the columns: window sums come from cumulative sums, runs from
+run-length encoding, so the cost is linear in the number of rows whatever
+the window length.
+"""
+
+from typing import Dict, NamedTuple, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+CONSUMPTION_COLUMNS = ("consumption_before", "consumption_after")
+RULES = ("negative", "spike", "stuck", "after_gt_before")
+DEFAULT_INTERVAL_MINUTES = 15
+# Shorter estimated intervals come from timestamps that are not real dates (e.g. epoch numbers)
+MIN_INTERVAL_MINUTES = 1
+
+
+class ScreeningRules(NamedTuple):
+    """Thresholds of the screening rules.
+
+    Durations are converted to rows with the reading interval of the
+    ``timestamp`` column (15 minutes without one, or when the interval is
+    under a minute).
+    """
+
+    spike_window_hours: float = 24.0
+    spike_threshold: float = 6.0
+    spike_floor: float = 0.05
+    stuck_hours: float = 4.0
+    after_tolerance: float = 0.5
+    flag_only: Tuple[str, ...] = ("after_gt_before",)
+
+
+class ScreeningResult(NamedTuple):
+    """Outcome of :func:`screen`.
+
+    ``hits`` maps each rule to the boolean mask of the rows it matched (in
+    the order of the screened DataFrame); ``keep`` is ``False`` for rows
+    matched by a rule that drops.
+    """
+
+    keep: np.ndarray
+    hits: Dict[str, np.ndarray]
+    rules: ScreeningRules
+
+    def dropped(self) -> Dict[str, int]:
+        return {rule: int(mask.sum()) for rule, mask in self.hits.items() if rule not in self.rules.flag_only}
+
+    def flagged(self) -> Dict[str, int]:
+        return {rule: int(mask.sum()) for rule, mask in self.hits.items() if rule in self.rules.flag_only}
+
+    def reasons(self, rows: np.ndarray) -> np.ndarray:
+        """``;``-separated names of the rules matched by each row of ``rows``."""
+        matched = [mask[rows] for mask in self.hits.values()]
+        return np.array(
+            [";".join(rule for rule, hit in zip(self.hits, row) if hit) for row in zip(*matched)],
+            dtype=object
+        )
+
+
+def interval_minutes(df: pd.DataFrame, sample: int = 500) -> float:
+    """Reading interval in minutes, estimated from the first ``sample`` timestamps."""
+    if "timestamp" not in df.columns or len(df) < 2:
+        return DEFAULT_INTERVAL_MINUTES
+    head = df.head(sample)
+    # UTC: offsets that change with daylight saving time cannot be parsed into one zone
+    stamps = pd.to_datetime(head["timestamp"], errors="coerce", utc=True)
+    if "meter_id" in head.columns:
+        steps = stamps.groupby(head["meter_id"].to_numpy()).diff()
+    else:
+        steps = stamps.diff()
+    minutes = steps.dt.total_seconds().div(60).loc[lambda s: s > 0]
+    return float(minutes.median()) if len(minutes) else DEFAULT_INTERVAL_MINUTES
+
+
+def _window_sums(values: np.ndarray, starts: np.ndarray, ends: np.ndarray, half: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Sum of ``values`` over ``i - half .. i + half`` within each group, and the row count."""
+    n = len(values)
+    cumulative = np.concatenate((np.zeros(half + 1), np.cumsum(values)))
+    cumulative = np.concatenate((cumulative, np.full(half, cumulative[-1])))
+    # Whole windows are plain slice differences; only rows near a group edge need clipping
+    totals = cumulative[2 * half + 1:] - cumulative[:n]
+    counts = np.full(n, 2 * half + 1)
+    edge = np.concatenate([
+        np.arange(start, min(start + half, end)) for start, end in zip(starts, ends)
+    ] + [
+        np.arange(max(end - half, start), end) for start, end in zip(starts, ends)
+    ])
+    group = np.searchsorted(starts, edge, side="right") - 1
+    lo = np.maximum(edge - half, starts[group])
+    hi = np.minimum(edge + half + 1, ends[group])
+    totals[edge] = cumulative[hi + half] - cumulative[lo + half]
+    counts[edge] = hi - lo
+    return totals, counts
+
+
+def _window_outliers(
+    values: np.ndarray,
+    starts: np.ndarray,
+    ends: np.ndarray,
+    half: int,
+    threshold: float,
+    floor: float,
+    offset: np.ndarray
+) -> np.ndarray:
+    """Rows above the mean of the other rows of their window by ``threshold`` deviations.
+
+    ``values`` are centred on ``offset``; the deviation is floored at
+    ``floor`` times the (uncentred) window mean.
+    """
+    total, count = _window_sums(values, starts, ends, half)
+    total_sq, _ = _window_sums(values * values, starts, ends, half)
+    # Leave the row itself out, so a spike cannot hide itself
+    count = count - 1
+    total -= values
+    total_sq -= values * values
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = total / count
+        std = np.sqrt(np.maximum(total_sq / count - mean * mean, 0.0))
+    deviation = np.maximum(std, floor * np.abs(mean + offset))
+    return (count >= half) & (values - mean > threshold * deviation)
+
+
+def _stuck(values: np.ndarray, same_group: np.ndarray, min_run: int) -> np.ndarray:
+    """Repeats in runs of at least ``min_run`` identical non-zero values (not their first row)."""
+    repeat = np.concatenate(([False], (values[1:] == values[:-1]) & same_group))
+    run_id = np.cumsum(~repeat)
+    run_length = np.bincount(run_id)[run_id]
+    return (run_length >= min_run) & (values != 0) & repeat
+
+
+def window_rows(rules: ScreeningRules, step: float) -> Tuple[int, int]:
+    """Half spike window and minimum stuck run, in rows of ``step`` minutes."""
+    if not step >= MIN_INTERVAL_MINUTES:
+        step = DEFAULT_INTERVAL_MINUTES
+    half = max(1, int(rules.spike_window_hours * 60 / step) // 2)
+    min_run = max(2, int(np.ceil(rules.stuck_hours * 60 / step)))
+    return half, min_run
+
+
+def screening_context(rules: ScreeningRules, step: float) -> Tuple[int, int]:
+    """Rows per meter to carry between screenings of appended data.
+
+    Returns ``(pending, context)``: the verdicts of the last ``pending``
+    rows of a meter may still change with the rows that follow, and
+    re-screening them needs the ``context`` rows before them.
+    """
+    half, min_run = window_rows(rules, step)
+    return max(half, min_run - 1), max(half, min_run)
+
+
+def screen(
+    df: pd.DataFrame,
+    rules: ScreeningRules = ScreeningRules(),
+    step_minutes: Optional[float] = None
+) -> ScreeningResult:
+    """Apply the screening rules to cleaned, numeric consumption data.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Data with numeric, non-missing ``consumption_before`` and
+        ``consumption_after`` columns, as produced by the first part of
+        ``normalize_data``.
+    rules : ScreeningRules
+        Thresholds and which rules only flag.
+    step_minutes : float, optional
+        Reading interval (default: estimated from the ``timestamp`` column).
+
+    Returns
+    -------
+    ScreeningResult
+        Rows to keep and the rows matched by each rule.
+    """
+    n = len(df)
+    if n == 0:
+        empty = np.zeros(0, dtype=bool)
+        return ScreeningResult(np.ones(0, dtype=bool), {rule: empty for rule in RULES}, rules)
+
+    step = step_minutes or interval_minutes(df)
+    if "meter_id" in df.columns:
+        codes = pd.factorize(df["meter_id"])[0]
+        # Small integer codes let the stable sort use radix sort
+        codes = codes.astype(np.int16 if codes.max() < np.iinfo(np.int16).max else np.int32)
+        order = np.argsort(codes, kind="stable")
+        codes = codes[order]
+    else:
+        codes = np.zeros(n, dtype=np.int64)
+        order = np.arange(n)
+    bounds = np.flatnonzero(np.diff(codes)) + 1
+    starts = np.concatenate(([0], bounds))
+    ends = np.concatenate((bounds, [n]))
+    sizes = ends - starts
+    same_group = codes[1:] == codes[:-1]
+    half, min_run = window_rows(rules, step)
+    # Longer windows and runs than a meter's rows give the same verdicts, without the memory
+    longest = int(sizes.max())
+    half, min_run = min(half, longest), min(min_run, longest + 1)
+    # Without usable timestamps a run of equal readings may last any length of time
+    timed = "timestamp" in df.columns and step >= MIN_INTERVAL_MINUTES
+
+    hits = {rule: np.zeros(n, dtype=bool) for rule in RULES}
+    for column in CONSUMPTION_COLUMNS:
+        values = df[column].to_numpy(dtype=np.float64)[order]
+        hits["negative"] |= values < 0
+        # Centre each meter on its mean: keeps the cumulative sums of squares accurate
+        means = np.add.reduceat(values, starts) / sizes
+        offset = np.repeat(means, sizes)
+        centred = values - offset
+        hits["spike"] |= _window_outliers(
+            centred, starts, ends, half, rules.spike_threshold, rules.spike_floor, offset
+        )
+        if timed:
+            hits["stuck"] |= _stuck(values, same_group, min_run)
+
+    # Back to the row order of ``df``
+    for rule, mask in hits.items():
+        restored = np.empty(n, dtype=bool)
+        restored[order] = mask
+        hits[rule] = restored
+    before = df["consumption_before"].to_numpy(dtype=np.float64)
+    after = df["consumption_after"].to_numpy(dtype=np.float64)
+    hits["after_gt_before"] = after > np.abs(before) * (1 + rules.after_tolerance)
+    keep = np.ones(n, dtype=bool)
+    for rule, mask in hits.items():
+        if rule not in rules.flag_only:
+            keep &= ~mask
+    return ScreeningResult(keep, hits, rules)
+
@@ -66,6 +66,119 @@
     a.remove();
   }
 
+  // ---------- Tabelle virtualizzate ----------
+  // Con molte righe vengono creati solo gli elementi visibili (più un margine):
+  // due righe "spaziatrici" mantengono l'altezza totale e quindi la barra di
+  // scorrimento. Le righe sono riusate per chiave e riscritte solo se il loro
+  // HTML cambia; i click sono gestiti da un solo listener per tabella (onRowAction).
+  const VIRTUAL_MIN_ROWS = 150;
+  const VIRTUAL_OVERSCAN = 10;
+
+  function virtualRows({ body, scroller, rowTag = "tr", rowClass = "", colspan = 1, rowHeight = 44, emptyHtml }) {
+    scroller = scroller || body.closest(".tablewrap") || body;
+    let nodes = new Map(); // chiave -> { el, html }
+    let items = [];
+    let keys = [];
+    let render = null;
+    let frame = 0;
+    let avgHeight = rowHeight;
+    let empty = emptyHtml;
+
+    function spacer() {
+      const el = document.createElement(rowTag);
+      el.className = "vspacer";
+      if (rowTag === "tr") el.innerHTML = `<td colspan="${colspan}"></td>`;
+      return el;
+    }
+    const topSpacer = spacer();
+    const bottomSpacer = spacer();
+    function setSpacer(el, height) {
+      (el.firstElementChild || el).style.height = `${height}px`;
+      el.hidden = height === 0;
+    }
+
+    function draw() {
+      frame = 0;
+      const n = items.length;
+      if (n === 0) {
+        nodes.clear();
+        scroller.classList.remove("virtual");
+        body.innerHTML = empty;
+        return;
+      }
+      const virtual = n > VIRTUAL_MIN_ROWS;
+      scroller.classList.toggle("virtual", virtual);
+      let first = 0;
+      let last = n;
+      if (virtual) {
+        const offset = scroller === body ? 0 : body.offsetTop;
+        first = clamp(Math.floor((scroller.scrollTop - offset) / avgHeight) - VIRTUAL_OVERSCAN, 0, n - 1);
+        // Un pannello nascosto ha altezza 0: si disegna comunque una finestra intera
+        const viewport = Math.max(scroller.clientHeight, window.innerHeight);
+        last = Math.min(n, first + Math.ceil(viewport / avgHeight) + 2 * VIRTUAL_OVERSCAN);
+      }
+      const visible = new Map();
+      const rows = [];
+      for (let i = first; i < last; i++) {
+        const html = render(items[i], i);
+        let node = nodes.get(keys[i]);
+        if (!node) {
+          node = { el: document.createElement(rowTag), html: null };
+          if (rowClass) node.el.className = rowClass;
+        }
+        if (node.html !== html) {
+          node.el.innerHTML = html;
+          node.html = html;
+        }
+        visible.set(keys[i], node);
+        rows.push(node.el);
+      }
+      nodes = visible;
+      setSpacer(topSpacer, Math.round(first * avgHeight));
+      setSpacer(bottomSpacer, Math.round((n - last) * avgHeight));
+      const wanted = [topSpacer, ...rows, bottomSpacer];
+      const current = body.children;
+      if (current.length !== wanted.length || wanted.some((el, i) => current[i] !== el)) {
+        body.replaceChildren(...wanted);
+      }
+      if (virtual) {
+        const measured = rows.reduce((h, el) => h + el.offsetHeight, 0) / rows.length;
+        if (measured > 0) avgHeight = measured;
+      }
+    }
+
+    scroller.addEventListener("scroll", () => {
+      if (!frame && items.length > VIRTUAL_MIN_ROWS) frame = requestAnimationFrame(draw);
+    }, { passive: true });
+
+    return {
+      // keyOf: chiave stabile della voce (le chiavi ripetute ricevono un suffisso #n);
+      // emptyText: riga mostrata se la lista è vuota, se diversa da quella iniziale
+      update(list, keyOf, renderRow, emptyText = emptyHtml) {
+        const seen = new Map();
+        items = list;
+        render = renderRow;
+        empty = emptyText;
+        keys = list.map((item, i) => {
+          const key = String(keyOf(item, i));
+          const count = seen.get(key) || 0;
+          seen.set(key, count + 1);
+          return count ? `${key}#${count}` : key;
+        });
+        if (frame) cancelAnimationFrame(frame);
+        draw();
+      }
+    };
+  }
+
+  // Un solo listener per tabella: il click viene ricondotto all'elemento che corrisponde a selector
+  function onRowAction(body, selector, handler) {
+    body.addEventListener("click", (ev) => {
+      const el = ev.target.closest(selector);
+      if (el && body.contains(el)) handler(el, ev);
+    });
+  }
+
   function setActiveStep(step) {
     // Evidenzia il pulsante di navigazione e mostra/nasconde i pannelli
     console.log("setActiveStep called with step:", step);
@@ -94,7 +207,7 @@
     }
     // render audit log when opening step7
     if (step === 7) renderLog();
-    persist();
+    persist("ui");
   }
 
   function setTab(tab) {
@@ -103,7 +216,8 @@
     $("#tab_manual").classList.toggle("hidden", tab !== "manual");
     $("#tab_csv").classList.toggle("hidden", tab !== "csv");
     $("#tab_pdf").classList.toggle("hidden", tab !== "pdf");
-    persist();
+    if (tab === "pdf") preloadPdfTools();
+    persist("ui");
   }
 
   // ---------- Modal ----------
@@ -135,6 +249,14 @@
   });
 
   // ---------- State ----------
+  // Salvataggio locale: una chiave per sezione dello stato (per energyByYear una
+  // per anno) e in STORAGE_KEY solo l'indice delle sezioni. I progetti troppo
+  // grandi per il localStorage passano a IndexedDB (vedi writeLocal).
+  const LOCAL_LAYOUT = 2;
+  const IDB_NAME = "openeurope_demo";
+  const IDB_STORE = "sections";
+  let localManifest = null;     // indice salvato: { layout, backend, sections, years }
+  const localSizes = new Map(); // chiave -> lunghezza del JSON salvato
   const state = loadState();
 
   function defaultState() {
@@ -171,32 +293,403 @@
     try {
       const raw = localStorage.getItem(STORAGE_KEY);
       if (!raw) return defaultState();
-      const obj = JSON.parse(raw);
-      // minimal validation
-      if (!obj.project || !obj.ui) return defaultState();
-      obj.energy = Array.isArray(obj.energy) ? obj.energy : [];
-      obj.machines = Array.isArray(obj.machines) ? obj.machines : [];
-      obj.autoprod = Array.isArray(obj.autoprod) ? obj.autoprod : [];
-      obj.gasUsers = Array.isArray(obj.gasUsers) ? obj.gasUsers : [];
-      obj.log = Array.isArray(obj.log) ? obj.log : [];
-      return obj;
+      let obj = JSON.parse(raw);
+      if (obj.layout === LOCAL_LAYOUT) {
+        localManifest = obj;
+        // Progetto in IndexedDB: lo carica loadIdbState all'avvio
+        if (obj.backend === "idb") return defaultState();
+        obj = assembleSections(obj, key => localStorage.getItem(key));
+      }
+      return validateState(obj);
     } catch (e) {
       console.warn("State load failed:", e);
       return defaultState();
     }
   }
 
-  function persist() {
+  function validateState(obj) {
+    // minimal validation
+    if (!obj.project || !obj.ui) return defaultState();
+    obj.energy = Array.isArray(obj.energy) ? obj.energy : [];
+    obj.machines = Array.isArray(obj.machines) ? obj.machines : [];
+    obj.autoprod = Array.isArray(obj.autoprod) ? obj.autoprod : [];
+    obj.gasUsers = Array.isArray(obj.gasUsers) ? obj.gasUsers : [];
+    obj.log = Array.isArray(obj.log) ? obj.log : [];
+    return obj;
+  }
+
+  function sectionKey(name, year) {
+    return year === undefined ? `${STORAGE_KEY}/${name}` : `${STORAGE_KEY}/${name}/${year}`;
+  }
+
+  // Ricompone lo stato dalle sezioni elencate nell'indice; read(chiave) -> JSON o null
+  function assembleSections(manifest, read) {
+    const obj = { energyByYear: {} };
+    const load = (key, assign) => {
+      const raw = read(key);
+      if (raw === null || raw === undefined) return;
+      localSizes.set(key, raw.length);
+      assign(JSON.parse(raw));
+    };
+    manifest.sections.forEach(name => load(sectionKey(name), v => { obj[name] = v; }));
+    manifest.years.forEach(year => load(sectionKey("energyByYear", year), v => { obj.energyByYear[year] = v; }));
+    return obj;
+  }
+
+  // ---------- Salvataggio ----------
+  // persist(section, year) segna come modificata una sezione dello stato
+  // (energyByYear anche per un solo anno; senza argomenti: tutto lo stato).
+  // Le modifiche si accumulano e vengono salvate dopo PERSIST_DELAY_MS senza
+  // altre modifiche, al più tardi PERSIST_MAX_WAIT_MS dopo la prima, oppure
+  // subito quando la pagina viene nascosta. Si serializzano solo le sezioni
+  // segnate, sia per il localStorage sia per l'archivio sul server.
+  const PERSIST_DELAY_MS = 300;
+  const PERSIST_MAX_WAIT_MS = 2000;
+  // Oltre questa dimensione (caratteri JSON) il salvataggio locale passa a IndexedDB
+  const LOCAL_STORAGE_BUDGET = 3 * 1024 * 1024;
+  let persistDirty = new Set();
+  let persistTimer = null;
+  let persistFirstAt = 0;
+  let localBackend = localManifest?.backend || "local";
+  let localLoaded = localBackend !== "idb";
+  let idbQueue = Promise.resolve();
+  let idbPromise = null;
+
+  function persist(section, year) {
+    persistDirty.add(!section ? "*" : year === undefined ? section : `${section}/${year}`);
+    schedulePersist();
+  }
+
+  function schedulePersist() {
+    const now = performance.now();
+    if (!persistFirstAt) persistFirstAt = now;
+    clearTimeout(persistTimer);
+    persistTimer = setTimeout(flushPersist, Math.min(PERSIST_DELAY_MS, persistFirstAt + PERSIST_MAX_WAIT_MS - now));
+  }
+
+  function isDirty(dirty, name, year) {
+    return dirty.has("*") || dirty.has(name) || (year !== undefined && dirty.has(`${name}/${year}`));
+  }
+
+  function flushPersist() {
+    clearTimeout(persistTimer);
+    persistTimer = null;
+    persistFirstAt = 0;
+    if (!persistDirty.size) return;
+    if (storeAvailable && !storeFailed) {
+      // Archivio sul server: si inviano solo i record cambiati.
+      // Finché non è aperto le modifiche restano in sospeso.
+      if (!storeReady) return;
+      const dirty = persistDirty;
+      persistDirty = new Set();
+      syncStore(dirty);
+      return;
+    }
+    // Stato in IndexedDB non ancora letto: salvare ora sovrascriverebbe il progetto
+    if (!localLoaded) return;
+    const dirty = persistDirty;
+    persistDirty = new Set();
     try {
-      localStorage.setItem(STORAGE_KEY, JSON.stringify(state));
+      writeLocal(dirty);
     } catch (e) {
       console.warn("State save failed:", e);
     }
   }
 
+  window.addEventListener("pagehide", flushPersist);
+  document.addEventListener("visibilitychange", () => {
+    if (document.visibilityState === "hidden") flushPersist();
+  });
+
+  function writeLocal(dirty) {
+    // Senza indice (primo salvataggio o vecchio formato a blob unico) si riscrive tutto
+    const all = dirty.has("*") || !localManifest;
+    const sections = Object.keys(state).filter(name => name !== "energyByYear");
+    const years = Object.keys(state.energyByYear || {});
+    const entries = [];
+    sections.forEach(name => {
+      if (all || isDirty(dirty, name)) entries.push([sectionKey(name), JSON.stringify(state[name])]);
+    });
+    years.forEach(year => {
+      if (all || isDirty(dirty, "energyByYear", year)) {
+        entries.push([sectionKey("energyByYear", year), JSON.stringify(state.energyByYear[year])]);
+      }
+    });
+    const keep = new Set([...sections.map(name => sectionKey(name)), ...years.map(year => sectionKey("energyByYear", year))]);
+    const stale = [...localSizes.keys()].filter(key => !keep.has(key));
+    entries.forEach(([key, json]) => localSizes.set(key, json.length));
+    stale.forEach(key => localSizes.delete(key));
+    const manifest = { layout: LOCAL_LAYOUT, backend: localBackend, sections, years };
+
+    if (localBackend === "local") {
+      let total = 0;
+      localSizes.forEach(n => { total += n; });
+      let overQuota = total > LOCAL_STORAGE_BUDGET;
+      if (!overQuota) {
+        try {
+          entries.forEach(([key, json]) => localStorage.setItem(key, json));
+        } catch (e) {
+          if (e.name !== "QuotaExceededError") throw e;
+          overQuota = true;
+        }
+      }
+      if (!overQuota || typeof indexedDB === "undefined") {
+        stale.forEach(key => localStorage.removeItem(key));
+        localStorage.setItem(STORAGE_KEY, JSON.stringify(manifest));
+        localManifest = manifest;
+        return;
+      }
+      console.info("Progetto grande: salvataggio spostato in IndexedDB");
+      localBackend = "idb";
+      writeLocal(new Set(["*"]));
+      return;
+    }
+
+    // IndexedDB: l'indice in localStorage cambia solo dopo che i dati sono scritti
+    const moving = localManifest?.backend !== "idb";
+    idbQueue = idbQueue
+      .then(() => idbWrite(entries, stale))
+      .then(() => {
+        localStorage.setItem(STORAGE_KEY, JSON.stringify(manifest));
+        localManifest = manifest;
+        if (moving) keep.forEach(key => localStorage.removeItem(key));
+      })
+      .catch(e => console.warn("State save failed:", e));
+  }
+
+  function openIdb() {
+    if (!idbPromise) {
+      idbPromise = new Promise((resolve, reject) => {
+        const req = indexedDB.open(IDB_NAME, 1);
+        req.onupgradeneeded = () => req.result.createObjectStore(IDB_STORE);
+        req.onsuccess = () => resolve(req.result);
+        req.onerror = () => reject(req.error);
+      });
+    }
+    return idbPromise;
+  }
+
+  async function idbWrite(entries, removed) {
+    const db = await openIdb();
+    await new Promise((resolve, reject) => {
+      const tx = db.transaction(IDB_STORE, "readwrite");
+      const store = tx.objectStore(IDB_STORE);
+      entries.forEach(([key, json]) => store.put(json, key));
+      removed.forEach(key => store.delete(key));
+      tx.oncomplete = () => resolve();
+      tx.onerror = tx.onabort = () => reject(tx.error);
+    });
+  }
+
+  // Carica il progetto salvato in IndexedDB (all'avvio, se l'indice lo indica)
+  async function loadIdbState() {
+    if (localLoaded) return false;
+    try {
+      const db = await openIdb();
+      const values = await new Promise((resolve, reject) => {
+        const tx = db.transaction(IDB_STORE, "readonly");
+        const store = tx.objectStore(IDB_STORE);
+        const keys = store.getAllKeys();
+        const all = store.getAll();
+        tx.oncomplete = () => resolve(new Map(keys.result.map((key, i) => [key, all.result[i]])));
+        tx.onerror = tx.onabort = () => reject(tx.error);
+      });
+      const obj = validateState(assembleSections(localManifest, key => values.get(key)));
+      Object.keys(state).forEach(k => { delete state[k]; });
+      Object.assign(state, obj);
+      localLoaded = true;
+      schedulePersist();
+      return true;
+    } catch (e) {
+      // Il salvataggio locale resta sospeso per non sovrascrivere il progetto
+      console.warn("Lettura del progetto da IndexedDB non riuscita:", e);
+      return false;
+    }
+  }
+
+  // ---------- Archivio progetto (server) ----------
+  // Servita da run_demo.py, la demo salva il progetto in un database SQLite
+  // (/api/project) invece che nel blob localStorage: ogni persist() confronta
+  // lo stato con l'ultima copia inviata e spedisce solo sezioni, voci e letture
+  // mensili modificate. Aperta da file resta il salvataggio in localStorage.
+  const storeAvailable = location.protocol.startsWith("http");
+  const STORE_URL = `/api/project?id=${encodeURIComponent(STORAGE_KEY)}`;
+  const STORE_LIST_SECTIONS = ["utilities", "machines", "autoprod", "gasUsers"];
+  let storeReady = false;
+  let storeFailed = false;
+  let storeQueue = Promise.resolve();
+  let storeSnapshot = null;
+
+  // Chiavi univoche per le voci di una lista (stessa regola di project_store.keyed)
+  function storeKeyed(list, keyOf, fn) {
+    const seen = {};
+    list.forEach((entry, pos) => {
+      let key = String(keyOf(entry) ?? pos);
+      if (seen[key]) key += "#" + seen[key]++;
+      else seen[key] = 1;
+      fn(key, pos, entry);
+    });
+  }
+
+  function storeEnergyYear(byUtil, fn) {
+    const groups = Array.isArray(byUtil) ? { "": byUtil } : (byUtil || {});
+    Object.entries(groups).forEach(([utilId, list]) => {
+      if (!Array.isArray(list)) return;
+      storeKeyed(list, r => r?.month, (month, pos, rec) => fn(utilId, month, pos, rec));
+    });
+  }
+
+  // Impronta dello stato: JSON per sezione, per voce e per lettura mensile
+  // (energy: anno -> record). Con `prev` si ricalcolano solo le sezioni e gli
+  // anni segnati in `dirty`; gli altri riusano l'impronta precedente.
+  function takeStoreSnapshot(dirty = new Set(["*"]), prev = null) {
+    const full = !prev || dirty.has("*");
+    const snap = { sections: {}, items: {}, energy: new Map(), logLen: state.log.length, logTail: state.log[0] };
+    Object.keys(state).forEach(name => {
+      if (name === "energyByYear" || name === "log" || STORE_LIST_SECTIONS.includes(name)) return;
+      const reuse = !full && !isDirty(dirty, name) && name in prev.sections;
+      snap.sections[name] = reuse ? prev.sections[name] : JSON.stringify(state[name]);
+    });
+    STORE_LIST_SECTIONS.forEach(section => {
+      if (!full && !isDirty(dirty, section)) {
+        snap.items[section] = prev.items[section];
+        return;
+      }
+      const items = new Map();
+      storeKeyed(state[section] || [], it => it?.id, (key, pos, it) => items.set(key, [pos, JSON.stringify(it)]));
+      snap.items[section] = items;
+    });
+    Object.entries(state.energyByYear || {}).forEach(([year, byUtil]) => {
+      if (!full && !isDirty(dirty, "energyByYear", year) && prev.energy.has(year)) {
+        snap.energy.set(year, prev.energy.get(year));
+        return;
+      }
+      const records = new Map();
+      storeEnergyYear(byUtil, (utilId, month, pos, rec) => {
+        records.set(`${utilId}\u0000${month}`, [pos, JSON.stringify(rec)]);
+      });
+      snap.energy.set(year, records);
+    });
+    return snap;
+  }
+
+  function diffStoreSnapshot(prev, next) {
+    const changes = { sections: {}, items: {}, energy: { upsert: [], delete: [] }, log: {} };
+    let changed = false;
+    Object.entries(next.sections).forEach(([name, json]) => {
+      if (prev.sections[name] !== json) {
+        changes.sections[name] = state[name];
+        changed = true;
+      }
+    });
+    STORE_LIST_SECTIONS.forEach(section => {
+      const before = prev.items[section];
+      if (before === next.items[section]) return;
+      const ops = { upsert: [], delete: [] };
+      next.items[section].forEach(([pos, json], key) => {
+        const old = before.get(key);
+        if (!old || old[0] !== pos || old[1] !== json) ops.upsert.push([key, pos, JSON.parse(json)]);
+      });
+      before.forEach((_, key) => { if (!next.items[section].has(key)) ops.delete.push(key); });
+      if (ops.upsert.length || ops.delete.length) {
+        changes.items[section] = ops;
+        changed = true;
+      }
+    });
+    next.energy.forEach((records, year) => {
+      const before = prev.energy.get(year);
+      if (before === records) return;
+      records.forEach(([pos, json], key) => {
+        const old = before && before.get(key);
+        if (!old || old[0] !== pos || old[1] !== json) {
+          changes.energy.upsert.push([year, ...key.split("\u0000"), pos, JSON.parse(json)]);
+        }
+      });
+      if (before) {
+        before.forEach((_, key) => {
+          if (!records.has(key)) changes.energy.delete.push([year, ...key.split("\u0000")]);
+        });
+      }
+    });
+    prev.energy.forEach((records, year) => {
+      if (next.energy.has(year)) return;
+      records.forEach((_, key) => changes.energy.delete.push([year, ...key.split("\u0000")]));
+    });
+    if (changes.energy.upsert.length || changes.energy.delete.length) changed = true;
+    // Il log cresce in testa (unshift): se la coda già inviata è intatta basta appendere
+    const added = next.logLen - prev.logLen;
+    if (added >= 0 && (prev.logLen === 0 || state.log[added] === prev.logTail)) {
+      if (added > 0) {
+        changes.log.append = state.log.slice(0, added).reverse();
+        changed = true;
+      }
+    } else {
+      changes.log = { reset: true, append: state.log.slice().reverse() };
+      changed = true;
+    }
+    return changed ? changes : null;
+  }
+
+  function syncStore(dirty) {
+    const next = takeStoreSnapshot(dirty, storeSnapshot);
+    const changes = diffStoreSnapshot(storeSnapshot, next);
+    storeSnapshot = next;
+    if (!changes) return;
+    const body = JSON.stringify(changes);
+    storeQueue = storeQueue
+      .then(() => fetch(STORE_URL, {
+        method: "PATCH",
+        headers: { "Content-Type": "application/json" },
+        body,
+        // Un salvataggio partito alla chiusura della pagina deve poter terminare (max 64 KB)
+        keepalive: body.length < 60000
+      }))
+      .then(r => { if (!r.ok) throw new Error(`HTTP ${r.status}`); })
+      .catch(e => {
+        console.warn("Salvataggio su server non riuscito, uso localStorage:", e);
+        storeFailed = true;
+        persist();
+      });
+  }
+
+  // Carica il progetto dal server; al primo avvio vi trasferisce quello in localStorage
+  async function openProjectStore() {
+    if (!storeAvailable) return false;
+    try {
+      const r = await fetch(STORE_URL);
+      if (r.status === 404) {
+        const snap = takeStoreSnapshot();
+        const up = await fetch(STORE_URL, {
+          method: "POST",
+          headers: { "Content-Type": "application/json" },
+          body: JSON.stringify(state)
+        });
+        if (!up.ok) throw new Error(`HTTP ${up.status}`);
+        storeSnapshot = snap;
+        storeReady = true;
+        // Modifiche fatte durante il trasferimento
+        persist();
+        return false;
+      }
+      if (!r.ok) throw new Error(`HTTP ${r.status}`);
+      const obj = await r.json();
+      Object.keys(state).forEach(k => { delete state[k]; });
+      Object.assign(state, defaultState(), obj);
+      storeSnapshot = takeStoreSnapshot();
+      storeReady = true;
+      return true;
+    } catch (e) {
+      console.warn("Archivio progetto non disponibile, uso localStorage:", e);
+      storeFailed = true;
+      // Salva in locale le modifiche fatte nel frattempo
+      schedulePersist();
+      return false;
+    }
+  }
+
   function log(msg) {
     state.log.unshift({ ts: nowISO(), msg });
-    persist();
+    persist("log");
   }
 
   // ---------- Project ----------
@@ -342,22 +835,19 @@
     refreshManualUtilitySelector();
   }
 
+  const utilityRows = virtualRows({
+    body: $("#utilitiesTable tbody"),
+    colspan: 5,
+    emptyHtml: `<tr><td colspan="6" class="muted small">Nessuna utenza registrata.</td></tr>`
+  });
+
   function renderUtilitiesTable() {
-    const tbody = $("#utilitiesTable tbody");
-    tbody.innerHTML = "";
-    if (state.utilities.length === 0) {
-      const tr = document.createElement("tr");
-      tr.innerHTML = `<td colspan="6" class="muted small">Nessuna utenza registrata.</td>`;
-      tbody.appendChild(tr);
-      return;
-    }
-    for (const u of state.utilities) {
-      const year = state.ui.selectedYear || new Date().getFullYear();
+    const year = state.ui.selectedYear || new Date().getFullYear();
+    utilityRows.update(state.utilities, u => u.id, (u) => {
       const yearData = state.energyByYear[year]?.[u.id] || [];
       const typeLabel = u.type === 'electricity' ? 'Elettrica' : 'Gas';
       const id = u.pod || u.pdr;
-      const tr = document.createElement("tr");
-      tr.innerHTML = `
+      return `
         <td><b>${typeLabel}</b></td>
         <td>${escapeHtml(id)}</td>
         <td>${escapeHtml(u.description)}</td>
@@ -367,49 +857,44 @@
           <button class="ghost smallbtn" data-del-utility="${u.id}">Elimina</button>
         </td>
       `;
-      tbody.appendChild(tr);
-    }
-    
-    // Edit button handlers
-    tbody.querySelectorAll("[data-edit-utility]").forEach(btn => {
-      btn.addEventListener("click", async () => {
-        const utilId = btn.dataset.editUtility;
-        const util = state.utilities.find(u => u.id === utilId);
-        if (!util) return;
-        
-        const isElec = util.type === 'electricity';
-        let newValue;
-        if (isElec) {
-          newValue = prompt(`Modifica POD (attuale: ${util.pod}):`, util.pod);
-          if (newValue !== null) {
-            util.pod = newValue;
-            log(`Aggiornato POD: ${newValue}`);
-          }
-        } else {
-          newValue = prompt(`Modifica PDR (attuale: ${util.pdr}):`, util.pdr);
-          if (newValue !== null) {
-            util.pdr = newValue;
-            log(`Aggiornato PDR: ${newValue}`);
-          }
-        }
-        if (newValue !== null) {
-          persist();
-          renderUtilitiesTable();
-          refreshManualUtilitySelector();
-        }
-      });
-    });
-    
-    // Delete button handlers
-    tbody.querySelectorAll("[data-del-utility]").forEach(btn => {
-      btn.addEventListener("click", async () => {
-        const id = btn.dataset.delUtility;
-        const ok = await confirmModal("Eliminare utenza?", "Questa azione elimina tutti i consumi associati.", "Elimina", "Annulla");
-        if (ok) deleteUtility(id);
-      });
     });
   }
 
+  // Edit button handler
+  onRowAction($("#utilitiesTable tbody"), "[data-edit-utility]", (btn) => {
+    const utilId = btn.dataset.editUtility;
+    const util = state.utilities.find(u => u.id === utilId);
+    if (!util) return;
+    
+    const isElec = util.type === 'electricity';
+    let newValue;
+    if (isElec) {
+      newValue = prompt(`Modifica POD (attuale: ${util.pod}):`, util.pod);
+      if (newValue !== null) {
+        util.pod = newValue;
+        log(`Aggiornato POD: ${newValue}`);
+      }
+    } else {
+      newValue = prompt(`Modifica PDR (attuale: ${util.pdr}):`, util.pdr);
+      if (newValue !== null) {
+        util.pdr = newValue;
+        log(`Aggiornato PDR: ${newValue}`);
+      }
+    }
+    if (newValue !== null) {
+      persist();
+      renderUtilitiesTable();
+      refreshManualUtilitySelector();
+    }
+  });
+
+  // Delete button handler
+  onRowAction($("#utilitiesTable tbody"), "[data-del-utility]", async (btn) => {
+    const id = btn.dataset.delUtility;
+    const ok = await confirmModal("Eliminare utenza?", "Questa azione elimina tutti i consumi associati.", "Elimina", "Annulla");
+    if (ok) deleteUtility(id);
+  });
+
   function refreshManualUtilitySelector() {
     const sel = $("#manualUtility");
     const current = state.ui.selectedUtility;
@@ -560,9 +1045,9 @@
     }
     
     existing.data[field] = round2(value);
-    persist();
+    persist("energyByYear", year);
     renderEnergyTable();
-    refreshDashboard();
+    recordChanged(year, utilId, month);
   }
 
   function saveMonthDataAutomatically(e) {
@@ -585,9 +1070,9 @@
     }
     
     existing.data[field] = round2(value);
-    persist();
+    persist("energyByYear", year);
     renderEnergyTable();
-    refreshDashboard();
+    recordChanged(year, utilId, month);
   }
 
   $("#btnAddUtility").addEventListener("click", async () => {
@@ -606,7 +1091,7 @@
     state.ui.selectedUtility = e.target.value;
     updateManualFieldsForUtility();
     renderUtilityDetailChart();
-    persist();
+    persist("ui");
   });
 
   $("#btnLoadDemo").addEventListener("click", async () => {
@@ -815,7 +1300,7 @@
       
       persist();
       renderEnergyTable();
-      refreshDashboard();
+      recordChanged(year, utilId, m);
       $("#manualMonth").value = "";
       $("#manualNote").value = "";
       $("#manualF1").value = "";
@@ -837,9 +1322,13 @@
     });
   }
 
+  const energyRows = virtualRows({
+    body: $("#energyTable tbody"),
+    colspan: 5,
+    rowHeight: 58
+  });
+
   function renderEnergyTable() {
-    const tbody = $("#energyTable tbody");
-    tbody.innerHTML = "";
     const year = state.ui.selectedYear || new Date().getFullYear();
     
     const allData = [];
@@ -850,16 +1339,9 @@
       }
     }
     
-    if (allData.length === 0) {
-      const tr = document.createElement("tr");
-      tr.innerHTML = `<td colspan="7" class="muted small">Nessun dato inserito per l'anno ${year}.</td>`;
-      tbody.appendChild(tr);
-      return;
-    }
-    
     allData.sort((a, b) => a.month.localeCompare(b.month));
     
-    for (const r of allData) {
+    energyRows.update(allData, r => `${r.utilityId}|${r.month}`, (r) => {
       const typeLabel = r.utility.type === 'electricity' ? 'Elettrica' : 'Gas';
       const utilLabel = r.utility.description || (r.utility.pod || r.utility.pdr);
       let dataStr = '';
@@ -879,8 +1361,7 @@
         dataStr = `Gas: ${fmtNumber(tot)}`;
       }
       
-      const tr = document.createElement("tr");
-      tr.innerHTML = `
+      return `
         <td>${typeLabel}<br><small>${escapeHtml(utilLabel)}</small></td>
         <td><b>${r.month}</b></td>
         <td>${dataStr}${extraInfo}</td>
@@ -889,45 +1370,245 @@
           <button class="ghost smallbtn" data-del-energy="${r.utilityId}" data-month="${r.month}">Elimina</button>
         </td>
       `;
-      tbody.appendChild(tr);
+    }, `<tr><td colspan="7" class="muted small">Nessun dato inserito per l'anno ${year}.</td></tr>`);
+  }
+
+  onRowAction($("#energyTable tbody"), "[data-del-energy]", async (btn) => {
+    const utilId = btn.dataset.delEnergy;
+    const month = btn.dataset.month;
+    const ok = await confirmModal("Eliminare riga?", `Eliminare i consumi del mese <b>${month}</b>?`, "Elimina", "Annulla");
+    if (!ok) return;
+    const year = state.ui.selectedYear || new Date().getFullYear();
+    state.energyByYear[year][utilId] = state.energyByYear[year][utilId].filter(r => r.month !== month);
+    log(`Eliminata riga consumi ${month}`);
+    persist("energyByYear", year);
+    renderEnergyTable();
+    recordChanged(year, utilId, month);
+  });
+
+  // ---------- Web Worker per CSV e aggregazioni ----------
+  // Il parsing dei CSV (PapaParse) e le somme mensili girano in un worker,
+  // così l'interfaccia resta reattiva anche con file grandi. Il worker usa le
+  // stesse funzioni di questo file (il sorgente viene copiato in un Blob) e
+  // restituisce le colonne numeriche come Float64Array trasferibili.
+  // Aprendo la demo da file, o se il worker non parte, si lavora come prima
+  // sul thread principale.
+  const CSV_PARSERS = { energy: parseCsvRows, auto: parseAutoCsvRows, gas: parseGasCsvRows };
+  const CSV_NUMERIC_FIELDS = {
+    energy: ["f1", "f2", "f3", "gas"],
+    auto: ["produced", "self"],
+    gas: ["power", "hoursYear", "util"]
+  };
+  const CSV_CHUNK_SIZE = 512 * 1024;
+  // Sotto questa soglia di letture l'andata e ritorno verso il worker costa più della somma
+  const WORKER_MIN_RECORDS = 2000;
+  let dataWorker = null;
+  let dataWorkerFailed = false;
+  let dataWorkerSeq = 0;
+  const dataWorkerJobs = new Map();
+  const csvLoadSeq = {};
+
+  // Righe interpretate -> colonne: i campi numerici come Float64Array
+  // (NaN = valore mancante), gli altri come array semplici.
+  function packRows(rows, numericFields) {
+    const n = rows.length;
+    const numbers = {};
+    const strings = {};
+    const ok = new Uint8Array(n);
+    for (const f of numericFields) numbers[f] = new Float64Array(n);
+    for (let i = 0; i < n; i++) {
+      const r = rows[i];
+      for (const k of Object.keys(r)) {
+        if (k === "_ok") continue;
+        if (numbers[k]) numbers[k][i] = r[k] === null || r[k] === undefined ? NaN : r[k];
+        else (strings[k] || (strings[k] = new Array(n)))[i] = r[k];
+      }
+      ok[i] = r._ok ? 1 : 0;
     }
+    return { length: n, numbers, strings, ok };
+  }
 
-    tbody.querySelectorAll("[data-del-energy]").forEach(btn => {
-      btn.addEventListener("click", async () => {
-        const utilId = btn.dataset.delEnergy;
-        const month = btn.dataset.month;
-        const ok = await confirmModal("Eliminare riga?", `Eliminare i consumi del mese <b>${month}</b>?`, "Elimina", "Annulla");
-        if (!ok) return;
-        const year = state.ui.selectedYear || new Date().getFullYear();
-        state.energyByYear[year][utilId] = state.energyByYear[year][utilId].filter(r => r.month !== month);
-        log(`Eliminata riga consumi ${month}`);
-        persist();
-        renderEnergyTable();
-        refreshDashboard();
+  function unpackRows(packed) {
+    const rows = new Array(packed.length);
+    for (let i = 0; i < packed.length; i++) {
+      const r = {};
+      for (const k in packed.strings) r[k] = packed.strings[k][i];
+      for (const k in packed.numbers) {
+        const v = packed.numbers[k][i];
+        r[k] = Number.isNaN(v) ? null : v;
+      }
+      r._ok = packed.ok[i] === 1;
+      rows[i] = r;
+    }
+    return rows;
+  }
+
+  // Corpo del worker: eseguito nel worker, non in questa pagina
+  function dataWorkerMain() {
+    const parsers = { energy: parseCsvRows, auto: parseAutoCsvRows, gas: parseGasCsvRows };
+    let papaUrl = null;
+    const fail = (id, e) => self.postMessage({ id, type: "error", message: String((e && e.message) || e) });
+    self.onmessage = (ev) => {
+      const msg = ev.data;
+      try {
+        if (msg.type === "parse") {
+          if (papaUrl !== msg.papaUrl) {
+            importScripts(msg.papaUrl);
+            papaUrl = msg.papaUrl;
+          }
+          Papa.parse(msg.file, {
+            header: true,
+            skipEmptyLines: true,
+            chunkSize: msg.chunkSize,
+            chunk: (res) => {
+              const packed = packRows(parsers[msg.kind](res.data || []), msg.numericFields);
+              const buffers = [packed.ok.buffer, ...Object.values(packed.numbers).map(a => a.buffer)];
+              self.postMessage({ id: msg.id, type: "rows", packed }, buffers);
+            },
+            complete: () => self.postMessage({ id: msg.id, type: "done" }),
+            error: (err) => fail(msg.id, err)
+          });
+        } else if (msg.type === "aggregate") {
+          const sums = sumEnergy(msg.year, msg.utilities, msg.yearData);
+          const kpi = sumPowerKpi(msg.utilities, msg.kpiYearData);
+          self.postMessage({ id: msg.id, type: "done", sums, kpi }, [sums.buffer]);
+        }
+      } catch (e) {
+        fail(msg.id, e);
+      }
+    };
+  }
+
+  function getDataWorker() {
+    if (dataWorker || dataWorkerFailed) return dataWorker;
+    if (!location.protocol.startsWith("http") || typeof Worker === "undefined") {
+      dataWorkerFailed = true;
+      return null;
+    }
+    const source = [
+      safeFloat, normalizeHeader, normalizeMonth, computeHoursYear,
+      parseCsvRows, parseAutoCsvRows, parseGasCsvRows,
+      packRows, sumEnergy, sumPowerKpi
+    ].map(fn => fn.toString()).join("\n") + `\n(${dataWorkerMain.toString()})();\n`;
+    try {
+      dataWorker = new Worker(URL.createObjectURL(new Blob([source], { type: "text/javascript" })));
+    } catch (e) {
+      console.warn("Worker dati non disponibile, elaborazione sul thread principale:", e);
+      dataWorkerFailed = true;
+      return null;
+    }
+    dataWorker.onmessage = (ev) => {
+      const job = dataWorkerJobs.get(ev.data.id);
+      if (job) job(ev.data);
+    };
+    dataWorker.onerror = (ev) => {
+      ev.preventDefault();
+      console.warn("Worker dati interrotto, elaborazione sul thread principale:", ev.message);
+      dataWorkerFailed = true;
+      dataWorker.terminate();
+      dataWorker = null;
+      const jobs = [...dataWorkerJobs.values()];
+      dataWorkerJobs.clear();
+      jobs.forEach(job => job({ type: "error", message: ev.message || "worker interrotto" }));
+    };
+    return dataWorker;
+  }
+
+  // Invia un lavoro al worker; onMessage riceve i risultati parziali
+  function runDataWorker(worker, msg, onMessage) {
+    const id = ++dataWorkerSeq;
+    return new Promise((resolve, reject) => {
+      dataWorkerJobs.set(id, (reply) => {
+        if (reply.type === "rows") {
+          onMessage(reply);
+          return;
+        }
+        dataWorkerJobs.delete(id);
+        if (reply.type === "error") reject(new Error(reply.message));
+        else resolve(reply);
+      });
+      worker.postMessage({ ...msg, id });
+    });
+  }
+
+  function parseCsvOnMain(file, kind) {
+    return new Promise((resolve, reject) => {
+      Papa.parse(file, {
+        header: true,
+        skipEmptyLines: true,
+        complete: (res) => resolve(CSV_PARSERS[kind](res.data || [])),
+        error: reject
       });
     });
   }
 
+  // Legge un CSV e consegna le righe interpretate a blocchi (onRows). Se il
+  // worker fallisce a metà si rilegge il file qui, saltando le righe già consegnate.
+  async function parseCsvFile(file, kind, onRows) {
+    const papaUrl = document.querySelector('script[src*="papaparse"]')?.src;
+    const worker = papaUrl ? getDataWorker() : null;
+    let delivered = 0;
+    if (worker) {
+      try {
+        await runDataWorker(worker, {
+          type: "parse", kind, file, papaUrl,
+          chunkSize: CSV_CHUNK_SIZE,
+          numericFields: CSV_NUMERIC_FIELDS[kind]
+        }, (reply) => {
+          const rows = unpackRows(reply.packed);
+          delivered += rows.length;
+          onRows(rows);
+        });
+        return;
+      } catch (e) {
+        console.warn("Parsing CSV nel worker non riuscito, riprovo sul thread principale:", e);
+      }
+    }
+    const rows = await parseCsvOnMain(file, kind);
+    onRows(delivered ? rows.slice(delivered) : rows);
+  }
+
+  // Anteprima a blocchi: le righe arrivano dal worker e la tabella viene
+  // ridisegnata al massimo una volta per frame; onRows(rows, done) riceve
+  // tutte le righe lette finora. Una nuova selezione annulla la precedente.
+  function streamCsvPreview(file, kind, onRows) {
+    const seq = csvLoadSeq[kind] = (csvLoadSeq[kind] || 0) + 1;
+    const current = () => seq === csvLoadSeq[kind];
+    let rows = [];
+    let frame = 0;
+    onRows(rows, false);
+    return parseCsvFile(file, kind, (chunk) => {
+      if (!current()) return;
+      rows = rows.concat(chunk);
+      if (!frame) {
+        frame = requestAnimationFrame(() => {
+          frame = 0;
+          if (current()) onRows(rows, false);
+        });
+      }
+    }).then(() => {
+      if (frame) cancelAnimationFrame(frame);
+      if (current()) onRows(rows, true);
+    }, (err) => {
+      if (current()) throw err;
+    });
+  }
+
   // CSV import preview state
   let csvPreviewRows = [];
 
   $("#fileCSV").addEventListener("change", (ev) => {
     const file = ev.target.files?.[0];
     if (!file) return;
-    Papa.parse(file, {
-      header: true,
-      skipEmptyLines: true,
-      complete: (res) => {
-        csvPreviewRows = parseCsvRows(res.data || []);
-        renderCsvPreview();
-        $("#btnConfirmCSVImport").disabled = csvPreviewRows.length === 0;
-        $("#btnClearCSVPreview").disabled = csvPreviewRows.length === 0;
-        log(`Caricato CSV: ${file.name} (anteprima)`);
-      },
-      error: (err) => {
-        console.error(err);
-        alert("Errore nella lettura del CSV.");
-      }
+    streamCsvPreview(file, "energy", (rows, done) => {
+      csvPreviewRows = rows;
+      renderCsvPreview();
+      $("#btnConfirmCSVImport").disabled = !done || rows.length === 0;
+      $("#btnClearCSVPreview").disabled = !done || rows.length === 0;
+      if (done) log(`Caricato CSV: ${file.name} (anteprima)`);
+    }).catch((err) => {
+      console.error(err);
+      alert("Errore nella lettura del CSV.");
     });
   });
 
@@ -1057,7 +1738,7 @@
     const csvPane = $("#autotab_csv");
     if (manualPane) manualPane.classList.toggle("hidden", tab !== "manual");
     if (csvPane) csvPane.classList.toggle("hidden", tab !== "csv");
-    persist();
+    persist("ui");
   }
 
   $$("#autoTabs .subtab").forEach(btn => {
@@ -1131,22 +1812,17 @@
   $("#fileAutoCSV")?.addEventListener("change", (ev) => {
     const file = ev.target.files?.[0];
     if (!file) return;
-    Papa.parse(file, {
-      header: true,
-      skipEmptyLines: true,
-      complete: (res) => {
-        autoPreviewRows = parseAutoCsvRows(res.data || []);
-        renderAutoPreview();
-        const confirmBtn = $("#btnConfirmAutoCSVImport");
-        const clearBtn = $("#btnClearAutoCSVPreview");
-        if (confirmBtn) confirmBtn.disabled = autoPreviewRows.length === 0;
-        if (clearBtn) clearBtn.disabled = autoPreviewRows.length === 0;
-        log(`Caricato CSV autoproduzione: ${file.name} (anteprima)`);
-      },
-      error: (err) => {
-        console.error(err);
-        alert("Errore nella lettura del CSV autoproduzione.");
-      }
+    streamCsvPreview(file, "auto", (rows, done) => {
+      autoPreviewRows = rows;
+      renderAutoPreview();
+      const confirmBtn = $("#btnConfirmAutoCSVImport");
+      const clearBtn = $("#btnClearAutoCSVPreview");
+      if (confirmBtn) confirmBtn.disabled = !done || rows.length === 0;
+      if (clearBtn) clearBtn.disabled = !done || rows.length === 0;
+      if (done) log(`Caricato CSV autoproduzione: ${file.name} (anteprima)`);
+    }).catch((err) => {
+      console.error(err);
+      alert("Errore nella lettura del CSV autoproduzione.");
     });
   });
 
@@ -1264,7 +1940,7 @@
     const csvPane = $("#gastab_csv");
     if (manualPane) manualPane.classList.toggle("hidden", tab !== "manual");
     if (csvPane) csvPane.classList.toggle("hidden", tab !== "csv");
-    persist();
+    persist("ui");
   }
 
   $$("#gasTabs .subtab").forEach(btn => {
@@ -1364,22 +2040,17 @@
   $("#fileGasCSV")?.addEventListener("change", (ev) => {
     const file = ev.target.files?.[0];
     if (!file) return;
-    Papa.parse(file, {
-      header: true,
-      skipEmptyLines: true,
-      complete: (res) => {
-        gasPreviewRows = parseGasCsvRows(res.data || []);
-        renderGasPreview();
-        const confirmBtn = $("#btnConfirmGasCSVImport");
-        const clearBtn = $("#btnClearGasCSVPreview");
-        if (confirmBtn) confirmBtn.disabled = gasPreviewRows.length === 0;
-        if (clearBtn) clearBtn.disabled = gasPreviewRows.length === 0;
-        log(`Caricato CSV impianti termici: ${file.name} (anteprima)`);
-      },
-      error: (err) => {
-        console.error(err);
-        alert("Errore nella lettura del CSV impianti termici.");
-      }
+    streamCsvPreview(file, "gas", (rows, done) => {
+      gasPreviewRows = rows;
+      renderGasPreview();
+      const confirmBtn = $("#btnConfirmGasCSVImport");
+      const clearBtn = $("#btnClearGasCSVPreview");
+      if (confirmBtn) confirmBtn.disabled = !done || rows.length === 0;
+      if (clearBtn) clearBtn.disabled = !done || rows.length === 0;
+      if (done) log(`Caricato CSV impianti termici: ${file.name} (anteprima)`);
+    }).catch((err) => {
+      console.error(err);
+      alert("Errore nella lettura del CSV impianti termici.");
     });
   });
 
@@ -1487,14 +2158,54 @@
   }
 
   // ---------- PDF + OCR extraction ----------
+  // Librerie pesanti caricate solo quando servono (import bollette, export PDF).
+  // build_demo.py sostituisce questi URL con le copie locali in vendor/.
+  const LIBS = {
+    pdfjs: "https://cdn.jsdelivr.net/npm/pdfjs-dist@4.10.38/build/pdf.min.js",
+    pdfjsWorker: "https://cdn.jsdelivr.net/npm/pdfjs-dist@4.10.38/build/pdf.worker.min.js",
+    tesseract: "https://cdn.jsdelivr.net/npm/tesseract.js@5.1.0/dist/tesseract.min.js",
+    tesseractWorker: "https://cdn.jsdelivr.net/npm/tesseract.js@5.1.0/dist/worker.min.js",
+    tesseractCore: "https://cdn.jsdelivr.net/npm/tesseract.js-core@5.1.0",
+    tesseractLang: "https://tessdata.projectnaptha.com/4.0.0",
+    html2pdf: "https://cdn.jsdelivr.net/npm/html2pdf.js@0.10.1/dist/html2pdf.bundle.min.js"
+  };
+  const libPromises = {};
+
+  function libUrl(key) {
+    // URL assoluto: i worker di tesseract risolvono i percorsi dalla propria posizione
+    return new URL(LIBS[key], document.baseURI).href;
+  }
+
+  function loadLib(key) {
+    if (!libPromises[key]) {
+      libPromises[key] = new Promise((resolve, reject) => {
+        const s = document.createElement("script");
+        s.src = libUrl(key);
+        s.onload = () => resolve();
+        s.onerror = () => {
+          delete libPromises[key];
+          reject(new Error(`Impossibile caricare ${LIBS[key]}`));
+        };
+        document.head.appendChild(s);
+      });
+    }
+    return libPromises[key];
+  }
+
+  // All'apertura della scheda PDF: scarica in anticipo pdf.js e tesseract
+  function preloadPdfTools() {
+    Promise.all([loadLib("pdfjs"), loadLib("tesseract")]).catch(e => console.warn(e));
+  }
+
   // pdf.js global
   let pdfjsLib = null;
-  function ensurePdfJs() {
+  async function ensurePdfJs() {
     if (pdfjsLib) return pdfjsLib;
+    await loadLib("pdfjs");
     // pdf.js attaches to window.pdfjsLib in recent builds
     pdfjsLib = window.pdfjsLib;
     if (pdfjsLib && pdfjsLib.GlobalWorkerOptions) {
-      pdfjsLib.GlobalWorkerOptions.workerSrc = "https://cdn.jsdelivr.net/npm/pdfjs-dist@4.10.38/build/pdf.worker.min.js";
+      pdfjsLib.GlobalWorkerOptions.workerSrc = libUrl("pdfjsWorker");
     }
     return pdfjsLib;
   }
@@ -1733,26 +2444,49 @@
   }
 
 
+  // Import di molte bollette: più file elaborati insieme (al massimo quanti
+  // worker OCR), righe aggiunte alla tabella man mano che i file terminano.
   async function processPdfFiles(files) {
-    ensurePdfJs();
+    try {
+      await ensurePdfJs();
+    } catch (e) {
+      console.error(e);
+      hideProgress();
+      alert("Impossibile caricare pdf.js: verificare la connessione o usare la build con librerie locali.");
+      return;
+    }
     const total = files.length;
     let done = 0;
-    for (const file of files) {
+    setProgress(0, `Apro ${total} file…`);
+    await mapLimit(files, ocrPoolSize(), async (file) => {
+      const rows = await extractFromSinglePdf(file);
       done++;
-      setProgress(Math.round((done - 1) / total * 100), `Apro ${file.name}…`);
-      const row = await extractFromSinglePdf(file);
-      pdfExtractRows.push(...row);
+      pdfExtractRows.push(...rows);
       renderPdfExtractTable();
       $("#btnConfirmPDFExtract").disabled = pdfExtractRows.length === 0;
       $("#btnClearPDFExtract").disabled = pdfExtractRows.length === 0;
-      setProgress(Math.round(done / total * 100), `Completato ${file.name}`);
-    }
+      setProgress(Math.round(done / total * 100), `Completato ${file.name} (${done}/${total})`);
+    });
     hideProgress();
     log(`Estrazione PDF completata: ${files.length} file`);
   }
 
+  // Esegue fn su ogni elemento con al massimo `limit` chiamate in corso
+  async function mapLimit(items, limit, fn) {
+    const results = new Array(items.length);
+    let next = 0;
+    const runners = Array.from({ length: Math.min(limit, items.length) }, async () => {
+      while (next < items.length) {
+        const i = next++;
+        results[i] = await fn(items[i], i);
+      }
+    });
+    await Promise.all(runners);
+    return results;
+  }
+
   async function extractFromSinglePdf(file) {
-    const pdfjs = ensurePdfJs();
+    const pdfjs = await ensurePdfJs();
     const rows = [];
     try {
       const ab = await file.arrayBuffer();
@@ -1777,8 +2511,7 @@
       const weak = !extracted.ok || (String(text).length < 120);
       if (weak) {
         method = "OCR";
-        setProgress(0, `OCR in corso: ${file.name}…`);
-        const ocrText = await ocrFirstPages(pdf, file.name);
+        const ocrText = await ocrFirstPages(pdf);
         text = ocrText;
         extracted = extractFasce(text);
         month = month || extractMonth(text, state.project.year);
@@ -1794,6 +2527,7 @@
         status: extracted.ok ? "OK (verifica consigliata)" : "Da verificare"
       };
       rows.push(row);
+      pdf.destroy();
       return rows;
     } catch (e) {
       console.error("PDF error:", e);
@@ -1810,32 +2544,94 @@
     }
   }
 
-  async function ocrFirstPages(pdf, label) {
-    // OCR first pages (max 2) for speed
-    const maxPages = Math.min(pdf.numPages, 2);
-    let all = "";
-    for (let p = 1; p <= maxPages; p++) {
-      setProgress(Math.round((p - 1) / maxPages * 100), `OCR pagina ${p}/${maxPages} — ${label}`);
-      const page = await pdf.getPage(p);
-      const viewport = page.getViewport({ scale: 2.0 });
-      const canvas = document.createElement("canvas");
-      const ctx = canvas.getContext("2d");
-      canvas.width = viewport.width;
-      canvas.height = viewport.height;
-      await page.render({ canvasContext: ctx, viewport }).promise;
-
-      const text = await Tesseract.recognize(canvas, "ita", {
-        logger: (m) => {
-          if (m.status === "recognizing text") {
-            const pct = Math.round((p - 1) / maxPages * 100 + (m.progress || 0) * (100 / maxPages));
-            setProgress(clamp(pct, 0, 100), `OCR… ${Math.round((m.progress || 0) * 100)}% — ${label}`);
-          }
-        }
-      }).then(r => r.data.text || "");
-      all += "\n" + text;
+  // ---------- OCR: pool di worker Tesseract ----------
+  // Uno scheduler Tesseract distribuisce le pagine su più worker; ogni worker
+  // carica i dati "ita" una volta e resta attivo tra un file e l'altro. Il pool
+  // cresce con le pagine in coda fino a ocrPoolSize() e viene chiuso dopo
+  // OCR_IDLE_MS di inattività per liberare memoria.
+  const OCR_IDLE_MS = 120000;
+  const OCR_MAX_WORKERS = 6;
+  let ocrScheduler = null;
+  let ocrWorkers = [];
+  let ocrPending = 0;
+  let ocrIdleTimer = null;
+
+  function ocrPoolSize() {
+    // Un core resta al thread principale (pdf.js, rendering delle pagine)
+    const cores = navigator.hardwareConcurrency || 2;
+    return clamp(cores - 1, 1, OCR_MAX_WORKERS);
+  }
+
+  async function addOcrWorker() {
+    const scheduler = ocrScheduler;
+    const worker = Tesseract.createWorker("ita", 1, {
+      workerPath: libUrl("tesseractWorker"),
+      corePath: libUrl("tesseractCore"),
+      langPath: libUrl("tesseractLang")
+    });
+    ocrWorkers.push(worker);
+    try {
+      const ready = await worker;
+      // Il pool può essere stato chiuso mentre il worker si avviava
+      if (ocrScheduler === scheduler) scheduler.addWorker(ready);
+      else ready.terminate();
+    } catch (e) {
+      ocrWorkers = ocrWorkers.filter(w => w !== worker);
+      throw e;
     }
-    setProgress(100, `OCR completato — ${label}`);
-    return all;
+  }
+
+  async function ocrRecognize(canvas) {
+    await loadLib("tesseract");
+    clearTimeout(ocrIdleTimer);
+    if (!ocrScheduler) ocrScheduler = Tesseract.createScheduler();
+    ocrPending++;
+    try {
+      while (ocrWorkers.length < Math.min(ocrPending, ocrPoolSize())) {
+        addOcrWorker().catch(e => console.warn("Worker OCR non avviato:", e));
+      }
+      // Serve almeno un worker pronto; gli altri si aggiungono allo scheduler quando sono pronti
+      if (ocrScheduler.getNumWorkers() === 0) await Promise.any(ocrWorkers);
+      const result = await ocrScheduler.addJob("recognize", canvas);
+      return result.data.text || "";
+    } finally {
+      ocrPending--;
+      if (ocrPending === 0) ocrIdleTimer = setTimeout(closeOcrPool, OCR_IDLE_MS);
+    }
+  }
+
+  function closeOcrPool() {
+    if (!ocrScheduler || ocrPending > 0) return;
+    const scheduler = ocrScheduler;
+    ocrScheduler = null;
+    ocrWorkers = [];
+    scheduler.terminate().catch(e => console.warn(e));
+  }
+
+  async function renderPageCanvas(pdf, p) {
+    const page = await pdf.getPage(p);
+    const viewport = page.getViewport({ scale: 2.0 });
+    const canvas = document.createElement("canvas");
+    canvas.width = viewport.width;
+    canvas.height = viewport.height;
+    await page.render({ canvasContext: canvas.getContext("2d"), viewport }).promise;
+    page.cleanup();
+    return canvas;
+  }
+
+  async function ocrFirstPages(pdf) {
+    // OCR first pages (max 2) for speed: rendered and recognised in parallel
+    const maxPages = Math.min(pdf.numPages, 2);
+    const pages = Array.from({ length: maxPages }, (_, i) => i + 1);
+    const texts = await Promise.all(pages.map(async (p) => {
+      const canvas = await renderPageCanvas(pdf, p);
+      try {
+        return await ocrRecognize(canvas);
+      } finally {
+        canvas.width = canvas.height = 0;
+      }
+    }));
+    return texts.map(t => "\n" + t).join("");
   }
 
   function extractFasce(rawText) {
@@ -2028,19 +2824,17 @@
     $("#mNote").value = "";
   });
 
+  const machineRows = virtualRows({
+    body: $("#machineTable tbody"),
+    colspan: 8,
+    rowHeight: 58,
+    emptyHtml: `<tr><td colspan="8" class="muted small">Nessun macchinario inserito.</td></tr>`
+  });
+
   function renderMachineTable() {
-    const tbody = $("#machineTable tbody");
-    tbody.innerHTML = "";
-    if (state.machines.length === 0) {
-      const tr = document.createElement("tr");
-      tr.innerHTML = `<td colspan="8" class="muted small">Nessun macchinario inserito.</td>`;
-      tbody.appendChild(tr);
-      return;
-    }
-    state.machines.forEach(m => {
+    machineRows.update(state.machines, m => m.id, (m) => {
       const kwh = computeMachineKwh(m);
-      const tr = document.createElement("tr");
-      tr.innerHTML = `
+      return `
         <td><b>${escapeHtml(m.name)}</b><br><small>${escapeHtml(m.note || "")}</small></td>
         <td>${fmtNumber(m.kW)}</td>
         <td>${fmtNumber(m.hoursYear)}</td>
@@ -2052,23 +2846,21 @@
           <button class="ghost smallbtn" data-act="del" data-id="${m.id}">Elimina</button>
         </td>
       `;
-      tbody.appendChild(tr);
-    });
-    tbody.querySelectorAll("button").forEach(btn => {
-      btn.addEventListener("click", async () => {
-        const id = btn.dataset.id;
-        const ok = await confirmModal("Eliminare macchinario?", "Confermi eliminazione?", "Elimina", "Annulla");
-        if (!ok) return;
-        const m = state.machines.find(x => x.id === id);
-        state.machines = state.machines.filter(x => x.id !== id);
-        log(`Eliminato macchinario: ${m?.name || id}`);
-        persist();
-        renderMachineTable();
-        refreshDashboard();
-      });
     });
   }
 
+  onRowAction($("#machineTable tbody"), "button[data-act='del']", async (btn) => {
+    const id = btn.dataset.id;
+    const ok = await confirmModal("Eliminare macchinario?", "Confermi eliminazione?", "Elimina", "Annulla");
+    if (!ok) return;
+    const m = state.machines.find(x => x.id === id);
+    state.machines = state.machines.filter(x => x.id !== id);
+    log(`Eliminato macchinario: ${m?.name || id}`);
+    persist();
+    renderMachineTable();
+    refreshDashboard();
+  });
+
   // ---------- Dashboard & Report ----------
   let chartMonthly = null;
   let chartShare = null;
@@ -2082,29 +2874,40 @@
     return arr;
   }
 
-  function aggregateEnergy() {
-    const y = state.ui.selectedYear || state.project.year || new Date().getFullYear();
-    const months = monthsOfYear(y);
-    const byMonth = {};
-    months.forEach(m => byMonth[m] = { f1: 0, f2: 0, f3: 0, gas: 0 });
-    
-    // Aggrega dati da tutte le utenze
-    for (const util of state.utilities) {
-      const utilData = state.energyByYear[y]?.[util.id] || [];
+  // Somme mensili di tutte le utenze: Float64Array di 12 mesi x [f1, f2, f3, gas].
+  // Usata anche dal worker dati, quindi dipende solo dai suoi argomenti.
+  function sumEnergy(year, utilities, yearData) {
+    const sums = new Float64Array(12 * 4);
+    const prefix = `${year}-`;
+    for (const util of utilities) {
+      const utilData = (yearData && yearData[util.id]) || [];
       for (const r of utilData) {
-        if (!r.month || !r.month.startsWith(String(y))) continue;
-        if (!byMonth[r.month]) byMonth[r.month] = { f1: 0, f2: 0, f3: 0, gas: 0 };
+        if (!r.month || !r.month.startsWith(prefix)) continue;
+        const m = Number(r.month.slice(prefix.length));
+        if (!(m >= 1 && m <= 12) || r.month.length !== prefix.length + 2) continue;
+        const i = (m - 1) * 4;
         if (util.type === 'electricity') {
-          byMonth[r.month].f1 += safeFloat(r.data.f1) ?? 0;
-          byMonth[r.month].f2 += safeFloat(r.data.f2) ?? 0;
-          byMonth[r.month].f3 += safeFloat(r.data.f3) ?? 0;
+          sums[i] += safeFloat(r.data.f1) ?? 0;
+          sums[i + 1] += safeFloat(r.data.f2) ?? 0;
+          sums[i + 2] += safeFloat(r.data.f3) ?? 0;
         } else {
-          byMonth[r.month].gas += safeFloat(r.data.gas) ?? 0;
+          sums[i + 3] += safeFloat(r.data.gas) ?? 0;
         }
       }
     }
-    
-    const series = months.map(m => ({ month: m, ...byMonth[m] }));
+    return sums;
+  }
+
+  function aggregateEnergy() {
+    const y = state.ui.selectedYear || state.project.year || new Date().getFullYear();
+    return aggregateFromSums(y, sumEnergy(y, state.utilities, state.energyByYear[y]));
+  }
+
+  function aggregateFromSums(y, sums) {
+    const months = monthsOfYear(y);
+    const series = months.map((m, k) => ({
+      month: m, f1: sums[k * 4], f2: sums[k * 4 + 1], f3: sums[k * 4 + 2], gas: sums[k * 4 + 3]
+    }));
     const total = series.reduce((acc, x) => {
       acc.f1 += x.f1; acc.f2 += x.f2; acc.f3 += x.f3; acc.gas += x.gas;
       return acc;
@@ -2117,25 +2920,22 @@
     return state.machines.reduce((acc, m) => acc + computeMachineKwh(m), 0);
   }
 
-  function refreshDashboard() {
-    const ag = aggregateEnergy();
-    $("#kpiF1").textContent = fmtNumber(ag.total.f1);
-    $("#kpiF2").textContent = fmtNumber(ag.total.f2);
-    $("#kpiF3").textContent = fmtNumber(ag.total.f3);
-    $("#kpiGas").textContent = fmtNumber(ag.total.gas);
-    $("#kpiTot").textContent = fmtNumber(ag.total.tot);
-    
-    // Calcola Potenza Attiva media e cos φ medio
+  // Potenza Attiva media e cos φ medio (solo letture non nulle)
+  function computePowerKpi() {
     const year = state.ui.selectedYear || new Date().getFullYear();
+    return sumPowerKpi(state.utilities, state.energyByYear[year]);
+  }
+
+  function sumPowerKpi(utilities, yearData) {
     let totalPotenza = 0;
     let totalCosfi = 0;
     let countPotenza = 0;
     let countCosfi = 0;
     
-    for (const util of state.utilities) {
+    for (const util of utilities) {
       if (util.type !== 'electricity') continue;
-      const yearData = state.energyByYear[year]?.[util.id] || [];
-      for (const r of yearData) {
+      const utilData = (yearData && yearData[util.id]) || [];
+      for (const r of utilData) {
         if (r.data?.potenza !== undefined && r.data.potenza !== null && r.data.potenza !== 0) {
           totalPotenza += r.data.potenza;
           countPotenza++;
@@ -2146,17 +2946,171 @@
         }
       }
     }
-    
-    const avgPotenza = countPotenza > 0 ? totalPotenza / countPotenza : 0;
-    const avgCosfi = countCosfi > 0 ? totalCosfi / countCosfi : 0;
-    
+    return {
+      potenza_avg: countPotenza > 0 ? totalPotenza / countPotenza : 0,
+      cosfi_avg: countCosfi > 0 ? totalCosfi / countCosfi : 0
+    };
+  }
+
+  // Serie dei grafici: se la demo è servita da run_demo.py le calcola il server,
+  // che mantiene somme parziali per utenza e mese: dopo il primo caricamento
+  // ogni modifica di un singolo mese invia solo quel record (costo O(1)).
+  // Aprendo la demo da file vengono calcolate qui.
+  const chartApiAvailable = location.protocol.startsWith("http");
+  const aggSession = uid();
+  let chartApiFailed = false;
+  let chartRequestSeq = 0;
+  let aggReady = false;
+  let aggQueue = Promise.resolve();
+  let lastChart = null;
+
+  function localChartData() {
+    return chartFromAggregate(aggregateEnergy(), computePowerKpi());
+  }
+
+  function chartFromAggregate(ag, kpi) {
+    return {
+      labels: ag.months.map(m => m.slice(5)), // month number
+      bands: {
+        f1: ag.series.map(x => round2(x.f1)),
+        f2: ag.series.map(x => round2(x.f2)),
+        f3: ag.series.map(x => round2(x.f3)),
+        gas: ag.series.map(x => round2(x.gas)),
+      },
+      share: [round2(ag.total.f1), round2(ag.total.f2), round2(ag.total.f3), round2(ag.total.gas)],
+      total: ag.total,
+      kpi
+    };
+  }
+
+  // Stesse serie di localChartData, calcolate nel worker per anni con molte letture
+  function workerChartData(worker) {
+    const y = state.ui.selectedYear || state.project.year || new Date().getFullYear();
+    const kpiYear = state.ui.selectedYear || new Date().getFullYear();
+    const utilities = state.utilities.map(u => ({ id: u.id, type: u.type }));
+    return runDataWorker(worker, {
+      type: "aggregate",
+      year: y,
+      utilities,
+      yearData: state.energyByYear[y],
+      kpiYearData: state.energyByYear[kpiYear]
+    }).then(reply => chartFromAggregate(aggregateFromSums(y, reply.sums), reply.kpi));
+  }
+
+  function selectedYearRecords() {
+    const y = state.ui.selectedYear || state.project.year || new Date().getFullYear();
+    return state.utilities.reduce((n, u) => n + (state.energyByYear[y]?.[u.id]?.length || 0), 0);
+  }
+
+  async function fetchChartData() {
+    const y = state.ui.selectedYear || state.project.year || new Date().getFullYear();
+    const body = JSON.stringify({
+      ui: { selectedYear: y },
+      project: { year: state.project.year },
+      utilities: state.utilities,
+      energyByYear: state.energyByYear
+    });
+    const r = await fetch(`/api/aggregate?session=${aggSession}&year=${y}`, {
+      method: "POST",
+      headers: { "Content-Type": "application/json" },
+      body
+    });
+    if (!r.ok) throw new Error(`HTTP ${r.status}`);
+    return r.json();
+  }
+
+  function refreshDashboard() {
+    const seq = ++chartRequestSeq;
+    if (chartApiAvailable && !chartApiFailed) {
+      aggQueue = aggQueue
+        .then(() => fetchChartData())
+        .then(chart => {
+          aggReady = true;
+          lastChart = chart;
+          if (seq === chartRequestSeq) applyDashboard(chart);
+        })
+        .catch(e => {
+          console.warn("Chart API non disponibile, calcolo locale:", e);
+          chartApiFailed = true;
+          aggReady = false;
+          if (seq === chartRequestSeq) applyDashboard(localChartData());
+        });
+      return;
+    }
+    const worker = selectedYearRecords() >= WORKER_MIN_RECORDS ? getDataWorker() : null;
+    if (worker) {
+      workerChartData(worker)
+        .catch(e => {
+          console.warn("Aggregazione nel worker non riuscita, calcolo locale:", e);
+          return localChartData();
+        })
+        .then(chart => {
+          if (seq === chartRequestSeq) applyDashboard(chart);
+        });
+      return;
+    }
+    applyDashboard(localChartData());
+  }
+
+  // Aggiornamento incrementale dopo la modifica di un singolo mese di un'utenza
+  function recordChanged(year, utilId, month) {
+    const util = state.utilities.find(u => u.id === utilId);
+    if (!aggReady || !lastChart || lastChart.year !== Number(year) || !util) {
+      refreshDashboard();
+      return;
+    }
+    const rec = (state.energyByYear[year]?.[utilId] || []).find(r => r.month === month);
+    const body = JSON.stringify({ year: Number(year), utility: util, month, data: rec ? rec.data : null });
+    const seq = ++chartRequestSeq;
+    // Le modifiche vengono inviate in ordine, una alla volta
+    aggQueue = aggQueue
+      .then(() => fetch(`/api/aggregate/record?session=${aggSession}`, {
+        method: "POST",
+        headers: { "Content-Type": "application/json" },
+        body
+      }))
+      .then(r => {
+        if (!r.ok) throw new Error(`HTTP ${r.status}`);
+        return r.json();
+      })
+      .then(delta => {
+        applyChartDelta(lastChart, delta);
+        if (seq === chartRequestSeq) applyDashboard(lastChart);
+      })
+      .catch(e => {
+        console.warn("Aggiornamento incrementale fallito, ricarico i dati:", e);
+        aggReady = false;
+        refreshDashboard();
+      });
+  }
+
+  function applyChartDelta(chart, delta) {
+    for (const band of Object.keys(delta.bands)) chart.bands[band][delta.index] = delta.bands[band];
+    chart.share = delta.share;
+    chart.total = delta.total;
+    chart.kpi = delta.kpi;
+    const detail = chart.utilities?.[delta.utility.id];
+    if (detail) detail.data[delta.index] = delta.utility.value;
+  }
+
+  function applyDashboard(chart) {
+    const total = chart.total;
+    $("#kpiF1").textContent = fmtNumber(total.f1);
+    $("#kpiF2").textContent = fmtNumber(total.f2);
+    $("#kpiF3").textContent = fmtNumber(total.f3);
+    $("#kpiGas").textContent = fmtNumber(total.gas);
+    $("#kpiTot").textContent = fmtNumber(total.tot);
+
+    const avgPotenza = chart.kpi.potenza_avg;
+    const avgCosfi = chart.kpi.cosfi_avg;
+
     const kpiPotenza = $("#kpiPotenza");
     if (kpiPotenza) kpiPotenza.textContent = avgPotenza > 0 ? fmtNumber(avgPotenza) : "—";
     
     const kpiCosfi = $("#kpiCosfi");
     if (kpiCosfi) kpiCosfi.textContent = avgCosfi > 0 ? fmtNumber(avgCosfi) : "—";
 
-    const bills = ag.total.tot;
+    const bills = total.tot;
     const mach = sumMachines();
     $("#kpiBills").textContent = fmtNumber(bills);
     $("#kpiMachines").textContent = fmtNumber(mach);
@@ -2172,77 +3126,44 @@
       ratioEl.textContent = ratio !== null ? `${fmtNumber(ratio)} %` : "—";
     }
 
-    renderCharts(ag);
-    updateReportPreview();
+    renderCharts(chart);
+    updateReportPreview(chart);
   }
 
-  function renderCharts(ag) {
-    const labels = ag.months.map(m => m.slice(5)); // month number
-    const f1 = ag.series.map(x => round2(x.f1));
-    const f2 = ag.series.map(x => round2(x.f2));
-    const f3 = ag.series.map(x => round2(x.f3));
-    const gas = ag.series.map(x => round2(x.gas));
-
-    // Monthly (stacked bar)
-    if (chartMonthly) chartMonthly.destroy();
-    chartMonthly = new Chart($("#chartMonthly"), {
-      type: "bar",
-      data: {
-        labels,
-        datasets: [
-          { label: "F1", data: f1, stack: "kwh" },
-          { label: "F2", data: f2, stack: "kwh" },
-          { label: "F3", data: f3, stack: "kwh" },
-          { label: "Gas", data: gas, stack: "kwh" },
-        ]
-      },
-      options: {
-        responsive: true,
-        plugins: { legend: { position: "bottom" } },
-        scales: { x: { stacked: true }, y: { stacked: true } }
-      }
-    });
+  // Aggiorna un grafico esistente invece di distruggerlo e ricrearlo
+  function upsertChart(chart, canvas, type, labels, datasets, options) {
+    if (chart) {
+      chart.data.labels = labels;
+      datasets.forEach((ds, i) => { chart.data.datasets[i].data = ds.data; });
+      chart.update("none");
+      return chart;
+    }
+    return new Chart(canvas, { type, data: { labels, datasets }, options });
+  }
 
-    // Share (doughnut)
-    if (chartShare) chartShare.destroy();
-    chartShare = new Chart($("#chartShare"), {
-      type: "doughnut",
-      data: {
-        labels: ["F1", "F2", "F3", "Gas"],
-        datasets: [{ data: [round2(ag.total.f1), round2(ag.total.f2), round2(ag.total.f3), round2(ag.total.gas)] }]
-      },
-      options: { responsive: true, plugins: { legend: { position: "bottom" } } }
-    });
+  function renderCharts(chart) {
+    const labels = chart.labels;
+    const monthlyDatasets = () => [
+      { label: "F1", data: chart.bands.f1, stack: "kwh" },
+      { label: "F2", data: chart.bands.f2, stack: "kwh" },
+      { label: "F3", data: chart.bands.f3, stack: "kwh" },
+      { label: "Gas", data: chart.bands.gas, stack: "kwh" },
+    ];
+    const monthlyOptions = {
+      responsive: true,
+      plugins: { legend: { position: "bottom" } },
+      scales: { x: { stacked: true }, y: { stacked: true } }
+    };
+    const shareLabels = ["F1", "F2", "F3", "Gas"];
+    const shareOptions = { responsive: true, plugins: { legend: { position: "bottom" } } };
 
-    // Report charts (separati)
-    if (chartMonthlyReport) chartMonthlyReport.destroy();
-    chartMonthlyReport = new Chart($("#chartMonthlyReport"), {
-      type: "bar",
-      data: {
-        labels,
-        datasets: [
-          { label: "F1", data: f1, stack: "kwh" },
-          { label: "F2", data: f2, stack: "kwh" },
-          { label: "F3", data: f3, stack: "kwh" },
-          { label: "Gas", data: gas, stack: "kwh" },
-        ]
-      },
-      options: {
-        responsive: true,
-        plugins: { legend: { position: "bottom" } },
-        scales: { x: { stacked: true }, y: { stacked: true } }
-      }
-    });
+    // Monthly (stacked bar) + Share (doughnut)
+    chartMonthly = upsertChart(chartMonthly, $("#chartMonthly"), "bar", labels, monthlyDatasets(), monthlyOptions);
+    chartShare = upsertChart(chartShare, $("#chartShare"), "doughnut", shareLabels, [{ data: [...chart.share] }], shareOptions);
 
-    if (chartShareReport) chartShareReport.destroy();
-    chartShareReport = new Chart($("#chartShareReport"), {
-      type: "doughnut",
-      data: {
-        labels: ["F1", "F2", "F3", "Gas"],
-        datasets: [{ data: [round2(ag.total.f1), round2(ag.total.f2), round2(ag.total.f3), round2(ag.total.gas)] }]
-      },
-      options: { responsive: true, plugins: { legend: { position: "bottom" } } }
-    });
+    // Report charts (separati)
+    chartMonthlyReport = upsertChart(chartMonthlyReport, $("#chartMonthlyReport"), "bar", labels, monthlyDatasets(), monthlyOptions);
+    chartShareReport = upsertChart(chartShareReport, $("#chartShareReport"), "doughnut", shareLabels, [{ data: [...chart.share] }], shareOptions);
   }
 
   function renderUtilityDetailChart() {
@@ -2283,19 +3204,19 @@
     // ma il grafico principale nella dashboard si aggiornerà comunque
   }
 
-  function updateReportPreview() {
-    const ag = aggregateEnergy();
+  function updateReportPreview(chart) {
+    const total = (chart || localChartData()).total;
     $("#rTitle").textContent = state.project.name || "OpenEurope — Report";
     const site = state.project.site ? ` • ${state.project.site}` : "";
     $("#rSub").textContent = `Profilo consumi per fasce (F1/F2/F3) e gas${site}`;
     $("#rGenerated").textContent = new Date().toLocaleString("it-IT");
     $("#rYear").textContent = String(state.project.year || "");
 
-    $("#rF1").textContent = `${fmtNumber(ag.total.f1)} kWh`;
-    $("#rF2").textContent = `${fmtNumber(ag.total.f2)} kWh`;
-    $("#rF3").textContent = `${fmtNumber(ag.total.f3)} kWh`;
-    $("#rGas").textContent = `${fmtNumber(ag.total.gas)} kWh`;
-    $("#rTot").textContent = `${fmtNumber(ag.total.tot)} kWh`;
+    $("#rF1").textContent = `${fmtNumber(total.f1)} kWh`;
+    $("#rF2").textContent = `${fmtNumber(total.f2)} kWh`;
+    $("#rF3").textContent = `${fmtNumber(total.f3)} kWh`;
+    $("#rGas").textContent = `${fmtNumber(total.gas)} kWh`;
+    $("#rTot").textContent = `${fmtNumber(total.tot)} kWh`;
 
     // Machines table in report
     const tbody = $("#reportMachineTable tbody");
@@ -2381,6 +3302,7 @@
       jsPDF: { unit: "mm", format: "a4", orientation: "portrait" }
     };
     try {
+      await loadLib("html2pdf");
       await html2pdf().set(opt).from(el).save();
       log(`Report PDF generato: ${filename}`);
     } catch (e) {
@@ -2390,19 +3312,19 @@
   }
 
   // ---------- Audit log ----------
+  // Il log è virtualizzato: si possono mostrare tutte le voci, non solo le ultime
+  const logRows = virtualRows({
+    body: $("#auditLog"),
+    rowTag: "div",
+    rowClass: "item",
+    rowHeight: 52,
+    emptyHtml: `<div class="item"><div class="muted">Nessun evento.</div></div>`
+  });
+
   function renderLog() {
-    const box = $("#auditLog");
-    box.innerHTML = "";
-    if (state.log.length === 0) {
-      box.innerHTML = `<div class="item"><div class="muted">Nessun evento.</div></div>`;
-      return;
-    }
-    state.log.slice(0, 250).forEach(item => {
-      const div = document.createElement("div");
-      div.className = "item";
-      div.innerHTML = `<div>${escapeHtml(item.msg)}</div><div class="ts">${escapeHtml(new Date(item.ts).toLocaleString("it-IT"))}</div>`;
-      box.appendChild(div);
-    });
+    logRows.update(state.log, item => `${item.ts}|${item.msg}`, (item) =>
+      `<div>${escapeHtml(item.msg)}</div><div class="ts">${escapeHtml(new Date(item.ts).toLocaleString("it-IT"))}</div>`
+    );
   }
 
   $("#btnClearLog").addEventListener("click", async () => {
@@ -2444,30 +3366,40 @@
   }
 
   // ---------- Init ----------
-  // Set year default in UI if empty
-  if (!state.project.year) state.project.year = new Date().getFullYear();
-  bindProjectUI();
-  bindCompanyUI();
-  renderUtilitiesTable();
-  refreshManualUtilitySelector();
-  updateManualFieldsForUtility();
-  renderEnergyTable();
-  renderMachineTable();
-  // render autoproduzione e impianti termici all'avvio
-  renderAutoTable();
-  renderGasTable();
-
-  // Restore UI
-  setActiveStep(state.ui.step || 1);
-  setTab(state.ui.tab || "manual");
-  // Imposta le tab per autoproduzione e gas
-  setAutoTab('manual');
-  setGasTab('manual');
-
-  // Refresh year UI and set manual month default to Jan of selected year
-  refreshEnergyYearUI();
-  const y = state.ui.selectedYear || state.project.year || new Date().getFullYear();
-  if (!$("#manualMonth").value) $("#manualMonth").value = `${y}-01`;
+  function restoreUI() {
+    // Set year default in UI if empty
+    if (!state.project.year) state.project.year = new Date().getFullYear();
+    bindProjectUI();
+    bindCompanyUI();
+    renderUtilitiesTable();
+    refreshManualUtilitySelector();
+    updateManualFieldsForUtility();
+    renderEnergyTable();
+    renderMachineTable();
+    // render autoproduzione e impianti termici all'avvio
+    renderAutoTable();
+    renderGasTable();
+
+    // Restore UI
+    setActiveStep(state.ui.step || 1);
+    setTab(state.ui.tab || "manual");
+    // Imposta le tab per autoproduzione e gas
+    setAutoTab('manual');
+    setGasTab('manual');
+
+    // Refresh year UI and set manual month default to Jan of selected year
+    refreshEnergyYearUI();
+    const y = state.ui.selectedYear || state.project.year || new Date().getFullYear();
+    if (!$("#manualMonth").value) $("#manualMonth").value = `${y}-01`;
+  }
+
+  restoreUI();
+  // Un progetto grande salvato in IndexedDB arriva in modo asincrono; con il
+  // server attivo il progetto salvato nel database sostituisce quello locale
+  loadIdbState()
+    .then(loaded => { if (loaded) restoreUI(); })
+    .then(() => openProjectStore())
+    .then(loaded => { if (loaded) restoreUI(); });
 
   // Add some CSS for small buttons without making a whole style system
   const style = document.createElement("style");
@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+OpenEurope Demo Supervisor
+--------------------------
+
+Starts ``run_demo.py`` as a child process for the installers
+(``install_and_run.py`` and ``web_installer.py``) and keeps it running:
+
+* the child is ready when it prints the address it is serving on (flushed
+  right after the socket is bound) and ``GET /api/health`` answers, so start
+  time is the actual startup time instead of a fixed number of sleeps;
+* when the preferred port is taken by another program the child binds any
+  free port and the supervisor reads it back from that line; an OpenEurope
+  server already answering on the port is reused instead;
+* a child that exits unexpectedly is restarted (on the same port when
+  possible), at most ``max_restarts`` times per minute;
+* every start reports its latency.
+
+Usage:
+    python3 demo_supervisor.py
+    python3 demo_supervisor.py --port 8080 --no-browser
+"""
+
+import argparse
+import json
+import os
+import re
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+import webbrowser
+from typing import Callable, List, Optional
+
+import bootstrap_env
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+START_PAGE = "/START_HERE.html"
+HEALTH_PATH = "/api/health"
+HEALTH_SERVICE = "openeurope-demo"  # run_demo.HEALTH_SERVICE, without importing the server
+
+# Line printed by run_demo.start_server once the socket is bound
+READY_LINE = re.compile(r"Serving OpenEurope demo at http://localhost:(\d+)")
+
+Log = Callable[[str], None]
+
+
+class SupervisorError(Exception):
+    """Raised when the demo server does not become ready."""
+
+
+def port_is_free(port: int) -> bool:
+    """Whether ``port`` can be bound on all interfaces."""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        try:
+            sock.bind(("", port))
+        except OSError:
+            return False
+    return True
+
+
+def probe_health(port: int, timeout: float = 1.0) -> Optional[dict]:
+    """Return the ``/api/health`` answer of an OpenEurope server on ``port``, if any."""
+    try:
+        url = f"http://127.0.0.1:{port}{HEALTH_PATH}"
+        with urllib.request.urlopen(url, timeout=timeout) as response:
+            payload = json.loads(response.read().decode("utf-8"))
+    except (OSError, ValueError, urllib.error.URLError):
+        return None
+    return payload if payload.get("service") == HEALTH_SERVICE else None
+
+
+class DemoSupervisor:
+    """Start, watch and restart the demo server.
+
+    Parameters
+    ----------
+    port : int
+        Preferred port; another free port is used when it is taken.
+    python : str, optional
+        Interpreter for ``run_demo.py`` (default: the project environment,
+        see ``bootstrap_env.project_python``).
+    startup_timeout : float
+        Seconds a start may take before :class:`SupervisorError` is raised.
+    max_restarts : int
+        Crash restarts allowed within one minute before giving up.
+    """
+
+    def __init__(
+        self,
+        port: int = 8000,
+        python: Optional[str] = None,
+        cwd: str = BASE_DIR,
+        startup_timeout: float = 30.0,
+        max_restarts: int = 5,
+        log: Log = print
+    ) -> None:
+        self.preferred_port = port
+        self.python = python
+        self.cwd = cwd
+        self.startup_timeout = startup_timeout
+        self.max_restarts = max_restarts
+        self.log = log
+        self.port: Optional[int] = None
+        self.startup_seconds: Optional[float] = None
+        self.restarts = 0
+        self.external = False
+        self._process: Optional[subprocess.Popen] = None
+        self._lock = threading.RLock()
+        self._stopping = threading.Event()
+        self._crashes: List[float] = []
+        self._monitor: Optional[threading.Thread] = None
+
+    def url(self, path: str = START_PAGE) -> str:
+        """Address of ``path`` on the running server."""
+        return f"http://localhost:{self.port}{path}"
+
+    @property
+    def running(self) -> bool:
+        """Whether the supervised (or reused) server is up."""
+        with self._lock:
+            if self.external:
+                return self.port is not None and probe_health(self.port) is not None
+            return self._process is not None and self._process.poll() is None
+
+    def start(self) -> float:
+        """Start the server (if needed) and return the startup latency in seconds.
+
+        Raises
+        ------
+        SupervisorError
+            If the server exits or is not ready within ``startup_timeout``.
+        """
+        with self._lock:
+            if self.running:
+                return self.startup_seconds or 0.0
+            self._stopping.clear()
+            started = time.perf_counter()
+            if probe_health(self.preferred_port) is not None:
+                self.log(f"Server OpenEurope già attivo sulla porta {self.preferred_port}")
+                self.external = True
+                self.port = self.preferred_port
+            else:
+                self.external = False
+                self._spawn(self.preferred_port)
+            self.startup_seconds = time.perf_counter() - started
+            self.log(f"Server pronto su {self.url()} in {self.startup_seconds * 1000:.0f} ms")
+            if not self.external and (self._monitor is None or not self._monitor.is_alive()):
+                self._monitor = threading.Thread(target=self._watch, name="demo-supervisor", daemon=True)
+                self._monitor.start()
+            return self.startup_seconds
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Stop the supervised server (a reused external server is left running)."""
+        self._stopping.set()
+        with self._lock:
+            process, self._process = self._process, None
+        if process is not None and process.poll() is None:
+            process.terminate()
+            try:
+                process.wait(timeout=timeout)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.wait()
+
+    def wait(self) -> None:
+        """Block until :meth:`stop` is called or the supervisor gives up."""
+        while not self._stopping.wait(0.5):
+            if self.external and not self.running:
+                return
+
+    def _spawn(self, port: int) -> None:
+        """Launch ``run_demo.py`` and wait for its readiness line and health probe."""
+        bind_port = port if port_is_free(port) else 0
+        if bind_port != port:
+            self.log(f"Porta {port} occupata: uso una porta libera")
+        command = [
+            self.python or bootstrap_env.project_python(), "-u", "run_demo.py",
+            "--port", str(bind_port), "--no-browser",
+        ]
+        process = subprocess.Popen(
+            command, cwd=self.cwd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+            text=True, bufsize=1
+        )
+        self._process = process
+        ready = threading.Event()
+        output: List[str] = []
+
+        def read_output() -> None:
+            # Drains the pipe for the whole life of the child
+            for line in process.stdout:
+                line = line.rstrip()
+                match = READY_LINE.search(line)
+                if match and not ready.is_set():
+                    self.port = int(match.group(1))
+                    ready.set()
+                elif line:
+                    output.append(line)
+                    del output[:-20]
+            ready.set()
+
+        threading.Thread(target=read_output, name="demo-output", daemon=True).start()
+        deadline = time.monotonic() + self.startup_timeout
+        if not ready.wait(self.startup_timeout) or process.poll() is not None:
+            self._fail(process, output, "il server non si è avviato")
+        # The readiness line comes right after bind: the health probe confirms it serves
+        while probe_health(self.port, timeout=0.5) is None:
+            if process.poll() is not None or time.monotonic() > deadline:
+                self._fail(process, output, "il server non risponde")
+            time.sleep(0.02)
+
+    def _fail(self, process: subprocess.Popen, output: List[str], reason: str) -> None:
+        if process.poll() is None:
+            process.kill()
+        process.wait()
+        detail = "\n".join(output[-5:])
+        raise SupervisorError(f"{reason} (codice {process.returncode})" + (f":\n{detail}" if detail else ""))
+
+    def _watch(self) -> None:
+        """Restart the child when it exits without :meth:`stop`."""
+        while not self._stopping.is_set():
+            with self._lock:
+                process = self._process
+            if process is None:
+                return
+            returncode = process.wait()
+            if self._stopping.is_set():
+                return
+            now = time.monotonic()
+            self._crashes = [t for t in self._crashes if now - t < 60] + [now]
+            if len(self._crashes) > self.max_restarts:
+                self.log(f"Server terminato (codice {returncode}) troppe volte: riavvio sospeso")
+                self._stopping.set()
+                return
+            self.log(f"Server terminato (codice {returncode}): riavvio...")
+            try:
+                with self._lock:
+                    started = time.perf_counter()
+                    self._spawn(self.port or self.preferred_port)
+                    self.restarts += 1
+                    self.startup_seconds = time.perf_counter() - started
+                self.log(f"Server riavviato su {self.url()} in {self.startup_seconds * 1000:.0f} ms")
+            except (OSError, SupervisorError) as exc:
+                self.log(f"Riavvio non riuscito: {exc}")
+                self._stopping.wait(1)
+
+
+def main() -> None:
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description="Run the OpenEurope demo server under supervision")
+    parser.add_argument("--port", type=int, default=8000, help="Preferred port (default: 8000)")
+    parser.add_argument("--no-browser", action="store_true", help="Do not open the start page")
+    args = parser.parse_args()
+
+    supervisor = DemoSupervisor(args.port)
+    try:
+        supervisor.start()
+    except (OSError, SupervisorError) as exc:
+        print(f"Errore: {exc}", file=sys.stderr)
+        raise SystemExit(1) from exc
+    if not args.no_browser:
+        webbrowser.open(supervisor.url())
+    try:
+        supervisor.wait()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        supervisor.stop()
+
+
+if __name__ == "__main__":
+    main()
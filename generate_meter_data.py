@@ -0,0 +1,558 @@
+#!/usr/bin/env python3
+"""
+OpenEurope Synthetic Meter Data
+-------------------------------
+
+Generates realistic 15-minute consumption data for load and scale testing of
+the pipeline (``openeurope.py``, ``benchmarks/bench_pipeline.py``):
+
+* several sites, each with electricity meters (POD) and gas meters (PDR)
+  in different building zones;
+* daily and weekly load shapes driven by occupancy, heating and cooling
+  seasons and Italian public holidays, with ``consumption_before`` /
+  ``consumption_after`` columns, the F1/F2/F3 time-of-use band of every
+  interval (``f1_kwh``, ``f2_kwh``, ``f3_kwh``), ``gas_kwh``, HVAC and
+  lighting states and occupancy;
+* the defects of real exports: missing values, non-numeric cells (``n/d``,
+  ``ERR``...), Italian-formatted numbers (``1.234,567``, ``;`` separated),
+  unit suffixes and stray spaces, each at a configurable rate.
+
+Everything is computed with NumPy on blocks of rows, rows are ordered by
+timestamp (all meters of an interval together, as SCADA exports append
+them). CSV is written without pandas: each column is formatted into a byte
+matrix and the rows are joined in one pass, which is what makes hundreds
+of MB per second possible. Excel, Parquet and Feather go through a
+DataFrame (the columnar formats need ``pyarrow``).
+
+Usage:
+    python3 generate_meter_data.py meters.csv --rows 10M
+    python3 generate_meter_data.py meters.csv --rows 1M --sites 5 --meters 8 --number-format it
+    python3 generate_meter_data.py meters.xlsx --rows 100K
+"""
+
+import argparse
+import os
+import re
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, timedelta
+from typing import Dict, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+COLUMNS = [
+    "timestamp", "site", "meter_id", "meter_type", "building_zone",
+    "consumption_before", "consumption_after", "f1_kwh", "f2_kwh", "f3_kwh",
+    "gas_kwh", "hvac_state", "lighting_state", "occupancy",
+]
+# Measured columns: the ones affected by missing values and export defects
+NUMERIC_COLUMNS = ["consumption_before", "consumption_after", "f1_kwh", "f2_kwh", "f3_kwh", "gas_kwh"]
+DECIMALS = 3
+
+ZONES = ["Produzione", "Magazzino", "Uffici", "Compressori", "Forni", "Servizi"]
+HVAC_STATES = ["off", "on", "eco"]
+LIGHTING_STATES = ["off", "on"]
+GARBAGE = ["n/d", "ERR", "--", "#VALORE!", "NaN", "?"]
+NUMBER_FORMATS = ("en", "it", "mixed")
+
+# Excel sheet limit (one row is the header)
+EXCEL_MAX_ROWS = 1_048_575
+
+# Occupancy by hour of a working day and of a Saturday (0..1)
+WEEKDAY_OCCUPANCY = np.array(
+    [0.03] * 6 + [0.15, 0.55, 0.85, 0.95, 0.95, 0.9, 0.7, 0.85, 0.95, 0.95, 0.9, 0.6, 0.3, 0.1] + [0.03] * 4
+)
+SATURDAY_OCCUPANCY = np.array([0.02] * 7 + [0.2, 0.35, 0.35, 0.35, 0.35, 0.2] + [0.02] * 11)
+
+
+class GeneratorConfig(NamedTuple):
+    """What to generate; rates are fractions of the cells of each measured column."""
+
+    sites: int = 3
+    meters_per_site: int = 4
+    gas_share: float = 0.25
+    start: str = "2024-01-01"
+    interval_minutes: int = 15
+    missing_rate: float = 0.002
+    garbage_rate: float = 0.0005
+    unit_rate: float = 0.0
+    space_rate: float = 0.0
+    number_format: str = "en"
+    seed: int = 0
+
+    @property
+    def meters(self) -> int:
+        return self.sites * self.meters_per_site
+
+    @property
+    def separator(self) -> str:
+        """CSV field separator: ``;`` whenever numbers may use a decimal comma."""
+        return "," if self.number_format == "en" else ";"
+
+
+def parse_size(text: str) -> int:
+    """Parse a row count such as ``5000``, ``10K``, ``2.5M`` or ``1e6``."""
+    match = re.fullmatch(r"\s*([0-9.]+(?:e[0-9]+)?)\s*([kKmMgG]?)\s*", text)
+    if not match:
+        raise argparse.ArgumentTypeError(f"invalid size: {text!r}")
+    scale = {"": 1, "k": 1_000, "m": 1_000_000, "g": 1_000_000_000}[match.group(2).lower()]
+    return int(float(match.group(1)) * scale)
+
+
+def easter(year: int) -> date:
+    """Gregorian Easter Sunday (anonymous algorithm)."""
+    a, b, c = year % 19, year // 100, year % 100
+    d, e = divmod(b, 4)
+    g = (8 * b + 13) // 25
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+
+def holidays(years: Sequence[int]) -> np.ndarray:
+    """Italian public holidays of ``years`` as ``datetime64[D]``."""
+    fixed = [(1, 1), (1, 6), (4, 25), (5, 1), (6, 2), (8, 15), (11, 1), (12, 8), (12, 25), (12, 26)]
+    days = []
+    for year in years:
+        days += [date(year, month, day) for month, day in fixed]
+        days.append(easter(year) + timedelta(days=1))
+    return np.array(days, dtype="datetime64[D]")
+
+
+class Meters(NamedTuple):
+    """Per-meter attributes, one array entry per meter."""
+
+    site: np.ndarray         # site index
+    meter_id: List[str]
+    gas: np.ndarray          # True for PDR (gas) meters
+    zone: np.ndarray         # index into ZONES
+    base_kwh: np.ndarray     # typical consumption of one interval
+    efficiency: np.ndarray   # consumption_after / consumption_before
+    capacity: np.ndarray     # people on site
+
+
+def make_meters(config: GeneratorConfig) -> Meters:
+    """Draw the sites and meters of ``config``."""
+    rng = np.random.default_rng(config.seed)
+    n = config.meters
+    site = np.repeat(np.arange(config.sites), config.meters_per_site)
+    gas = rng.random(n) < config.gas_share
+    ids = []
+    for i in range(n):
+        if gas[i]:
+            ids.append(f"{rng.integers(10 ** 13, 10 ** 14)}")
+        else:
+            ids.append(f"IT{rng.integers(1, 999):03d}E{rng.integers(10 ** 7, 10 ** 8)}")
+    base = np.where(gas, rng.lognormal(np.log(40.0), 0.5, n), rng.lognormal(np.log(25.0), 0.6, n))
+    capacity = rng.integers(40, 400, config.sites)[site]
+    return Meters(
+        site=site,
+        meter_id=ids,
+        gas=gas,
+        zone=rng.integers(0, len(ZONES), n),
+        base_kwh=base,
+        efficiency=rng.uniform(0.75, 0.95, n),
+        capacity=capacity,
+    )
+
+
+def time_grid(config: GeneratorConfig, first: int, stop: int) -> Dict[str, np.ndarray]:
+    """Calendar features of the intervals ``first``..``stop - 1`` since ``config.start``."""
+    step = np.timedelta64(config.interval_minutes, "m")
+    stamps = np.datetime64(config.start, "m") + np.arange(first, stop) * step
+    days = stamps.astype("datetime64[D]")
+    minutes = (stamps - days).astype(np.int64)
+    hour = minutes // 60
+    weekday = (days.astype(np.int64) + 3) % 7  # 1970-01-01 was a Thursday; Monday = 0
+    years = range(int(days[0].astype("datetime64[Y]").astype(int)) + 1970,
+                  int(days[-1].astype("datetime64[Y]").astype(int)) + 1971)
+    holiday = np.isin(days, holidays(years))
+    workday = (weekday < 5) & ~holiday
+    saturday = (weekday == 5) & ~holiday
+
+    # ARERA bands: F1 working days 8-19; F2 working days 7-8 and 19-23, Saturdays 7-23; F3 otherwise
+    band = np.full(len(stamps), 2, dtype=np.int8)
+    band[workday & (((hour >= 7) & (hour < 8)) | ((hour >= 19) & (hour < 23)))] = 1
+    band[workday & (hour >= 8) & (hour < 19)] = 0
+    band[saturday & (hour >= 7) & (hour < 23)] = 1
+
+    fraction = hour + (minutes % 60) / 60.0
+    occupancy = np.where(
+        workday, np.interp(fraction, np.arange(24), WEEKDAY_OCCUPANCY),
+        np.where(saturday, np.interp(fraction, np.arange(24), SATURDAY_OCCUPANCY), 0.02)
+    )
+    day_of_year = (days - days.astype("datetime64[Y]")).astype(np.int64)
+    heating = np.clip(np.cos(2 * np.pi * (day_of_year - 15) / 365.25), 0, None)
+    cooling = np.clip(np.cos(2 * np.pi * (day_of_year - 200) / 365.25), 0, None)
+    occupied = occupancy > 0.2
+    hvac = np.where(occupied & ((heating > 0.2) | (cooling > 0.2)), 1,
+                    np.where(~occupied & (heating > 0.5), 2, 0)).astype(np.int8)
+    daylight = (hour >= 7) & (hour < 17 + 2 * cooling)
+    lighting = (occupied & ~(daylight & (cooling > 0.5))).astype(np.int8)
+    return {
+        "timestamp": stamps,
+        "band": band,
+        "occupancy": occupancy,
+        "electric": 0.35 + 0.5 * occupancy + 0.3 * cooling * (0.3 + occupancy) + 0.1 * lighting,
+        "gas": 0.08 + 0.9 * heating * (0.4 + 0.6 * occupancy),
+        "hvac": hvac,
+        "lighting": lighting,
+    }
+
+
+def generate_chunk(config: GeneratorConfig, meters: Meters, start_row: int, stop_row: int) -> Dict[str, np.ndarray]:
+    """Generate rows ``start_row``..``stop_row - 1`` as column arrays.
+
+    Numeric columns are float64 with NaN for missing cells; ``<column>_garbage``
+    holds the index into ``GARBAGE`` of non-numeric cells (-1 elsewhere) and
+    ``italian``, ``unit`` and ``space`` mark how each row is written.
+    """
+    rng = np.random.default_rng([config.seed, start_row])
+    n_meters = config.meters
+    rows = np.arange(start_row, stop_row)
+    t_index, meter = np.divmod(rows, n_meters)
+    first = int(t_index[0])
+    grid = time_grid(config, first, int(t_index[-1]) + 1)
+    t = t_index - first
+    n = len(rows)
+
+    gas = meters.gas[meter]
+    shape = np.where(gas, grid["gas"][t], grid["electric"][t])
+    before = meters.base_kwh[meter] * shape * rng.normal(1.0, 0.04, n)
+    after = before * meters.efficiency[meter] * rng.normal(1.0, 0.02, n)
+    band = grid["band"][t]
+    electric_kwh = np.where(gas, 0.0, before)
+    occupancy = np.rint(meters.capacity[meter] * grid["occupancy"][t] * rng.normal(1.0, 0.08, n))
+
+    chunk: Dict[str, np.ndarray] = {
+        "timestamp": grid["timestamp"][t],
+        "site": meters.site[meter],
+        "meter": meter,
+        "meter_type": gas.astype(np.int8),
+        "building_zone": meters.zone[meter],
+        "consumption_before": before,
+        "consumption_after": after,
+        "f1_kwh": np.where(band == 0, electric_kwh, 0.0),
+        "f2_kwh": np.where(band == 1, electric_kwh, 0.0),
+        "f3_kwh": np.where(band == 2, electric_kwh, 0.0),
+        "gas_kwh": np.where(gas, before, 0.0),
+        "hvac_state": grid["hvac"][t],
+        "lighting_state": grid["lighting"][t],
+        "occupancy": np.clip(occupancy, 0, None).astype(np.int64),
+    }
+    for column in NUMERIC_COLUMNS:
+        values = chunk[column]
+        values[rng.random(n) < config.missing_rate] = np.nan
+        garbage = np.full(n, -1, dtype=np.int8)
+        bad = rng.random(n) < config.garbage_rate
+        garbage[bad] = rng.integers(0, len(GARBAGE), int(bad.sum()))
+        chunk[column + "_garbage"] = garbage
+    if config.number_format == "mixed":
+        chunk["italian"] = rng.random(n) < 0.5
+    else:
+        chunk["italian"] = np.full(n, config.number_format == "it")
+    chunk["unit"] = rng.random(n) < config.unit_rate
+    chunk["space"] = rng.random(n) < config.space_rate
+    return chunk
+
+
+def _digit_groups() -> np.ndarray:
+    """Bytes of 000..999, then of 0..999 without leading zeros (NUL), then a NUL group."""
+    full = np.array([list(f"{i:03d}".encode("ascii")) for i in range(1000)], dtype=np.uint8)
+    leading = full.copy()
+    leading[:100, 0] = 0
+    leading[:10, 1] = 0
+    return np.concatenate([full, leading, np.zeros((1, 3), dtype=np.uint8)])
+
+
+# Lookup table used by format_numbers: three digits per gather
+_DIGIT_GROUPS = _digit_groups()
+
+
+def _label_table(labels: Sequence[str]) -> np.ndarray:
+    """Byte matrix with one NUL-padded row per label."""
+    encoded = [label.encode("utf-8") for label in labels]
+    table = np.zeros((len(encoded), max(len(e) for e in encoded)), dtype=np.uint8)
+    for i, label in enumerate(encoded):
+        table[i, :len(label)] = np.frombuffer(label, dtype=np.uint8)
+    return table
+
+
+def format_numbers(
+    values: np.ndarray,
+    decimals: int,
+    italian: np.ndarray,
+    garbage: Optional[np.ndarray] = None,
+    unit: Optional[np.ndarray] = None,
+    space: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """Format ``values`` into a NUL-padded byte matrix, one row per value.
+
+    Rows marked ``italian`` use a decimal comma and ``.`` thousand separators;
+    NaN becomes an empty cell, ``garbage`` rows a ``GARBAGE`` token, ``unit``
+    rows get a `` kWh`` suffix and ``space`` rows surrounding spaces. NUL
+    bytes are padding and are dropped when the rows are joined.
+    """
+    n = len(values)
+    nan = np.isnan(values)
+    scaled = np.rint(np.abs(np.where(nan, 0.0, values)) * 10 ** decimals).astype(np.int64)
+    integer, fraction = np.divmod(scaled, 10 ** decimals)
+    groups = max(1, -(-len(str(int(integer.max()))) // 3)) if n else 1
+    # sign, groups of three digits with a mark after each but the last, decimal mark and decimals
+    width = 1 + 4 * groups - 1 + (1 + decimals if decimals else 0)
+    out = np.empty((n, width), dtype=np.uint8)
+    out[:, 0] = np.where((values < 0) & (scaled > 0), ord("-"), 0)
+    thousands = np.where(italian, ord("."), 0).astype(np.uint8)
+    col = 1
+    for k in reversed(range(groups)):
+        present = integer >= 1000 ** k
+        index = (integer // 1000 ** k) % 1000
+        # Full digits below the leading group, stripped leading zeros in it, nothing above
+        index = np.where(integer >= 1000 ** (k + 1), index, index + 1000)
+        if k:
+            index = np.where(present, index, 2000)
+        out[:, col:col + 3] = _DIGIT_GROUPS[index]
+        col += 3
+        if k:
+            out[:, col] = np.where(present, thousands, 0)
+            col += 1
+    if decimals:
+        out[:, col] = np.where(italian, ord(","), ord("."))
+        out[:, col + 1:] = _DIGIT_GROUPS[fraction][:, 3 - decimals:]
+    out[nan] = 0
+
+    bad = garbage >= 0 if garbage is not None else np.zeros(n, dtype=bool)
+    if bad.any():
+        table = _label_table(GARBAGE)
+        if table.shape[1] > width:
+            out = np.pad(out, ((0, 0), (0, table.shape[1] - width)))
+        out[bad] = 0
+        out[bad, :table.shape[1]] = table[garbage[bad]]
+    parts = [out]
+    if space is not None and space.any():
+        pad = np.where(space, ord(" "), 0).astype(np.uint8)[:, None]
+        parts = [pad] + parts + [pad]
+    if unit is not None and unit.any():
+        suffix = np.frombuffer(b" kWh", dtype=np.uint8)
+        parts.append(np.where((unit & ~nan & ~bad)[:, None], suffix, 0).astype(np.uint8))
+    return np.concatenate(parts, axis=1) if len(parts) > 1 else out
+
+
+def format_timestamps(stamps: np.ndarray) -> np.ndarray:
+    """Format minute timestamps as ``YYYY-MM-DD HH:MM`` bytes (one row each)."""
+    if len(stamps) and (stamps[1:] >= stamps[:-1]).all():
+        # Generated rows are in time order: no sort needed to find the distinct values
+        change = np.empty(len(stamps), dtype=bool)
+        change[0] = True
+        np.not_equal(stamps[1:], stamps[:-1], out=change[1:])
+        unique, inverse = stamps[change], np.cumsum(change) - 1
+    else:
+        unique, inverse = np.unique(stamps, return_inverse=True)
+    text = np.datetime_as_string(unique, unit="m").astype("S16")
+    table = text.view(np.uint8).reshape(len(unique), 16).copy()
+    table[:, 10] = ord(" ")
+    return table[inverse]
+
+
+def chunk_columns(chunk: Dict[str, np.ndarray], meters: Meters, config: GeneratorConfig) -> List[np.ndarray]:
+    """Byte matrices of the ``COLUMNS`` of ``chunk``, in order."""
+    sites = _label_table([f"Sito {i + 1:02d}" for i in range(config.sites)])
+    matrices = {
+        "timestamp": format_timestamps(chunk["timestamp"]),
+        "site": sites[chunk["site"]],
+        "meter_id": _label_table(meters.meter_id)[chunk["meter"]],
+        "meter_type": _label_table(["POD", "PDR"])[chunk["meter_type"]],
+        "building_zone": _label_table(ZONES)[chunk["building_zone"]],
+        "hvac_state": _label_table(HVAC_STATES)[chunk["hvac_state"]],
+        "lighting_state": _label_table(LIGHTING_STATES)[chunk["lighting_state"]],
+        "occupancy": format_numbers(chunk["occupancy"].astype(np.float64), 0, chunk["italian"]),
+    }
+    for column in NUMERIC_COLUMNS:
+        matrices[column] = format_numbers(
+            chunk[column], DECIMALS, chunk["italian"], chunk[column + "_garbage"],
+            chunk["unit"], chunk["space"]
+        )
+    return [matrices[column] for column in COLUMNS]
+
+
+def chunk_to_csv(chunk: Dict[str, np.ndarray], meters: Meters, config: GeneratorConfig) -> bytes:
+    """Encode ``chunk`` as CSV lines (no header)."""
+    columns = chunk_columns(chunk, meters, config)
+    n = len(columns[0])
+    separator = np.full((n, 1), ord(config.separator), dtype=np.uint8)
+    newline = np.full((n, 1), ord("\n"), dtype=np.uint8)
+    parts = []
+    for column in columns:
+        parts += [column, separator]
+    parts[-1] = newline
+    flat = np.concatenate(parts, axis=1).ravel()
+    return flat[flat != 0].tobytes()
+
+
+def chunk_to_frame(chunk: Dict[str, np.ndarray], meters: Meters, config: GeneratorConfig) -> pd.DataFrame:
+    """Return ``chunk`` as a DataFrame; defective numeric columns become text."""
+    frame = {
+        "timestamp": chunk["timestamp"],
+        "site": np.array([f"Sito {i + 1:02d}" for i in range(config.sites)], dtype=object)[chunk["site"]],
+        "meter_id": np.array(meters.meter_id, dtype=object)[chunk["meter"]],
+        "meter_type": np.array(["POD", "PDR"], dtype=object)[chunk["meter_type"]],
+        "building_zone": np.array(ZONES, dtype=object)[chunk["building_zone"]],
+        "hvac_state": np.array(HVAC_STATES, dtype=object)[chunk["hvac_state"]],
+        "lighting_state": np.array(LIGHTING_STATES, dtype=object)[chunk["lighting_state"]],
+        "occupancy": chunk["occupancy"],
+    }
+    clean = (
+        config.number_format == "en" and not chunk["unit"].any() and not chunk["space"].any()
+    )
+    for column in NUMERIC_COLUMNS:
+        values = chunk[column]
+        if clean and not (chunk[column + "_garbage"] >= 0).any():
+            frame[column] = values.round(DECIMALS)
+            continue
+        matrix = format_numbers(
+            values, DECIMALS, chunk["italian"], chunk[column + "_garbage"], chunk["unit"], chunk["space"]
+        )
+        # Move the padding to the end of each row: NUL-padded bytes read back as strings
+        order = np.argsort(matrix == 0, axis=1, kind="stable")
+        packed = np.ascontiguousarray(np.take_along_axis(matrix, order, axis=1))
+        text = packed.view(f"S{packed.shape[1]}").ravel().astype(str).astype(object)
+        text[text == ""] = None
+        frame[column] = text
+    return pd.DataFrame(frame, columns=COLUMNS)
+
+
+def generate_frame(rows: int, config: GeneratorConfig = GeneratorConfig()) -> pd.DataFrame:
+    """Generate ``rows`` rows in memory."""
+    meters = make_meters(config)
+    return chunk_to_frame(generate_chunk(config, meters, 0, rows), meters, config)
+
+
+def iter_chunks(rows: int, config: GeneratorConfig, chunk_rows: int):
+    """Yield ``(meters, chunk)`` blocks covering ``rows`` rows."""
+    meters = make_meters(config)
+    for start in range(0, rows, chunk_rows):
+        yield meters, generate_chunk(config, meters, start, min(rows, start + chunk_rows))
+
+
+def _csv_block(config: GeneratorConfig, meters: Meters, start: int, stop: int) -> bytes:
+    return chunk_to_csv(generate_chunk(config, meters, start, stop), meters, config)
+
+
+def iter_csv_blocks(rows: int, config: GeneratorConfig, chunk_rows: int, jobs: int = 1):
+    """Yield the CSV bytes of ``rows`` rows block by block, in order.
+
+    With ``jobs > 1`` blocks are formatted in worker processes; at most two
+    blocks per worker are in flight, so memory stays bounded.
+    """
+    meters = make_meters(config)
+    ranges = [(start, min(rows, start + chunk_rows)) for start in range(0, rows, chunk_rows)]
+    if jobs <= 1:
+        for start, stop in ranges:
+            yield _csv_block(config, meters, start, stop)
+        return
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        pending = deque()
+        for start, stop in ranges:
+            pending.append(pool.submit(_csv_block, config, meters, start, stop))
+            if len(pending) >= 2 * jobs:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def write_dataset(
+    path: str,
+    rows: int,
+    config: GeneratorConfig = GeneratorConfig(),
+    file_format: Optional[str] = None,
+    chunk_rows: int = 1 << 18,
+    jobs: int = 1
+) -> Dict[str, float]:
+    """Write ``rows`` rows to ``path`` and return size and throughput figures.
+
+    ``file_format`` (``csv``, ``xlsx``, ``parquet``, ``feather``) defaults to
+    the file extension; ``jobs`` worker processes format CSV blocks in
+    parallel (the output is identical for any number of jobs).
+    """
+    file_format = file_format or os.path.splitext(path)[1].lstrip(".").lower() or "csv"
+    started = time.perf_counter()
+    if file_format == "csv":
+        with open(path, "wb") as fh:
+            fh.write((config.separator.join(COLUMNS) + "\n").encode("utf-8"))
+            for block in iter_csv_blocks(rows, config, chunk_rows, jobs):
+                fh.write(block)
+    elif file_format in ("xlsx", "parquet", "feather"):
+        if file_format == "xlsx" and rows > EXCEL_MAX_ROWS:
+            raise ValueError(f"Excel sheets hold at most {EXCEL_MAX_ROWS} rows")
+        frame = pd.concat(
+            [chunk_to_frame(chunk, meters, config) for meters, chunk in iter_chunks(rows, config, chunk_rows)],
+            ignore_index=True
+        )
+        if file_format == "xlsx":
+            frame.to_excel(path, index=False)
+        elif file_format == "parquet":
+            frame.to_parquet(path, index=False)
+        else:
+            frame.to_feather(path)
+    else:
+        raise ValueError(f"Unsupported format: {file_format}")
+    seconds = time.perf_counter() - started
+    size = os.path.getsize(path)
+    return {
+        "rows": rows,
+        "bytes": size,
+        "seconds": seconds,
+        "mb_per_s": size / 1e6 / seconds if seconds else 0.0,
+    }
+
+
+def main() -> None:
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description="Generate synthetic OpenEurope meter data")
+    parser.add_argument("output", help="Output file (.csv, .xlsx, .parquet or .feather)")
+    parser.add_argument("--rows", type=parse_size, default=parse_size("100K"), help="Rows to write (default: 100K)")
+    parser.add_argument("--format", dest="file_format", choices=["csv", "xlsx", "parquet", "feather"],
+                        help="Output format (default: from the file extension)")
+    parser.add_argument("--sites", type=int, default=3, help="Number of sites (default: 3)")
+    parser.add_argument("--meters", type=int, default=4, help="Meters per site (default: 4)")
+    parser.add_argument("--gas-share", type=float, default=0.25, help="Share of gas (PDR) meters (default: 0.25)")
+    parser.add_argument("--start", default="2024-01-01", help="First timestamp (default: 2024-01-01)")
+    parser.add_argument("--interval", type=int, default=15, help="Minutes per interval (default: 15)")
+    parser.add_argument("--number-format", choices=NUMBER_FORMATS, default="en",
+                        help="en: 1234.567 ',' separated; it: 1.234,567 ';' separated; mixed: both")
+    parser.add_argument("--missing-rate", type=float, default=0.002, help="Empty cells (default: 0.002)")
+    parser.add_argument("--garbage-rate", type=float, default=0.0005, help="Non-numeric cells (default: 0.0005)")
+    parser.add_argument("--unit-rate", type=float, default=0.0, help="Values with a ' kWh' suffix (default: 0)")
+    parser.add_argument("--space-rate", type=float, default=0.0, help="Values with stray spaces (default: 0)")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed (default: 0)")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1,
+                        help="Worker processes formatting CSV blocks (default: all CPUs)")
+    args = parser.parse_args()
+
+    config = GeneratorConfig(
+        sites=args.sites,
+        meters_per_site=args.meters,
+        gas_share=args.gas_share,
+        start=args.start,
+        interval_minutes=args.interval,
+        missing_rate=args.missing_rate,
+        garbage_rate=args.garbage_rate,
+        unit_rate=args.unit_rate,
+        space_rate=args.space_rate,
+        number_format=args.number_format,
+        seed=args.seed,
+    )
+    stats = write_dataset(args.output, args.rows, config, args.file_format, jobs=args.jobs)
+    print(
+        f"Written {stats['rows']:,} rows ({stats['bytes'] / 1e6:.1f} MB) to {args.output} "
+        f"in {stats['seconds']:.2f} s ({stats['mb_per_s']:.0f} MB/s)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+"""
+OpenEurope Incremental Ingestion
+--------------------------------
+
+Checkpoints for CSV exports that only ever grow, such as the daily appends
+of a SCADA exporter, so that each pipeline run parses only the rows added
+since the previous one.
+
+For every input a small JSON state file records:
+
+* the checkpoint: byte offset just past the last complete line consumed,
+  rows consumed, last timestamp seen, SHA-256 of the header line and of the
+  ``TAIL_PROBE`` bytes before the offset;
+* the accumulators the reports are computed from: consumption totals and
+  row counts, dropped rows, monthly F1/F2/F3/gas totals and, when grouping,
+  per-group totals;
+* with anomaly screening, the last rows of each meter, whose verdicts wait
+  for the rows appended after them (see ``openeurope.audit_incremental``).
+
+A run validates the checkpoint against the file (same header, not shorter,
+same bytes before the offset); when the file was rewritten rather than
+appended to, the checkpoint is discarded and the whole file is read again.
+A last line without its newline is left for the next run, since the
+exporter may still be writing it.
+
+The pipeline side lives in ``openeurope.audit_incremental``; this module
+only reads the new rows and keeps the state.
+
+Usage:
+    python3 incremental_ingest.py show meters.csv
+    python3 incremental_ingest.py reset meters.csv
+"""
+
+import argparse
+import hashlib
+import io
+import json
+import os
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+import pandas as pd
+
+STATE_VERSION = 2
+STATE_SUFFIX = ".ingest.json"
+TAIL_PROBE = 4096
+CHUNK_ROWS = 1 << 20
+BANDS = ("f1", "f2", "f3", "gas")
+
+
+class IngestCheckpoint(NamedTuple):
+    """Position reached in an input file."""
+
+    offset: int = 0
+    rows: int = 0
+    last_timestamp: str = ""
+    header_sha256: str = ""
+    tail_sha256: str = ""
+
+
+class IngestState:
+    """Checkpoint plus the running totals built from the rows consumed so far.
+
+    Parameters
+    ----------
+    group_by : str, optional
+        Column whose per-group totals are accumulated.
+    """
+
+    def __init__(self, group_by: Optional[str] = None) -> None:
+        self.checkpoint = IngestCheckpoint()
+        self.group_by = group_by
+        self.rows = 0
+        self.dropped = 0
+        self.baseline_total = 0.0
+        self.new_total = 0.0
+        self.monthly: Dict[str, List[float]] = {}
+        self.groups: Dict[str, List[float]] = {}
+        self.screening = False
+        self.screen_step: Optional[float] = None
+        self.tail: Optional[pd.DataFrame] = None
+
+    def add(self, clean: pd.DataFrame, dropped: int, monthly: Optional[pd.DataFrame], sign: int = 1) -> None:
+        """Merge a normalised chunk and its monthly band totals.
+
+        With ``sign=-1`` the rows are taken back out of the totals (and
+        ``dropped``, already negative, is added as given).
+        """
+        self.rows += sign * len(clean)
+        self.dropped += dropped
+        self.baseline_total += sign * float(clean["consumption_before"].sum())
+        self.new_total += sign * float(clean["consumption_after"].sum())
+        if monthly is not None:
+            for row in monthly.itertuples(index=False):
+                totals = self.monthly.setdefault(row.month, [0.0] * len(BANDS))
+                for i, band in enumerate(BANDS):
+                    totals[i] += sign * float(getattr(row, band))
+        if self.group_by:
+            if self.group_by not in clean.columns:
+                raise ValueError(f"Grouping column '{self.group_by}' not found in input data")
+            grouped = clean.groupby(clean[self.group_by].astype(str))
+            sums = grouped[["consumption_before", "consumption_after"]].sum()
+            sums["rows"] = grouped.size()
+            for key, row in sums.iterrows():
+                totals = self.groups.setdefault(key, [0, 0.0, 0.0])
+                totals[0] += sign * int(row["rows"])
+                totals[1] += sign * float(row["consumption_before"])
+                totals[2] += sign * float(row["consumption_after"])
+                if not totals[0]:
+                    del self.groups[key]
+
+    def monthly_frame(self) -> Optional[pd.DataFrame]:
+        """Monthly totals shaped like ``openeurope.calculate_monthly_bands``."""
+        if not self.monthly:
+            return None
+        months = sorted(self.monthly)
+        return pd.DataFrame([[month, *self.monthly[month]] for month in months], columns=["month", *BANDS])
+
+    def group_frame(self) -> pd.DataFrame:
+        """Per-group results shaped like ``openeurope.calculate_group_savings``."""
+        keys = sorted(self.groups)
+        groups = pd.DataFrame({
+            "group": keys,
+            "rows": [self.groups[key][0] for key in keys],
+            "baseline_avg": [self.groups[key][1] / self.groups[key][0] for key in keys],
+            "new_avg": [self.groups[key][2] / self.groups[key][0] for key in keys],
+        })
+        groups["savings"] = groups["baseline_avg"] - groups["new_avg"]
+        groups["savings_percent"] = (
+            groups["savings"] / groups["baseline_avg"].where(groups["baseline_avg"] != 0) * 100
+        ).fillna(0.0)
+        return groups
+
+    def to_dict(self) -> dict:
+        return {
+            "version": STATE_VERSION,
+            "checkpoint": self.checkpoint._asdict(),
+            "group_by": self.group_by,
+            "rows": self.rows,
+            "dropped": self.dropped,
+            "baseline_total": self.baseline_total,
+            "new_total": self.new_total,
+            "monthly": self.monthly,
+            "groups": self.groups,
+            "screening": self.screening,
+            "screen_step": self.screen_step,
+            "tail": json.loads(self.tail.to_json(orient="split", index=False)) if self.tail is not None else None,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "IngestState":
+        # Version 1 predates screening and has no tail
+        if data.get("version") not in (1, STATE_VERSION):
+            raise ValueError(f"Unsupported ingestion state version {data.get('version')}")
+        state = cls(data["group_by"])
+        state.checkpoint = IngestCheckpoint(**data["checkpoint"])
+        state.rows = int(data["rows"])
+        state.dropped = int(data["dropped"])
+        state.baseline_total = float(data["baseline_total"])
+        state.new_total = float(data["new_total"])
+        state.monthly = data["monthly"]
+        state.groups = data["groups"]
+        state.screening = bool(data.get("screening", False))
+        state.screen_step = data.get("screen_step")
+        if data.get("tail") is not None:
+            state.tail = pd.DataFrame(data["tail"]["data"], columns=data["tail"]["columns"])
+        return state
+
+
+def state_path(input_file: str, state_dir: Optional[str] = None) -> str:
+    """State file of ``input_file``: next to it, or in ``state_dir``."""
+    directory = state_dir or os.path.dirname(os.path.abspath(input_file))
+    return os.path.join(directory, os.path.basename(input_file) + STATE_SUFFIX)
+
+
+def load_state(path: str) -> Optional[IngestState]:
+    """Read the state saved by :func:`save_state`, if any."""
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return IngestState.from_dict(json.load(f))
+
+
+def save_state(path: str, state: IngestState) -> None:
+    """Persist ``state`` atomically."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state.to_dict(), f)
+    os.replace(tmp_path, path)
+
+
+def csv_separator(header: bytes) -> str:
+    """Field separator of a CSV file from its header line: ``;`` or ``,``.
+
+    Exports with decimal commas (``generate_meter_data.py --number-format it``,
+    Italian Excel) separate fields with ``;``.
+    """
+    return ";" if header.count(b";") > header.count(b",") else ","
+
+
+def sniff_separator(path: str) -> str:
+    """:func:`csv_separator` of the file at ``path``."""
+    with open(path, "rb") as f:
+        return csv_separator(f.readline())
+
+
+def _sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def _probe(f, offset: int) -> str:
+    """Hash of the bytes just before ``offset``."""
+    start = max(0, offset - TAIL_PROBE)
+    f.seek(start)
+    return _sha256(f.read(offset - start))
+
+
+def stale_reason(input_file: str, checkpoint: IngestCheckpoint) -> Optional[str]:
+    """Why ``checkpoint`` no longer describes a prefix of ``input_file`` (``None`` if it does)."""
+    with open(input_file, "rb") as f:
+        header = f.readline()
+        if _sha256(header) != checkpoint.header_sha256:
+            return "header changed"
+        if os.fstat(f.fileno()).st_size < checkpoint.offset:
+            return "file is shorter than the checkpoint"
+        if _probe(f, checkpoint.offset) != checkpoint.tail_sha256:
+            return "content before the checkpoint changed"
+    return None
+
+
+def read_new_rows(
+    input_file: str,
+    checkpoint: IngestCheckpoint,
+    chunk_rows: int = CHUNK_ROWS
+) -> Tuple[IngestCheckpoint, Iterator[pd.DataFrame]]:
+    """Rows of ``input_file`` after ``checkpoint``, in chunks of ``chunk_rows``.
+
+    Returns
+    -------
+    tuple of (IngestCheckpoint, iterator of pd.DataFrame)
+        The checkpoint at the end of the last complete line (``rows`` and
+        ``last_timestamp`` still to be updated by the caller) and the new
+        rows, parsed with the header and field separator of the file.
+    """
+    with open(input_file, "rb") as f:
+        header = f.readline()
+        size = os.fstat(f.fileno()).st_size
+        start = max(checkpoint.offset, len(header))
+        # Stop after the last newline: a trailing partial line is still being written
+        end = size
+        while end > start:
+            f.seek(max(start, end - 65536))
+            block = f.read(end - f.tell())
+            newline = block.rfind(b"\n")
+            if newline >= 0:
+                end = end - len(block) + newline + 1
+                break
+            end -= len(block)
+        tail = _probe(f, end)
+    sep = csv_separator(header)
+    columns = list(pd.read_csv(io.BytesIO(header), sep=sep).columns)
+    new = checkpoint._replace(offset=end, header_sha256=_sha256(header), tail_sha256=tail)
+
+    def chunks() -> Iterator[pd.DataFrame]:
+        if end <= start:
+            return
+        with open(input_file, "rb") as f:
+            f.seek(start)
+            # Parse straight from the file unless a partial line has to be cut off
+            source = f if end == size else io.BytesIO(f.read(end - start))
+            yield from pd.read_csv(source, sep=sep, names=columns, header=None, chunksize=chunk_rows)
+
+    return new, chunks()
+
+
+def main() -> None:
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description="Inspect or reset incremental ingestion checkpoints")
+    parser.add_argument("command", choices=["show", "reset"])
+    parser.add_argument("input_file", help="Input whose checkpoint to show or reset")
+    parser.add_argument("--state-dir", help="Directory of the state files (default: next to the input)")
+    args = parser.parse_args()
+
+    path = state_path(args.input_file, args.state_dir)
+    if args.command == "reset":
+        if os.path.exists(path):
+            os.remove(path)
+        print(f"Checkpoint removed: {path}")
+        return
+    state = load_state(path)
+    if state is None:
+        print(f"No checkpoint for {args.input_file}")
+        return
+    checkpoint = state.checkpoint
+    print(f"State: {path}")
+    print(f"Rows consumed: {checkpoint.rows:,} ({checkpoint.offset:,} bytes), last timestamp {checkpoint.last_timestamp}")
+    print(f"Valid rows accumulated: {state.rows:,}, dropped: {state.dropped:,}, months: {len(state.monthly)}")
+    reason = stale_reason(args.input_file, checkpoint) if os.path.exists(args.input_file) else "input missing"
+    print(f"Checkpoint {'stale: ' + reason if reason else 'valid'}")
+
+
+if __name__ == "__main__":
+    main()
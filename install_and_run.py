@@ -6,11 +6,12 @@ Installa le dipendenze, verifica l'installazione e avvia l'applicazione web
 
 import sys
 import os
-import subprocess
-import time
 import webbrowser
 from pathlib import Path
 
+import bootstrap_env
+from demo_supervisor import DemoSupervisor, SupervisorError
+
 # Colori per output
 class Colors:
     GREEN = '\033[92m'
@@ -45,28 +46,23 @@ def check_python_version():
     print_status(f"Python {sys.version.split()[0]} OK", "success")
 
 def install_dependencies():
-    """Installa le dipendenze richieste"""
+    """Prepara l'ambiente virtuale del progetto (vedi bootstrap_env)"""
+    if bootstrap_env.is_current():
+        print_status("Dipendenze già installate (lock invariato)", "success")
+        return
+    
     print_status("Installazione dipendenze...", "info")
+    if bootstrap_env.wheel_files():
+        print_status("Uso della wheelhouse locale (offline)", "info")
     
-    packages = ["pandas", "openpyxl"]
-    
-    for package in packages:
-        print_status(f"Installazione {package}...", "info")
-        try:
-            subprocess.check_call(
-                [sys.executable, "-m", "pip", "install", "--quiet", package],
-                stdout=subprocess.DEVNULL,
-                stderr=subprocess.DEVNULL
-            )
-            print_status(f"{package} installato", "success")
-        except subprocess.CalledProcessError:
-            print_status(f"Errore nell'installazione di {package}", "error")
-            print_status("Tentativo di installazione con opzioni verbose...", "warning")
-            try:
-                subprocess.check_call([sys.executable, "-m", "pip", "install", package])
-            except subprocess.CalledProcessError:
-                print_status(f"Impossibile installare {package}", "error")
-                sys.exit(1)
+    output = []
+    try:
+        bootstrap_env.ensure_environment(log=output.append)
+    except bootstrap_env.BootstrapError as e:
+        print("\n".join(output[-20:]))
+        print_status(f"Errore nell'installazione: {e}", "error")
+        sys.exit(1)
+    print_status(", ".join(bootstrap_env.REQUIREMENTS) + " installati", "success")
 
 def verify_dependencies():
     """Verifica che le dipendenze siano correttamente installate"""
@@ -79,10 +75,9 @@ def verify_dependencies():
     
     all_ok = True
     for package, description in packages.items():
-        try:
-            __import__(package)
+        if bootstrap_env.find_module(package):
             print_status(f"{package} ({description})", "success")
-        except ImportError:
+        else:
             print_status(f"{package} ({description}) - NON TROVATO", "error")
             all_ok = False
     
@@ -112,65 +107,23 @@ def check_project_structure():
     return all_ok
 
 def start_server():
-    """Avvia il server di demo"""
+    """Avvia il server di demo sotto supervisione e attende che sia pronto"""
     print_status("Avvio server OpenEurope...", "info")
     
+    supervisor = DemoSupervisor(8000, log=lambda line: print_status(line, "info"))
     try:
-        # Avvia il server in background
-        process = subprocess.Popen(
-            [sys.executable, "run_demo.py"],
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True
-        )
-        
-        print_status("Server in avvio...", "info")
-        time.sleep(3)  # Attendi che il server si avvii
-        
-        # Verifica che il processo sia ancora in esecuzione
-        if process.poll() is None:
-            print_status("Server avviato con successo (PID: {})".format(process.pid), "success")
-            return process
-        else:
-            stdout, stderr = process.communicate()
-            print_status(f"Errore nell'avvio del server:\n{stderr}", "error")
-            sys.exit(1)
-            
-    except Exception as e:
+        supervisor.start()
+    except (OSError, SupervisorError) as e:
         print_status(f"Errore nell'avvio del server: {e}", "error")
         sys.exit(1)
+    
+    print_status(f"Server raggiungibile su http://localhost:{supervisor.port}", "success")
+    return supervisor
 
-def test_server_connection():
-    """Testa che il server sia raggiungibile"""
-    print_status("Test connessione server...", "info")
-    
-    import socket
-    
-    for attempt in range(5):
-        try:
-            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            sock.settimeout(1)
-            result = sock.connect_ex(('localhost', 8000))
-            sock.close()
-            
-            if result == 0:
-                print_status("Server raggiungibile su http://localhost:8000", "success")
-                return True
-            else:
-                print_status(f"Tentativo {attempt + 1}/5: Server non pronto, attesa...", "warning")
-                time.sleep(1)
-        except Exception as e:
-            print_status(f"Tentativo {attempt + 1}/5: {e}", "warning")
-            time.sleep(1)
-    
-    print_status("Server non raggiungibile", "error")
-    return False
-
-def open_browser():
+def open_browser(url):
     """Apre il browser alla URL dell'applicazione"""
     print_status("Apertura browser...", "info")
     
-    url = "http://localhost:8000/START_HERE.html"
     try:
         webbrowser.open(url)
         print_status(f"Browser aperto: {url}", "success")
@@ -204,34 +157,26 @@ def main():
     
     print()
     
-    # Avvia server
-    server_process = start_server()
-    
-    print()
-    
-    # Testa connessione
-    if not test_server_connection():
-        print_status("Chiusura server e uscita", "error")
-        server_process.terminate()
-        sys.exit(1)
+    # Avvia server (pronto quando risponde a /api/health)
+    supervisor = start_server()
     
     print()
     
     # Apri browser
-    open_browser()
+    open_browser(supervisor.url())
     
     print()
     print(f"{Colors.GREEN}{Colors.BOLD}✓ OpenEurope è pronto!{Colors.END}")
-    print(f"{Colors.BLUE}URL: http://localhost:8000/START_HERE.html{Colors.END}")
+    print(f"{Colors.BLUE}URL: {supervisor.url()}{Colors.END}")
     print(f"\n{Colors.YELLOW}Premi Ctrl+C per fermare il server{Colors.END}\n")
     
-    # Mantieni il server in esecuzione
+    # Mantieni il server in esecuzione (riavviato se termina inaspettatamente)
     try:
-        server_process.wait()
+        supervisor.wait()
     except KeyboardInterrupt:
         print_status("Arresto server...", "info")
-        server_process.terminate()
-        server_process.wait(timeout=5)
+    finally:
+        supervisor.stop()
         print_status("Server fermato", "success")
 
 if __name__ == "__main__":
@@ -0,0 +1,244 @@
+"""
+OpenEurope Interval Gaps
+------------------------
+
+Detects the readings missing from interval data (15-minute exports with a
+``timestamp`` column, per ``meter_id`` when present) against the regular
+grid of each meter, fills short gaps by interpolation and reports long
+gaps and completeness, so that missing intervals do not silently bias the
+averages of ``calculate_savings``.
+
+Gaps are found from the differences between consecutive timestamps of
+each meter after one sort, and the rows of all short gaps are built at
+once with ``np.repeat``; completeness is counted per meter and month from
+the same arrays. No per-row Python work is done, so years of data for
+hundreds of meters are handled in a few passes.
+
+Timestamps with UTC offsets are compared in UTC, so a day with a daylight
+saving time change has no gap and no duplicate; months are UTC months.
+
+Interpolation methods:
+
+``linear``
+    straight line between the readings around the gap;
+``previous``
+    repeat the reading before the gap;
+``none``
+    detect and report only.
+"""
+
+from typing import List, NamedTuple, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from data_quality import interval_minutes
+from number_format import to_float
+
+GAP_METHODS = ("linear", "previous", "none")
+# Resolution of the grid: shorter reading intervals cannot be checked
+MIN_STEP_MINUTES = 1
+FILLED_COLUMNS = ("consumption_before", "consumption_after", "f1_kwh", "f2_kwh", "f3_kwh", "gas_kwh")
+FLAG_COLUMN = "interpolated"
+
+
+class GapReport(NamedTuple):
+    """What :func:`fill_gaps` found and did.
+
+    ``long_gaps`` has one row per unfilled gap (``meter_id``, ``after``,
+    ``before``, ``missing``); ``completeness`` one row per meter and month
+    (``meter_id``, ``month``, ``expected``, ``present``, ``filled``,
+    ``completeness``, ``completeness_filled``, as percentages).
+    """
+
+    interval_minutes: float
+    short_gaps: int
+    filled: int
+    long_gaps: pd.DataFrame
+    completeness: pd.DataFrame
+
+    @property
+    def missing(self) -> int:
+        """Intervals missing before filling."""
+        return int(self.completeness["expected"].sum() - self.completeness["present"].sum())
+
+
+def _completeness(
+    codes: np.ndarray,
+    minutes: np.ndarray,
+    filled_codes: np.ndarray,
+    filled_minutes: np.ndarray,
+    meter_ids: List[str],
+    step: int
+) -> pd.DataFrame:
+    """Expected, present and filled intervals per meter and month.
+
+    ``codes``/``minutes`` are the distinct readings sorted by meter and time;
+    a meter is expected to report on its grid from its first to its last
+    reading.
+    """
+    month_of = lambda m: m.astype("datetime64[m]").astype("datetime64[M]").astype(np.int64)
+    n_months_key = 1 << 32
+    present = pd.Series(codes.astype(np.int64) * n_months_key + month_of(minutes)).value_counts()
+    filled = pd.Series(filled_codes.astype(np.int64) * n_months_key + month_of(filled_minutes)).value_counts()
+
+    starts = np.flatnonzero(np.concatenate(([True], codes[1:] != codes[:-1])))
+    ends = np.concatenate((starts[1:], [len(codes)])) - 1
+    rows = []
+    for first_index, last_index in zip(starts, ends):
+        code, first, last = codes[first_index], minutes[first_index], minutes[last_index]
+        months = np.arange(month_of(np.array([first]))[0], month_of(np.array([last]))[0] + 1)
+        month_start = months.astype("datetime64[M]").astype("datetime64[m]").astype(np.int64)
+        month_end = (months + 1).astype("datetime64[M]").astype("datetime64[m]").astype(np.int64) - 1
+        lo = np.maximum(month_start, first)
+        hi = np.minimum(month_end, last)
+        expected = (hi - first) // step - (-((first - lo) // step)) + 1
+        keys = code * n_months_key + months
+        rows.append(pd.DataFrame({
+            "meter_id": meter_ids[code],
+            "month": np.datetime_as_string(months.astype("datetime64[M]"), unit="M"),
+            "expected": expected,
+            "present": present.reindex(keys, fill_value=0).to_numpy(),
+            "filled": filled.reindex(keys, fill_value=0).to_numpy(),
+        }))
+    table = pd.concat(rows, ignore_index=True)
+    table["completeness"] = (100 * table["present"] / table["expected"]).round(2)
+    table["completeness_filled"] = (100 * (table["present"] + table["filled"]) / table["expected"]).round(2)
+    return table
+
+
+def parse_timestamps(column: pd.Series) -> pd.Series:
+    """``column`` as datetimes, NaT where it is not a date.
+
+    Naive timestamps stay naive and a single time zone is kept; offsets
+    that change within the column (daylight saving time) are converted to
+    UTC, as no single zone describes them.
+    """
+    try:
+        return pd.to_datetime(column, errors="coerce")
+    except (ValueError, TypeError):
+        return pd.to_datetime(column, errors="coerce", utc=True)
+
+
+def _utc_minutes(stamps: pd.Series) -> np.ndarray:
+    """Minutes since the epoch (UTC for aware timestamps) of valid ``stamps``."""
+    if isinstance(stamps.dtype, pd.DatetimeTZDtype):
+        stamps = stamps.dt.tz_convert(None)
+    return stamps.to_numpy().astype("datetime64[m]").astype(np.int64)
+
+
+def _from_minutes(minutes: np.ndarray, like: pd.Series) -> pd.DatetimeIndex:
+    """Minutes from :func:`_utc_minutes` back to datetimes of the dtype of ``like``."""
+    stamps = pd.DatetimeIndex(minutes.astype("datetime64[m]"))
+    if isinstance(like.dtype, pd.DatetimeTZDtype):
+        return stamps.tz_localize("UTC").tz_convert(like.dtype.tz).as_unit(like.dtype.unit)
+    return stamps.as_unit(np.datetime_data(like.dtype)[0])
+
+
+def _empty_report(step: float) -> GapReport:
+    return GapReport(
+        step, 0, 0,
+        pd.DataFrame(columns=["meter_id", "after", "before", "missing"]),
+        pd.DataFrame(columns=["meter_id", "month", "expected", "present", "filled", "completeness", "completeness_filled"])
+    )
+
+
+def fill_gaps(
+    df: pd.DataFrame,
+    method: str = "linear",
+    max_gap_minutes: float = 60.0,
+    step_minutes: Optional[float] = None
+) -> Tuple[pd.DataFrame, GapReport]:
+    """Detect missing intervals and fill the short gaps.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Normalised data with a ``timestamp`` column and optionally
+        ``meter_id``.
+    method : str
+        One of ``GAP_METHODS``.
+    max_gap_minutes : float
+        Longest gap filled; longer gaps are only reported.
+    step_minutes : float, optional
+        Grid interval (default: estimated from the timestamps).
+
+    Returns
+    -------
+    tuple of (pd.DataFrame, GapReport)
+        ``df`` with its ``timestamp`` column parsed and the interpolated
+        columns numeric, followed by the
+        interpolated rows (``interpolated`` set to ``True`` on those only),
+        and the gap report.
+
+    Raises
+    ------
+    ValueError
+        If ``method`` is unknown, or the reading interval is shorter than
+        ``MIN_STEP_MINUTES`` (sub-minute data, or numbers such as epoch
+        seconds read as timestamps).
+    """
+    if method not in GAP_METHODS:
+        raise ValueError(f"Unknown gap filling method: {method}")
+    interval = step_minutes or interval_minutes(df)
+    if not interval >= MIN_STEP_MINUTES:
+        raise ValueError(
+            f"Reading interval of {interval:.3g} minutes is shorter than the "
+            f"{MIN_STEP_MINUTES}-minute resolution of the gap check"
+        )
+    step = int(round(interval))
+    stamps = parse_timestamps(df["timestamp"])
+    valid = np.flatnonzero(stamps.notna().to_numpy())
+    if not len(valid):
+        out = df.copy()
+        out["timestamp"] = stamps
+        return out, _empty_report(step)
+    minutes = _utc_minutes(stamps)[valid]
+    if "meter_id" in df.columns:
+        codes, uniques = pd.factorize(df["meter_id"].to_numpy()[valid])
+        meter_ids = [str(meter) for meter in uniques]
+    else:
+        codes, meter_ids = np.zeros(len(valid), dtype=np.int64), [""]
+    order = np.lexsort((minutes, codes))
+    codes, minutes, rows = codes[order], minutes[order], valid[order]
+
+    # Duplicated readings count once
+    distinct = np.concatenate(([True], (codes[1:] != codes[:-1]) | (minutes[1:] != minutes[:-1])))
+    codes, minutes, rows = codes[distinct], minutes[distinct], rows[distinct]
+    same_meter = codes[1:] == codes[:-1]
+    missing = np.where(same_meter, np.rint(np.diff(minutes) / step).astype(np.int64) - 1, 0)
+    missing = np.maximum(missing, 0)
+    max_fill = int(max_gap_minutes // step) if method != "none" else 0
+    short = np.flatnonzero((missing > 0) & (missing <= max_fill))
+    long = np.flatnonzero(missing > max(max_fill, 0))
+
+    # One new row per missing interval of every short gap
+    counts = missing[short]
+    left = np.repeat(short, counts)
+    position = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts) + 1
+    fraction = position / np.repeat(counts + 1, counts)
+    filled_minutes = minutes[left] + position * step
+    out = df.copy()
+    out["timestamp"] = stamps
+    new_rows = out.iloc[rows[left]].copy()
+    new_rows["timestamp"] = _from_minutes(filled_minutes, stamps)
+    for column in FILLED_COLUMNS:
+        if column not in out.columns:
+            continue
+        out[column] = to_float(out[column])
+        values = out[column].to_numpy()[rows]
+        before, after = values[left], values[left + 1]
+        new_rows[column] = before + (after - before) * fraction if method == "linear" else before
+    if len(new_rows):
+        out[FLAG_COLUMN] = False
+        new_rows[FLAG_COLUMN] = True
+        out = pd.concat([out, new_rows], ignore_index=True)
+
+    long_gaps = pd.DataFrame({
+        "meter_id": np.array(meter_ids, dtype=object)[codes[long]] if len(long) else [],
+        "after": minutes[long].astype("datetime64[m]"),
+        "before": minutes[long + 1].astype("datetime64[m]"),
+        "missing": missing[long],
+    })
+    completeness = _completeness(codes, minutes, codes[left], filled_minutes, meter_ids, step)
+    return out, GapReport(step, len(short), len(new_rows), long_gaps, completeness)
@@ -0,0 +1,397 @@
+#!/usr/bin/env python3
+"""
+OpenEurope Interval Store
+-------------------------
+
+Compact binary storage for years of interval (e.g. 15-minute) meter data, so
+that repeated analyses memory-map one file instead of re-reading CSV or
+Excel exports.
+
+A store holds, for every meter, one fixed-width ``float32`` array per
+channel (``consumption_before``, ``consumption_after``, ``f1_kwh``...) on a
+regular time grid; missing intervals are NaN. The file layout is::
+
+    header   magic, version, channel count, meter count, data offset (64 bytes)
+    channels one NUL-padded name per channel
+    index    one record per meter: id, byte offset, first timestamp,
+             interval and number of intervals (``INDEX_DTYPE``)
+    data     per meter, 64-byte aligned, the channel arrays one after the
+             other (channel-major), little-endian float32
+
+Because every interval sits at a computable position, selecting a meter
+and a time range is index arithmetic on the memory map: the arrays handed
+to the calculations are views of the file, nothing is parsed or copied.
+Monthly F1/F2/F3 totals use the same arithmetic for the month boundaries,
+so timestamps are never materialised either.
+
+Usage:
+    python3 interval_store.py build meters.csv meters.oeis
+    python3 interval_store.py info meters.oeis
+"""
+
+import argparse
+import struct
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from number_format import to_float
+
+STORE_SUFFIX = ".oeis"
+MAGIC = b"OEISTORE"
+VERSION = 1
+
+# Channels copied from tabular data when present
+STORE_COLUMNS = ("consumption_before", "consumption_after", "f1_kwh", "f2_kwh", "f3_kwh", "gas_kwh")
+BAND_COLUMNS = {key: f"{key}_kwh" for key in ("f1", "f2", "f3", "gas")}
+
+_HEADER = struct.Struct("<8sHHIIQ")
+_HEADER_SIZE = 64
+_NAME_DTYPE = np.dtype("S32")
+_ALIGN = 64
+
+INDEX_DTYPE = np.dtype([
+    ("meter_id", "S64"),
+    ("offset", "<u8"),
+    ("start", "<M8[m]"),
+    ("interval", "<m8[m]"),
+    ("count", "<u8"),
+])
+
+
+class MeterSlice(NamedTuple):
+    """Intervals of one meter selected from a store.
+
+    ``values`` has one row per store channel and is a read-only view of the
+    memory-mapped file.
+    """
+
+    meter_id: str
+    start: np.datetime64
+    interval: np.timedelta64
+    values: np.ndarray
+
+    @property
+    def timestamps(self) -> np.ndarray:
+        """Timestamp of every selected interval (computed, not stored)."""
+        return self.start + np.arange(self.values.shape[1]) * self.interval
+
+
+def _aligned(offset: int) -> int:
+    return -(-offset // _ALIGN) * _ALIGN
+
+
+def _to_minute(value) -> np.datetime64:
+    return np.datetime64(pd.Timestamp(value).to_datetime64(), "m")
+
+
+def write_store(
+    path: str,
+    df: pd.DataFrame,
+    columns: Optional[Sequence[str]] = None,
+    meter_column: str = "meter_id",
+    interval_minutes: Optional[int] = None
+) -> int:
+    """Write a long-format table to an interval store.
+
+    Parameters
+    ----------
+    path : str
+        Output file, conventionally with the ``.oeis`` suffix.
+    df : pd.DataFrame
+        One row per meter and interval with a ``timestamp`` column, the
+        ``meter_column`` (all rows form one meter when it is absent) and the
+        channel columns; values that are not numeric are stored as gaps.
+    columns : sequence of str, optional
+        Channels to store (default: the ``STORE_COLUMNS`` present in ``df``).
+    meter_column : str
+        Column identifying the meter (POD/PDR code).
+    interval_minutes : int, optional
+        Grid step; by default the smallest step between two readings of the
+        same meter.
+
+    Returns
+    -------
+    int
+        Number of meters written.
+
+    Raises
+    ------
+    ValueError
+        If a timestamp is missing or falls between two grid intervals.
+    """
+    columns = list(columns or [col for col in STORE_COLUMNS if col in df.columns])
+    if not columns:
+        raise ValueError("No channel columns to store")
+    if any(len(col.encode("utf-8")) > _NAME_DTYPE.itemsize for col in columns):
+        raise ValueError(f"Channel names are limited to {_NAME_DTYPE.itemsize} bytes")
+
+    if df.empty:
+        raise ValueError("No rows to store")
+    stamps = pd.to_datetime(df["timestamp"], errors="coerce").to_numpy().astype("datetime64[m]")
+    if np.isnat(stamps).any():
+        raise ValueError("Rows without a valid timestamp cannot be stored")
+    if meter_column in df.columns:
+        codes, meter_ids = pd.factorize(df[meter_column].astype(str), sort=True)
+    else:
+        codes, meter_ids = np.zeros(len(df), dtype=np.int64), pd.Index(["all"])
+    minutes = stamps.astype(np.int64)
+    order = np.lexsort((minutes, codes))
+    codes, minutes = codes[order], minutes[order]
+    values = np.stack([
+        to_float(df[col]).to_numpy()[order] for col in columns
+    ])
+    bounds = np.flatnonzero(np.diff(codes)) + 1
+    starts = np.concatenate(([0], bounds))
+    stops = np.concatenate((bounds, [len(codes)]))
+
+    if interval_minutes is None:
+        steps = np.diff(minutes)
+        steps = steps[(steps > 0) & (np.diff(codes) == 0)]
+        interval_minutes = int(steps.min()) if len(steps) else 15
+    index = np.zeros(len(meter_ids), dtype=INDEX_DTYPE)
+    offset = _aligned(_HEADER_SIZE + len(columns) * _NAME_DTYPE.itemsize + len(index) * INDEX_DTYPE.itemsize)
+    data_offset = offset
+    positions = []
+    for i, (lo, hi) in enumerate(zip(starts, stops)):
+        first = minutes[lo]
+        pos, off_grid = np.divmod(minutes[lo:hi] - first, interval_minutes)
+        if off_grid.any():
+            raise ValueError(
+                f"Meter {meter_ids[codes[lo]]}: timestamps are not on a {interval_minutes}-minute grid"
+            )
+        meter_id = str(meter_ids[codes[lo]]).encode("utf-8")
+        if len(meter_id) > INDEX_DTYPE["meter_id"].itemsize:
+            raise ValueError(f"Meter id too long: {meter_ids[codes[lo]]}")
+        count = int(pos[-1]) + 1
+        index[i] = (meter_id, offset, np.datetime64(int(first), "m"), np.timedelta64(interval_minutes, "m"), count)
+        positions.append(pos)
+        offset = _aligned(offset + len(columns) * count * 4)
+
+    with open(path, "wb") as fh:
+        fh.write(_HEADER.pack(MAGIC, VERSION, 0, len(columns), len(index), data_offset).ljust(_HEADER_SIZE, b"\0"))
+        fh.write(np.array(columns, dtype=_NAME_DTYPE).tobytes())
+        fh.write(index.tobytes())
+        for entry, lo, hi, pos in zip(index, starts, stops, positions):
+            block = np.full((len(columns), int(entry["count"])), np.nan, dtype="<f4")
+            block[:, pos] = values[:, lo:hi]  # duplicates: the last reading wins
+            fh.seek(int(entry["offset"]))
+            fh.write(block)
+    return len(index)
+
+
+class IntervalStore:
+    """Read-only, memory-mapped view of an interval store.
+
+    Parameters
+    ----------
+    path : str
+        Store written by :func:`write_store`.
+
+    Raises
+    ------
+    ValueError
+        If the file is not a store or is truncated.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._map = np.memmap(path, dtype=np.uint8, mode="r")
+        if len(self._map) < _HEADER_SIZE:
+            raise ValueError(f"{path} is not an interval store")
+        magic, version, _, n_channels, n_meters, data_offset = _HEADER.unpack_from(self._map)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not an interval store")
+        if version != VERSION:
+            raise ValueError(f"Unsupported interval store version {version}")
+        names = np.frombuffer(self._map, dtype=_NAME_DTYPE, count=n_channels, offset=_HEADER_SIZE)
+        self.columns: List[str] = [name.decode("utf-8") for name in names]
+        self.index = np.frombuffer(
+            self._map, dtype=INDEX_DTYPE, count=n_meters,
+            offset=_HEADER_SIZE + n_channels * _NAME_DTYPE.itemsize
+        )
+        ends = self.index["offset"] + self.index["count"] * n_channels * 4
+        if len(self.index) and int(ends.max()) > len(self._map) or data_offset > len(self._map):
+            raise ValueError(f"{path} is truncated")
+        self._rows: Dict[str, int] = {
+            meter_id.decode("utf-8"): i for i, meter_id in enumerate(self.index["meter_id"])
+        }
+
+    def __enter__(self) -> "IntervalStore":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Drop the memory map (views already handed out keep it alive)."""
+        self._map = None
+
+    @property
+    def meters(self) -> List[str]:
+        """Meter ids, sorted."""
+        return list(self._rows)
+
+    def __len__(self) -> int:
+        """Total number of stored intervals over all meters."""
+        return int(self.index["count"].sum())
+
+    def meter(self, meter_id: str, start=None, end=None) -> MeterSlice:
+        """Intervals of ``meter_id`` with ``start <= timestamp < end``.
+
+        ``start`` and ``end`` accept anything :class:`pandas.Timestamp` does
+        and default to the whole series.
+
+        Raises
+        ------
+        KeyError
+            If the store has no such meter.
+        """
+        entry = self.index[self._rows[meter_id]]
+        first, step, count = entry["start"], entry["interval"], int(entry["count"])
+        lo = 0 if start is None else int(np.clip(-((first - _to_minute(start)) // step), 0, count))
+        hi = count if end is None else int(np.clip(-((first - _to_minute(end)) // step), lo, count))
+        offset = int(entry["offset"])
+        block = self._map[offset:offset + len(self.columns) * count * 4].view("<f4")
+        values = block.reshape(len(self.columns), count)[:, lo:hi]
+        return MeterSlice(meter_id, first + lo * step, step, values)
+
+    def series(self, meter_id: str, column: str, start=None, end=None) -> np.ndarray:
+        """One channel of :meth:`meter` as a float32 view."""
+        return self.meter(meter_id, start, end).values[self.columns.index(column)]
+
+    def select(self, meters: Optional[Sequence[str]] = None, start=None, end=None) -> List[MeterSlice]:
+        """:meth:`meter` slices of ``meters`` (default: all), skipping empty ones."""
+        slices = [self.meter(meter_id, start, end) for meter_id in (meters or self.meters)]
+        return [item for item in slices if item.values.shape[1]]
+
+    def frame(self, meters: Optional[Sequence[str]] = None, start=None, end=None) -> pd.DataFrame:
+        """Selected intervals as a long-format DataFrame (``timestamp``, ``meter_id``, channels).
+
+        This copies the data; prefer :func:`consumption_totals` and
+        :func:`monthly_bands` for whole-series statistics.
+        """
+        slices = self.select(meters, start, end)
+        if not slices:
+            return pd.DataFrame(columns=["timestamp", "meter_id", *self.columns])
+        values = np.concatenate([item.values for item in slices], axis=1)
+        data = {
+            "timestamp": np.concatenate([item.timestamps for item in slices]),
+            "meter_id": np.repeat([item.meter_id for item in slices], [item.values.shape[1] for item in slices]),
+        }
+        data.update(zip(self.columns, values))
+        return pd.DataFrame(data)
+
+    def _valid(self, item: MeterSlice) -> np.ndarray:
+        """Intervals with both consumption readings, as kept by ``normalize_data``."""
+        valid = np.ones(item.values.shape[1], dtype=bool)
+        for column in ("consumption_before", "consumption_after"):
+            if column in self.columns:
+                valid &= ~np.isnan(item.values[self.columns.index(column)])
+        return valid
+
+    def consumption_totals(self, slices: Sequence[MeterSlice]) -> Tuple[float, float, int, int]:
+        """Sum ``consumption_before`` and ``consumption_after`` over ``slices``.
+
+        Returns
+        -------
+        tuple of (float, float, int, int)
+            Baseline total, new total, intervals used and intervals skipped
+            because a reading is missing.
+
+        Raises
+        ------
+        ValueError
+            If the store lacks either consumption channel.
+        """
+        try:
+            before = self.columns.index("consumption_before")
+            after = self.columns.index("consumption_after")
+        except ValueError as exc:
+            raise ValueError("Store has no consumption_before/consumption_after channels") from exc
+        baseline = new = 0.0
+        used = skipped = 0
+        for item in slices:
+            valid = self._valid(item)
+            baseline += float(item.values[before].sum(where=valid, dtype=np.float64))
+            new += float(item.values[after].sum(where=valid, dtype=np.float64))
+            n = int(valid.sum())
+            used += n
+            skipped += len(valid) - n
+        return baseline, new, used, skipped
+
+    def monthly_bands(self, slices: Sequence[MeterSlice]) -> Optional[pd.DataFrame]:
+        """F1/F2/F3 and gas totals by calendar month over ``slices``.
+
+        Matches :func:`openeurope.calculate_monthly_bands` on the normalised
+        data: intervals missing a consumption reading are left out.
+
+        Returns
+        -------
+        pd.DataFrame or None
+            One row per month (``YYYY-MM``) with ``f1``, ``f2``, ``f3`` and
+            ``gas`` totals, or ``None`` without band channels.
+        """
+        present = {key: self.columns.index(col) for key, col in BAND_COLUMNS.items() if col in self.columns}
+        if not present or not slices:
+            return None
+        first = min(item.start for item in slices).astype("datetime64[M]")
+        last = max(item.start + (item.values.shape[1] - 1) * item.interval for item in slices)
+        months = np.arange(first, last.astype("datetime64[M]") + 1)
+        totals = np.zeros((len(months), len(BAND_COLUMNS)))
+        counts = np.zeros(len(months), dtype=np.int64)
+        for item in slices:
+            valid = self._valid(item)
+            n = len(valid)
+            # First interval of every month within the slice, plus the end
+            edges = np.clip(-((item.start - months.astype("datetime64[m]")) // item.interval), 0, n)
+            edges = np.append(edges, n)
+            counts += np.diff(np.concatenate(([0], np.cumsum(valid)))[edges])
+            for j, key in enumerate(BAND_COLUMNS):
+                if key in present:
+                    values = item.values[present[key]]
+                    used = np.where(valid & ~np.isnan(values), values, 0.0)
+                    totals[:, j] += np.diff(np.concatenate(([0.0], np.cumsum(used, dtype=np.float64)))[edges])
+        monthly = pd.DataFrame(totals, columns=list(BAND_COLUMNS))
+        monthly.insert(0, "month", np.datetime_as_string(months, unit="M"))
+        return monthly[counts > 0].reset_index(drop=True)
+
+
+def is_store(path: str) -> bool:
+    """Whether ``path`` is an interval store (by suffix)."""
+    return path.endswith(STORE_SUFFIX)
+
+
+def main() -> None:
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description="Build and inspect OpenEurope interval stores")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="Convert a CSV, Excel, Parquet or Feather file")
+    build.add_argument("input", help="Long-format input with timestamp and meter_id columns")
+    build.add_argument("output", help=f"Store to write (conventionally *{STORE_SUFFIX})")
+    build.add_argument("--meter-column", default="meter_id", help="Meter id column (default: meter_id)")
+    build.add_argument("--interval", type=int, help="Grid step in minutes (default: inferred)")
+    info = commands.add_parser("info", help="List the meters of a store")
+    info.add_argument("store")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        from openeurope import ingest_data
+
+        df = ingest_data(args.input, [])
+        meters = write_store(args.output, df, meter_column=args.meter_column, interval_minutes=args.interval)
+        print(f"Stored {len(df):,} rows of {meters} meters in {args.output}")
+        return
+    with IntervalStore(args.store) as store:
+        print(f"Channels: {', '.join(store.columns)}")
+        for entry in store.index:
+            end = entry["start"] + entry["count"] * entry["interval"]
+            print(
+                f"{entry['meter_id'].decode('utf-8')}: {int(entry['count']):,} x "
+                f"{entry['interval'].astype(int)} min, {entry['start']} .. {end}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+OpenEurope Demo Load Test
+-------------------------
+
+Measures how many concurrent users the demo server can serve. The same set
+of static files is requested by N client threads against:
+
+* ``legacy``: the former single-threaded ``socketserver.TCPServer`` with
+  ``SimpleHTTPRequestHandler`` (HTTP/1.0, no compression) over the extracted
+  archive;
+* ``threaded``: ``run_demo.DemoHTTPServer`` (keep-alive, compressed assets,
+  validators) serving straight from the archive.
+
+Optionally some "slow" clients open a connection and stall half way through
+their request, as a user on a bad network would; with the single-threaded
+server every other user waits for them.
+
+Usage:
+    python3 loadtest_demo.py
+    python3 loadtest_demo.py --clients 1 8 32 --requests 100 --slow-clients 1
+"""
+
+import argparse
+import functools
+import http.client
+import http.server
+import re
+import socket
+import socketserver
+import statistics
+import tempfile
+import threading
+import time
+import zipfile
+from pathlib import Path
+from typing import Dict, List
+
+import run_demo
+from static_files import ZipSource
+
+# Requested besides the page and the local scripts/stylesheets it links
+EXTRA_PATHS = ["/START_HERE.html", "/assets/sample_energy.csv"]
+
+
+def first_load_paths(zip_path: str) -> list:
+    """Return the page and the local assets it loads (bundle names change per build)."""
+    source = ZipSource(zip_path)
+    html = source.read(source.stat("index.html")).decode("utf-8")
+    links = re.findall(r'(?:src|href)="([^":]+\.(?:js|css))"', html)
+    return ["/index.html"] + [f"/{link}" for link in links] + EXTRA_PATHS
+
+
+class _QuietLegacyHandler(http.server.SimpleHTTPRequestHandler):
+    def log_message(self, *args) -> None:
+        pass
+
+
+def _legacy_server(zip_path: str, workdir: str) -> socketserver.TCPServer:
+    with zipfile.ZipFile(zip_path) as zf:
+        zf.extractall(workdir)
+    # The archive holds a single top-level folder with the demo
+    root = next(Path(workdir).glob("*/index.html")).parent
+    handler = functools.partial(_QuietLegacyHandler, directory=str(root))
+    return socketserver.TCPServer(("127.0.0.1", 0), handler)
+
+
+class _QuietDemoHandler(run_demo.DemoRequestHandler):
+    def log_message(self, *args) -> None:
+        pass
+
+
+def _threaded_server(zip_path: str, workdir: str) -> socketserver.TCPServer:
+    run_demo.STATIC_SOURCE = ZipSource(zip_path)
+    run_demo.COMPRESSION_CACHE.warm(run_demo.STATIC_SOURCE)
+    return run_demo.DemoHTTPServer(("127.0.0.1", 0), _QuietDemoHandler)
+
+
+SERVERS = {"legacy": _legacy_server, "threaded": _threaded_server}
+
+
+def _client(port: int, paths: List[str], requests: int, latencies: List[float], sizes: List[int]) -> None:
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+    headers = {"Accept-Encoding": "gzip, br"}
+    try:
+        for i in range(requests):
+            started = time.perf_counter()
+            conn.request("GET", paths[i % len(paths)], headers=headers)
+            response = conn.getresponse()
+            body = response.read()
+            latencies.append(time.perf_counter() - started)
+            sizes.append(len(body))
+            if response.will_close:
+                conn.close()
+    finally:
+        conn.close()
+
+
+def _slow_client(port: int, hold: float) -> None:
+    """Send half a request line, stall for ``hold`` seconds, then give up."""
+    with socket.create_connection(("127.0.0.1", port)) as sock:
+        sock.sendall(b"GET /index.html HTT")
+        time.sleep(hold)
+
+
+def run_load(
+    server_name: str,
+    zip_path: str,
+    clients: int,
+    requests: int,
+    paths: List[str],
+    slow_clients: int = 0,
+    slow_hold: float = 2.0
+) -> Dict[str, float]:
+    """Run one load scenario and return its throughput and latency figures."""
+    workdir = tempfile.TemporaryDirectory()
+    server = SERVERS[server_name](zip_path, workdir.name)
+    port = server.server_address[1]
+    server_thread = threading.Thread(target=server.serve_forever, daemon=True)
+    server_thread.start()
+    latencies: List[float] = []
+    sizes: List[int] = []
+    try:
+        slow = [
+            threading.Thread(target=_slow_client, args=(port, slow_hold), daemon=True)
+            for _ in range(slow_clients)
+        ]
+        for thread in slow:
+            thread.start()
+        time.sleep(0.1 if slow else 0)
+        workers = [
+            threading.Thread(target=_client, args=(port, paths, requests, latencies, sizes))
+            for _ in range(clients)
+        ]
+        started = time.perf_counter()
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        for thread in slow:
+            thread.join()
+    finally:
+        server.shutdown()
+        server.server_close()
+        workdir.cleanup()
+    latencies.sort()
+    return {
+        "server": server_name,
+        "clients": clients,
+        "requests": len(latencies),
+        "seconds": elapsed,
+        "req_per_s": len(latencies) / elapsed if elapsed else 0.0,
+        "p50_ms": statistics.median(latencies) * 1000 if latencies else 0.0,
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1] * 1000 if latencies else 0.0,
+        "kib_per_request": sum(sizes) / len(sizes) / 1024 if sizes else 0.0,
+    }
+
+
+def main() -> None:
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description="Load test the OpenEurope demo server")
+    parser.add_argument(
+        "--clients", type=int, nargs="+", default=[1, 8, 32],
+        help="Concurrent client counts to test (default: 1 8 32)"
+    )
+    parser.add_argument("--requests", type=int, default=50, help="Requests per client (default: 50)")
+    parser.add_argument(
+        "--slow-clients", type=int, default=0,
+        help="Clients that stall mid-request during each run (default: 0)"
+    )
+    parser.add_argument(
+        "--slow-hold", type=float, default=2.0,
+        help="Seconds each slow client stalls (default: 2)"
+    )
+    parser.add_argument(
+        "--server", choices=sorted(SERVERS), action="append",
+        help="Server(s) to test (default: both)"
+    )
+    args = parser.parse_args()
+
+    zip_path = str(Path(__file__).resolve().parent / run_demo.ZIP_NAME)
+    paths = first_load_paths(zip_path)
+
+    print(f"{'server':<10}{'clients':>8}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'KiB/req':>10}")
+    for server_name in args.server or ["legacy", "threaded"]:
+        for clients in args.clients:
+            result = run_load(
+                server_name, zip_path, clients, args.requests, paths,
+                args.slow_clients, args.slow_hold
+            )
+            print(
+                f"{result['server']:<10}{result['clients']:>8}{result['req_per_s']:>10.0f}"
+                f"{result['p50_ms']:>10.2f}{result['p95_ms']:>10.2f}{result['kib_per_request']:>10.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
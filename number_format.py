@@ -0,0 +1,249 @@
+"""
+OpenEurope Number Parsing
+-------------------------
+
+Converts text columns of consumption readings to floats for
+``openeurope.normalize_data``. Meter and bill exports write numbers in ways
+``pd.to_numeric`` rejects: Italian decimal commas (``1.234,56``), English
+thousand separators (``1,234.56``), units (``12,5 kWh``, ``310 Sm3``),
+currency signs and stray or non-breaking spaces.
+
+A cell is read as an optional sign or currency sign, the number, then an
+optional currency sign or unit starting with a letter (``kWh``, ``°C``
+but not ``_000`` or ``|3``); spaces around these parts are ignored. In
+the number, the decimal separator is the last of ``.`` and ``,`` when both
+appear, and a separator that repeats is a thousand separator, as is a
+single space (``1 234,56``). Thousand separators must split the integer
+part in groups of three digits, so ``12  5`` and ``1 2345`` are not
+numbers. One
+separator followed by exactly three digits (``1.234``, ``1,234``) is
+ambiguous: it is read with the decimal separator of the majority of the
+unambiguous cells of the column; without a majority, its own separator is
+the decimal one, as ``pd.to_numeric`` reads ``1.234``. Anything else
+(``n/d``, ``1.2.3``, ``12-5``) is NaN, except in :func:`to_float`, which
+keeps what ``pd.to_numeric`` reads (``1e3``).
+
+Cells are parsed a chunk at a time as a 2-D array of character codes, one
+column per cell: separators, digits and groups are checked with whole-array
+comparisons and each value is assembled from an integer mantissa, so no
+Python code runs per cell and the result is the correctly rounded float
+of the digits. Columns that ``pd.to_numeric`` reads entirely are returned
+by it: they hold no decimal comma, so the rules above read them the same
+way.
+"""
+
+from typing import Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+DECIMAL_SEPARATORS = (".", ",")
+CHUNK_CELLS = 1 << 18
+# Longer cells are not readings
+MAX_CELL_LENGTH = 64
+# Digits an int64 mantissa holds exactly
+MAX_DIGITS = 18
+
+_POW10_FLOAT = 10.0 ** np.arange(MAX_DIGITS + 1)
+_DOT, _COMMA, _SPACE, _CURRENCY, _OTHER = ord("."), ord(","), ord(" "), ord("$"), 127
+# A space between two characters of a number: a thousand separator (control codes are free)
+_GROUP = 1
+_SPACES = (0xA0, 0x2009, 0x202F)
+_CURRENCIES = (0xA3, 0x20AC)
+
+
+def _char_codes(cells: np.ndarray) -> np.ndarray:
+    """``cells`` (str) as a zero-padded uint8 matrix of character classes.
+
+    Spaces map to ``" "``, currency signs to ``"$"`` and any other non-ASCII
+    character to 127, cells longer than ``MAX_CELL_LENGTH`` are blanked,
+    spaces between two digits or separators become ``_GROUP`` and the other
+    spaces are squeezed out of each cell. The matrix is transposed (one
+    row per character position) so the per-cell reductions run over
+    contiguous vectors; four zero rows are left at the end for the
+    look-ahead of the group check.
+    """
+    text = cells.astype(str)
+    if text.dtype.itemsize // 4 > MAX_CELL_LENGTH:
+        text[np.char.str_len(text) > MAX_CELL_LENGTH] = ""
+        text = text.astype(f"U{MAX_CELL_LENGTH}")
+    width = text.dtype.itemsize // 4
+    points = text.view(np.uint32).reshape(len(text), width)
+    codes = np.minimum(points, _OTHER).astype(np.uint8)
+    codes[(codes > 0) & (codes < _SPACE)] = _SPACE
+    wide = np.flatnonzero(points.ravel() > _OTHER)
+    if len(wide):
+        wide_points = points.ravel()[wide]
+        codes.ravel()[wide[np.isin(wide_points, _SPACES)]] = _SPACE
+        codes.ravel()[wide[np.isin(wide_points, _CURRENCIES)]] = _CURRENCY
+    spaced = np.flatnonzero((codes == _SPACE).any(axis=1))
+    if len(spaced):
+        rows = codes[spaced]
+        space = rows == _SPACE
+        # Nearest character that is not a space on each side (-1 and width: none)
+        pos = np.arange(width)
+        before = np.maximum.accumulate(np.where(space, -1, pos), axis=1)
+        after = np.minimum.accumulate(np.where(space, width, pos)[:, ::-1], axis=1)[:, ::-1]
+        numeric = ((rows >= ord("0")) & (rows <= ord("9"))) | (rows == _DOT) | (rows == _COMMA)
+        # The padding column answers for both -1 and width
+        numeric = np.concatenate((numeric, np.zeros((len(rows), 1), dtype=bool)), axis=1)
+        inner = space & np.take_along_axis(numeric, before, axis=1) & np.take_along_axis(numeric, after, axis=1)
+        rows[inner] = _GROUP
+        space &= ~inner
+        order = np.argsort(space, axis=1, kind="stable")
+        rows = np.take_along_axis(rows, order, axis=1)
+        rows[np.take_along_axis(space, order, axis=1)] = 0
+        codes[spaced] = rows
+        width = int((codes != 0).sum(axis=1).max()) if len(codes) else 0
+    transposed = np.zeros((width + 4, len(codes)), dtype=np.uint8)
+    transposed[:width] = codes[:, :width].T
+    return transposed
+
+
+def _parse_chunk(cells: np.ndarray, decimal: Optional[str]) -> Tuple[np.ndarray, np.ndarray, np.ndarray, int, int]:
+    """Parse one chunk of text cells.
+
+    Returns the values (NaN where invalid), the ambiguous cells, their
+    separator, and the cells voting for a decimal comma and a decimal point.
+    Ambiguous cells are valued with a thousand separator.
+    """
+    codes = _char_codes(cells)
+    width, n = codes.shape
+    pos = np.arange(width)[:, None]
+    cols = np.arange(n)
+    digit = (codes >= ord("0")) & (codes <= ord("9"))
+    dot, comma, group = codes == _DOT, codes == _COMMA, codes == _GROUP
+    number = digit | dot | comma | group
+    sign = (codes == ord("-")) | (codes == ord("+"))
+
+    start = np.where(number, pos, width).min(axis=0)
+    prefix = pos < start
+    # The zero padding guarantees a character that ends the number
+    stop = np.where(number | prefix, width, pos).min(axis=0)
+    region = ~prefix & (pos < stop)
+    valid = start < width
+    valid &= ~(prefix & ~sign & (codes != _CURRENCY)).any(axis=0)
+    valid &= (prefix & sign).sum(axis=0, dtype=np.int16) <= 1
+    negative = (prefix & (codes == ord("-"))).any(axis=0)
+
+    # A unit starts with a letter, and not with an exponent such as e3
+    stop = np.minimum(stop, width - 2)
+    after = codes[stop, cols]
+    following = codes[stop + 1, cols]
+    exponent = ((after | 0x20) == ord("e")) & (
+        ((following >= ord("0")) & (following <= ord("9"))) | (following == ord("-")) | (following == ord("+"))
+    )
+    letter = ((after | 0x20) >= ord("a")) & ((after | 0x20) <= ord("z"))
+    valid &= (after == 0) | (after == _CURRENCY) | ((letter | (after == _OTHER)) & ~exponent)
+
+    digit &= region
+    dot &= region
+    comma &= region
+    group &= region
+    n_digits = digit.sum(axis=0, dtype=np.int16)
+    n_dots, n_commas = dot.sum(axis=0, dtype=np.int16), comma.sum(axis=0, dtype=np.int16)
+    last_dot = np.where(dot, pos, -1).max(axis=0)
+    last_comma = np.where(comma, pos, -1).max(axis=0)
+    valid &= (n_digits >= 1) & (n_digits <= MAX_DIGITS)
+
+    if decimal is None:
+        both = (n_dots > 0) & (n_commas > 0)
+        point = np.where(both, last_dot > last_comma, (n_dots == 1) & (n_commas == 0))
+        decimal_comma = np.where(both, last_comma > last_dot, (n_commas == 1) & (n_dots == 0))
+        separator_at = np.maximum(last_dot, last_comma)
+        leading = codes[np.minimum(start, width - 1), cols]
+        ambiguous = (
+            (n_dots + n_commas == 1) & (stop - separator_at == 4)
+            & (separator_at - start >= 1) & (separator_at - start <= 3)
+            & (leading >= ord("1")) & (leading <= ord("9"))
+        )
+        point &= ~ambiguous
+        decimal_comma &= ~ambiguous
+        comma_votes = int((valid & (decimal_comma | ((n_dots > 1) & (n_commas == 0)))).sum())
+        point_votes = int((valid & (point | ((n_commas > 1) & (n_dots == 0)))).sum())
+        ambiguous_separator = np.where(ambiguous, codes[np.maximum(separator_at, 0), cols], 0)
+    else:
+        point = np.full(n, decimal == ".")
+        decimal_comma = ~point
+        ambiguous = np.zeros(n, dtype=bool)
+        ambiguous_separator = np.zeros(n, dtype=np.uint8)
+        comma_votes = point_votes = 0
+
+    decimal_mask = (dot & point) | (comma & decimal_comma)
+    thousands = ((dot | comma) & ~decimal_mask) | group
+    valid &= decimal_mask.sum(axis=0, dtype=np.int16) <= 1
+    decimal_at = np.where(decimal_mask, pos, width).min(axis=0)
+    # Groups of exactly three digits after each thousand separator, all before the decimals
+    grouped = np.zeros_like(thousands)
+    grouped[:-4] = digit[1:-3] & digit[2:-2] & digit[3:-1] & ~digit[4:]
+    valid &= ~(thousands & (~grouped | (pos > decimal_at))).any(axis=0)
+    first_group = np.where(thousands, pos, width).min(axis=0) - start
+    valid &= (first_group >= width - start) | ((first_group >= 1) & (first_group <= 3))
+
+    # Integer mantissa of all the digits, scaled by the decimals
+    mantissa = np.zeros(n, dtype=np.int64)
+    decimals = np.zeros(n, dtype=np.int64)
+    for row in range(width - 4):
+        present = digit[row]
+        mantissa = np.where(present, mantissa * 10 + (codes[row] - ord("0")), mantissa)
+        decimals += present & (row > decimal_at)
+    values = mantissa / _POW10_FLOAT[np.minimum(decimals, MAX_DIGITS)]
+    values = np.where(valid, np.where(negative, -values, values), np.nan)
+    return values, ambiguous & valid, ambiguous_separator, comma_votes, point_votes
+
+
+def parse_numbers(cells: np.ndarray, decimal: Optional[str] = None) -> np.ndarray:
+    """Parse an array of str in Italian or English notation into float64.
+
+    Parameters
+    ----------
+    cells : np.ndarray
+        Text cells (any array of ``str``).
+    decimal : str, optional
+        ``"."`` or ``","`` to fix the decimal separator of every cell;
+        by default it is inferred per cell and per column (see the module
+        documentation).
+
+    Returns
+    -------
+    np.ndarray
+        The values, NaN for cells that are not a number.
+    """
+    if decimal is not None and decimal not in DECIMAL_SEPARATORS:
+        raise ValueError(f"Unknown decimal separator: {decimal!r}")
+    cells = np.asarray(cells, dtype=object)
+    values = np.empty(len(cells))
+    ambiguous = np.zeros(len(cells), dtype=bool)
+    separator = np.zeros(len(cells), dtype=np.uint8)
+    comma_votes = point_votes = 0
+    for first in range(0, len(cells), CHUNK_CELLS):
+        rows = slice(first, first + CHUNK_CELLS)
+        values[rows], ambiguous[rows], separator[rows], commas, points = _parse_chunk(cells[rows], decimal)
+        comma_votes += commas
+        point_votes += points
+    if ambiguous.any():
+        if point_votes == comma_votes:
+            values[ambiguous] /= 1000
+        else:
+            column_decimal = _DOT if point_votes > comma_votes else _COMMA
+            values[ambiguous & (separator == column_decimal)] /= 1000
+    return values
+
+
+def to_float(series: pd.Series, decimal: Optional[str] = None) -> pd.Series:
+    """Numeric version of ``series``, like ``pd.to_numeric(errors="coerce")``.
+
+    Text cells are read with :func:`parse_numbers`, numbers are kept, and
+    text it rejects but ``pd.to_numeric`` reads (``1e3``) keeps that value.
+    """
+    if pd.api.types.is_numeric_dtype(series.dtype) and not pd.api.types.is_bool_dtype(series.dtype):
+        return series.astype(np.float64)
+    numeric = pd.to_numeric(series, errors="coerce")
+    if decimal is None and numeric.notna().sum() == series.notna().sum():
+        return numeric.astype(np.float64)
+    values = numeric.to_numpy(dtype=np.float64, na_value=np.nan).copy()
+    text = np.flatnonzero(series.str.len().notna().to_numpy())
+    if len(text):
+        parsed = parse_numbers(series.to_numpy(dtype=object)[text], decimal)
+        values[text] = np.where(np.isnan(parsed), values[text], parsed)
+    return pd.Series(values, index=series.index, name=series.name)
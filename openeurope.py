@@ -17,18 +17,40 @@ generate documents compliant with relevant regulations.
 import argparse
 import logging
 import os
+import shutil
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
-from typing import List, Dict, Tuple
+from typing import List, Dict, Optional, Sequence, Tuple
 
+import numpy as np
 import pandas as pd
 
+from audit_trail import append_entries, file_digest
+from data_quality import ScreeningResult, ScreeningRules, interval_minutes, screen, screening_context
+from incremental_ingest import (
+    IngestState, load_state, read_new_rows, save_state, sniff_separator, stale_reason, state_path
+)
+from interval_gaps import GAP_METHODS, fill_gaps, parse_timestamps
+from interval_store import IntervalStore, is_store
+from number_format import to_float
+from report_engine import (
+    DEFAULT_FILENAME_PATTERN, DIGEST_FORMATS, RENDERERS, ReportData, report_filename, write_reports
+)
+from watch_folder import DropFolderWatcher
+
 def ingest_data(file_path: str, audit_log: List[Dict[str, str]]) -> pd.DataFrame:
-    """Read consumption data from a CSV or Excel file.
+    """Read consumption data from a CSV, Excel or columnar file.
+
+    Columnar files (``.parquet``, ``.feather``) need the optional ``pyarrow``
+    package; interval stores (``.oeis``) are expanded to one row per meter
+    and interval. CSV fields may be separated by ``,`` or, as in exports with
+    decimal commas, by ``;``.
 
     Parameters
     ----------
     file_path : str
-        Path to the input CSV or Excel file.
+        Path to the input CSV, Excel, Parquet, Feather or interval store file.
     audit_log : list of dict
         A list used to record audit trail entries.
 
@@ -40,8 +62,15 @@ def ingest_data(file_path: str, audit_log: List[Dict[str, str]]) -> pd.DataFrame
     logging.info("Ingesting data from %s", file_path)
     if file_path.endswith('.xlsx') or file_path.endswith('.xls'):
         df = pd.read_excel(file_path)
+    elif file_path.endswith('.parquet'):
+        df = pd.read_parquet(file_path)
+    elif file_path.endswith('.feather'):
+        df = pd.read_feather(file_path)
+    elif is_store(file_path):
+        with IntervalStore(file_path) as store:
+            df = store.frame()
     else:
-        df = pd.read_csv(file_path)
+        df = pd.read_csv(file_path, sep=sniff_separator(file_path))
     audit_log.append({
         "step": "ingestion",
         "timestamp": datetime.now().isoformat(),
@@ -49,10 +78,19 @@ def ingest_data(file_path: str, audit_log: List[Dict[str, str]]) -> pd.DataFrame
     })
     return df
 
-def normalize_data(df: pd.DataFrame, audit_log: List[Dict[str, str]]) -> pd.DataFrame:
+def normalize_data(
+    df: pd.DataFrame,
+    audit_log: List[Dict[str, str]],
+    rules: Optional[ScreeningRules] = None,
+    quarantine_path: Optional[str] = None
+) -> pd.DataFrame:
     """Clean and normalise the data set.
 
-    Drops any rows with missing consumption values and ensures numeric types.
+    Drops any rows with missing consumption values and ensures numeric types
+    (Italian or English notation, with units; see :mod:`number_format`),
+    then, with ``rules``, screens the readings for anomalies (negative
+    values, spikes, stuck meters, after above before; see
+    :mod:`data_quality`).
 
     Parameters
     ----------
@@ -60,6 +98,11 @@ def normalize_data(df: pd.DataFrame, audit_log: List[Dict[str, str]]) -> pd.Data
         The raw data.
     audit_log : list of dict
         A list used to record audit trail entries.
+    rules : ScreeningRules, optional
+        Screening thresholds (default: no screening).
+    quarantine_path : str, optional
+        CSV file receiving the rejected rows, as read, with a leading
+        ``rejected_by`` column; written only when rows are rejected.
 
     Returns
     -------
@@ -67,21 +110,18 @@ def normalize_data(df: pd.DataFrame, audit_log: List[Dict[str, str]]) -> pd.Data
         Normalised DataFrame.
     """
     logging.info("Normalising data")
-    before_rows = len(df)
+    consumption = ["consumption_before", "consumption_after"]
     # Drop rows with missing consumption values
-    df_clean = df.dropna(subset=["consumption_before", "consumption_after"]).copy()
-    dropped_missing = before_rows - len(df_clean)
+    missing = df[consumption].isna().any(axis=1).to_numpy()
+    df_clean = df[~missing].copy()
+    dropped_missing = int(missing.sum())
 
-    # Ensure numeric types, coercing invalid values to NaN
-    df_clean["consumption_before"] = pd.to_numeric(
-        df_clean["consumption_before"], errors="coerce"
-    )
-    df_clean["consumption_after"] = pd.to_numeric(
-        df_clean["consumption_after"], errors="coerce"
-    )
-    before_numeric_rows = len(df_clean)
-    df_clean = df_clean.dropna(subset=["consumption_before", "consumption_after"])
-    dropped_non_numeric = before_numeric_rows - len(df_clean)
+    # Ensure numeric types (Italian or English notation), coercing invalid values to NaN
+    df_clean["consumption_before"] = to_float(df_clean["consumption_before"])
+    df_clean["consumption_after"] = to_float(df_clean["consumption_after"])
+    non_numeric = df_clean[consumption].isna().any(axis=1).to_numpy()
+    df_clean = df_clean[~non_numeric]
+    dropped_non_numeric = int(non_numeric.sum())
 
     audit_log.append({
         "step": "normalisation",
@@ -92,8 +132,118 @@ def normalize_data(df: pd.DataFrame, audit_log: List[Dict[str, str]]) -> pd.Data
             f"{dropped_non_numeric} rows with non-numeric values"
         )
     })
+
+    rejected = []
+    if quarantine_path:
+        kept_rows = np.flatnonzero(~missing)
+        rejected.append(df[missing].assign(rejected_by="missing"))
+        rejected.append(df.iloc[kept_rows[non_numeric]].assign(rejected_by="non_numeric"))
+    if rules is not None:
+        logging.info("Screening readings for anomalies")
+        result = screen(df_clean, rules)
+        if quarantine_path:
+            screened = np.flatnonzero(~result.keep)
+            rejected.append(df.iloc[kept_rows[~non_numeric][screened]].assign(
+                rejected_by=result.reasons(screened)
+            ))
+        df_clean = df_clean[result.keep]
+        _log_screening(result, audit_log)
+    if quarantine_path and sum(len(part) for part in rejected):
+        quarantine = pd.concat(rejected)
+        quarantine.insert(0, "rejected_by", quarantine.pop("rejected_by"))
+        quarantine.to_csv(quarantine_path, index=False)
+        audit_log.append({
+            "step": "normalisation",
+            "timestamp": datetime.now().isoformat(),
+            "message": f"Quarantined {len(quarantine)} rejected rows in {quarantine_path}"
+        })
     return df_clean
 
+def _log_screening(result: ScreeningResult, audit_log: List[Dict[str, str]]) -> None:
+    """Record the rows dropped and flagged by each screening rule."""
+    dropped = ", ".join(f"{count} {rule}" for rule, count in result.dropped().items())
+    flagged = ", ".join(f"{count} {rule}" for rule, count in result.flagged().items())
+    audit_log.append({
+        "step": "screening",
+        "timestamp": datetime.now().isoformat(),
+        "message": (
+            f"Dropped {int((~result.keep).sum())} anomalous rows ({dropped})"
+            + (f"; flagged {flagged}" if flagged else "")
+        )
+    })
+
+def fill_interval_gaps(
+    df: pd.DataFrame,
+    audit_log: List[Dict[str, str]],
+    method: str = "none",
+    max_gap_minutes: float = 60.0,
+    completeness_path: Optional[str] = None
+) -> pd.DataFrame:
+    """Report the gaps of interval data and, on request, fill the short ones.
+
+    Data without a ``timestamp`` column is returned unchanged, and so is
+    any data with ``method="none"``; when its timestamps cannot be checked
+    (see :func:`interval_gaps.fill_gaps`) that is logged and the check is
+    skipped, unless filling was requested. See :mod:`interval_gaps` for the
+    detection and the filling methods.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        The cleaned data set.
+    audit_log : list of dict
+        A list used to record audit trail entries.
+    method : str
+        Interpolation method, one of ``interval_gaps.GAP_METHODS``.
+    max_gap_minutes : float
+        Longest gap filled; longer gaps are only reported.
+    completeness_path : str, optional
+        CSV file receiving the completeness of each meter and month.
+
+    Returns
+    -------
+    pd.DataFrame
+        The data with one ``interpolated`` row per filled interval.
+    """
+    if "timestamp" not in df.columns or df.empty:
+        return df
+    logging.info("Checking interval data for gaps")
+    try:
+        df_filled, report = fill_gaps(df, method, max_gap_minutes)
+    except (ValueError, TypeError) as exc:
+        if method != "none":
+            raise
+        # Detection only informs the audit trail: timestamps it cannot use must not stop the audit
+        audit_log.append({
+            "step": "gap filling",
+            "timestamp": datetime.now().isoformat(),
+            "message": f"Gap check skipped: {exc}"
+        })
+        return df
+    found = f"Found {report.missing} missing {report.interval_minutes}-minute intervals"
+    if method == "none":
+        message = f"{found} in {len(report.long_gaps)} gaps, not filled"
+        df_filled = df
+    else:
+        long_missing = int(report.long_gaps["missing"].sum())
+        message = (
+            f"{found}: filled {report.filled} in {report.short_gaps} gaps of up to {max_gap_minutes:g} "
+            f"minutes ({method}), left {long_missing} in {len(report.long_gaps)} longer gaps"
+        )
+    audit_log.append({
+        "step": "gap filling",
+        "timestamp": datetime.now().isoformat(),
+        "message": message
+    })
+    if completeness_path:
+        report.completeness.to_csv(completeness_path, index=False)
+        audit_log.append({
+            "step": "gap filling",
+            "timestamp": datetime.now().isoformat(),
+            "message": f"Wrote completeness per meter and month to {completeness_path}"
+        })
+    return df_filled
+
 def calculate_savings(df: pd.DataFrame, audit_log: List[Dict[str, str]]) -> Tuple[float, float, float, float]:
     """Compute baseline and new consumption averages and energy savings.
 
@@ -113,8 +263,14 @@ def calculate_savings(df: pd.DataFrame, audit_log: List[Dict[str, str]]) -> Tupl
     if df.empty:
         raise ValueError("No valid consumption data available after normalisation")
 
-    baseline_avg = df["consumption_before"].mean()
-    new_avg = df["consumption_after"].mean()
+    return _savings_from_averages(df["consumption_before"].mean(), df["consumption_after"].mean(), audit_log)
+
+def _savings_from_averages(
+    baseline_avg: float,
+    new_avg: float,
+    audit_log: List[Dict[str, str]]
+) -> Tuple[float, float, float, float]:
+    """Derive and log the savings of :func:`calculate_savings` from the two averages."""
     savings = baseline_avg - new_avg
     savings_percent = (savings / baseline_avg) * 100 if baseline_avg else 0.0
     audit_log.append({
@@ -127,6 +283,89 @@ def calculate_savings(df: pd.DataFrame, audit_log: List[Dict[str, str]]) -> Tupl
     })
     return baseline_avg, new_avg, savings, savings_percent
 
+def calculate_group_savings(
+    df: pd.DataFrame,
+    group_by: str,
+    audit_log: List[Dict[str, str]]
+) -> pd.DataFrame:
+    """Compute baseline and new averages and savings for each group of rows.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        The cleaned data set.
+    group_by : str
+        Column used to split the data (e.g. ``building_zone``).
+    audit_log : list of dict
+        A list used to record audit trail entries.
+
+    Returns
+    -------
+    pd.DataFrame
+        One row per group with ``group``, ``rows``, ``baseline_avg``, ``new_avg``,
+        ``savings`` and ``savings_percent`` columns.
+    """
+    logging.info("Calculating savings by %s", group_by)
+    if group_by not in df.columns:
+        raise ValueError(f"Grouping column '{group_by}' not found in input data")
+
+    grouped = df.groupby(group_by, sort=True)
+    groups = pd.DataFrame({
+        "rows": grouped.size(),
+        "baseline_avg": grouped["consumption_before"].mean(),
+        "new_avg": grouped["consumption_after"].mean(),
+    })
+    groups["savings"] = groups["baseline_avg"] - groups["new_avg"]
+    groups["savings_percent"] = (
+        groups["savings"] / groups["baseline_avg"].where(groups["baseline_avg"] != 0) * 100
+    ).fillna(0.0)
+    groups = groups.rename_axis("group").reset_index()
+    audit_log.append({
+        "step": "calculation",
+        "timestamp": datetime.now().isoformat(),
+        "message": f"Computed savings for {len(groups)} groups by {group_by}"
+    })
+    return groups
+
+def calculate_monthly_bands(
+    df: pd.DataFrame,
+    audit_log: List[Dict[str, str]]
+) -> Optional[pd.DataFrame]:
+    """Sum the F1/F2/F3 and gas consumption columns by calendar month.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        The cleaned data set, with a ``timestamp`` column and any of the
+        ``f1_kwh``, ``f2_kwh``, ``f3_kwh`` and ``gas_kwh`` columns.
+    audit_log : list of dict
+        A list used to record audit trail entries.
+
+    Returns
+    -------
+    pd.DataFrame or None
+        One row per month (``YYYY-MM``) with ``f1``, ``f2``, ``f3`` and ``gas``
+        totals, or ``None`` when the data has no timestamp or band columns.
+    """
+    bands = {key: f"{key}_kwh" for key in ("f1", "f2", "f3", "gas")}
+    present = {key: col for key, col in bands.items() if col in df.columns}
+    if "timestamp" not in df.columns or not present:
+        return None
+
+    logging.info("Aggregating monthly F1/F2/F3 consumption")
+    months = parse_timestamps(df["timestamp"]).dt.strftime("%Y-%m")
+    values = pd.DataFrame({
+        key: to_float(df[col]) if key in present else 0.0
+        for key, col in bands.items()
+    })
+    monthly = values.groupby(months).sum().rename_axis("month").reset_index()
+    audit_log.append({
+        "step": "calculation",
+        "timestamp": datetime.now().isoformat(),
+        "message": f"Aggregated {', '.join(present.values())} into {len(monthly)} monthly totals"
+    })
+    return monthly
+
 def generate_report(
     output_dir: str,
     baseline_avg: float,
@@ -134,9 +373,16 @@ def generate_report(
     savings: float,
     savings_percent: float,
     audit_log: List[Dict[str, str]],
-    input_file: str
-) -> str:
-    """Create a Markdown report summarising the results and audit trail.
+    input_file: str,
+    formats: Sequence[str] = ("md",),
+    filename_pattern: str = DEFAULT_FILENAME_PATTERN,
+    site: str = "",
+    groups: Optional[pd.DataFrame] = None,
+    group_by: Optional[str] = None,
+    monthly: Optional[pd.DataFrame] = None,
+    input_sha256: str = ""
+) -> List[str]:
+    """Create report files summarising the results and audit trail.
 
     Parameters
     ----------
@@ -154,30 +400,465 @@ def generate_report(
         Audit trail entries.
     input_file : str
         Name of the input CSV file.
+    formats : sequence of str
+        Output formats to render (``md``, ``html``, ``json``, ``csv``, ``pdf``).
+    filename_pattern : str
+        Report file name pattern, see :func:`report_engine.report_filename`.
+    site : str
+        Site name shown in the report and available as ``{site}`` in the pattern.
+    groups : pd.DataFrame, optional
+        Per-group results from :func:`calculate_group_savings`.
+    group_by : str, optional
+        Name of the grouping column, used as the group table title.
+    monthly : pd.DataFrame, optional
+        Monthly band totals from :func:`calculate_monthly_bands`, charted in PDF reports.
+    input_sha256 : str
+        Digest of the input file, printed in the PDF sign-off block.
 
     Returns
     -------
-    str
-        Path to the generated report file.
+    list of str
+        Paths of the generated report files, in the order of ``formats``.
     """
     logging.info("Generating report")
-    # Ensure output directory exists
-    os.makedirs(output_dir, exist_ok=True)
-    report_path = os.path.join(output_dir, "energy_audit_report.md")
-    with open(report_path, "w", encoding="utf-8") as f:
-        f.write("# Energy Audit Report\n\n")
-        f.write(f"**Input file:** {os.path.basename(input_file)}\n\n")
-        f.write("## Summary\n\n")
-        f.write(f"- Baseline average consumption: {baseline_avg:.2f}\n")
-        f.write(f"- New average consumption: {new_avg:.2f}\n")
-        f.write(f"- Absolute energy savings: {savings:.2f}\n")
-        f.write(f"- Savings percentage: {savings_percent:.2f}%\n\n")
-        f.write("## Audit Trail\n\n")
-        for entry in audit_log:
-            f.write(
-                f"- {entry['timestamp']} [{entry['step']}] {entry['message']}\n"
+    data = ReportData(
+        input_file=input_file,
+        baseline_avg=baseline_avg,
+        new_avg=new_avg,
+        savings=savings,
+        savings_percent=savings_percent,
+        audit_log=audit_log,
+        groups=groups,
+        group_by=group_by,
+        site=site,
+        monthly=monthly,
+        input_sha256=input_sha256,
+    )
+    return write_reports(output_dir, data, formats, filename_pattern)
+
+def audit_store(
+    store_path: str,
+    audit_log: List[Dict[str, str]],
+    group_by: Optional[str] = None,
+    monthly_bands: bool = False,
+    meters: Optional[Sequence[str]] = None,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    rules: Optional[ScreeningRules] = None
+) -> Tuple[float, float, float, float, Optional[pd.DataFrame], Optional[pd.DataFrame]]:
+    """Run the calculation steps directly on a memory-mapped interval store.
+
+    Savings and monthly band totals are computed on views of the store, so
+    no table is built; only ``group_by`` and screening need the selection
+    as a DataFrame. Intervals missing a consumption reading are skipped, as
+    :func:`normalize_data` does.
+
+    Parameters
+    ----------
+    store_path : str
+        Interval store written by :func:`interval_store.write_store`.
+    audit_log : list of dict
+        A list used to record audit trail entries.
+    group_by : str, optional
+        Column for :func:`calculate_group_savings` (e.g. ``meter_id``).
+    monthly_bands : bool
+        Whether to compute the monthly F1/F2/F3 and gas totals.
+    meters : sequence of str, optional
+        Meter ids to analyse (default: all).
+    start, end : str, optional
+        Time range ``start <= timestamp < end`` (default: everything).
+    rules : ScreeningRules, optional
+        Anomaly screening, see :func:`normalize_data` (default: none).
+
+    Returns
+    -------
+    tuple
+        baseline_avg, new_avg, absolute savings, percentage savings,
+        per-group results (or ``None``) and monthly totals (or ``None``).
+    """
+    logging.info("Mapping interval store %s", store_path)
+    with IntervalStore(store_path) as store:
+        unknown = sorted(set(meters or ()) - set(store.meters))
+        if unknown:
+            raise ValueError(f"Meters not found in {store_path}: {', '.join(unknown)}")
+        slices = store.select(meters, start, end)
+        intervals = sum(item.values.shape[1] for item in slices)
+        audit_log.append({
+            "step": "ingestion",
+            "timestamp": datetime.now().isoformat(),
+            "message": f"Mapped {intervals} intervals of {len(slices)} meters from {store_path}"
+        })
+        if rules is not None:
+            # Screening needs the rows of each meter in order, so the selection is built
+            frame = store.frame(meters, start, end)
+            consumption = ["consumption_before", "consumption_after"]
+            clean = frame.dropna(subset=consumption).astype(dict.fromkeys(consumption, np.float64))
+            audit_log.append({
+                "step": "normalisation",
+                "timestamp": datetime.now().isoformat(),
+                "message": f"Skipped {len(frame) - len(clean)} intervals with missing values"
+            })
+            logging.info("Screening readings for anomalies")
+            result = screen(clean, rules)
+            clean = clean[result.keep]
+            _log_screening(result, audit_log)
+            logging.info("Calculating energy savings")
+            if clean.empty:
+                raise ValueError("No valid consumption data available after normalisation")
+            results = calculate_savings(clean, audit_log)
+            groups = calculate_group_savings(clean, group_by, audit_log) if group_by else None
+            monthly = calculate_monthly_bands(clean, audit_log) if monthly_bands else None
+            return (*results, groups, monthly)
+
+        baseline_total, new_total, used, skipped = store.consumption_totals(slices)
+        audit_log.append({
+            "step": "normalisation",
+            "timestamp": datetime.now().isoformat(),
+            "message": f"Skipped {skipped} intervals with missing values"
+        })
+        logging.info("Calculating energy savings")
+        if not used:
+            raise ValueError("No valid consumption data available after normalisation")
+        results = _savings_from_averages(baseline_total / used, new_total / used, audit_log)
+
+        groups = None
+        if group_by:
+            frame = store.frame(meters, start, end)
+            frame = frame.dropna(subset=["consumption_before", "consumption_after"])
+            groups = calculate_group_savings(frame, group_by, audit_log)
+        monthly = None
+        if monthly_bands:
+            logging.info("Aggregating monthly F1/F2/F3 consumption")
+            monthly = store.monthly_bands(slices)
+            if monthly is not None:
+                audit_log.append({
+                    "step": "calculation",
+                    "timestamp": datetime.now().isoformat(),
+                    "message": f"Aggregated store bands into {len(monthly)} monthly totals"
+                })
+    return (*results, groups, monthly)
+
+def _screen_appended(state: IngestState, clean: pd.DataFrame, rules: ScreeningRules) -> int:
+    """Screen the normalised rows ``clean`` after the tail kept in ``state`` and merge them.
+
+    The rows of the tail whose verdicts were pending are taken back out of
+    the totals and screened again with the new rows, so every verdict is
+    the one a run over the whole file gives. Returns the number of rows
+    dropped, net of the pending rows dropped before.
+    """
+    scratch: List[Dict[str, str]] = []
+    flags = ["_pending", "_kept"]
+    if state.screen_step is None:
+        state.screen_step = interval_minutes(clean)
+    tail = state.tail
+    retracted = 0
+    if tail is not None:
+        pending = tail[tail["_pending"]]
+        kept = pending[pending["_kept"]].drop(columns=flags)
+        retracted = len(pending) - len(kept)
+        state.add(kept, -retracted, calculate_monthly_bands(kept, scratch), sign=-1)
+        combined = pd.concat([tail.drop(columns=flags), clean], ignore_index=True)
+        decided = np.concatenate([tail["_pending"].to_numpy(dtype=bool), np.ones(len(clean), dtype=bool)])
+    else:
+        combined = clean.reset_index(drop=True)
+        decided = np.ones(len(clean), dtype=bool)
+
+    keep = screen(combined, rules, state.screen_step).keep
+    accepted = combined[decided & keep]
+    dropped = int((decided & ~keep).sum())
+    state.add(accepted, dropped, calculate_monthly_bands(accepted, scratch))
+
+    # The last rows of each meter, with the context their re-screening needs
+    pending_rows, context_rows = screening_context(rules, state.screen_step)
+    if "meter_id" in combined.columns:
+        from_end = combined.groupby("meter_id", sort=False, dropna=False).cumcount(ascending=False).to_numpy()
+    else:
+        from_end = np.arange(len(combined))[::-1]
+    last = from_end < pending_rows + context_rows
+    state.tail = combined[last].assign(_pending=from_end[last] < pending_rows, _kept=keep[last])
+    return dropped - retracted
+
+def audit_incremental(
+    input_file: str,
+    audit_log: List[Dict[str, str]],
+    state_file: str,
+    group_by: Optional[str] = None,
+    rules: Optional[ScreeningRules] = None
+) -> Tuple[float, float, float, float, Optional[pd.DataFrame], Optional[pd.DataFrame]]:
+    """Run the pipeline on the rows appended to a CSV since the previous run.
+
+    Only the bytes after the checkpoint in ``state_file`` are parsed; each
+    chunk goes through :func:`normalize_data` and
+    :func:`calculate_monthly_bands` and is merged into the persisted totals,
+    from which the results are computed. With ``rules``, the last rows of
+    each meter are kept in the state and screened again with the rows
+    appended after them, so spike windows and stuck runs that straddle a
+    checkpoint give the verdicts of a full run. When the file was
+    rewritten, or ``group_by`` or the screening changed, the checkpoint is
+    discarded and the whole file is read again.
+
+    Parameters
+    ----------
+    input_file : str
+        CSV file that is only ever appended to.
+    audit_log : list of dict
+        A list used to record audit trail entries, including the range of
+        rows, bytes and timestamps read.
+    state_file : str
+        Checkpoint and accumulators, see :mod:`incremental_ingest`.
+    group_by : str, optional
+        Column for per-group savings.
+    rules : ScreeningRules, optional
+        Anomaly screening, see :func:`normalize_data` (default: none).
+
+    Returns
+    -------
+    tuple
+        baseline_avg, new_avg, absolute savings, percentage savings,
+        per-group results (or ``None``) and monthly totals (or ``None``),
+        all over every row consumed so far.
+    """
+    logging.info("Ingesting new rows of %s", input_file)
+    state = load_state(state_file)
+    reason = None
+    if state is not None:
+        reason = stale_reason(input_file, state.checkpoint)
+        if reason is None and group_by and group_by != state.group_by:
+            reason = f"grouping column changed to {group_by}"
+        if reason is None and (rules is not None) != state.screening:
+            reason = "screening turned " + ("on" if rules is not None else "off")
+    if state is None or reason:
+        if reason:
+            audit_log.append({
+                "step": "ingestion",
+                "timestamp": datetime.now().isoformat(),
+                "message": f"Checkpoint of {input_file} discarded ({reason}); reading the whole file"
+            })
+        state = IngestState(group_by)
+        state.screening = rules is not None
+    previous = state.checkpoint
+    checkpoint, chunks = read_new_rows(input_file, previous)
+
+    rows = dropped = 0
+    first_seen = last_seen = None
+    for chunk in chunks:
+        scratch: List[Dict[str, str]] = []
+        clean = normalize_data(chunk, scratch)
+        dropped += len(chunk) - len(clean)
+        if rules is not None:
+            state.dropped += len(chunk) - len(clean)
+            dropped += _screen_appended(state, clean, rules)
+        else:
+            state.add(clean, len(chunk) - len(clean), calculate_monthly_bands(clean, scratch))
+        rows += len(chunk)
+        if "timestamp" in chunk.columns:
+            stamps = parse_timestamps(chunk["timestamp"])
+            if stamps.notna().any():
+                low, high = stamps.min(), stamps.max()
+                first_seen = low if first_seen is None else min(first_seen, low)
+                last_seen = high if last_seen is None else max(last_seen, high)
+    state.checkpoint = checkpoint._replace(
+        rows=previous.rows + rows,
+        last_timestamp=last_seen.isoformat() if last_seen is not None else previous.last_timestamp
+    )
+    if rows:
+        span = f", timestamps {first_seen} .. {last_seen}" if last_seen is not None else ""
+        message = (
+            f"Read rows {previous.rows + 1}-{previous.rows + rows} "
+            f"(bytes {previous.offset}-{checkpoint.offset}{span}) from {input_file}"
+        )
+    else:
+        message = f"No new rows in {input_file} since {previous.last_timestamp or 'the checkpoint'}"
+    audit_log.append({
+        "step": "ingestion",
+        "timestamp": datetime.now().isoformat(),
+        "message": f"{message}; {state.checkpoint.rows} rows consumed in total"
+    })
+    audit_log.append({
+        "step": "normalisation",
+        "timestamp": datetime.now().isoformat(),
+        "message": (
+            f"Dropped {dropped} new rows with missing, non-numeric or anomalous values "
+            f"({state.dropped} in total)"
+        )
+    })
+
+    logging.info("Calculating energy savings")
+    if not state.rows:
+        raise ValueError("No valid consumption data available after normalisation")
+    results = _savings_from_averages(state.baseline_total / state.rows, state.new_total / state.rows, audit_log)
+    groups = None
+    if group_by:
+        groups = state.group_frame()
+        audit_log.append({
+            "step": "calculation",
+            "timestamp": datetime.now().isoformat(),
+            "message": f"Computed savings for {len(groups)} groups by {group_by}"
+        })
+    save_state(state_file, state)
+    return (*results, groups, state.monthly_frame())
+
+def run_audit(
+    input_file: str,
+    output_dir: str,
+    formats: Sequence[str] = ("md",),
+    filename_pattern: str = DEFAULT_FILENAME_PATTERN,
+    site: str = "",
+    group_by: Optional[str] = None,
+    meters: Optional[Sequence[str]] = None,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    incremental: bool = False,
+    state_dir: Optional[str] = None,
+    screening: bool = False,
+    gap_method: Optional[str] = None,
+    max_gap_minutes: float = 60.0
+) -> Tuple[List[str], List[Dict[str, str]], str]:
+    """Run the whole pipeline on one input file.
+
+    This is a module-level function so that batch runs can execute it in
+    worker processes. Interval stores are analysed in place, restricted to
+    ``meters`` and to ``start <= timestamp < end``, see :func:`audit_store`.
+    With ``incremental``, CSV inputs are read from their checkpoint in
+    ``state_dir`` (default: next to the input), see :func:`audit_incremental`.
+    With ``screening``, the readings are screened for anomalies, and for
+    inputs read whole the rows rejected by :func:`normalize_data` are written
+    to ``<input>_quarantine.csv`` in ``output_dir``. Gaps in timestamped data
+    are then counted in the audit trail; with a ``gap_method`` other than
+    ``"none"`` those up to ``max_gap_minutes`` are filled, and with any
+    ``gap_method`` the completeness per meter and month is written to
+    ``<input>_completeness.csv``. Incremental runs neither report nor fill
+    gaps.
+
+    Returns
+    -------
+    tuple of (list of str, list of dict, str)
+        Generated report paths, audit trail entries and input file SHA-256,
+        or ``""`` when no report format prints it (hashing a large, growing
+        input is left to the audit chain, which needs it).
+    """
+    audit_log: List[Dict[str, str]] = []
+    rules = ScreeningRules() if screening else None
+    if is_store(input_file):
+        baseline_avg, new_avg, savings, savings_percent, groups, monthly = audit_store(
+            input_file, audit_log, group_by, "pdf" in formats, meters, start, end, rules
+        )
+    elif incremental and input_file.endswith('.csv'):
+        baseline_avg, new_avg, savings, savings_percent, groups, monthly = audit_incremental(
+            input_file, audit_log, state_path(input_file, state_dir), group_by, rules
+        )
+        monthly = monthly if "pdf" in formats else None
+        audit_log.append({
+            "step": "gap filling",
+            "timestamp": datetime.now().isoformat(),
+            "message": (
+                "Gaps not checked: incremental runs compute the results from the rows as read, "
+                "without gap filling"
+                + (f" ({gap_method} requested)" if gap_method and gap_method != "none" else "")
             )
-    return report_path
+        })
+    else:
+        df = ingest_data(input_file, audit_log)
+        os.makedirs(output_dir, exist_ok=True)
+        stem = os.path.splitext(os.path.basename(input_file))[0]
+        quarantine_path = os.path.join(output_dir, f"{stem}_quarantine.csv") if screening else None
+        df_clean = normalize_data(df, audit_log, rules, quarantine_path)
+        completeness_path = os.path.join(output_dir, f"{stem}_completeness.csv") if gap_method else None
+        df_clean = fill_interval_gaps(
+            df_clean, audit_log, gap_method or "none", max_gap_minutes, completeness_path
+        )
+        baseline_avg, new_avg, savings, savings_percent = calculate_savings(df_clean, audit_log)
+        groups = calculate_group_savings(df_clean, group_by, audit_log) if group_by else None
+        monthly = calculate_monthly_bands(df_clean, audit_log) if "pdf" in formats else None
+    input_sha256 = file_digest(input_file) if set(formats) & set(DIGEST_FORMATS) else ""
+    report_paths = generate_report(
+        output_dir, baseline_avg, new_avg, savings, savings_percent, audit_log, input_file,
+        formats, filename_pattern, site, groups, group_by, monthly, input_sha256
+    )
+    return report_paths, audit_log, input_sha256
+
+def archive_bill(pdf_path: str, output_dir: str) -> Tuple[List[str], List[Dict[str, str]], str]:
+    """Copy a dropped PDF bill into ``output_dir/bills`` and log its fingerprint.
+
+    Bill data is extracted in the web demo (PDF import with OCR); the
+    pipeline keeps the original so the audit trail can reference it.
+
+    Returns
+    -------
+    tuple of (list of str, list of dict, str)
+        Archived path, audit trail entries and the file SHA-256, like
+        :func:`run_audit`.
+    """
+    input_sha256 = file_digest(pdf_path)
+    bills_dir = os.path.join(output_dir, "bills")
+    os.makedirs(bills_dir, exist_ok=True)
+    name, ext = os.path.splitext(os.path.basename(pdf_path))
+    target = os.path.join(bills_dir, name + ext)
+    if os.path.exists(target) and file_digest(target) != input_sha256:
+        # A different bill with the same name: keep both
+        target = os.path.join(bills_dir, f"{name}_{input_sha256[:12]}{ext}")
+    shutil.copy2(pdf_path, target)
+    audit_log = [{
+        "step": "ingestion",
+        "timestamp": datetime.now().isoformat(),
+        "message": f"Archived bill {os.path.basename(pdf_path)} ({os.path.getsize(pdf_path)} bytes) as {target}"
+    }]
+    return [target], audit_log, input_sha256
+
+def process_dropped_file(
+    path: str,
+    output_dir: str,
+    formats: Sequence[str],
+    filename_pattern: str,
+    site: str = "",
+    group_by: Optional[str] = None,
+    incremental: bool = False,
+    state_dir: Optional[str] = None,
+    screening: bool = False,
+    gap_method: Optional[str] = None,
+    max_gap_minutes: float = 60.0
+) -> Tuple[List[str], List[Dict[str, str]], str]:
+    """Handle a file dropped into the watched folder: audit data, archive bills."""
+    if path.lower().endswith(".pdf"):
+        return archive_bill(path, output_dir)
+    return run_audit(
+        path, output_dir, formats, filename_pattern, site, group_by,
+        incremental=incremental, state_dir=state_dir, screening=screening,
+        gap_method=gap_method, max_gap_minutes=max_gap_minutes
+    )
+
+def watch_folder(args: argparse.Namespace, formats: Sequence[str], report_name: str) -> None:
+    """Run :func:`process_dropped_file` on every file landing in ``args.watch``."""
+    if os.path.abspath(args.output_dir) == os.path.abspath(args.watch):
+        raise ValueError("The output directory must differ from the watched folder")
+
+    def on_result(path: str, result, error: Optional[BaseException], latency: float) -> None:
+        if error is not None:
+            logging.error("Audit of %s failed: %s", path, error)
+            return
+        report_paths, audit_log, input_sha256 = result
+        label = "Bill archived at" if path.lower().endswith(".pdf") else "Report generated at"
+        for report_path in report_paths:
+            print(f"{label}: {report_path}")
+        if args.audit_chain:
+            head = append_entries(args.audit_chain, audit_log, path, input_sha256 or None)
+            print(f"Audit trail appended to {args.audit_chain} (head {head})")
+        logging.info("%s processed %.1f s after it was noticed", os.path.basename(path), latency)
+
+    handler = partial(
+        process_dropped_file,
+        output_dir=args.output_dir, formats=formats, filename_pattern=report_name, site=args.site,
+        group_by=args.group_by, incremental=args.incremental, state_dir=args.state_dir,
+        screening=args.screen, gap_method=args.gap_fill, max_gap_minutes=args.max_gap
+    )
+    watcher = DropFolderWatcher(
+        args.watch, handler, on_result, workers=args.jobs, settle=args.settle,
+        poll_interval=args.poll_interval, process_existing=args.existing
+    )
+    try:
+        watcher.run()
+    except KeyboardInterrupt:
+        logging.info("Stopped watching %s", args.watch)
 
 def main() -> None:
     """Command-line entry point."""
@@ -187,13 +868,16 @@ def main() -> None:
             "This command-line tool demonstrates a simplified energy audit workflow. "
             "It expects a CSV file containing consumption_before and consumption_after columns, "
             "cleans the data, calculates the average baseline and new consumption, and outputs a "
-            "Markdown report with results and an audit trail."
+            "Markdown report with results and an audit trail. Several input files can be given "
+            "to produce one report each, optionally in parallel."
         ),
         formatter_class=argparse.RawDescriptionHelpFormatter
     )
     parser.add_argument(
-        "csv_file",
-        help="Path to the input CSV or Excel file with consumption data"
+        "csv_files",
+        nargs="*",
+        metavar="csv_file",
+        help="Path to the input CSV, Excel or interval store (.oeis) file with consumption data"
     )
     parser.add_argument(
         "-o",
@@ -201,26 +885,161 @@ def main() -> None:
         default=".",
         help="Directory where the report will be saved (default: current directory)"
     )
+    parser.add_argument(
+        "-f",
+        "--format",
+        dest="formats",
+        action="append",
+        choices=sorted(RENDERERS),
+        help="Report format (md, html, json, csv, pdf); repeat for several formats (default: md)"
+    )
+    parser.add_argument(
+        "--report-name",
+        default=DEFAULT_FILENAME_PATTERN,
+        help=(
+            "Report file name pattern with optional {site}, {input}, {date} and {ext} "
+            f"placeholders (default: {DEFAULT_FILENAME_PATTERN})"
+        )
+    )
+    parser.add_argument(
+        "--site",
+        default="",
+        help="Site name shown in the report and used for {site} in --report-name"
+    )
+    parser.add_argument(
+        "--group-by",
+        metavar="COLUMN",
+        help="Add a per-group savings table, grouping rows by COLUMN (e.g. building_zone)"
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="Number of input files processed in parallel, also with --watch (default: 1)"
+    )
+    parser.add_argument(
+        "--meter",
+        dest="meters",
+        action="append",
+        metavar="METER_ID",
+        help="Interval store inputs only: analyse this meter; repeat for several (default: all)"
+    )
+    parser.add_argument(
+        "--start",
+        help="Interval store inputs only: first timestamp to analyse (e.g. 2024-01-01)"
+    )
+    parser.add_argument(
+        "--end",
+        help="Interval store inputs only: analyse timestamps before this one"
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help=(
+            "CSV inputs only: parse just the rows appended since the previous run and "
+            "report on all rows read so far (checkpoint kept in INPUT.ingest.json)"
+        )
+    )
+    parser.add_argument(
+        "--state-dir",
+        metavar="DIR",
+        help="Directory for the --incremental checkpoints (default: next to each input)"
+    )
+    parser.add_argument(
+        "--screen",
+        action="store_true",
+        help=(
+            "Screen the readings with the anomaly rules (negative readings, spikes, stuck meters, "
+            "after above before); rejected rows are listed in OUTPUT_DIR/<input>_quarantine.csv"
+        )
+    )
+    parser.add_argument(
+        "--gap-fill",
+        choices=GAP_METHODS,
+        help=(
+            "Fill the missing intervals of timestamped data by this method ('none' fills "
+            "nothing) and write the completeness per meter and month to "
+            "OUTPUT_DIR/<input>_completeness.csv (default: only count the gaps in the audit trail)"
+        )
+    )
+    parser.add_argument(
+        "--max-gap",
+        type=float,
+        default=60.0,
+        metavar="MINUTES",
+        help="Longest gap filled by --gap-fill; longer gaps are only reported (default: 60)"
+    )
+    parser.add_argument(
+        "--watch",
+        metavar="DIR",
+        help=(
+            "Keep running and audit every CSV or Excel file dropped into DIR (PDF bills "
+            "are archived in OUTPUT_DIR/bills), -j files at a time"
+        )
+    )
+    parser.add_argument(
+        "--settle",
+        type=float,
+        default=1.0,
+        help="--watch: seconds a file must stay unchanged before it is processed (default: 1)"
+    )
+    parser.add_argument(
+        "--poll-interval",
+        type=float,
+        default=1.0,
+        help="--watch: seconds between folder scans without inotify (default: 1)"
+    )
+    parser.add_argument(
+        "--existing",
+        action="store_true",
+        help="--watch: also process the files already in the folder"
+    )
+    parser.add_argument(
+        "--audit-chain",
+        metavar="LOG_FILE",
+        help=(
+            "Append the audit trail to this tamper-evident, hash-chained log "
+            "(verify it with: python audit_trail.py verify LOG_FILE)"
+        )
+    )
     args = parser.parse_args()
+    if not args.csv_files and not args.watch:
+        parser.error("give at least one input file or --watch DIR")
 
     logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
-    audit_log: List[Dict[str, str]] = []
+    formats = args.formats or ["md"]
+    report_name = args.report_name
+    if (len(args.csv_files) > 1 or args.watch) and "{input}" not in report_name:
+        # One report per input: keep file names from colliding
+        report_name = "{input}_" + report_name
+    try:
+        # Fail before running the pipeline on a pattern with unknown placeholders
+        report_filename(report_name, ReportData("input.csv", 0.0, 0.0, 0.0, 0.0, []), "md")
+    except ValueError as exc:
+        parser.error(str(exc))
 
     try:
         # Execute workflow
-        df = ingest_data(args.csv_file, audit_log)
-        df_clean = normalize_data(df, audit_log)
-        baseline_avg, new_avg, savings, savings_percent = calculate_savings(df_clean, audit_log)
-        report_path = generate_report(
-            args.output_dir,
-            baseline_avg,
-            new_avg,
-            savings,
-            savings_percent,
-            audit_log,
-            args.csv_file
-        )
-        print(f"Report generated at: {report_path}")
+        jobs = [
+            (csv_file, args.output_dir, formats, report_name, args.site, args.group_by,
+             args.meters, args.start, args.end, args.incremental, args.state_dir,
+             args.screen, args.gap_fill, args.max_gap)
+            for csv_file in args.csv_files
+        ]
+        if args.jobs > 1 and len(jobs) > 1:
+            with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+                results = list(pool.map(run_audit, *zip(*jobs)))
+        else:
+            results = [run_audit(*job) for job in jobs]
+        for csv_file, (report_paths, audit_log, input_sha256) in zip(args.csv_files, results):
+            for report_path in report_paths:
+                print(f"Report generated at: {report_path}")
+            if args.audit_chain:
+                head = append_entries(args.audit_chain, audit_log, csv_file, input_sha256 or None)
+                print(f"Audit trail appended to {args.audit_chain} (head {head})")
+        if args.watch:
+            watch_folder(args, formats, report_name)
     except (ValueError, FileNotFoundError) as exc:
         logging.error("Audit failed: %s", exc)
         raise SystemExit(1) from exc
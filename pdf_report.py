@@ -0,0 +1,316 @@
+"""
+OpenEurope PDF Report
+---------------------
+
+Renders the audit report straight to PDF with the standard library only, so
+reports can be produced headlessly (no browser, no html2pdf) and in parallel
+from the nightly batch. The layout mirrors the web demo report: summary,
+monthly F1/F2/F3/Gas stacked bar chart and share doughnut (as drawn by
+``renderCharts`` in ``app.js``), per-group table, audit trail and a sign-off
+block carrying the input file digest.
+
+Charts are drawn as vector graphics. Text uses the built-in Helvetica fonts
+with WinAnsi encoding, so no font files are embedded. Pages are written to the
+output file as soon as they are full; only object offsets are kept in memory.
+"""
+
+import math
+import os
+import textwrap
+from datetime import datetime
+from typing import BinaryIO, Dict, List, Sequence, Tuple
+
+PAGE_WIDTH = 595.0   # A4 in points
+PAGE_HEIGHT = 842.0
+MARGIN = 50.0
+
+# Chart.js default palette, in the dataset order used by renderCharts
+BAND_COLORS = [
+    ("F1", (54, 162, 235)),
+    ("F2", (255, 99, 132)),
+    ("F3", (255, 159, 64)),
+    ("Gas", (255, 205, 86)),
+]
+_BAND_KEYS = ["f1", "f2", "f3", "gas"]
+
+Color = Tuple[int, int, int]
+
+
+def _pdf_string(text: str) -> bytes:
+    raw = str(text).encode("cp1252", errors="replace")
+    return b"(" + raw.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)") + b")"
+
+
+def _rgb(color: Color) -> str:
+    return " ".join(f"{c / 255:.3f}" for c in color)
+
+
+def _fmt(value: float) -> str:
+    """Format a number Italian-style (``1.234,56``), like ``fmtNumber`` in app.js."""
+    return f"{value:,.2f}".replace(",", "_").replace(".", ",").replace("_", ".")
+
+
+class PdfWriter:
+    """Minimal streaming PDF writer.
+
+    Objects 1 (catalog), 2 (page tree) and 3-4 (fonts) are reserved up front;
+    every finished page is flushed immediately and the page tree and cross
+    reference table are written by :meth:`close`.
+    """
+
+    def __init__(self, f: BinaryIO, title: str = "") -> None:
+        self._f = f
+        self._offsets: Dict[int, int] = {}
+        self._next_id = 6
+        self._pages: List[int] = []
+        self._ops: List[str] = []
+        self._title = title
+        self._write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        self._object(3, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica "
+                        b"/Encoding /WinAnsiEncoding >>")
+        self._object(4, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold "
+                        b"/Encoding /WinAnsiEncoding >>")
+
+    def _write(self, data: bytes) -> None:
+        self._f.write(data)
+
+    def _object(self, obj_id: int, body: bytes) -> None:
+        self._offsets[obj_id] = self._f.tell()
+        self._write(b"%d 0 obj\n" % obj_id + body + b"\nendobj\n")
+
+    def _new_id(self) -> int:
+        obj_id = self._next_id
+        self._next_id += 1
+        return obj_id
+
+    # -- drawing primitives -------------------------------------------------
+    def text(self, x: float, y: float, text: str, size: float = 10, bold: bool = False,
+             color: Color = (17, 24, 39)) -> None:
+        font = "/F2" if bold else "/F1"
+        self._ops.append(
+            f"BT {_rgb(color)} rg {font} {size:g} Tf {x:.2f} {y:.2f} Td "
+            + _pdf_string(text).decode("latin-1") + " Tj ET"
+        )
+
+    def rect(self, x: float, y: float, w: float, h: float, fill: Color) -> None:
+        self._ops.append(f"{_rgb(fill)} rg {x:.2f} {y:.2f} {w:.2f} {h:.2f} re f")
+
+    def line(self, x1: float, y1: float, x2: float, y2: float,
+             color: Color = (203, 213, 225), width: float = 0.5) -> None:
+        self._ops.append(
+            f"{_rgb(color)} RG {width:g} w {x1:.2f} {y1:.2f} m {x2:.2f} {y2:.2f} l S"
+        )
+
+    def polygon(self, points: Sequence[Tuple[float, float]], fill: Color) -> None:
+        if not points:
+            return
+        path = [f"{points[0][0]:.2f} {points[0][1]:.2f} m"]
+        path.extend(f"{x:.2f} {y:.2f} l" for x, y in points[1:])
+        self._ops.append(f"{_rgb(fill)} rg " + " ".join(path) + " h f")
+
+    # -- pages --------------------------------------------------------------
+    def end_page(self) -> None:
+        """Flush the current page to the output file."""
+        content = "\n".join(self._ops).encode("latin-1")
+        content_id = self._new_id()
+        self._object(content_id, b"<< /Length %d >>\nstream\n" % len(content)
+                     + content + b"\nendstream")
+        page_id = self._new_id()
+        self._object(page_id, (
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {PAGE_WIDTH:g} {PAGE_HEIGHT:g}] "
+            f"/Resources << /Font << /F1 3 0 R /F2 4 0 R >> >> /Contents {content_id} 0 R >>"
+        ).encode("ascii"))
+        self._pages.append(page_id)
+        self._ops = []
+
+    def close(self) -> None:
+        """Finish the document: page tree, info dictionary, xref and trailer."""
+        if self._ops or not self._pages:
+            self.end_page()
+        kids = " ".join(f"{p} 0 R" for p in self._pages)
+        self._object(2, f"<< /Type /Pages /Kids [{kids}] /Count {len(self._pages)} >>".encode("ascii"))
+        self._object(1, b"<< /Type /Catalog /Pages 2 0 R >>")
+        created = datetime.now().strftime("D:%Y%m%d%H%M%S")
+        self._object(5, b"<< /Title " + _pdf_string(self._title)
+                     + b" /Producer (OpenEurope) /CreationDate (" + created.encode("ascii") + b") >>")
+        xref_offset = self._f.tell()
+        size = self._next_id
+        lines = [b"xref\n", b"0 %d\n" % size, b"0000000000 65535 f \n"]
+        for obj_id in range(1, size):
+            offset = self._offsets.get(obj_id)
+            lines.append(b"%010d 00000 n \n" % offset if offset is not None else b"0000000000 65535 f \n")
+        self._write(b"".join(lines))
+        self._write(
+            b"trailer\n<< /Size %d /Root 1 0 R /Info 5 0 R >>\nstartxref\n%d\n%%%%EOF\n"
+            % (size, xref_offset)
+        )
+
+
+class _Layout:
+    """Top-to-bottom flow of content with automatic page breaks."""
+
+    def __init__(self, pdf: PdfWriter) -> None:
+        self.pdf = pdf
+        self.y = PAGE_HEIGHT - MARGIN
+
+    def need(self, height: float) -> None:
+        if self.y - height < MARGIN:
+            self.pdf.end_page()
+            self.y = PAGE_HEIGHT - MARGIN
+
+    def heading(self, text: str, size: float = 14) -> None:
+        self.need(size + 18)
+        self.y -= size + 8
+        self.pdf.text(MARGIN, self.y, text, size=size, bold=True)
+        self.y -= 8
+
+    def paragraph(self, text: str, size: float = 10, bold: bool = False,
+                  color: Color = (17, 24, 39)) -> None:
+        # Helvetica averages roughly half an em per character
+        width = max(20, int((PAGE_WIDTH - 2 * MARGIN) / (size * 0.5)))
+        for chunk in textwrap.wrap(text, width) or [""]:
+            self.need(size + 4)
+            self.y -= size + 4
+            self.pdf.text(MARGIN, self.y, chunk, size=size, bold=bold, color=color)
+
+
+def _draw_monthly_chart(pdf: PdfWriter, x: float, y: float, w: float, h: float,
+                        months: List[str], series: Dict[str, List[float]]) -> None:
+    """Stacked bar chart of the monthly bands, bottom-left corner at (x, y)."""
+    totals = [sum(series[k][i] for k in _BAND_KEYS) for i in range(len(months))]
+    top = max(totals) if totals and max(totals) > 0 else 1.0
+    # Round the axis up to a "nice" value
+    magnitude = 10 ** math.floor(math.log10(top))
+    top = math.ceil(top / magnitude) * magnitude
+    axis_x = x + 45
+    plot_w = w - 45
+    plot_h = h - 30
+    base_y = y + 25
+    for i in range(5):
+        gy = base_y + plot_h * i / 4
+        pdf.line(axis_x, gy, axis_x + plot_w, gy)
+        pdf.text(x, gy - 3, _fmt(top * i / 4).rsplit(",", 1)[0], size=7, color=(100, 116, 139))
+    slot = plot_w / max(1, len(months))
+    bar_w = min(slot * 0.6, 30)
+    for i, month in enumerate(months):
+        bx = axis_x + slot * i + (slot - bar_w) / 2
+        by = base_y
+        for key, (_, color) in zip(_BAND_KEYS, BAND_COLORS):
+            bh = plot_h * series[key][i] / top
+            if bh > 0:
+                pdf.rect(bx, by, bar_w, bh, color)
+                by += bh
+        pdf.text(bx, y + 12, month[5:] if len(month) > 5 else month, size=7, color=(100, 116, 139))
+    _draw_legend(pdf, axis_x, y)
+
+
+def _draw_legend(pdf: PdfWriter, x: float, y: float) -> None:
+    for i, (label, color) in enumerate(BAND_COLORS):
+        lx = x + i * 60
+        pdf.rect(lx, y - 2, 8, 8, color)
+        pdf.text(lx + 12, y - 1, label, size=8)
+
+
+def _draw_share_chart(pdf: PdfWriter, cx: float, cy: float, radius: float,
+                      totals: Dict[str, float]) -> None:
+    """Doughnut chart of the yearly share of each band, centred on (cx, cy)."""
+    grand = sum(totals[k] for k in _BAND_KEYS)
+    if grand <= 0:
+        pdf.text(cx - 30, cy, "No data", size=9, color=(100, 116, 139))
+        return
+    inner = radius * 0.5
+    angle = math.pi / 2
+    for key, (_, color) in zip(_BAND_KEYS, BAND_COLORS):
+        sweep = 2 * math.pi * totals[key] / grand
+        if sweep <= 0:
+            continue
+        steps = max(2, int(sweep / (math.pi / 90)))
+        arc = [angle - sweep * s / steps for s in range(steps + 1)]
+        outer_pts = [(cx + radius * math.cos(a), cy + radius * math.sin(a)) for a in arc]
+        inner_pts = [(cx + inner * math.cos(a), cy + inner * math.sin(a)) for a in reversed(arc)]
+        pdf.polygon(outer_pts + inner_pts, color)
+        angle -= sweep
+    for i, (key, (label, _)) in enumerate(zip(_BAND_KEYS, BAND_COLORS)):
+        share = totals[key] / grand * 100
+        pdf.text(cx + radius + 20, cy + radius - 14 - i * 14, f"{label}: {share:.1f}%", size=8)
+
+
+def _monthly_series(monthly) -> Tuple[List[str], Dict[str, List[float]]]:
+    months = [str(m) for m in monthly["month"]]
+    series = {
+        key: [float(v) for v in monthly[key]] if key in monthly else [0.0] * len(months)
+        for key in _BAND_KEYS
+    }
+    return months, series
+
+
+def render_pdf(data, f: BinaryIO) -> None:
+    """Write the report described by a ``report_engine.ReportData`` as PDF."""
+    input_name = os.path.basename(data.input_file)
+    pdf = PdfWriter(f, title=f"Energy Audit Report - {input_name}")
+    layout = _Layout(pdf)
+    layout.heading("Energy Audit Report", size=20)
+    layout.paragraph(f"Input file: {input_name}")
+    if data.site:
+        layout.paragraph(f"Site: {data.site}")
+    layout.paragraph(f"Generated: {datetime.now().strftime('%d/%m/%Y %H:%M')}",
+                     size=9, color=(100, 116, 139))
+
+    layout.heading("Summary")
+    layout.paragraph(f"Baseline average consumption: {data.baseline_avg:.2f}")
+    layout.paragraph(f"New average consumption: {data.new_avg:.2f}")
+    layout.paragraph(f"Absolute energy savings: {data.savings:.2f}")
+    layout.paragraph(f"Savings percentage: {data.savings_percent:.2f}%")
+
+    monthly = getattr(data, "monthly", None)
+    if monthly is not None and len(monthly):
+        months, series = _monthly_series(monthly)
+        totals = {key: sum(series[key]) for key in _BAND_KEYS}
+        layout.heading("Monthly consumption by band (kWh)")
+        chart_h = 200
+        layout.need(chart_h + 10)
+        _draw_monthly_chart(pdf, MARGIN, layout.y - chart_h, PAGE_WIDTH - 2 * MARGIN, chart_h,
+                            months, series)
+        layout.y -= chart_h + 10
+        layout.heading("Annual share")
+        share_h = 150
+        layout.need(share_h)
+        _draw_share_chart(pdf, MARGIN + 80, layout.y - share_h / 2, 65, totals)
+        layout.y -= share_h
+        for key, (label, _) in zip(_BAND_KEYS, BAND_COLORS):
+            layout.paragraph(f"{label}: {_fmt(totals[key])} kWh", size=9)
+
+    if data.groups is not None:
+        layout.heading(f"Savings by {data.group_by}")
+        columns = [("Group", 0), ("Rows", 150), ("Baseline avg", 200), ("New avg", 280),
+                   ("Savings", 350), ("Savings %", 420)]
+        layout.need(16)
+        layout.y -= 14
+        for label, dx in columns:
+            pdf.text(MARGIN + dx, layout.y, label, size=9, bold=True)
+        groups = data.groups
+        for row in groups[["group", "rows", "baseline_avg", "new_avg", "savings",
+                           "savings_percent"]].itertuples(index=False, name=None):
+            layout.need(14)
+            layout.y -= 13
+            group, rows, base, new, sav, pct = row
+            values = [str(group)[:30], str(rows), f"{base:.2f}", f"{new:.2f}",
+                      f"{sav:.2f}", f"{pct:.2f}%"]
+            for value, (_, dx) in zip(values, columns):
+                pdf.text(MARGIN + dx, layout.y, value, size=9)
+
+    layout.heading("Audit Trail")
+    for entry in data.audit_log:
+        layout.paragraph(f"{entry['timestamp']} [{entry['step']}] {entry['message']}", size=8)
+
+    layout.heading("Sign-off")
+    digest = getattr(data, "input_sha256", "")
+    if digest:
+        layout.paragraph(f"Input SHA-256: {digest}", size=8)
+    layout.need(50)
+    layout.y -= 40
+    pdf.line(MARGIN, layout.y, MARGIN + 200, layout.y, color=(17, 24, 39))
+    pdf.line(MARGIN + 260, layout.y, MARGIN + 400, layout.y, color=(17, 24, 39))
+    pdf.text(MARGIN, layout.y - 12, "Auditor", size=8, color=(100, 116, 139))
+    pdf.text(MARGIN + 260, layout.y - 12, "Date", size=8, color=(100, 116, 139))
+    pdf.close()
@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+"""
+OpenEurope Project Store
+------------------------
+
+SQLite-backed storage for the web demo project state, served by
+``run_demo.py`` in place of the single ``openeurope_demo_v3`` localStorage
+blob. The state is split into rows so an edit only rewrites the records it
+touches:
+
+* ``energy``: one row per monthly reading of ``energyByYear``, keyed by
+  ``(year, utility_id, month)`` and indexed by utility and by month;
+* ``items``: one row per entry of the list sections (``utilities``,
+  ``machines``, ``autoprod``, ``gasUsers``), keyed by the entry ``id``;
+* ``log``: the audit log, append only;
+* ``sections``: the remaining small sections (``ui``, ``project``,
+  ``company``, ``energyYears``, ...) as one JSON document each.
+
+Several projects can share one database file; each is addressed by a
+project id (the demo uses its storage key).
+
+Usage:
+    python3 project_store.py export openeurope_projects.db -o progetto.json
+    python3 project_store.py import openeurope_projects.db progetto.json
+"""
+
+import argparse
+import json
+import sqlite3
+import threading
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# Project id used by the web demo (its former localStorage key)
+DEFAULT_PROJECT = "openeurope_demo_v3"
+
+# List sections stored one entry per row, keyed by the entry ``id``
+ITEM_SECTIONS = ("utilities", "machines", "autoprod", "gasUsers")
+
+# Key of the legacy ``energyByYear[year] = [...]`` layout, which has no utility level
+LEGACY_UTILITY = ""
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sections (
+    project TEXT NOT NULL,
+    name TEXT NOT NULL,
+    value TEXT NOT NULL,
+    PRIMARY KEY (project, name)
+);
+CREATE TABLE IF NOT EXISTS items (
+    project TEXT NOT NULL,
+    section TEXT NOT NULL,
+    id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    value TEXT NOT NULL,
+    PRIMARY KEY (project, section, id)
+);
+CREATE TABLE IF NOT EXISTS energy (
+    project TEXT NOT NULL,
+    year TEXT NOT NULL,
+    utility_id TEXT NOT NULL,
+    month TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    value TEXT NOT NULL,
+    PRIMARY KEY (project, year, utility_id, month)
+);
+CREATE INDEX IF NOT EXISTS energy_by_utility ON energy (project, utility_id, year);
+CREATE INDEX IF NOT EXISTS energy_by_month ON energy (project, year, month);
+CREATE TABLE IF NOT EXISTS log (
+    project TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    value TEXT NOT NULL,
+    PRIMARY KEY (project, seq)
+);
+"""
+
+
+def _dump(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+
+def keyed(entries: List[Any], key_of) -> Iterator[Tuple[str, int, Any]]:
+    """Yield ``(key, position, entry)`` with duplicate keys made unique.
+
+    The n-th repeat of a key gets a ``#n`` suffix, matching ``storeKeyed`` in
+    app.js, so client and server address the same row for the same entry.
+    """
+    seen: Dict[str, int] = {}
+    for pos, entry in enumerate(entries):
+        key = key_of(entry, pos)
+        if key in seen:
+            seen[key] += 1
+            key = f"{key}#{seen[key] - 1}"
+        else:
+            seen[key] = 1
+        yield key, pos, entry
+
+
+def _item_key(entry: Any, pos: int) -> str:
+    value = entry.get("id") if isinstance(entry, dict) else None
+    return str(pos if value is None else value)
+
+
+def _month_key(entry: Any, pos: int) -> str:
+    value = entry.get("month") if isinstance(entry, dict) else None
+    return str(pos if value is None else value)
+
+
+def energy_rows(energy_by_year: Dict[str, Any]) -> Iterator[Tuple[str, str, str, int, Any]]:
+    """Flatten ``energyByYear`` into ``(year, utility_id, month, position, record)`` rows."""
+    for year, by_utility in (energy_by_year or {}).items():
+        groups = {LEGACY_UTILITY: by_utility} if isinstance(by_utility, list) else by_utility
+        if not isinstance(groups, dict):
+            continue
+        for util_id, records in groups.items():
+            if not isinstance(records, list):
+                continue
+            for month, pos, record in keyed(records, _month_key):
+                yield str(year), str(util_id), month, pos, record
+
+
+class ProjectStore:
+    """Project states stored in a SQLite database.
+
+    A single connection is shared by the server threads and serialised with a
+    lock; SQLite runs in WAL mode so a write only appends to the journal.
+
+    Parameters
+    ----------
+    path : str
+        Database file, created on first use (``":memory:"`` for a scratch store).
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def exists(self, project: str) -> bool:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM sections WHERE project = ? LIMIT 1", (project,)
+            ).fetchone()
+        return row is not None
+
+    def load(self, project: str) -> Optional[Dict[str, Any]]:
+        """Rebuild the full project state, or return ``None`` if it is not stored."""
+        with self._lock:
+            conn = self._conn
+            sections = conn.execute(
+                "SELECT name, value FROM sections WHERE project = ?", (project,)
+            ).fetchall()
+            # A project may consist of list entries or readings only
+            if not sections and not any(
+                conn.execute(f"SELECT 1 FROM {table} WHERE project = ? LIMIT 1", (project,)).fetchone()
+                for table in ("items", "energy", "log")
+            ):
+                return None
+            state: Dict[str, Any] = {name: json.loads(value) for name, value in sections}
+            for section in ITEM_SECTIONS:
+                state[section] = [
+                    json.loads(value) for (value,) in conn.execute(
+                        "SELECT value FROM items WHERE project = ? AND section = ? ORDER BY position",
+                        (project, section),
+                    )
+                ]
+            energy: Dict[str, Any] = {}
+            for year, util_id, value in conn.execute(
+                "SELECT year, utility_id, value FROM energy WHERE project = ? "
+                "ORDER BY year, utility_id, position",
+                (project,),
+            ):
+                if util_id == LEGACY_UTILITY:
+                    energy.setdefault(year, []).append(json.loads(value))
+                else:
+                    energy.setdefault(year, {}).setdefault(util_id, []).append(json.loads(value))
+            state["energyByYear"] = energy
+            state["log"] = [
+                json.loads(value) for (value,) in conn.execute(
+                    "SELECT value FROM log WHERE project = ? ORDER BY seq DESC", (project,)
+                )
+            ]
+        return state
+
+    def replace(self, project: str, state: Dict[str, Any]) -> None:
+        """Store ``state`` as the whole content of ``project``."""
+        if not isinstance(state, dict):
+            raise ValueError("project state must be a JSON object")
+        log = state.get("log") or []
+        patch = {
+            "sections": {
+                name: value for name, value in state.items()
+                if name not in ITEM_SECTIONS and name not in ("energyByYear", "log")
+            },
+            "items": {
+                section: {
+                    "upsert": [
+                        [key, pos, entry]
+                        for key, pos, entry in keyed(state.get(section) or [], _item_key)
+                    ]
+                }
+                for section in ITEM_SECTIONS
+            },
+            "energy": {"upsert": [list(row) for row in energy_rows(state.get("energyByYear"))]},
+            # The state keeps the newest log entry first
+            "log": {"append": list(reversed(log))},
+        }
+        with self._lock, self._conn:
+            conn = self._conn
+            for table in ("sections", "items", "energy", "log"):
+                conn.execute(f"DELETE FROM {table} WHERE project = ?", (project,))
+            self._apply(project, patch)
+
+    def patch(self, project: str, changes: Dict[str, Any]) -> None:
+        """Apply a set of record-level changes in one transaction.
+
+        ``changes`` may contain:
+
+        * ``sections``: ``{name: value}`` documents to replace;
+        * ``items``: ``{section: {"upsert": [[id, position, value], ...],
+          "delete": [id, ...]}}``;
+        * ``energy``: ``{"upsert": [[year, utility_id, month, position, value], ...],
+          "delete": [[year, utility_id, month], ...]}``;
+        * ``log``: ``{"reset": bool, "append": [entry, ...]}`` with entries
+          oldest first.
+
+        Raises
+        ------
+        KeyError
+            If ``project`` has not been stored yet.
+        ValueError
+            If ``changes`` is malformed.
+        """
+        if not isinstance(changes, dict):
+            raise ValueError("changes must be a JSON object")
+        if not self.exists(project):
+            raise KeyError(project)
+        with self._lock, self._conn:
+            self._apply(project, changes)
+
+    def _apply(self, project: str, changes: Dict[str, Any]) -> None:
+        conn = self._conn
+        sections = changes.get("sections") or {}
+        conn.executemany(
+            "INSERT OR REPLACE INTO sections (project, name, value) VALUES (?, ?, ?)",
+            [(project, str(name), _dump(value)) for name, value in sections.items()],
+        )
+        for section, ops in (changes.get("items") or {}).items():
+            if section not in ITEM_SECTIONS:
+                raise ValueError(f"unknown list section: {section}")
+            conn.executemany(
+                "DELETE FROM items WHERE project = ? AND section = ? AND id = ?",
+                [(project, section, str(key)) for key in ops.get("delete") or []],
+            )
+            conn.executemany(
+                "INSERT OR REPLACE INTO items (project, section, id, position, value) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [(project, section, str(key), int(pos), _dump(value))
+                 for key, pos, value in ops.get("upsert") or []],
+            )
+        energy = changes.get("energy") or {}
+        conn.executemany(
+            "DELETE FROM energy WHERE project = ? AND year = ? AND utility_id = ? AND month = ?",
+            [(project, str(year), str(util_id), str(month))
+             for year, util_id, month in energy.get("delete") or []],
+        )
+        conn.executemany(
+            "INSERT OR REPLACE INTO energy (project, year, utility_id, month, position, value) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            [(project, str(year), str(util_id), str(month), int(pos), _dump(value))
+             for year, util_id, month, pos, value in energy.get("upsert") or []],
+        )
+        log = changes.get("log") or {}
+        if log.get("reset"):
+            conn.execute("DELETE FROM log WHERE project = ?", (project,))
+        entries = log.get("append") or []
+        if entries:
+            (last,) = conn.execute(
+                "SELECT COALESCE(MAX(seq), -1) FROM log WHERE project = ?", (project,)
+            ).fetchone()
+            conn.executemany(
+                "INSERT INTO log (project, seq, value) VALUES (?, ?, ?)",
+                [(project, last + 1 + i, _dump(entry)) for i, entry in enumerate(entries)],
+            )
+
+
+def main() -> None:
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description="Export or import OpenEurope demo projects")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    export_parser = subparsers.add_parser("export", help="Write a stored project as JSON")
+    export_parser.add_argument("database", help="Project store database file")
+    export_parser.add_argument("-o", "--output", required=True, help="Output JSON file")
+    import_parser = subparsers.add_parser("import", help="Store a project JSON exported by the demo")
+    import_parser.add_argument("database", help="Project store database file")
+    import_parser.add_argument("project_file", help="Project JSON file")
+    for sub in (export_parser, import_parser):
+        sub.add_argument(
+            "--project", default=DEFAULT_PROJECT,
+            help=f"Project id (default: {DEFAULT_PROJECT})"
+        )
+    args = parser.parse_args()
+
+    store = ProjectStore(args.database)
+    try:
+        if args.command == "export":
+            state = store.load(args.project)
+            if state is None:
+                raise SystemExit(f"Project {args.project!r} not found in {args.database}")
+            with open(args.output, "w", encoding="utf-8") as f:
+                json.dump(state, f, ensure_ascii=False, indent=2)
+            print(f"Written {args.output}")
+        else:
+            with open(args.project_file, "r", encoding="utf-8") as f:
+                store.replace(args.project, json.load(f))
+            print(f"Stored project {args.project!r} in {args.database}")
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
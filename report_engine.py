@@ -0,0 +1,285 @@
+"""
+OpenEurope Report Engine
+------------------------
+
+Renders the results of an energy audit in several output formats from a single
+result model. Each renderer writes directly to a buffered file as it walks the
+model, so large sections (per-group tables, long audit trails) are streamed to
+disk instead of being assembled in memory first.
+
+Supported formats (Markdown, HTML, JSON, CSV and PDF) are registered in
+:data:`RENDERERS`; the output file name is
+built from a pattern such as ``"{site}_{date}_audit"`` so batch runs can keep
+one report per site side by side.
+"""
+
+import csv
+import html
+import json
+import os
+from datetime import datetime
+from string import Template
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, TextIO
+
+import pandas as pd
+
+from pdf_report import render_pdf
+
+# Default file name pattern, matching the historical fixed report name
+DEFAULT_FILENAME_PATTERN = "energy_audit_report"
+
+# Large write buffer: renderers emit many short lines
+_BUFFER_SIZE = 1024 * 1024
+
+GROUP_COLUMNS = ["group", "rows", "baseline_avg", "new_avg", "savings", "savings_percent"]
+
+
+class ReportData(NamedTuple):
+    """Result model shared by all renderers.
+
+    ``audit_log`` and ``groups`` are iterated once per rendered format, so they
+    must be re-iterable (a list, a DataFrame, ...) rather than a one-shot
+    generator when several formats are requested.
+    """
+
+    input_file: str
+    baseline_avg: float
+    new_avg: float
+    savings: float
+    savings_percent: float
+    audit_log: Iterable[Dict[str, str]]
+    groups: Optional[pd.DataFrame] = None
+    group_by: Optional[str] = None
+    site: str = ""
+    monthly: Optional[pd.DataFrame] = None
+    input_sha256: str = ""
+
+
+MARKDOWN_HEADER = Template(
+    "# Energy Audit Report\n\n"
+    "**Input file:** $input_name\n\n"
+    "$site_line"
+    "## Summary\n\n"
+    "- Baseline average consumption: $baseline_avg\n"
+    "- New average consumption: $new_avg\n"
+    "- Absolute energy savings: $savings\n"
+    "- Savings percentage: $savings_percent%\n\n"
+)
+
+HTML_HEADER = Template(
+    "<!DOCTYPE html>\n"
+    "<html lang=\"en\">\n<head>\n<meta charset=\"utf-8\">\n"
+    "<title>Energy Audit Report — $input_name</title>\n"
+    "<style>body{font-family:sans-serif;margin:2em}"
+    "table{border-collapse:collapse}td,th{border:1px solid #ccc;padding:4px 8px}"
+    "td.num{text-align:right}</style>\n"
+    "</head>\n<body>\n"
+    "<h1>Energy Audit Report</h1>\n"
+    "<p><strong>Input file:</strong> $input_name</p>\n"
+    "$site_line"
+    "<h2>Summary</h2>\n<ul>\n"
+    "<li>Baseline average consumption: $baseline_avg</li>\n"
+    "<li>New average consumption: $new_avg</li>\n"
+    "<li>Absolute energy savings: $savings</li>\n"
+    "<li>Savings percentage: $savings_percent%</li>\n"
+    "</ul>\n"
+)
+
+
+def _summary_fields(data: ReportData) -> Dict[str, str]:
+    return {
+        "input_name": os.path.basename(data.input_file),
+        "baseline_avg": f"{data.baseline_avg:.2f}",
+        "new_avg": f"{data.new_avg:.2f}",
+        "savings": f"{data.savings:.2f}",
+        "savings_percent": f"{data.savings_percent:.2f}",
+    }
+
+
+def _iter_groups(groups: Optional[pd.DataFrame]) -> Iterator[tuple]:
+    if groups is None:
+        return iter(())
+    return groups[GROUP_COLUMNS].itertuples(index=False, name=None)
+
+
+def render_markdown(data: ReportData, f: TextIO, header: Template = MARKDOWN_HEADER) -> None:
+    """Write the report as Markdown."""
+    fields = _summary_fields(data)
+    fields["site_line"] = f"**Site:** {data.site}\n\n" if data.site else ""
+    f.write(header.safe_substitute(fields))
+    if data.groups is not None:
+        f.write(f"## Savings by {data.group_by}\n\n")
+        f.write("| Group | Rows | Baseline avg | New avg | Savings | Savings % |\n")
+        f.write("|---|---:|---:|---:|---:|---:|\n")
+        f.writelines(
+            f"| {group} | {rows} | {base:.2f} | {new:.2f} | {sav:.2f} | {pct:.2f}% |\n"
+            for group, rows, base, new, sav, pct in _iter_groups(data.groups)
+        )
+        f.write("\n")
+    f.write("## Audit Trail\n\n")
+    f.writelines(
+        f"- {entry['timestamp']} [{entry['step']}] {entry['message']}\n"
+        for entry in data.audit_log
+    )
+
+
+def render_html(data: ReportData, f: TextIO, header: Template = HTML_HEADER) -> None:
+    """Write the report as a standalone HTML page."""
+    esc = html.escape
+    fields = {k: esc(v) for k, v in _summary_fields(data).items()}
+    fields["site_line"] = f"<p><strong>Site:</strong> {esc(data.site)}</p>\n" if data.site else ""
+    f.write(header.safe_substitute(fields))
+    if data.groups is not None:
+        f.write(f"<h2>Savings by {esc(str(data.group_by))}</h2>\n<table>\n")
+        f.write(
+            "<tr><th>Group</th><th>Rows</th><th>Baseline avg</th><th>New avg</th>"
+            "<th>Savings</th><th>Savings %</th></tr>\n"
+        )
+        f.writelines(
+            f"<tr><td>{esc(str(group))}</td><td class=\"num\">{rows}</td>"
+            f"<td class=\"num\">{base:.2f}</td><td class=\"num\">{new:.2f}</td>"
+            f"<td class=\"num\">{sav:.2f}</td><td class=\"num\">{pct:.2f}%</td></tr>\n"
+            for group, rows, base, new, sav, pct in _iter_groups(data.groups)
+        )
+        f.write("</table>\n")
+    f.write("<h2>Audit Trail</h2>\n<ul>\n")
+    f.writelines(
+        f"<li>{esc(entry['timestamp'])} [{esc(entry['step'])}] {esc(entry['message'])}</li>\n"
+        for entry in data.audit_log
+    )
+    f.write("</ul>\n</body>\n</html>\n")
+
+
+def render_json(data: ReportData, f: TextIO) -> None:
+    """Write the report as a JSON document, one array element at a time."""
+    head = {
+        "input_file": os.path.basename(data.input_file),
+        "site": data.site,
+        "summary": {
+            "baseline_avg": data.baseline_avg,
+            "new_avg": data.new_avg,
+            "savings": data.savings,
+            "savings_percent": data.savings_percent,
+        },
+        "group_by": data.group_by,
+        "input_sha256": data.input_sha256,
+    }
+    f.write(json.dumps(head, ensure_ascii=False)[:-1])
+    f.write(',\n"groups": [')
+    for i, row in enumerate(_iter_groups(data.groups)):
+        item = dict(zip(GROUP_COLUMNS, row))
+        item["group"] = str(item["group"])
+        item["rows"] = int(item["rows"])
+        f.write((",\n" if i else "\n") + json.dumps(item, ensure_ascii=False))
+    f.write('],\n"monthly": [')
+    if data.monthly is not None:
+        for i, record in enumerate(data.monthly.to_dict("records")):
+            f.write((",\n" if i else "\n") + json.dumps(record, ensure_ascii=False))
+    f.write('],\n"audit_trail": [')
+    for i, entry in enumerate(data.audit_log):
+        f.write((",\n" if i else "\n") + json.dumps(entry, ensure_ascii=False))
+    f.write("]}\n")
+
+
+def render_csv(data: ReportData, f: TextIO) -> None:
+    """Write the report as a long-format CSV with ``section,key,field,value`` rows."""
+    writer = csv.writer(f, lineterminator="\n")
+    writer.writerow(["section", "key", "field", "value"])
+    writer.writerow(["summary", "input_file", "value", os.path.basename(data.input_file)])
+    if data.site:
+        writer.writerow(["summary", "site", "value", data.site])
+    for name, value in (
+        ("baseline_avg", data.baseline_avg),
+        ("new_avg", data.new_avg),
+        ("savings", data.savings),
+        ("savings_percent", data.savings_percent),
+    ):
+        writer.writerow(["summary", "total", name, f"{value:.4f}"])
+    for group, rows, base, new, sav, pct in _iter_groups(data.groups):
+        writer.writerows([
+            ["group", group, "rows", rows],
+            ["group", group, "baseline_avg", f"{base:.4f}"],
+            ["group", group, "new_avg", f"{new:.4f}"],
+            ["group", group, "savings", f"{sav:.4f}"],
+            ["group", group, "savings_percent", f"{pct:.4f}"],
+        ])
+    for i, entry in enumerate(data.audit_log):
+        writer.writerows([
+            ["audit", i, "timestamp", entry["timestamp"]],
+            ["audit", i, "step", entry["step"]],
+            ["audit", i, "message", entry["message"]],
+        ])
+
+
+# Output format -> (file extension, renderer, binary output)
+RENDERERS: Dict[str, tuple] = {
+    "md": ("md", render_markdown, False),
+    "html": ("html", render_html, False),
+    "json": ("json", render_json, False),
+    "csv": ("csv", render_csv, False),
+    "pdf": ("pdf", render_pdf, True),
+}
+
+# Formats that print ``ReportData.input_sha256``
+DIGEST_FORMATS = ("json", "pdf")
+
+
+# Placeholders of the report file name pattern
+FILENAME_PLACEHOLDERS = ("site", "input", "date", "ext")
+
+
+def report_filename(pattern: str, data: ReportData, extension: str) -> str:
+    """Expand a file name pattern for one report.
+
+    Available placeholders are ``{site}``, ``{input}`` (input file name without
+    extension), ``{date}`` (``YYYYMMDD``) and ``{ext}``. The extension is appended
+    unless the pattern already places ``{ext}`` itself; any other
+    placeholder raises ``ValueError``.
+    """
+    site = "".join(c if c.isalnum() or c in "-_" else "_" for c in data.site) or "site"
+    try:
+        name = pattern.format(
+            site=site,
+            input=os.path.splitext(os.path.basename(data.input_file))[0],
+            date=datetime.now().strftime("%Y%m%d"),
+            ext=extension,
+        )
+    except (KeyError, IndexError, ValueError) as exc:
+        raise ValueError(
+            f"Invalid report file name pattern {pattern!r} ({exc!r}); "
+            f"available placeholders: {', '.join('{' + key + '}' for key in FILENAME_PLACEHOLDERS)}"
+        ) from None
+    if "{ext}" not in pattern:
+        name = f"{name}.{extension}"
+    return name
+
+
+def write_reports(
+    output_dir: str,
+    data: ReportData,
+    formats: Sequence[str] = ("md",),
+    filename_pattern: str = DEFAULT_FILENAME_PATTERN
+) -> List[str]:
+    """Render ``data`` in each requested format under ``output_dir``.
+
+    Returns
+    -------
+    list of str
+        Paths of the generated report files, in the order of ``formats``.
+    """
+    unknown = [fmt for fmt in formats if fmt not in RENDERERS]
+    if unknown:
+        raise ValueError(f"Unsupported report format(s): {', '.join(unknown)}")
+    os.makedirs(output_dir, exist_ok=True)
+    paths = []
+    for fmt in formats:
+        extension, renderer, binary = RENDERERS[fmt]
+        path = os.path.join(output_dir, report_filename(filename_pattern, data, extension))
+        if binary:
+            with open(path, "wb", buffering=_BUFFER_SIZE) as f:
+                renderer(data, f)
+        else:
+            with open(path, "w", encoding="utf-8", newline="", buffering=_BUFFER_SIZE) as f:
+                renderer(data, f)
+        paths.append(path)
+    return paths
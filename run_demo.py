@@ -3,84 +3,484 @@
 """
 Simple local launcher for the OpenEurope Demo.
 
-This script extracts the provided demo ZIP archive into a temporary
-directory (``demo`` by default) and then starts a basic HTTP server
-bound to ``localhost`` so you can interact with the application
-through your web browser. It uses only standard library modules and
-should work on any recent Python 3 interpreter.
+This script starts a basic HTTP server bound to ``127.0.0.1`` that
+serves the demo straight from the provided ZIP archive, so you can
+interact with the application through your web browser. Nothing is
+extracted: files are read from the archive on demand and a rebuilt
+archive is picked up without restarting. It uses only standard library
+modules and should work on any recent Python 3 interpreter.
 
 Usage:
     python3 run_demo.py
+    python3 run_demo.py --dir demo/OpenEurope_Demo_Semplice_v3   # working copy
+    python3 run_demo.py --port 8080
+    python3 run_demo.py --port 0 --no-browser   # any free port (see demo_supervisor.py)
 
 Once running, open ``http://localhost:8000/START_HERE.html`` in your
 browser to launch the demo. You can stop the server at any time
 by pressing :kbd:`Ctrl+C` in the terminal.
 
-Note: This script does not require any external dependencies and
-will not modify your repository; it simply extracts the contents
-into a local directory for inspection. You can delete the ``demo``
-directory after use.
+Note: This script does not require any external dependencies. The
+project state edited in the demo is saved in ``openeurope_projects.db``
+next to this script (see ``project_store.py``); nothing else is written.
 """
 
+import argparse
+import gzip
 import http.server
+import json
 import os
-import socketserver
+import urllib.parse
 import webbrowser
-import zipfile
 from pathlib import Path
+from typing import Optional, Union
+
+from dashboard_data import (
+    AggregateSessions,
+    ChartCache,
+    render_monthly_svg,
+    render_share_svg,
+    render_utility_svg,
+    selected_year,
+)
+from project_store import DEFAULT_PROJECT, ProjectStore
+from static_files import (
+    MIN_COMPRESS_SIZE,
+    CompressionCache,
+    DirectorySource,
+    ZipSource,
+    accepted_encodings,
+    cache_control,
+    compressed_variant,
+    content_length,
+    not_modified,
+    parse_range,
+    response_headers,
+)
 
 # Path to the ZIP file relative to this script
 ZIP_NAME = "OpenEurope_Demo_Semplice_v3.zip"
 
-# Directory where the zip will be extracted
-EXTRACT_DIR = "demo"
+# Largest project state accepted by the API endpoints
+MAX_BODY_BYTES = 64 * 1024 * 1024
+
+# Precomputed dashboard charts, shared by all requests
+CHART_CACHE = ChartCache()
+
+# Incremental aggregation models of the open dashboards
+AGGREGATES = AggregateSessions()
+
+# SQLite project store, created next to this script
+STORE_NAME = "openeurope_projects.db"
+
+# Opened by main(); the project API answers 503 while it is unset
+PROJECT_STORE: Optional[ProjectStore] = None
+
+# Demo files served by start_server(), and their compressed variants
+STATIC_SOURCE: Optional[Union[ZipSource, DirectorySource]] = None
+COMPRESSION_CACHE = CompressionCache()
+
+# Assets without a fingerprint in their name are kept but revalidated (cheap 304)
+STATIC_CACHE_CONTROL = "no-cache"
+
+# Idle keep-alive connections are closed after this many seconds
+KEEPALIVE_TIMEOUT = 30
+
+# Identifies this server in the /api/health answer
+HEALTH_SERVICE = "openeurope-demo"
+
+# Interface the server listens on: the demo is never reachable from the network
+BIND_ADDRESS = "127.0.0.1"
+
+# Host names the demo answers to; others may be a DNS rebinding attack
+LOCAL_HOSTS = ("localhost", "127.0.0.1")
+
+
+class DemoHTTPServer(http.server.ThreadingHTTPServer):
+    """One thread per connection, so a slow client does not block the others."""
+
+    allow_reuse_address = True
+    daemon_threads = True
+
+
+class DemoRequestHandler(http.server.SimpleHTTPRequestHandler):
+    """Static file handler plus the dashboard chart API.
+
+    Connections are kept alive (HTTP/1.1). Static files carry ``ETag`` and
+    ``Last-Modified`` validators, are sent gzip/brotli compressed when the
+    client accepts it and honour single ``Range`` requests.
+
+    ``POST /api/charts[?year=YYYY]`` takes the project state JSON and returns
+    the precomputed chart series (see ``dashboard_data.build_chart_data``);
+    the response ``key`` then addresses server-rendered SVG charts at
+    ``GET /api/charts/<key>/monthly.svg``, ``share.svg`` and
+    ``utility/<utility id>.svg``.
+
+    ``/api/aggregate`` keeps a live aggregation model per dashboard session:
+    ``POST /api/aggregate?session=S`` loads the full state once, then
+    ``POST /api/aggregate/record?session=S`` applies a single monthly record
+    (``{"year", "utility", "month", "data"}``, ``data: null`` to delete) in O(1)
+    and returns only the changed chart values; ``GET /api/aggregate?session=S&year=Y``
+    returns the full chart series from the running sums.
+
+    ``/api/project?id=P`` exposes the SQLite project store (see
+    ``project_store.py``): ``GET`` returns the whole state, ``POST`` replaces
+    it and ``PATCH`` applies only the changed records.
 
-def ensure_demo_extracted(base_dir: Path) -> Path:
-    """Ensure that the demo contents are extracted to ``EXTRACT_DIR``.
+    ``GET /api/health`` answers as soon as the server accepts requests; it is
+    the readiness probe of ``demo_supervisor.py``.
 
-    If the directory already exists, the zip file will not be
-    re-extracted. The function returns the absolute path to the
-    extracted directory.
+    Requests whose ``Host`` or ``Origin`` is not the demo itself are refused
+    with 403, so other web sites cannot read or overwrite the project
+    store, and project writes must be sent as ``application/json`` (415
+    otherwise).
     """
-    extract_path = base_dir / EXTRACT_DIR
-    if extract_path.exists():
-        return extract_path
 
-    zip_path = base_dir / ZIP_NAME
-    if not zip_path.exists():
-        raise FileNotFoundError(f"Could not find {ZIP_NAME} in {base_dir}")
+    protocol_version = "HTTP/1.1"
+    timeout = KEEPALIVE_TIMEOUT
+    # Headers and body go out in separate writes: without TCP_NODELAY a
+    # kept-alive connection waits for the peer's delayed ACK on each response
+    disable_nagle_algorithm = True
 
-    with zipfile.ZipFile(zip_path, 'r') as zf:
-        zf.extractall(extract_path)
-    return extract_path
+    def read_body(self) -> bytes:
+        """Return the request body, or ``b""`` after sending an error response."""
+        length = content_length(self.headers.get("Content-Length"))
+        if not length or length > MAX_BODY_BYTES:
+            # The unread body would be taken for the next request
+            self.close_connection = True
+            self.send_error(413 if length else 400)
+            return b""
+        return self.rfile.read(length)
 
+    def local_request(self) -> bool:
+        """Whether ``Host`` and ``Origin`` name this server; sends 403 if not."""
+        port = self.server.server_address[1]
+        allowed = {f"{host}:{port}" for host in LOCAL_HOSTS}
+        origin = self.headers.get("Origin")
+        if self.headers.get("Host") in allowed and (
+            origin is None or origin in {f"http://{host}" for host in allowed}
+        ):
+            return True
+        self.close_connection = True
+        self.send_error(403)
+        return False
 
-def start_server(directory: Path, port: int = 8000) -> None:
-    """Start an HTTP server serving ``directory`` on ``localhost``.
+    def split_path(self) -> tuple:
+        path, _, query = self.path.partition("?")
+        return path, dict(urllib.parse.parse_qsl(query))
+
+    def do_POST(self) -> None:
+        if not self.local_request():
+            return
+        path, params = self.split_path()
+        if path == "/api/aggregate":
+            self.handle_aggregate_load(params)
+        elif path == "/api/aggregate/record":
+            self.handle_aggregate_record(params)
+        elif path == "/api/charts":
+            self.handle_charts(params)
+        elif path == "/api/project":
+            self.handle_project_write(params, replace=True)
+        else:
+            self.send_error(404)
+
+    def do_PATCH(self) -> None:
+        if not self.local_request():
+            return
+        path, params = self.split_path()
+        if path == "/api/project":
+            self.handle_project_write(params, replace=False)
+        else:
+            self.send_error(404)
+
+    def handle_project_write(self, params: dict, replace: bool) -> None:
+        if PROJECT_STORE is None:
+            self.send_error(503)
+            return
+        content_type = self.headers.get("Content-Type", "").partition(";")[0].strip().lower()
+        if content_type != "application/json":
+            # A form or text/plain body would let any page write here without a CORS preflight
+            self.close_connection = True
+            self.send_error(415)
+            return
+        raw = self.read_body()
+        if not raw:
+            return
+        project = params.get("id", DEFAULT_PROJECT)
+        try:
+            payload = json.loads(raw)
+            if replace:
+                PROJECT_STORE.replace(project, payload)
+            else:
+                PROJECT_STORE.patch(project, payload)
+        except KeyError:
+            self.send_json({"error": "Progetto non trovato"}, status=404)
+            return
+        except (ValueError, TypeError, AttributeError) as exc:
+            self.send_json({"error": f"Dati progetto non validi: {exc}"}, status=400)
+            return
+        self.send_json({"ok": True})
+
+    def handle_charts(self, params: dict) -> None:
+        raw_state = self.read_body()
+        if not raw_state:
+            return
+        try:
+            year = int(params["year"]) if "year" in params else None
+            key, chart = CHART_CACHE.get_or_build(raw_state, year)
+        except (ValueError, TypeError, AttributeError) as exc:
+            self.send_json({"error": f"Stato progetto non valido: {exc}"}, status=400)
+            return
+        if self.headers.get("If-None-Match") == f'"{key}"':
+            self.send_response(304)
+            self.send_header("ETag", f'"{key}"')
+            self.end_headers()
+            return
+        self.send_json(chart, etag=key)
+
+    def handle_aggregate_load(self, params: dict) -> None:
+        raw_state = self.read_body()
+        if not raw_state:
+            return
+        session = params.get("session", "")
+        try:
+            state = json.loads(raw_state)
+            year = int(params["year"]) if "year" in params else selected_year(state)
+            model = AGGREGATES.load(session, state)
+        except (ValueError, TypeError, AttributeError) as exc:
+            self.send_json({"error": f"Stato progetto non valido: {exc}"}, status=400)
+            return
+        with AGGREGATES.lock:
+            chart = model.chart_data(year)
+        self.send_json(chart)
+
+    def handle_aggregate_record(self, params: dict) -> None:
+        raw = self.read_body()
+        if not raw:
+            return
+        model = AGGREGATES.get(params.get("session", ""))
+        if model is None:
+            # Session expired or server restarted: the client must reload the state
+            self.send_json({"error": "Sessione non trovata"}, status=404)
+            return
+        try:
+            change = json.loads(raw)
+            year = int(change["year"])
+            month = str(change["month"])
+            utility = change["utility"]
+            with AGGREGATES.lock:
+                model.set_utility(utility)
+                if change.get("data") is None:
+                    model.delete(year, utility["id"], month)
+                elif not model.upsert(year, utility["id"], month, change["data"]):
+                    raise ValueError(f"mese {month} non valido per l'anno {year}")
+                delta = model.month_delta(year, utility["id"], month)
+        except (ValueError, TypeError, KeyError, AttributeError) as exc:
+            self.send_json({"error": f"Modifica non valida: {exc}"}, status=400)
+            return
+        self.send_json(delta)
+
+    def do_GET(self) -> None:
+        if not self.local_request():
+            return
+        path, params = self.split_path()
+        if path.startswith("/api/charts/"):
+            self.handle_chart_svg(path[len("/api/charts/"):])
+            return
+        if path == "/api/aggregate":
+            model = AGGREGATES.get(params.get("session", ""))
+            if model is None:
+                self.send_json({"error": "Sessione non trovata"}, status=404)
+                return
+            try:
+                year = int(params["year"])
+            except (KeyError, ValueError):
+                self.send_error(400)
+                return
+            with AGGREGATES.lock:
+                chart = model.chart_data(year)
+            self.send_json(chart)
+            return
+        if path == "/api/health":
+            self.send_json({"status": "ok", "service": HEALTH_SERVICE, "pid": os.getpid()})
+            return
+        if path == "/api/project":
+            if PROJECT_STORE is None:
+                self.send_error(503)
+                return
+            state = PROJECT_STORE.load(params.get("id", DEFAULT_PROJECT))
+            if state is None:
+                self.send_json({"error": "Progetto non trovato"}, status=404)
+                return
+            self.send_json(state)
+            return
+        self.serve_static(path)
+
+    def do_HEAD(self) -> None:
+        if not self.local_request():
+            return
+        path, _ = self.split_path()
+        if path.startswith("/api/"):
+            self.send_error(405)
+            return
+        self.serve_static(path, head_only=True)
+
+    def serve_static(self, path: str, head_only: bool = False) -> None:
+        """Send a demo file with validators, compression and range support."""
+        name = urllib.parse.unquote(path).lstrip("/")
+        if not name or STATIC_SOURCE.is_dir(name):
+            if name and not path.endswith("/"):
+                self.send_response(301)
+                self.send_header("Location", path + "/")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            index = name + "index.html"
+            if STATIC_SOURCE.stat(index) is None:
+                if not isinstance(STATIC_SOURCE, DirectorySource):
+                    self.send_error(404)
+                    return
+                # No index page: keep the standard directory listing
+                if head_only:
+                    super().do_HEAD()
+                else:
+                    super().do_GET()
+                return
+            name = index
+        asset = STATIC_SOURCE.stat(name)
+        if asset is None:
+            self.send_error(404)
+            return
+
+        range_header = self.headers.get("Range")
+        if_range = self.headers.get("If-Range")
+        if if_range is not None and if_range not in (asset.etag, asset.last_modified):
+            range_header = None
+        # Ranges address the identity body, so they are never compressed
+        variant = None
+        if range_header is None:
+            variant = compressed_variant(
+                STATIC_SOURCE, COMPRESSION_CACHE, asset, self.headers.get("Accept-Encoding")
+            )
+        headers = response_headers(asset, variant, cache_control(name, STATIC_CACHE_CONTROL))
+        if not_modified(self.headers, headers["ETag"], asset.mtime):
+            self.send_response(304)
+            for key in ("ETag", "Last-Modified", "Cache-Control", "Vary"):
+                if key in headers:
+                    self.send_header(key, headers[key])
+            self.end_headers()
+            return
+        try:
+            byte_range = parse_range(range_header, asset.size)
+        except ValueError:
+            self.send_response(416)
+            self.send_header("Content-Range", f"bytes */{asset.size}")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        if variant is not None and variant.body is not None:
+            self.send_response(200)
+            for key, value in headers.items():
+                self.send_header(key, value)
+            self.send_header("Content-Length", str(variant.size))
+            self.end_headers()
+            if not head_only:
+                self.wfile.write(variant.body)
+            return
+
+        source_asset = variant.sibling if variant is not None else asset
+        start, end = byte_range or (0, source_asset.size - 1)
+        self.send_response(206 if byte_range else 200)
+        for key, value in headers.items():
+            self.send_header(key, value)
+        if byte_range:
+            self.send_header("Content-Range", f"bytes {start}-{end}/{asset.size}")
+        self.send_header("Content-Length", str(end - start + 1))
+        self.end_headers()
+        if head_only or end < start:
+            return
+        STATIC_SOURCE.sendfile(self.connection, source_asset, start, end - start + 1)
+
+    def handle_chart_svg(self, subpath: str) -> None:
+        key, _, name = subpath.partition("/")
+        chart = CHART_CACHE.get(key)
+        if chart is None:
+            self.send_error(404, "Grafico non trovato: inviare prima lo stato a /api/charts")
+            return
+        try:
+            if name == "monthly.svg":
+                svg = render_monthly_svg(chart)
+            elif name == "share.svg":
+                svg = render_share_svg(chart)
+            elif name.startswith("utility/") and name.endswith(".svg"):
+                svg = render_utility_svg(chart, name[len("utility/"):-len(".svg")])
+            else:
+                raise KeyError(name)
+        except KeyError:
+            self.send_error(404)
+            return
+        body = svg.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "image/svg+xml")
+        self.send_header("Content-Length", str(len(body)))
+        # Keys are content digests, so a given URL never changes
+        self.send_header("Cache-Control", "public, max-age=31536000, immutable")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_json(self, payload: dict, status: int = 200, etag: str = "") -> None:
+        body = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+        compress = len(body) >= MIN_COMPRESS_SIZE and "gzip" in accepted_encodings(
+            self.headers.get("Accept-Encoding")
+        )
+        if compress:
+            body = gzip.compress(body, compresslevel=5)
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Vary", "Accept-Encoding")
+        if compress:
+            self.send_header("Content-Encoding", "gzip")
+        if etag:
+            self.send_header("ETag", f'"{etag}"')
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def start_server(
+    source: Union[ZipSource, DirectorySource],
+    port: int = 8000,
+    open_browser: bool = True
+) -> None:
+    """Start an HTTP server serving the demo files of ``source`` on ``127.0.0.1``.
 
     The server runs until interrupted (e.g. Ctrl+C). When the server
     starts, the default browser will open the ``START_HERE.html`` page
-    if it exists within the directory.
+    if it exists within the source and ``open_browser`` is set. With
+    ``port=0`` any free port is used; the "Serving ..." line reports the
+    actual one and is flushed immediately, so a parent process can read it
+    as the readiness signal.
     """
-    os.chdir(directory)
-
-    handler = http.server.SimpleHTTPRequestHandler
-    
-    # Crea una classe TCPServer personalizzata che riusa la porta
-    class ReusableTCPServer(socketserver.TCPServer):
-        allow_reuse_address = True
-    
+    global STATIC_SOURCE
+    STATIC_SOURCE = source
+    if isinstance(source, DirectorySource):
+        # Directory listings are produced by SimpleHTTPRequestHandler from the cwd
+        os.chdir(source.root)
+    # Comprime subito i file di testo: le richieste trovano già le varianti gzip/br
+    COMPRESSION_CACHE.warm(STATIC_SOURCE)
+
     try:
-        with ReusableTCPServer(("", port), handler) as httpd:
+        with DemoHTTPServer((BIND_ADDRESS, port), DemoRequestHandler) as httpd:
+            port = httpd.server_address[1]
             # Try to open the start page in the default browser
-            start_page = directory / "START_HERE.html"
-            if start_page.exists():
+            if open_browser and source.stat("START_HERE.html") is not None:
                 try:
                     webbrowser.open(f"http://localhost:{port}/START_HERE.html")
                 except Exception:
                     pass
             print(f"Serving OpenEurope demo at http://localhost:{port}")
-            print("Press Ctrl+C to stop the server.")
+            print("Press Ctrl+C to stop the server.", flush=True)
             try:
                 httpd.serve_forever()
             except KeyboardInterrupt:
@@ -93,9 +493,29 @@ def start_server(directory: Path, port: int = 8000) -> None:
 
 
 def main() -> None:
+    global PROJECT_STORE
+    parser = argparse.ArgumentParser(description="Serve the OpenEurope web demo on localhost")
+    parser.add_argument("--port", type=int, default=8000, help="HTTP port, 0 for any free port (default: 8000)")
+    parser.add_argument("--no-browser", action="store_true", help="Do not open the start page")
+    parser.add_argument(
+        "--dir",
+        help=f"Serve this directory instead of {ZIP_NAME} (e.g. a working copy being edited)"
+    )
+    args = parser.parse_args()
+
     base_dir = Path(__file__).resolve().parent
-    extract_path = ensure_demo_extracted(base_dir)
-    start_server(extract_path)
+    if args.dir:
+        source = DirectorySource(args.dir)
+    else:
+        zip_path = base_dir / ZIP_NAME
+        if not zip_path.exists():
+            raise FileNotFoundError(f"Could not find {ZIP_NAME} in {base_dir}")
+        source = ZipSource(str(zip_path))
+    PROJECT_STORE = ProjectStore(str(base_dir / STORE_NAME))
+    try:
+        start_server(source, args.port, open_browser=not args.no_browser)
+    finally:
+        PROJECT_STORE.close()
 
 
 if __name__ == "__main__":
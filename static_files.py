@@ -0,0 +1,459 @@
+"""
+OpenEurope Static Files
+-----------------------
+
+Static asset delivery for the demo server (``run_demo.py``). Files come from
+a directory (:class:`DirectorySource`) or straight from the demo ZIP archive
+(:class:`ZipSource`), without extracting it. Assets are
+described by strong validators (``ETag`` and ``Last-Modified``), so a reload
+costs a ``304 Not Modified``; text assets are compressed once per change and
+served from memory; byte ranges let the PDF viewer fetch pages on demand.
+
+Precompressed variants are taken, in order of preference, from sibling files
+written by a build step (``app.js.br``, ``app.js.gz``, newer than the
+original) or from an in-memory cache filled at startup. Brotli variants are
+produced in memory only when the optional ``brotli`` package is installed;
+gzip always is.
+"""
+
+import email.utils
+import gzip
+import mimetypes
+import os
+import re
+import socket
+import struct
+import threading
+import time
+import zipfile
+from collections import OrderedDict
+from typing import BinaryIO, Dict, Iterator, List, NamedTuple, Optional, Set, Tuple
+
+try:
+    import brotli
+except ImportError:  # optional: only pre-built .br files are served
+    brotli = None
+
+# Content types worth compressing; images, PDFs and archives already are
+COMPRESSIBLE_TYPES = (
+    "text/",
+    "application/javascript",
+    "application/json",
+    "application/xml",
+    "image/svg+xml",
+)
+
+# Smaller bodies gain nothing from compression
+MIN_COMPRESS_SIZE = 512
+
+# Upper bound of the in-memory compressed variants
+DEFAULT_CACHE_BYTES = 64 * 1024 * 1024
+
+# Accept-Encoding token -> file suffix, in order of preference
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+# build_demo.py names bundles ``name.<10 hex digits>.ext``: their content never changes
+_FINGERPRINTED = re.compile(r"\.[0-9a-f]{10}\.\w+$")
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# ZIP local file header: signature ... file name length, extra field length
+_LOCAL_HEADER = struct.Struct("<4s2B4HL2L2H")
+
+
+class Asset(NamedTuple):
+    """A servable file: ``name`` is its ``/``-separated path inside the source."""
+
+    name: str
+    size: int
+    mtime: float
+    etag: str
+
+    @property
+    def last_modified(self) -> str:
+        return email.utils.formatdate(self.mtime, usegmt=True)
+
+
+def content_type(name: str) -> str:
+    ctype, _ = mimetypes.guess_type(name)
+    if ctype is None:
+        return "application/octet-stream"
+    if ctype.startswith("text/") or ctype in ("application/javascript", "application/json"):
+        return f"{ctype}; charset=utf-8"
+    return ctype
+
+
+def is_compressible(name: str) -> bool:
+    return content_type(name).startswith(COMPRESSIBLE_TYPES)
+
+
+def cache_control(name: str, default: str) -> str:
+    """``Cache-Control`` for ``name``: immutable when its file name is fingerprinted."""
+    return IMMUTABLE_CACHE_CONTROL if _FINGERPRINTED.search(name) else default
+
+
+class DirectorySource:
+    """Assets read from a directory tree."""
+
+    def __init__(self, root: str) -> None:
+        self.root = os.path.abspath(root)
+
+    def _path(self, name: str) -> Optional[str]:
+        path = os.path.abspath(os.path.join(self.root, *name.split("/")))
+        if path != self.root and not path.startswith(self.root + os.sep):
+            return None
+        return path
+
+    def is_dir(self, name: str) -> bool:
+        path = self._path(name)
+        return path is not None and os.path.isdir(path)
+
+    def stat(self, name: str) -> Optional[Asset]:
+        """Return the asset called ``name``, or ``None`` if it is not a file."""
+        path = self._path(name)
+        if path is None:
+            return None
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        if not os.path.isfile(path):
+            return None
+        return Asset(name, st.st_size, st.st_mtime, f'"{st.st_mtime_ns:x}-{st.st_size:x}"')
+
+    def open(self, asset: Asset) -> BinaryIO:
+        return open(self._path(asset.name), "rb")
+
+    def read(self, asset: Asset) -> bytes:
+        with self.open(asset) as f:
+            return f.read()
+
+    def sendfile(self, sock: socket.socket, asset: Asset, offset: int, count: int) -> None:
+        """Send ``count`` bytes of ``asset`` from ``offset`` with sendfile(2)."""
+        with self.open(asset) as f:
+            sock.sendfile(f, offset, count)
+
+    def names(self) -> Iterator[str]:
+        for dirpath, _, filenames in os.walk(self.root):
+            rel = os.path.relpath(dirpath, self.root)
+            for filename in filenames:
+                yield filename if rel == "." else "/".join(rel.split(os.sep) + [filename])
+
+
+class _ZipIndex(NamedTuple):
+    signature: Tuple[int, int]
+    members: Dict[str, Tuple[zipfile.ZipInfo, int]]
+    dirs: Set[str]
+
+
+class ZipSource:
+    """Assets read straight from a ZIP archive, without extracting it.
+
+    The archive's central directory is indexed in memory. Members stored
+    without compression are sent with sendfile(2) directly from their byte
+    range in the archive; deflated members are inflated once and kept in an
+    LRU cache. The index is rebuilt when the archive's mtime or size changes,
+    so replacing the ZIP takes effect without restarting the server, and
+    ``ETag`` values derive from each member's CRC-32, so untouched files keep
+    their validators across archive rebuilds.
+
+    Parameters
+    ----------
+    zip_path : str
+        The demo archive. A single top-level folder, if present, is served as
+        the root.
+    check_interval : float
+        Minimum seconds between two checks of the archive's mtime and size.
+    max_bytes : int
+        Total size of the inflated members kept in memory.
+    """
+
+    def __init__(
+        self,
+        zip_path: str,
+        check_interval: float = 1.0,
+        max_bytes: int = DEFAULT_CACHE_BYTES
+    ) -> None:
+        self.zip_path = os.path.abspath(zip_path)
+        self._check_interval = check_interval
+        self._checked = 0.0
+        self._lock = threading.Lock()
+        self._bodies: "OrderedDict[Tuple[str, str], bytes]" = OrderedDict()
+        self._bodies_size = 0
+        self._max_bytes = max_bytes
+        self._index = self._load_index()
+
+    def _load_index(self) -> _ZipIndex:
+        st = os.stat(self.zip_path)
+        members: Dict[str, Tuple[zipfile.ZipInfo, int]] = {}
+        with zipfile.ZipFile(self.zip_path) as zf, open(self.zip_path, "rb") as raw:
+            files = [info for info in zf.infolist() if not info.is_dir()]
+            tops = {info.filename.split("/", 1)[0] for info in files}
+            prefix = ""
+            if len(tops) == 1 and all("/" in info.filename for info in files):
+                prefix = tops.pop() + "/"
+            for info in files:
+                offset = -1
+                if info.compress_type == zipfile.ZIP_STORED and not info.flag_bits & 0x1:
+                    raw.seek(info.header_offset)
+                    header = _LOCAL_HEADER.unpack(raw.read(_LOCAL_HEADER.size))
+                    if header[0] == zipfile.stringFileHeader:
+                        offset = info.header_offset + _LOCAL_HEADER.size + header[-2] + header[-1]
+                members[info.filename[len(prefix):]] = (info, offset)
+        dirs = {
+            "/".join(name.split("/")[:depth])
+            for name in members
+            for depth in range(1, name.count("/") + 1)
+        }
+        return _ZipIndex((st.st_mtime_ns, st.st_size), members, dirs)
+
+    def _current(self) -> _ZipIndex:
+        now = time.monotonic()
+        if now - self._checked >= self._check_interval:
+            self._checked = now
+            try:
+                st = os.stat(self.zip_path)
+            except OSError:
+                return self._index
+            if (st.st_mtime_ns, st.st_size) != self._index.signature:
+                index = self._load_index()
+                with self._lock:
+                    self._index = index
+                    self._bodies.clear()
+                    self._bodies_size = 0
+        return self._index
+
+    def is_dir(self, name: str) -> bool:
+        return name.rstrip("/") in self._current().dirs
+
+    def stat(self, name: str) -> Optional[Asset]:
+        """Return the member called ``name``, or ``None`` if there is none."""
+        entry = self._current().members.get(name)
+        if entry is None:
+            return None
+        info, _ = entry
+        mtime = time.mktime(info.date_time + (0, 0, -1))
+        return Asset(name, info.file_size, mtime, f'"{info.CRC:08x}-{info.file_size:x}"')
+
+    def read(self, asset: Asset) -> bytes:
+        key = (asset.name, asset.etag)
+        with self._lock:
+            body = self._bodies.get(key)
+            if body is not None:
+                self._bodies.move_to_end(key)
+                return body
+        index = self._current()
+        info, _ = index.members[asset.name]
+        with zipfile.ZipFile(self.zip_path) as zf:
+            body = zf.read(info)
+        with self._lock:
+            if key not in self._bodies:
+                self._bodies[key] = body
+                self._bodies_size += len(body)
+            while self._bodies_size > self._max_bytes and self._bodies:
+                _, dropped = self._bodies.popitem(last=False)
+                self._bodies_size -= len(dropped)
+        return body
+
+    def sendfile(self, sock: socket.socket, asset: Asset, offset: int, count: int) -> None:
+        """Send ``count`` bytes of ``asset`` from ``offset``, zero-copy when stored."""
+        index = self._current()
+        info, data_offset = index.members.get(asset.name, (None, -1))
+        if data_offset >= 0:
+            with open(self.zip_path, "rb") as f:
+                st = os.fstat(f.fileno())
+                # The archive may have been replaced since the index was built
+                if (st.st_mtime_ns, st.st_size) == index.signature:
+                    sock.sendfile(f, data_offset + offset, count)
+                    return
+        sock.sendall(memoryview(self.read(asset))[offset:offset + count])
+
+    def names(self) -> Iterator[str]:
+        return iter(list(self._current().members))
+
+
+def accepted_encodings(header: Optional[str]) -> List[str]:
+    """Return the supported encodings allowed by an ``Accept-Encoding`` header."""
+    allowed = set()
+    for token in (header or "").split(","):
+        coding, _, params = token.strip().partition(";")
+        q = params.strip()
+        if q.startswith("q="):
+            try:
+                if float(q[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        allowed.add(coding.strip().lower())
+    return [coding for coding, _ in ENCODINGS if coding in allowed]
+
+
+def content_length(header: Optional[str]) -> Optional[int]:
+    """Body length announced by a ``Content-Length`` header.
+
+    Returns ``0`` when the header is absent and ``None`` when it is not a
+    non-negative decimal integer (the request must then be refused with 400).
+    """
+    if header is None:
+        return 0
+    header = header.strip()
+    return int(header) if header.isascii() and header.isdigit() else None
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """Parse a single ``bytes=`` range into inclusive ``(start, end)`` offsets.
+
+    Returns ``None`` when the header is absent, malformed or asks for several
+    ranges (the whole body is then sent, as RFC 9110 allows).
+
+    Raises
+    ------
+    ValueError
+        If the range cannot be satisfied for a body of ``size`` bytes.
+    """
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+    first, sep, last = header[6:].strip().partition("-")
+    if not sep or not (first.isdigit() or last.isdigit()) or (first and not first.isdigit()):
+        return None
+    if not first:
+        length = int(last)
+        if length == 0:
+            raise ValueError("empty suffix range")
+        return max(0, size - length), size - 1
+    start = int(first)
+    if last and not last.isdigit():
+        return None
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or end < start:
+        raise ValueError("range not satisfiable")
+    return start, end
+
+
+def not_modified(headers, etag: str, mtime: float) -> bool:
+    """Whether the request's validators match the representation (RFC 9110 precedence)."""
+    if_none_match = headers.get("If-None-Match")
+    if if_none_match is not None:
+        tags = [tag.strip() for tag in if_none_match.split(",")]
+        return "*" in tags or etag in tags or f"W/{etag}" in tags
+    since = headers.get("If-Modified-Since")
+    if since:
+        try:
+            parsed = email.utils.parsedate_to_datetime(since)
+        except (TypeError, ValueError):
+            return False
+        return int(mtime) <= parsed.timestamp()
+    return False
+
+
+class CompressionCache:
+    """Compressed asset variants, keyed by name, validator and encoding (LRU).
+
+    Parameters
+    ----------
+    max_bytes : int
+        Total size of the compressed bodies kept in memory.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_CACHE_BYTES) -> None:
+        self._entries: "OrderedDict[Tuple[str, str, str], bytes]" = OrderedDict()
+        self._size = 0
+        self._max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def compress(body: bytes, encoding: str) -> Optional[bytes]:
+        if encoding == "gzip":
+            return gzip.compress(body, compresslevel=9, mtime=0)
+        if encoding == "br" and brotli is not None:
+            return brotli.compress(body, quality=11)
+        return None
+
+    def get(self, source, asset: Asset, encoding: str) -> Optional[bytes]:
+        """Return ``asset`` compressed with ``encoding``, compressing it on a miss."""
+        if encoding == "br" and brotli is None:
+            return None
+        key = (asset.name, asset.etag, encoding)
+        with self._lock:
+            body = self._entries.get(key)
+            if body is not None:
+                self._entries.move_to_end(key)
+                # An empty entry records that compression did not pay off
+                return body or None
+        body = self.compress(source.read(asset), encoding)
+        if len(body) >= asset.size:
+            body = b""
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = body
+                self._size += len(body)
+            while self._size > self._max_bytes and self._entries:
+                _, dropped = self._entries.popitem(last=False)
+                self._size -= len(dropped)
+        return body or None
+
+    def warm(self, source) -> int:
+        """Precompress every compressible asset of ``source``; return how many."""
+        count = 0
+        for name in source.names():
+            if name.endswith((".br", ".gz")) or not is_compressible(name):
+                continue
+            asset = source.stat(name)
+            if asset is None or asset.size < MIN_COMPRESS_SIZE:
+                continue
+            for encoding, _ in ENCODINGS:
+                if self.get(source, asset, encoding) is not None:
+                    count += 1
+        return count
+
+
+class Variant(NamedTuple):
+    """A compressed representation: in-memory ``body`` or a pre-built ``sibling`` file."""
+
+    encoding: str
+    etag: str
+    size: int
+    body: Optional[bytes] = None
+    sibling: Optional[Asset] = None
+
+
+def compressed_variant(
+    source,
+    cache: CompressionCache,
+    asset: Asset,
+    accept_encoding: Optional[str]
+) -> Optional[Variant]:
+    """Pick the best compressed representation of ``asset`` for a request."""
+    if asset.size < MIN_COMPRESS_SIZE or not is_compressible(asset.name):
+        return None
+    for encoding in accepted_encodings(accept_encoding):
+        suffix = dict(ENCODINGS)[encoding]
+        sibling = source.stat(asset.name + suffix)
+        if sibling is not None and sibling.mtime >= asset.mtime:
+            return Variant(encoding, _variant_etag(sibling.etag, encoding), sibling.size, sibling=sibling)
+        body = cache.get(source, asset, encoding)
+        if body is not None:
+            return Variant(encoding, _variant_etag(asset.etag, encoding), len(body), body=body)
+    return None
+
+
+def _variant_etag(etag: str, encoding: str) -> str:
+    # Variants need their own validator or caches could mix them up
+    return f'{etag[:-1]}-{encoding}"'
+
+
+def response_headers(asset: Asset, variant: Optional[Variant], cache_control: str) -> Dict[str, str]:
+    """Entity headers shared by 200, 206 and 304 responses for ``asset``."""
+    headers = {
+        "Content-Type": content_type(asset.name),
+        "Last-Modified": asset.last_modified,
+        "Cache-Control": cache_control,
+    }
+    if is_compressible(asset.name):
+        headers["Vary"] = "Accept-Encoding"
+    if variant is not None:
+        headers["Content-Encoding"] = variant.encoding
+        headers["ETag"] = variant.etag
+    else:
+        headers["ETag"] = asset.etag
+        headers["Accept-Ranges"] = "bytes"
+    return headers
@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+"""
+OpenEurope Drop-Folder Watcher
+------------------------------
+
+Watches a shared folder where operators drop meter exports and bills and
+hands every new or changed file to a handler running in a bounded pool of
+worker processes (``openeurope.py --watch`` runs the audit pipeline on
+them).
+
+* Change notification uses inotify on Linux (through ``ctypes``, no extra
+  package); elsewhere, or when inotify is unavailable, the folder is
+  polled. Network shares do not always deliver inotify events for writes
+  made by other machines, so the folder is also rescanned every
+  ``RESCAN_EVERY`` poll intervals while inotify is in use.
+* A file is processed only once its size and modification time have been
+  stable for ``settle`` seconds and it can be opened, so half-copied files
+  are not picked up; editor and download temporaries (``~$report.xlsx``,
+  ``.part``...) are ignored.
+* At most ``workers`` files are processed at a time; the others wait in
+  arrival order. A file that changes again is processed again.
+
+Usage:
+    python3 openeurope.py --watch cartella_condivisa -o report -f pdf -j 4
+"""
+
+import ctypes
+import ctypes.util
+import logging
+import os
+import select
+import signal
+import struct
+import sys
+import threading
+import time
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, wait
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+WATCHED_SUFFIXES = (".csv", ".xlsx", ".xls", ".pdf")
+IGNORED_PREFIXES = (".", "~$")
+IGNORED_SUFFIXES = (".tmp", ".part", ".partial", ".crdownload", ".swp")
+RESCAN_EVERY = 10
+
+# inotify(7) constants
+_IN_MODIFY = 0x00000002
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_Q_OVERFLOW = 0x00004000
+_IN_NONBLOCK = 0o4000
+_IN_CLOEXEC = 0o2000000
+_EVENT = struct.Struct("iIII")
+
+Signature = Tuple[int, int]
+ResultCallback = Callable[[str, object, Optional[BaseException], float], None]
+
+
+def is_candidate(name: str, suffixes: Sequence[str] = WATCHED_SUFFIXES) -> bool:
+    """Whether a file called ``name`` should be processed."""
+    lower = name.lower()
+    return (
+        lower.endswith(tuple(suffixes))
+        and not lower.startswith(IGNORED_PREFIXES)
+        and not lower.endswith(IGNORED_SUFFIXES)
+    )
+
+
+def file_signature(path: str) -> Optional[Signature]:
+    """Size and modification time of ``path``, or ``None`` if it is gone."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+
+def _ignore_interrupts() -> None:
+    # Ctrl+C reaches the whole process group: only the watcher handles it
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+class InotifyEvents:
+    """Names of the files created, written or moved into one directory (Linux).
+
+    Raises
+    ------
+    OSError
+        If inotify is not available.
+    """
+
+    def __init__(self, directory: str) -> None:
+        if not sys.platform.startswith("linux"):
+            raise OSError("inotify is only available on Linux")
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self.fd = libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        mask = _IN_MODIFY | _IN_CLOSE_WRITE | _IN_MOVED_TO | _IN_CREATE
+        if libc.inotify_add_watch(self.fd, os.fsencode(directory), mask) < 0:
+            errno = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(errno, f"inotify_add_watch failed for {directory}")
+
+    def read(self, timeout: float) -> Optional[List[str]]:
+        """Names with events within ``timeout`` seconds; ``None`` if events were lost."""
+        ready, _, _ = select.select([self.fd], [], [], max(timeout, 0.0))
+        if not ready:
+            return []
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+        names = []
+        offset = 0
+        while offset + _EVENT.size <= len(data):
+            _, mask, _, length = _EVENT.unpack_from(data, offset)
+            offset += _EVENT.size
+            if mask & _IN_Q_OVERFLOW:
+                return None
+            name = data[offset:offset + length].rstrip(b"\0")
+            offset += length
+            if name:
+                names.append(os.fsdecode(name))
+        return names
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+class _Pending(NamedTuple):
+    signature: Optional[Signature]
+    changed: float      # monotonic time of the last observed change
+    first_seen: float   # monotonic time the file was first noticed
+
+
+class DropFolderWatcher:
+    """Process files dropped into ``directory`` with ``handler`` in worker processes.
+
+    Parameters
+    ----------
+    directory : str
+        Folder to watch (not recursive).
+    handler : callable
+        ``handler(path)`` run in a worker process; it and its result must be
+        picklable (a module-level function or a ``functools.partial`` of one).
+    on_result : callable
+        ``on_result(path, result, error, latency)`` called in the watching
+        thread when a file is done; ``latency`` is seconds since the file
+        was first noticed.
+    workers : int
+        Files processed at the same time.
+    settle : float
+        Seconds a file must stay unchanged before it is processed.
+    poll_interval : float
+        Seconds between scans when polling (and the event wait granularity).
+    process_existing : bool
+        Also process the files already in the folder at start.
+    use_inotify : bool
+        Set to ``False`` to force polling.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        handler: Callable[[str], object],
+        on_result: ResultCallback,
+        workers: int = 2,
+        settle: float = 1.0,
+        poll_interval: float = 1.0,
+        suffixes: Sequence[str] = WATCHED_SUFFIXES,
+        process_existing: bool = False,
+        use_inotify: bool = True
+    ) -> None:
+        if not os.path.isdir(directory):
+            raise FileNotFoundError(f"Watch folder not found: {directory}")
+        self.directory = directory
+        self.handler = handler
+        self.on_result = on_result
+        self.workers = max(1, workers)
+        self.settle = settle
+        self.poll_interval = poll_interval
+        self.suffixes = tuple(suffixes)
+        self.process_existing = process_existing
+        self.use_inotify = use_inotify
+        self.stop_event = threading.Event()
+        self._pending: Dict[str, _Pending] = {}
+        self._done: Dict[str, Optional[Signature]] = {}
+        self._running: Dict[Future, Tuple[str, float]] = {}
+
+    def stop(self) -> None:
+        """Ask :meth:`run` to return once the files being processed are done."""
+        self.stop_event.set()
+
+    def _paths(self) -> List[str]:
+        try:
+            with os.scandir(self.directory) as entries:
+                return [
+                    entry.path for entry in entries
+                    if is_candidate(entry.name, self.suffixes) and entry.is_file()
+                ]
+        except OSError as exc:
+            logging.warning("Cannot scan %s: %s", self.directory, exc)
+            return []
+
+    def _notice(self, path: str, now: float) -> None:
+        """Record a (possible) change of ``path``; processing waits for it to settle."""
+        pending = self._pending.get(path)
+        signature = file_signature(path)
+        if pending is None:
+            if signature is None or signature == self._done.get(path):
+                return
+            self._pending[path] = _Pending(signature, now, now)
+        elif signature != pending.signature:
+            self._pending[path] = pending._replace(signature=signature, changed=now)
+
+    def _rescan(self, now: float) -> None:
+        for path in self._paths():
+            self._notice(path, now)
+
+    def _ready(self, now: float) -> List[str]:
+        """Pending files unchanged for ``settle`` seconds, oldest first."""
+        ready = []
+        for path, pending in list(self._pending.items()):
+            signature = file_signature(path)
+            if signature is None:
+                del self._pending[path]
+            elif signature != pending.signature:
+                self._pending[path] = pending._replace(signature=signature, changed=now)
+            elif now - pending.changed >= self.settle and self._readable(path):
+                ready.append(path)
+        return sorted(ready, key=lambda path: self._pending[path].first_seen)
+
+    @staticmethod
+    def _readable(path: str) -> bool:
+        # Writers on Windows shares keep the file locked until the copy ends
+        try:
+            with open(path, "rb"):
+                return True
+        except OSError:
+            return False
+
+    def _next_timeout(self, now: float) -> float:
+        deadlines = [pending.changed + self.settle - now for pending in self._pending.values()]
+        return max(0.05, min([self.poll_interval, *deadlines]))
+
+    def _dispatch(self, pool: Executor, now: float) -> None:
+        busy = {path for path, _ in self._running.values()}
+        for path in self._ready(now):
+            if len(self._running) >= self.workers:
+                break
+            if path in busy:
+                continue  # changed while processing: picked up again when that run ends
+            pending = self._pending.pop(path)
+            # Failures are not retried until the file changes again
+            self._done[path] = pending.signature
+            future = pool.submit(self.handler, path)
+            self._running[future] = (path, pending.first_seen)
+
+    def _collect(self) -> None:
+        for future in [future for future in self._running if future.done()]:
+            path, first_seen = self._running.pop(future)
+            error = future.exception()
+            self.on_result(path, None if error else future.result(), error, time.monotonic() - first_seen)
+
+    def run(self, executor: Optional[Executor] = None) -> None:
+        """Watch until :meth:`stop` is called (or Ctrl+C).
+
+        ``executor`` defaults to a ``ProcessPoolExecutor`` with ``workers``
+        processes.
+        """
+        events = None
+        if self.use_inotify:
+            try:
+                events = InotifyEvents(self.directory)
+            except (OSError, AttributeError) as exc:
+                logging.info("inotify unavailable (%s): polling %s", exc, self.directory)
+        pool = executor or ProcessPoolExecutor(max_workers=self.workers, initializer=_ignore_interrupts)
+        try:
+            now = time.monotonic()
+            for path in self._paths():
+                if self.process_existing:
+                    self._notice(path, now - self.settle)
+                else:
+                    self._done[path] = file_signature(path)
+            logging.info(
+                "Watching %s (%s, %d workers)", self.directory,
+                "inotify" if events else "polling", self.workers
+            )
+            rescan_interval = self.poll_interval * (RESCAN_EVERY if events else 1)
+            last_scan = now
+            while not self.stop_event.is_set():
+                timeout = self._next_timeout(time.monotonic())
+                if events is not None:
+                    names = events.read(timeout)
+                    now = time.monotonic()
+                    if names is None:
+                        last_scan = -rescan_interval  # queue overflow: events were lost
+                    for name in names or ():
+                        if is_candidate(name, self.suffixes):
+                            self._notice(os.path.join(self.directory, name), now)
+                else:
+                    self.stop_event.wait(timeout)
+                    now = time.monotonic()
+                if now - last_scan >= rescan_interval:
+                    self._rescan(now)
+                    last_scan = now
+                self._collect()
+                self._dispatch(pool, time.monotonic())
+            wait(list(self._running))
+            self._collect()
+        finally:
+            if events is not None:
+                events.close()
+            if executor is None:
+                pool.shutdown(cancel_futures=True)
@@ -5,28 +5,228 @@ Installer interattivo che funziona da browser
 """
 
 import http.server
+import importlib
 import socketserver
-import subprocess
 import sys
 import os
 import json
 import threading
-import time
 import webbrowser
 from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+import bootstrap_env
+from demo_supervisor import DemoSupervisor, SupervisorError
+from static_files import content_length
 
 PORT = 9999
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Moduli richiesti e file che devono esistere nel progetto
+REQUIRED_MODULES = bootstrap_env.REQUIREMENTS
+STRUCTURE_FILES = (
+    "openeurope.py",
+    "run_demo.py",
+    "demo/OpenEurope_Demo_Semplice_v3/app.js",
+)
+
+
+class DependencyChecks:
+    """Verifiche dell'installazione eseguite in background e tenute in cache.
+
+    Le verifiche cercano i moduli senza importarli, nell'ambiente virtuale
+    del progetto se esiste (vedi ``bootstrap_env``), e vengono rieseguite
+    solo quando cambia l'impronta dell'ambiente: data di modifica delle
+    cartelle di ``sys.path`` e del site-packages dell'ambiente virtuale (un
+    ``pip install`` vi aggiunge cartelle) e dei file del progetto. Le
+    richieste ricevono sempre subito l'ultimo risultato.
+    """
+
+    def __init__(self, modules=REQUIRED_MODULES, files=STRUCTURE_FILES):
+        self.modules = tuple(modules)
+        self.files = tuple(files)
+        self._lock = threading.Lock()
+        self._status = None
+        self._signature = None
+        self._refreshing = False
+        self._ready = threading.Event()
+
+    def start(self):
+        """Avvia la prima verifica in background."""
+        self._refresh_async(self._environment_signature())
+
+    def invalidate(self):
+        """Forza una nuova verifica (ad esempio dopo un'installazione)."""
+        with self._lock:
+            self._signature = None
+
+    def status(self, fresh=False):
+        """Restituisce lo stato in cache.
+
+        Se l'ambiente è cambiato la verifica viene rilanciata in background;
+        con ``fresh=True`` viene invece eseguita subito e il risultato è
+        quello aggiornato.
+        """
+        signature = self._environment_signature()
+        with self._lock:
+            current = self._status is not None and signature == self._signature
+        if fresh and not current:
+            return self._run(signature)
+        if not current:
+            self._refresh_async(signature)
+        self._ready.wait(timeout=5)
+        with self._lock:
+            return dict(self._status) if self._status else self._pending()
+
+    def _pending(self):
+        item = {"ok": False, "message": "Verifica..."}
+        status = {"python": item, "structure": item}
+        status.update({name: item for name in self.modules})
+        status["all_ok"] = False
+        return status
+
+    def _refresh_async(self, signature):
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+
+        def worker():
+            try:
+                self._run(signature)
+            finally:
+                with self._lock:
+                    self._refreshing = False
+
+        threading.Thread(target=worker, name="dependency-checks", daemon=True).start()
+
+    def _run(self, signature):
+        # I finder di importlib tengono in cache il contenuto delle cartelle
+        importlib.invalidate_caches()
+        status = {
+            "python": InstallerHandler.check_python(),
+            "structure": InstallerHandler.check_structure(self.files),
+        }
+        for name in self.modules:
+            status[name] = InstallerHandler.check_module(name)
+        status["all_ok"] = all(item["ok"] for item in status.values())
+        with self._lock:
+            self._status = status
+            self._signature = signature
+        self._ready.set()
+        return dict(status)
+
+    def _environment_signature(self):
+        paths = [p for p in sys.path if p] + [os.path.abspath(f) for f in self.files]
+        paths += [bootstrap_env.VENV_DIR, bootstrap_env.site_packages() or ""]
+        signature = []
+        for path in paths:
+            try:
+                signature.append((path, os.stat(path).st_mtime_ns))
+            except OSError:
+                signature.append((path, None))
+        return tuple(signature)
+
+
+CHECKS = DependencyChecks()
+
+class InstallJob:
+    """Installazione delle dipendenze eseguita in un thread separato.
+
+    L'ambiente virtuale viene preparato da ``bootstrap_env`` (un solo
+    ``pip install`` per tutti i pacchetti, dalla wheelhouse locale se
+    presente); ogni riga prodotta da pip viene conservata in ``lines`` e le
+    richieste in attesa (SSE o polling) vengono risvegliate tramite
+    ``changed``.
+    """
+
+    def __init__(self, packages=REQUIRED_MODULES):
+        self.packages = tuple(packages)
+        self.changed = threading.Condition()
+        self.lines = []
+        self.state = "idle"  # idle, running, done, failed
+        self.message = ""
+
+    def start(self):
+        """Avvia l'installazione; restituisce False se è già in corso."""
+        with self.changed:
+            if self.state == "running":
+                return False
+            self.lines = []
+            self.state = "running"
+            self.message = "Installazione in corso..."
+            self.changed.notify_all()
+        threading.Thread(target=self._run, name="pip-install", daemon=True).start()
+        return True
+
+    def snapshot(self, since=0):
+        """Stato del job e righe di log a partire dall'indice ``since``."""
+        with self.changed:
+            return {
+                "state": self.state,
+                "message": self.message,
+                "success": self.state == "done",
+                "next": len(self.lines),
+                "lines": self.lines[since:],
+            }
+
+    def wait(self, since, timeout=15):
+        """Attende nuove righe o la fine del job (per lo streaming SSE)."""
+        with self.changed:
+            self.changed.wait_for(
+                lambda: len(self.lines) > since or self.state != "running",
+                timeout=timeout,
+            )
+
+    def _append(self, line):
+        print(f"[INSTALL] {line}")
+        with self.changed:
+            self.lines.append(line)
+            self.changed.notify_all()
+
+    def _finish(self, state, message):
+        CHECKS.invalidate()
+        print(f"[INSTALL] {'✓' if state == 'done' else '✗'} {message}")
+        with self.changed:
+            self.state = state
+            self.message = message
+            self.changed.notify_all()
+
+    def _run(self):
+        self._append("Pacchetti: " + " ".join(self.packages))
+        try:
+            changed = bootstrap_env.ensure_environment(
+                requirements=self.packages, log=self._append
+            )
+        except bootstrap_env.BootstrapError as e:
+            self._finish("failed", str(e)[:200])
+        except Exception as e:
+            self._finish("failed", f"Errore imprevisto: {e}"[:200])
+        else:
+            self._finish("done", "Installazione completata" if changed else "Ambiente già aggiornato")
+
+
+INSTALL_JOB = InstallJob()
+
+# Server demo avviato e sorvegliato dall'installer (porta libera se 8000 è occupata)
+DEMO_SERVER = DemoSupervisor(8000, log=lambda line: print(f"[DEMO] {line}"))
 
 # Classe TCPServer che riusa le porte
 class ReuseAddrTCPServer(socketserver.TCPServer):
     allow_reuse_address = True
 
+
+class ThreadingInstallerServer(socketserver.ThreadingMixIn, ReuseAddrTCPServer):
+    """Un thread per richiesta: lo streaming del log non blocca le verifiche"""
+    daemon_threads = True
+
 class InstallerHandler(http.server.SimpleHTTPRequestHandler):
     """Handler per il web installer"""
     
     def do_GET(self):
         """Gestisci richieste GET"""
         try:
+            url = urlparse(self.path)
             if self.path == '/':
                 self.send_response(200)
                 self.send_header('Content-type', 'text/html; charset=utf-8')
@@ -35,8 +235,17 @@ class InstallerHandler(http.server.SimpleHTTPRequestHandler):
                 self.wfile.write(html.encode('utf-8'))
             elif self.path == '/api/check':
                 self.handle_check()
-            elif self.path == '/api/install':
-                self.handle_install()
+            elif url.path == '/api/install':
+                # L'installazione si avvia solo con POST: un link o un prefetch non devono lanciarla
+                self.send_response(405)
+                self.send_header('Allow', 'POST')
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+            elif url.path == '/api/install/status':
+                since = int(parse_qs(url.query).get('since', ['0'])[0] or 0)
+                self.send_json(INSTALL_JOB.snapshot(since))
+            elif url.path == '/api/install/events':
+                self.handle_install_events()
             else:
                 self.send_response(404)
                 self.end_headers()
@@ -47,8 +256,18 @@ class InstallerHandler(http.server.SimpleHTTPRequestHandler):
     def do_POST(self):
         """Gestisci richieste POST"""
         try:
-            content_length = int(self.headers.get('Content-Length', 0))
-            body = self.rfile.read(content_length).decode('utf-8')
+            length = content_length(self.headers.get('Content-Length'))
+            if length is None:
+                self.close_connection = True
+                self.send_error(400)
+                return
+            content_type = self.headers.get('Content-Type', '').partition(';')[0].strip().lower()
+            if content_type != 'application/json':
+                # Un form di un altro sito non può inviare JSON senza preflight CORS
+                self.close_connection = True
+                self.send_error(415)
+                return
+            body = self.rfile.read(length).decode('utf-8')
             
             if self.path == '/api/install':
                 self.handle_install_post(body)
@@ -64,21 +283,9 @@ class InstallerHandler(http.server.SimpleHTTPRequestHandler):
         pass  # Senza log
     
     def handle_check(self):
-        """Verifica lo stato dell'installazione"""
+        """Verifica lo stato dell'installazione (risultato in cache, vedi DependencyChecks)"""
         try:
-            status = {
-                "python": self.check_python(),
-                "pandas": self.check_module("pandas"),
-                "openpyxl": self.check_module("openpyxl"),
-                "structure": self.check_structure(),
-            }
-            
-            status["all_ok"] = all([
-                status["python"]["ok"],
-                status["pandas"]["ok"],
-                status["openpyxl"]["ok"],
-                status["structure"]["ok"]
-            ])
+            status = CHECKS.status()
             
             self.send_response(200)
             self.send_header('Content-type', 'application/json; charset=utf-8')
@@ -91,69 +298,59 @@ class InstallerHandler(http.server.SimpleHTTPRequestHandler):
             self.end_headers()
             self.wfile.write(json.dumps({"error": str(e)}).encode('utf-8'))
     
-    def handle_install(self):
-        """Installa le dipendenze"""
-        print("[INSTALL] Inizio installazione...")
-        try:
-            # Pip upgrade
-            print("[INSTALL] Aggiornamento pip...")
-            subprocess.run(
-                [sys.executable, "-m", "pip", "install", "--upgrade", "pip"],
-                capture_output=True,
-                timeout=120
-            )
-            
-            # Pandas
-            print("[INSTALL] Installazione pandas...")
-            result = subprocess.run(
-                [sys.executable, "-m", "pip", "install", "pandas"],
-                capture_output=True,
-                text=True,
-                timeout=180
-            )
-            if result.returncode != 0:
-                raise Exception(result.stderr[:200])
-            
-            # Openpyxl
-            print("[INSTALL] Installazione openpyxl...")
-            result = subprocess.run(
-                [sys.executable, "-m", "pip", "install", "openpyxl"],
-                capture_output=True,
-                text=True,
-                timeout=120
-            )
-            if result.returncode != 0:
-                raise Exception(result.stderr[:200])
-            
-            print("[INSTALL] ✓ Completato")
-            response = {"success": True, "message": "Installazione completata"}
-        except Exception as e:
-            print(f"[INSTALL] ✗ Errore: {e}")
-            response = {"success": False, "message": str(e)[:200]}
-        
+    def send_json(self, payload):
+        """Invia una risposta JSON"""
         self.send_response(200)
         self.send_header('Content-type', 'application/json; charset=utf-8')
+        self.send_header('Cache-Control', 'no-store')
         self.end_headers()
-        self.wfile.write(json.dumps(response).encode('utf-8'))
+        self.wfile.write(json.dumps(payload).encode('utf-8'))
+    
+    def handle_install(self):
+        """Avvia l'installazione in background e risponde subito"""
+        started = INSTALL_JOB.start()
+        if started:
+            print("[INSTALL] Inizio installazione...")
+        response = INSTALL_JOB.snapshot()
+        response["started"] = started
+        self.send_json(response)
+    
+    def handle_install_events(self):
+        """Trasmette il log di pip come Server-Sent Events fino alla fine del job"""
+        sent = int(self.headers.get('Last-Event-ID') or 0)
+        self.send_response(200)
+        self.send_header('Content-type', 'text/event-stream; charset=utf-8')
+        self.send_header('Cache-Control', 'no-store')
+        self.end_headers()
+        try:
+            while True:
+                snap = INSTALL_JOB.snapshot(sent)
+                chunk = []
+                for line in snap["lines"]:
+                    sent += 1
+                    chunk.append(f"id: {sent}\ndata: {json.dumps(line)}\n\n")
+                if snap["state"] != "running" and sent >= snap["next"]:
+                    del snap["lines"]
+                    chunk.append(f"event: done\ndata: {json.dumps(snap)}\n\n")
+                    self.wfile.write("".join(chunk).encode('utf-8'))
+                    return
+                # Commento SSE come keep-alive quando pip tace a lungo
+                self.wfile.write(("".join(chunk) or ": attesa\n\n").encode('utf-8'))
+                INSTALL_JOB.wait(sent)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
     
     def handle_install_post(self, body):
         """Gestisci POST per azioni: verifica tutto prima di avviare il server"""
         try:
             data = json.loads(body) if body else {}
+            if data.get("action") == "install":
+                self.handle_install()
+                return
             if data.get("action") == "start_server":
-                # Verifica dipendenze e struttura
-                status = {
-                    "python": self.check_python(),
-                    "pandas": self.check_module("pandas"),
-                    "openpyxl": self.check_module("openpyxl"),
-                    "structure": self.check_structure(),
-                }
-                all_ok = all([
-                    status["python"]["ok"],
-                    status["pandas"]["ok"],
-                    status["openpyxl"]["ok"],
-                    status["structure"]["ok"]
-                ])
+                # Verifica dipendenze e struttura (aggiornata, non dalla cache)
+                status = CHECKS.status(fresh=True)
+                all_ok = status.pop("all_ok")
                 if not all_ok:
                     msg = "Errore: "
                     for k, v in status.items():
@@ -162,11 +359,7 @@ class InstallerHandler(http.server.SimpleHTTPRequestHandler):
                     response = {"success": False, "message": msg.strip()}
                 else:
                     print("[INSTALL_POST] Tutto ok, avvio server demo...")
-                    threading.Thread(
-                        target=self.start_demo_server_and_open,
-                        daemon=True
-                    ).start()
-                    response = {"success": True, "message": "Server avviato e browser aperto"}
+                    response = self.start_demo_server()
             else:
                 response = {"success": False, "message": "Azione sconosciuta"}
         except Exception as e:
@@ -177,71 +370,20 @@ class InstallerHandler(http.server.SimpleHTTPRequestHandler):
         self.end_headers()
         self.wfile.write(json.dumps(response).encode('utf-8'))
 
-    @staticmethod
-    def start_demo_server_and_open():
-        """Avvia il server demo e apre il browser su START_HERE.html"""
-        try:
-            import socket
-            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            result = sock.connect_ex(('127.0.0.1', 8000))
-            sock.close()
-            if result == 0:
-                print("[DEMO] Server già in esecuzione su porta 8000")
-                webbrowser.open('http://localhost:8000/START_HERE.html')
-                return
-        except:
-            pass
-        try:
-            print("[DEMO] Avvio server...")
-            os.chdir('/workspaces/operneurope')
-            subprocess.Popen(
-                [sys.executable, "run_demo.py"],
-                stdout=subprocess.DEVNULL,
-                stderr=subprocess.DEVNULL
-            )
-            # Attendi che il server parta
-            for _ in range(10):
-                time.sleep(1)
-                try:
-                    import socket
-                    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-                    result = sock.connect_ex(('127.0.0.1', 8000))
-                    sock.close()
-                    if result == 0:
-                        webbrowser.open('http://localhost:8000/START_HERE.html')
-                        print("[DEMO] Browser aperto su START_HERE.html")
-                        return
-                except:
-                    pass
-            print("[DEMO] Server avviato ma browser non aperto (timeout)")
-        except Exception as e:
-            print(f"[DEMO] Errore: {e}")
-    
     @staticmethod
     def start_demo_server():
-        """Avvia il server demo"""
-        # Verifica se server è già in esecuzione
+        """Avvia il server demo e attende che sia pronto (vedi DemoSupervisor)"""
         try:
-            import socket
-            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            result = sock.connect_ex(('127.0.0.1', 8000))
-            sock.close()
-            if result == 0:
-                print("[DEMO] Server già in esecuzione su porta 8000")
-                return
-        except:
-            pass
-        
-        try:
-            print("[DEMO] Avvio server...")
-            os.chdir('/workspaces/operneurope')
-            subprocess.Popen(
-                [sys.executable, "run_demo.py"],
-                stdout=subprocess.DEVNULL,
-                stderr=subprocess.DEVNULL
-            )
-        except Exception as e:
+            latency = DEMO_SERVER.start()
+        except (OSError, SupervisorError) as e:
             print(f"[DEMO] Errore: {e}")
+            return {"success": False, "message": f"Avvio server non riuscito: {e}"[:300]}
+        return {
+            "success": True,
+            "message": f"Server pronto in {latency * 1000:.0f} ms",
+            "url": DEMO_SERVER.url(),
+            "startup_ms": round(latency * 1000),
+        }
     
     @staticmethod
     def check_python():
@@ -253,21 +395,19 @@ class InstallerHandler(http.server.SimpleHTTPRequestHandler):
     
     @staticmethod
     def check_module(name):
-        """Verifica modulo Python"""
+        """Verifica modulo Python (senza importarlo)"""
         try:
-            __import__(name)
-            return {"ok": True, "message": f"{name} ✓"}
-        except ImportError:
+            found = bootstrap_env.find_module(name)
+        except (ImportError, ValueError):
+            found = False
+        if not found:
             return {"ok": False, "message": f"{name} mancante"}
+        version = bootstrap_env.module_version(name)
+        return {"ok": True, "message": f"{name} {version} ✓" if version else f"{name} ✓"}
     
     @staticmethod
-    def check_structure():
+    def check_structure(files=STRUCTURE_FILES):
         """Verifica struttura progetto"""
-        files = [
-            "openeurope.py",
-            "run_demo.py",
-            "demo/OpenEurope_Demo_Semplice_v3/app.js"
-        ]
         ok = all(Path(f).exists() for f in files)
         return {
             "ok": ok,
@@ -400,6 +540,20 @@ class InstallerHandler(http.server.SimpleHTTPRequestHandler):
             display: none;
         }
         .info.show { display: block; }
+        .log {
+            display: none;
+            margin-top: 15px;
+            max-height: 220px;
+            overflow: auto;
+            background: #1e1e2e;
+            color: #d0d0e0;
+            font-size: 11px;
+            line-height: 1.4;
+            padding: 10px;
+            border-radius: 8px;
+            white-space: pre-wrap;
+        }
+        .log.show { display: block; }
         .spinner {
             display: inline-block;
             width: 12px;
@@ -447,6 +601,7 @@ class InstallerHandler(http.server.SimpleHTTPRequestHandler):
         </div>
         
         <div class="info" id="info"></div>
+        <pre class="log" id="log"></pre>
     </div>
     
     <script>
@@ -459,6 +614,7 @@ class InstallerHandler(http.server.SimpleHTTPRequestHandler):
         }
         
         async function check() {
+            if (installing) return;
             try {
                 const r = await fetch('/api/check');
                 const s = await r.json();
@@ -481,26 +637,74 @@ class InstallerHandler(http.server.SimpleHTTPRequestHandler):
             }
         }
         
-        async function install() {
+        let installing = false;
+        
+        function appendLog(line) {
+            const el = document.getElementById('log');
+            el.classList.add('show');
+            const atBottom = el.scrollTop + el.clientHeight >= el.scrollHeight - 4;
+            el.textContent += line + '\\n';
+            if (atBottom) el.scrollTop = el.scrollHeight;
+        }
+        
+        function installFinished(s) {
+            installing = false;
+            const btn = document.getElementById('btn-install');
+            if (s.success) {
+                showInfo('✓ Installazione completata', 'ok');
+                check();
+            } else {
+                showInfo('✗ Errore: ' + s.message, 'error');
+                btn.disabled = false;
+                btn.textContent = 'Installa';
+            }
+        }
+        
+        // Log in tempo reale via SSE; senza EventSource si interroga lo stato
+        function followInstall() {
+            installing = true;
             const btn = document.getElementById('btn-install');
             btn.disabled = true;
             btn.textContent = 'Installazione...';
             showInfo('Installazione in corso...', 'info');
+            document.getElementById('log').textContent = '';
+            if (window.EventSource) {
+                const source = new EventSource('/api/install/events');
+                source.onmessage = (e) => appendLog(JSON.parse(e.data));
+                source.addEventListener('done', (e) => {
+                    source.close();
+                    installFinished(JSON.parse(e.data));
+                });
+                return;
+            }
+            let since = 0;
+            const poll = async () => {
+                try {
+                    const r = await fetch('/api/install/status?since=' + since);
+                    const s = await r.json();
+                    s.lines.forEach(appendLog);
+                    since = s.next;
+                    if (s.state === 'running') setTimeout(poll, 1000);
+                    else installFinished(s);
+                } catch(e) {
+                    setTimeout(poll, 2000);
+                }
+            };
+            poll();
+        }
+        
+        async function install() {
             try {
-                const r = await fetch('/api/install');
+                const r = await fetch('/api/install', {
+                    method: 'POST',
+                    headers: {'Content-Type': 'application/json'},
+                    body: JSON.stringify({action: 'install'})
+                });
+                if (!r.ok) throw new Error('HTTP ' + r.status);
                 const s = await r.json();
-                if (s.success) {
-                    showInfo('✓ Fatto! Ricaricando...', 'ok');
-                    setTimeout(() => location.reload(), 1500);
-                } else {
-                    showInfo('✗ Errore: ' + s.message, 'error');
-                    btn.disabled = false;
-                    btn.textContent = 'Installa';
-                }
+                if (s.state === 'running') followInstall();
             } catch(e) {
                 showInfo('✗ Errore di connessione', 'error');
-                btn.disabled = false;
-                btn.textContent = 'Installa';
             }
         }
         
@@ -517,12 +721,19 @@ class InstallerHandler(http.server.SimpleHTTPRequestHandler):
                 });
                 const s = await r.json();
                 if (s.success) {
-                    showInfo('✓ Server avviato! Apertura dashboard...', 'ok');
-                    setTimeout(() => {
-                        window.location.href = 'http://localhost:8000/START_HERE.html';
-                    }, 1500);
+                    // La risposta arriva quando il server è pronto: niente attese fisse
+                    showInfo('✓ ' + s.message + '. Apertura dashboard...', 'ok');
+                    window.location.href = s.url;
+                } else {
+                    showInfo('✗ ' + s.message, 'error');
+                    btn.disabled = false;
+                    btn.textContent = 'Avvia';
                 }
-            } catch(e) {}
+            } catch(e) {
+                showInfo('✗ Errore di connessione', 'error');
+                btn.disabled = false;
+                btn.textContent = 'Avvia';
+            }
         }
         
         function showInfo(msg, type) {
@@ -531,14 +742,21 @@ class InstallerHandler(http.server.SimpleHTTPRequestHandler):
             el.className = 'info show';
         }
         
-        window.addEventListener('load', check);
+        window.addEventListener('load', async () => {
+            await check();
+            // Un'installazione avviata prima di ricaricare la pagina continua
+            try {
+                const r = await fetch('/api/install/status');
+                if ((await r.json()).state === 'running') followInstall();
+            } catch(e) {}
+        });
         setInterval(check, 3000);
     </script>
 </body>
 </html>"""
 
 def main():
-    os.chdir('/workspaces/operneurope')
+    os.chdir(BASE_DIR)
     
     print(f"\n{'='*60}")
     print("  🚀 OpenEurope - Web Installer")
@@ -547,8 +765,9 @@ def main():
     print(f"✓ Premi Ctrl+C per fermare\n")
     
     try:
+        CHECKS.start()
         # Crea server
-        with ReuseAddrTCPServer(("", PORT), InstallerHandler) as httpd:
+        with ThreadingInstallerServer(("", PORT), InstallerHandler) as httpd:
             print(f"[SERVER] In esecuzione su porta {PORT}\n")
             
             # Apri browser
@@ -561,6 +780,7 @@ def main():
             # Serve
             httpd.serve_forever()
     except KeyboardInterrupt:
+        DEMO_SERVER.stop()
         print("\n\n✓ Installer fermato")
     except Exception as e:
         print(f"\n✗ Errore: {e}")